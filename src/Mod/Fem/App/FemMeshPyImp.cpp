@@ -591,6 +591,170 @@ PyObject* FemMeshPy::addVolume(PyObject *args)
     return 0;
 }
 
+namespace {
+
+bool sequenceToDoubles(PyObject* obj, std::vector<double>& values)
+{
+    PyObject* seq = PySequence_Fast(obj, "sequence of floats expected");
+    if (!seq)
+        return false;
+    Py_ssize_t size = PySequence_Fast_GET_SIZE(seq);
+    PyObject** items = PySequence_Fast_ITEMS(seq);
+    values.reserve(size);
+    for (Py_ssize_t i = 0; i < size; ++i) {
+        double value = PyFloat_AsDouble(items[i]);
+        if (value == -1.0 && PyErr_Occurred()) {
+            Py_DECREF(seq);
+            return false;
+        }
+        values.push_back(value);
+    }
+    Py_DECREF(seq);
+    return true;
+}
+
+bool sequenceToInts(PyObject* obj, std::vector<int>& values)
+{
+    PyObject* seq = PySequence_Fast(obj, "sequence of ints expected");
+    if (!seq)
+        return false;
+    Py_ssize_t size = PySequence_Fast_GET_SIZE(seq);
+    PyObject** items = PySequence_Fast_ITEMS(seq);
+    values.reserve(size);
+    for (Py_ssize_t i = 0; i < size; ++i) {
+        long value = PyLong_AsLong(items[i]);
+        if (value == -1 && PyErr_Occurred()) {
+            Py_DECREF(seq);
+            return false;
+        }
+        values.push_back(static_cast<int>(value));
+    }
+    Py_DECREF(seq);
+    return true;
+}
+
+SMDS_MeshElement* addElementWithID(SMESHDS_Mesh* meshDS, const std::string& type,
+                                   const std::vector<const SMDS_MeshNode*>& n, int id)
+{
+    if (type == "Edge") {
+        switch (n.size()) {
+            case 2:
+                return meshDS->AddEdgeWithID(n[0],n[1],id);
+            case 3:
+                return meshDS->AddEdgeWithID(n[0],n[1],n[2],id);
+            default:
+                throw std::runtime_error("Unknown node count, [2|3] are allowed"); //unknown edge type
+        }
+    }
+    else if (type == "Face") {
+        switch (n.size()) {
+            case 3:
+                return meshDS->AddFaceWithID(n[0],n[1],n[2],id);
+            case 4:
+                return meshDS->AddFaceWithID(n[0],n[1],n[2],n[3],id);
+            case 6:
+                return meshDS->AddFaceWithID(n[0],n[1],n[2],n[3],n[4],n[5],id);
+            case 8:
+                return meshDS->AddFaceWithID(n[0],n[1],n[2],n[3],n[4],n[5],n[6],n[7],id);
+            default:
+                throw std::runtime_error("Unknown node count, [3|4|6|8] are allowed"); //unknown face type
+        }
+    }
+    else if (type == "Volume") {
+        switch (n.size()) {
+            case 4:
+                return meshDS->AddVolumeWithID(n[0],n[1],n[2],n[3],id);
+            case 5:
+                return meshDS->AddVolumeWithID(n[0],n[1],n[2],n[3],n[4],id);
+            case 6:
+                return meshDS->AddVolumeWithID(n[0],n[1],n[2],n[3],n[4],n[5],id);
+            case 8:
+                return meshDS->AddVolumeWithID(n[0],n[1],n[2],n[3],n[4],n[5],n[6],n[7],id);
+            case 10:
+                return meshDS->AddVolumeWithID(n[0],n[1],n[2],n[3],n[4],n[5],n[6],n[7],n[8],n[9],id);
+            case 13:
+                return meshDS->AddVolumeWithID(n[0],n[1],n[2],n[3],n[4],n[5],n[6],n[7],n[8],n[9],n[10],n[11],n[12],id);
+            case 15:
+                return meshDS->AddVolumeWithID(n[0],n[1],n[2],n[3],n[4],n[5],n[6],n[7],n[8],n[9],n[10],n[11],n[12],n[13],n[14],id);
+            case 20:
+                return meshDS->AddVolumeWithID(n[0],n[1],n[2],n[3],n[4],n[5],n[6],n[7],n[8],n[9],n[10],n[11],n[12],n[13],n[14],n[15],n[16],n[17],n[18],n[19],id);
+            default:
+                throw std::runtime_error("Unknown node count, [4|5|6|8|10|13|15|20] are allowed"); //unknown volume type
+        }
+    }
+    throw std::runtime_error("Unknown element type, [Edge|Face|Volume] are allowed");
+}
+
+}
+
+PyObject* FemMeshPy::addNodes(PyObject *args)
+{
+    PyObject *coordsObj, *idsObj;
+    if (!PyArg_ParseTuple(args, "OO", &coordsObj, &idsObj))
+        return 0;
+
+    std::vector<double> coords;
+    std::vector<int> ids;
+    if (!sequenceToDoubles(coordsObj, coords) || !sequenceToInts(idsObj, ids))
+        return 0;
+
+    try {
+        if (coords.size() != 3 * ids.size())
+            throw std::runtime_error("Three coordinates per node id are needed");
+        SMESH_Mesh* mesh = getFemMeshPtr()->getSMesh();
+        SMESHDS_Mesh* meshDS = mesh->GetMeshDS();
+        for (std::size_t i = 0; i < ids.size(); ++i) {
+            SMDS_MeshNode* node = meshDS->AddNodeWithID(coords[3*i],coords[3*i+1],coords[3*i+2],ids[i]);
+            if (!node)
+                throw std::runtime_error("Failed to add node");
+        }
+        return Py::new_reference_to(Py::Long(static_cast<long>(ids.size())));
+    }
+    catch (const std::exception& e) {
+        PyErr_SetString(Base::BaseExceptionFreeCADError, e.what());
+        return 0;
+    }
+}
+
+PyObject* FemMeshPy::addElements(PyObject *args)
+{
+    char* type;
+    PyObject *nodesObj, *idsObj;
+    if (!PyArg_ParseTuple(args, "sOO", &type, &nodesObj, &idsObj))
+        return 0;
+
+    std::vector<int> nodeIds;
+    std::vector<int> ids;
+    if (!sequenceToInts(nodesObj, nodeIds) || !sequenceToInts(idsObj, ids))
+        return 0;
+
+    try {
+        if (ids.empty())
+            return Py::new_reference_to(Py::Long(0));
+        if (nodeIds.size() % ids.size() != 0)
+            throw std::runtime_error("The same number of nodes per element id is needed");
+        std::size_t nodeCount = nodeIds.size() / ids.size();
+        SMESH_Mesh* mesh = getFemMeshPtr()->getSMesh();
+        SMESHDS_Mesh* meshDS = mesh->GetMeshDS();
+        std::string elementType(type);
+        std::vector<const SMDS_MeshNode*> Nodes(nodeCount);
+        for (std::size_t i = 0; i < ids.size(); ++i) {
+            for (std::size_t j = 0; j < nodeCount; ++j) {
+                Nodes[j] = meshDS->FindNode(nodeIds[i*nodeCount+j]);
+                if (!Nodes[j])
+                    throw std::runtime_error("Failed to get node of the given indices");
+            }
+            if (!addElementWithID(meshDS, elementType, Nodes, ids[i]))
+                throw std::runtime_error("Failed to add element with given ElementId");
+        }
+        return Py::new_reference_to(Py::Long(static_cast<long>(ids.size())));
+    }
+    catch (const std::exception& e) {
+        PyErr_SetString(Base::BaseExceptionFreeCADError, e.what());
+        return 0;
+    }
+}
+
 PyObject* FemMeshPy::copy(PyObject *args)
 {
     if (!PyArg_ParseTuple(args, ""))
@@ -27,6 +27,7 @@ __url__ = "http://www.freecadweb.org"
 
 
 import os
+import re
 import subprocess
 import os.path
 
@@ -38,10 +39,6 @@ import importCcxFrdResults
 import importCcxDatResults
 
 import Writer
-import FemGui
-
-
-_inputFileName = None
 
 
 class Check(FemRun.Check):
@@ -54,8 +51,12 @@ class Check(FemRun.Check):
 
 class Prepare(FemRun.Prepare):
 
+    def __init__(self):
+        super(Prepare, self).__init__()
+        # the name of the input file, read by the other tasks of the machine
+        self.inputFileName = None
+
     def run(self):
-        global _inputFileName
         self.pushStatus("Preparing input files...\n")
         c = _Container(self.analysis)
         writer = Writer.FemInputWriterCcx(
@@ -69,7 +70,7 @@ class Prepare(FemRun.Prepare):
             c.beam_sections, c.shell_thicknesses, c.fluid_sections,
             self.solver.AnalysisType, self.directory)
         path = writer.write_calculix_input_file()
-        _inputFileName = os.path.splitext(os.path.basename(path))[0]
+        self.inputFileName = os.path.splitext(os.path.basename(path))[0]
 
 
 class Solve(FemRun.Solve):
@@ -78,27 +79,52 @@ class Solve(FemRun.Solve):
         self.pushStatus("Executing solver...\n")
         binary = FemSettings.getBinary("Calculix")
         self._process = subprocess.Popen(
-            [binary, "-i", _inputFileName],
+            [binary, "-i", self.machine.prepare.inputFileName],
             cwd=self.directory,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE)
         self.signalAbort.add(self._process.terminate)
-        output = self._observeSolver(self._process)
-        self._process.communicate()
+        self.observeSolver(self._process, _ConvergenceParser().parse)
+        self._process.wait()
         self.signalAbort.remove(self._process.terminate)
 
-    def _observeSolver(self, process):
-        output = ""
-        line = process.stdout.readline()
-        self.pushStatus(line)
-        output += line
-        line = process.stdout.readline()
-        while line:
-            line = "\n%s" % line.rstrip()
-            self.pushStatus(line)
-            output += line
-            line = process.stdout.readline()
-        return output
+
+class _ConvergenceParser(object):
+    ''' Collects the counters of the increments and iterations of ccx.
+    An entry is returned after the residual of each iteration is known.
+    '''
+
+    _INCREMENT = re.compile(r"^increment (\d+) attempt (\d+)")
+    _ITERATION = re.compile(r"^iteration (\d+)")
+    _VALUE = re.compile(
+        r"^(average force|largest residual \w+|largest increment of \w+"
+        r"|largest correction to \w+)= *([-+0-9.eE]+)")
+    _STEP_TIME = re.compile(r"^actual step time= *([-+0-9.eE]+)")
+
+    def __init__(self):
+        self._entry = {}
+
+    def parse(self, line):
+        m = self._INCREMENT.match(line)
+        if m:
+            self._entry = {
+                "increment": int(m.group(1)),
+                "attempt": int(m.group(2))}
+            return None
+        m = self._STEP_TIME.match(line)
+        if m:
+            self._entry["step time"] = float(m.group(1))
+            return None
+        m = self._ITERATION.match(line)
+        if m:
+            self._entry["iteration"] = int(m.group(1))
+            return None
+        m = self._VALUE.match(line)
+        if m:
+            self._entry[m.group(1)] = float(m.group(2))
+            if m.group(1).startswith("largest correction"):
+                return dict(self._entry)
+        return None
 
 
 class Results(FemRun.Results):
@@ -106,7 +132,8 @@ class Results(FemRun.Results):
     def run(self):
         prefs = App.ParamGet(
             "User parameter:BaseApp/Preferences/Mod/Fem/General")
-        if not prefs.GetBool("KeepResultsOnReRun", False):
+        if not (self.keepResults
+                or prefs.GetBool("KeepResultsOnReRun", False)):
             self.purge_results()
         self.load_results_ccxfrd()
         self.load_results_ccxdat()
@@ -120,7 +147,7 @@ class Results(FemRun.Results):
 
     def load_results_ccxfrd(self):
         frd_result_file = os.path.join(
-            self.directory, _inputFileName + '.frd')
+            self.directory, self.machine.prepare.inputFileName + '.frd')
         if os.path.isfile(frd_result_file):
             result_name_prefix = 'CalculiX_' + self.solver.AnalysisType + '_'
             importCcxFrdResults.importFrd(
@@ -131,7 +158,7 @@ class Results(FemRun.Results):
 
     def load_results_ccxdat(self):
         dat_result_file = os.path.join(
-            self.directory, _inputFileName + '.dat')
+            self.directory, self.machine.prepare.inputFileName + '.dat')
         if os.path.isfile(dat_result_file):
             mode_frequencies = importCcxDatResults.import_dat(
                 dat_result_file, self.analysis)
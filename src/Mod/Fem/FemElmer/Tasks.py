@@ -26,6 +26,7 @@ __author__ = "Markus Hovorka"
 __url__ = "http://www.freecadweb.org"
 
 
+import re
 import subprocess
 import os.path
 
@@ -85,50 +86,64 @@ class Solve(FemRun.Solve):
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE)
         self.signalAbort.add(self._process.terminate)
-        output = self._observeSolver(self._process)
-        self._process.communicate()
+        self.output = self.observeSolver(self._process, _parseConvergence)
+        self._process.wait()
         self.signalAbort.remove(self._process.terminate)
-        if not self.aborted:
-            self._updateOutput(output)
-
-    def _observeSolver(self, process):
-        output = ""
-        line = process.stdout.readline()
-        self.pushStatus(line)
-        output += line
-        line = process.stdout.readline()
-        while line:
-            line = "\n%s" % line.rstrip()
-            self.pushStatus(line)
-            output += line
-            line = process.stdout.readline()
-        return output
+        if not self.aborted and not self.keepOutput:
+            self._updateOutput(self.output)
 
     def _updateOutput(self, output):
         if self.solver.ElmerOutput is None:
-            self._createOutput()
+            self.solver.ElmerOutput = _createOutput(self.solver, self.analysis)
         self.solver.ElmerOutput.Text = output
 
-    def _createOutput(self):
-        self.solver.ElmerOutput = self.analysis.Document.addObject(
-            "App::TextDocument", self.solver.Name + "Output")
-        self.solver.ElmerOutput.Label = self.solver.Label + "Output"
-        self.solver.ElmerOutput.ReadOnly = True
-        self.analysis.Member += [self.solver.ElmerOutput]
+
+def _createOutput(solver, analysis):
+    output = analysis.Document.addObject(
+        "App::TextDocument", solver.Name + "Output")
+    output.Label = solver.Label + "Output"
+    output.ReadOnly = True
+    analysis.Member += [output]
+    return output
+
+
+_COMPUTE_CHANGE = re.compile(
+    r"ComputeChange: *(NS|SS) *\(ITER=(\d+)\) *\(NRM,RELC\): *"
+    r"\( *([-+0-9.eE]+) +([-+0-9.eE]+) *\) *:: *(.*)")
+
+
+def _parseConvergence(line):
+    m = _COMPUTE_CHANGE.search(line)
+    if m is None:
+        return None
+    return {
+        "equation": m.group(5).strip(),
+        "type": "nonlinear" if m.group(1) == "NS" else "steady state",
+        "iteration": int(m.group(2)),
+        "norm": float(m.group(3)),
+        "change": float(m.group(4))}
 
 
 class Results(FemRun.Results):
 
     def run(self):
-        if self.solver.ElmerResult is None:
-            self._createResults()
+        if self.keepResults:
+            result = self._createResults()
+            if self.output is not None:
+                output = _createOutput(self.solver, self.analysis)
+                output.Text = self.output
+        else:
+            if self.solver.ElmerResult is None:
+                self.solver.ElmerResult = self._createResults()
+            result = self.solver.ElmerResult
         postPath = os.path.join(self.directory, "case0001.vtu")
-        self.solver.ElmerResult.read(postPath)
-        self.solver.ElmerResult.getLastPostObject().touch()
+        result.read(postPath)
+        result.getLastPostObject().touch()
         self.solver.Document.recompute()
 
     def _createResults(self):
-        self.solver.ElmerResult = self.analysis.Document.addObject(
+        result = self.analysis.Document.addObject(
             "Fem::FemPostPipeline", self.solver.Name + "Result")
-        self.solver.ElmerResult.Label = self.solver.Label + "Result"
-        self.analysis.Member += [self.solver.ElmerResult]
+        result.Label = self.solver.Label + "Result"
+        self.analysis.Member += [result]
+        return result
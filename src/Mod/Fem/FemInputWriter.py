@@ -29,7 +29,9 @@ __url__ = "http://www.freecadweb.org"
 
 import FreeCAD
 import FemMeshTools
+import hashlib
 import os
+import six
 
 
 class FemInputWriter():
@@ -82,6 +84,39 @@ class FemInputWriter():
         self.femelement_table = {}
         self.constraint_conflict_nodes = []
         self.femnodes_ele_table = {}
+        self.femmesh_key = None
+
+    def get_include_key(self, *femobj_lists, **kwargs):
+        ''' Content key of an include file or a block of sets, made of the mesh and the references of the given constraints.
+        props are further constraint properties written with the sets.
+        '''
+        props = kwargs.get('props', ())
+        if self.femmesh_key is None:
+            if not self.femelement_table:
+                self.femelement_table = FemMeshTools.get_femelement_table(self.femmesh)
+            self.femmesh_key = FemMeshTools.get_femmesh_key(self.femmesh, self.femelement_table)
+        key = hashlib.md5(self.femmesh_key.encode())
+        for femobj_list in femobj_lists:
+            for femobj in femobj_list:
+                obj = femobj['Object']
+                key.update(repr((obj.Name, obj.Label) + tuple(getattr(obj, p) for p in props)).encode())
+                for o, elem_tup in obj.References:
+                    for elem in elem_tup:
+                        key.update(repr((o.Name, elem)).encode())
+                        key.update(o.Shape.getElement(elem).exportBrepToString().encode())
+        return key.hexdigest()
+
+    def write_cached_sets(self, f, name, key, write):
+        ''' Writes what write(f) writes into f. The text is kept with the content key, as long as the key
+        of the sets called name does not change the text is reused instead of searching the sets again.
+        '''
+        cached = _set_texts.get((self.dir_name, name))
+        if cached is None or cached[0] != key:
+            sets = six.StringIO()
+            write(sets)
+            cached = (key, sets.getvalue())
+            _set_texts[(self.dir_name, name)] = cached
+        f.write(cached[1])
 
     def get_constraints_fixed_nodes(self):
         # get nodes
@@ -218,4 +253,27 @@ class FemInputWriter():
                 self.femelement_table = FemMeshTools.get_femelement_table(self.femmesh)
             FemMeshTools.get_femelement_sets(self.femmesh, self.femelement_table, self.material_objects)
 
+
+# include file path --> (content key, modification time) of the include files written in this session
+_include_file_keys = {}
+
+# (working directory, sets name) --> (content key, text) of the sets written into one input file in this session
+_set_texts = {}
+
+
+def is_include_file_current(file_path, key):
+    ''' True if file_path was written with the content key and was not changed since
+    '''
+    if key is None or not os.path.isfile(file_path):
+        return False
+    return _include_file_keys.get(file_path) == (key, os.path.getmtime(file_path))
+
+
+def set_include_file_key(file_path, key):
+    if key is None:
+        _include_file_keys.pop(file_path, None)
+    else:
+        _include_file_keys[file_path] = (key, os.path.getmtime(file_path))
+
+
 ##  @}
@@ -89,17 +89,17 @@ class FemInputWriterCcx(FemInputWriter.FemInputWriter):
             FemMeshTools.write_D_network_element_to_inputfile(self.file_name)
             inpfile = open(self.file_name, 'a')
         # node and element sets
+        # node sets and surfaces only depend on mesh and reference geometry, they are reused if they are up to date
         self.write_element_sets_material_and_femelement_type(inpfile)
-        if self.fixed_objects:
-            self.write_node_sets_constraints_fixed(inpfile)
-        if self.displacement_objects:
-            self.write_node_sets_constraints_displacement(inpfile)
-        if self.planerotation_objects:
-            self.write_node_sets_constraints_planerotation(inpfile)
+        if self.fixed_objects or self.displacement_objects or self.planerotation_objects:
+            nodes_key = self.get_include_key(self.fixed_objects, self.displacement_objects, self.planerotation_objects)
+            self.write_cached_sets(inpfile, 'Node_sets', nodes_key, self.write_node_sets_constraints)
         if self.contact_objects:
-            self.write_surfaces_contraints_contact(inpfile)
+            contact_key = self.get_include_key(self.contact_objects)
+            self.write_cached_sets(inpfile, 'Surface_Contact', contact_key, self.write_surfaces_contraints_contact)
         if self.transform_objects:
-            self.write_node_sets_constraints_transform(inpfile)
+            transform_key = self.get_include_key(self.transform_objects, props=('TransformType',))
+            self.write_cached_sets(inpfile, 'Node_Transform', transform_key, self.write_node_sets_constraints_transform)
         if self.analysis_type == "thermomech" and self.temperature_objects:
             self.write_node_sets_constraints_temperature(inpfile)
 
@@ -180,14 +180,22 @@ class FemInputWriterCcx(FemInputWriter.FemInputWriter):
         name = self.file_name[:-4]
         include_name = self.main_file_name[:-4]
 
-        self.femmesh.writeABAQUS(name + "_Node_Elem_sets.inp")
-        inpfileNodesElem = open(name + "_Node_Elem_sets.inp", 'a')
-        inpfileNodesElem.write('\n***********************************************************\n')
-        inpfileNodesElem.close()
+        # the mesh include is only rewritten if the mesh has changed since it was written last
+        # fluid sections modify the mesh include afterwards, thus it is always rewritten for them
+        mesh_file = name + "_Node_Elem_sets.inp"
+        mesh_key = None
+        if not self.fluidsection_objects:
+            mesh_key = self.get_include_key()
+        if mesh_key is None or not FemInputWriter.is_include_file_current(mesh_file, mesh_key):
+            self.femmesh.writeABAQUS(mesh_file)
+            inpfileNodesElem = open(mesh_file, 'a')
+            inpfileNodesElem.write('\n***********************************************************\n')
+            inpfileNodesElem.close()
+            FemInputWriter.set_include_file_key(mesh_file, mesh_key)
 
         # Check to see if fluid sections are in analysis and use D network element type
         if self.fluidsection_objects:
-            FemMeshTools.write_D_network_element_to_inputfile(name + "_Node_Elem_sets.inp")
+            FemMeshTools.write_D_network_element_to_inputfile(mesh_file)
 
         inpfileMain.write('\n***********************************************************\n')
         inpfileMain.write('**Nodes and Elements\n')
@@ -195,8 +203,25 @@ class FemInputWriterCcx(FemInputWriter.FemInputWriter):
         inpfileMain.write('*INCLUDE,INPUT=' + include_name + "_Node_Elem_sets.inp \n")
 
         # create separate inputfiles for each node set or constraint
+        # node sets and surfaces only depend on mesh and reference geometry, their include files are reused if they are up to date
+        nodes_file = name + "_Node_sets.inp"
+        inpfileNodes = None
         if self.fixed_objects or self.displacement_objects or self.planerotation_objects:
-            inpfileNodes = open(name + "_Node_sets.inp", 'w')
+            nodes_key = self.get_include_key(self.fixed_objects, self.displacement_objects, self.planerotation_objects)
+            if not FemInputWriter.is_include_file_current(nodes_file, nodes_key):
+                inpfileNodes = open(nodes_file, 'w')
+        contact_file = name + "_Surface_Contact.inp"
+        inpfileContact = None
+        if self.contact_objects:
+            contact_key = self.get_include_key(self.contact_objects)
+            if not FemInputWriter.is_include_file_current(contact_file, contact_key):
+                inpfileContact = open(contact_file, 'w')
+        transform_file = name + "_Node_Transform.inp"
+        inpfileTransform = None
+        if self.transform_objects:
+            transform_key = self.get_include_key(self.transform_objects, props=('TransformType',))
+            if not FemInputWriter.is_include_file_current(transform_file, transform_key):
+                inpfileTransform = open(transform_file, 'w')
         if self.analysis_type == "thermomech" and self.temperature_objects:
             inpfileNodeTemp = open(name + "_Node_Temp.inp", 'w')
         if self.force_objects:
@@ -205,23 +230,21 @@ class FemInputWriterCcx(FemInputWriter.FemInputWriter):
             inpfilePressure = open(name + "_Pressure.inp", 'w')
         if self.analysis_type == "thermomech" and self.heatflux_objects:
             inpfileHeatflux = open(name + "_Node_Heatlfux.inp", 'w')
-        if self.contact_objects:
-            inpfileContact = open(name + "_Surface_Contact.inp", 'w')
-        if self.transform_objects:
-            inpfileTransform = open(name + "_Node_Transform.inp", 'w')
 
         # node and element sets
         self.write_element_sets_material_and_femelement_type(inpfileMain)
-        if self.fixed_objects:
-            self.write_node_sets_constraints_fixed(inpfileNodes)
-        if self.displacement_objects:
-            self.write_node_sets_constraints_displacement(inpfileNodes)
-        if self.planerotation_objects:
-            self.write_node_sets_constraints_planerotation(inpfileNodes)
-        if self.contact_objects:
+        if inpfileNodes:
+            self.write_node_sets_constraints(inpfileNodes)
+            inpfileNodes.close()
+            FemInputWriter.set_include_file_key(nodes_file, nodes_key)
+        if inpfileContact:
             self.write_surfaces_contraints_contact(inpfileContact)
-        if self.transform_objects:
+            inpfileContact.close()
+            FemInputWriter.set_include_file_key(contact_file, contact_key)
+        if inpfileTransform:
             self.write_node_sets_constraints_transform(inpfileTransform)
+            inpfileTransform.close()
+            FemInputWriter.set_include_file_key(transform_file, transform_key)
 
         # write commentary and include statement for static case node sets
         inpfileMain.write('\n***********************************************************\n')
@@ -335,6 +358,14 @@ class FemInputWriterCcx(FemInputWriter.FemInputWriter):
         inpfileMain.close()
         print("Writing time input file: " + str(time.clock() - timestart) + ' \n')
 
+    def write_node_sets_constraints(self, f):
+        if self.fixed_objects:
+            self.write_node_sets_constraints_fixed(f)
+        if self.displacement_objects:
+            self.write_node_sets_constraints_displacement(f)
+        if self.planerotation_objects:
+            self.write_node_sets_constraints_planerotation(f)
+
     def write_element_sets_material_and_femelement_type(self, f):
         f.write('\n***********************************************************\n')
         f.write('** Element sets for materials and FEM element type (solid, shell, beam, fluid)\n')
@@ -30,6 +30,8 @@ __url__ = "http://www.freecadweb.org"
 #  \ingroup FEM
 
 import time
+import FreeCAD
+import numpy as np
 # import Mesh
 
 
@@ -87,92 +89,76 @@ face_dicts = {
 
 
 def femmesh_2_mesh(myFemMesh, myResults=None):
-    shiftBits = 20  # allows a million nodes, needs to be higher for more nodes in a FemMesh
-
-    # This code generates a dict and a faceCode for each face of all elements
-    # All faceCodes are than sorted.
+    # The faces of all volume elements are collected in arrays, one array for the triangle faces
+    # and one array for the quad faces. The faces are sorted by their sorted node ids,
+    # faces which do not have a counterpart are on the surface of the mesh.
+    # There is no limit for the node numbers and no search inside the result node numbers.
 
     start_time = time.clock()
-    faceCodeList = []
-    faceCodeDict = {}
-
+    element_table = {}  # {number of nodes: [element nodes, ...]}
     for ele in myFemMesh.Volumes:
         element_nodes = myFemMesh.getElementNodes(ele)
-        # print 'element_node: ', element_nodes
-        faceDef = face_dicts[len(element_nodes)]
-
-        for key in faceDef:
-            nodeList = []
-            codeList = []
-            faceCode = 0
-            shifter = 0
-            for nodeIdx in faceDef[key]:
-                nodeList.append(element_nodes[nodeIdx])
-                codeList.append(element_nodes[nodeIdx])
-            codeList.sort()
-            for node in codeList:
-                faceCode += (node << shifter)
-                # x << n: x shifted left by n bits = Multiplication
-                shifter += shiftBits
-            # print 'codeList: ', codeList
-            faceCodeDict[faceCode] = nodeList
-            faceCodeList.append(faceCode)
-
-    faceCodeList.sort()
-    allFaces = len(faceCodeList)
-    actFaceIdx = 0
-    singleFaces = []
-    # Here we search for faces, which do not have a counterpart.
-    # These are the faces on the surface of the mesh.
-    while actFaceIdx < allFaces:
-        if actFaceIdx < (allFaces - 1):
-            if faceCodeList[actFaceIdx] == faceCodeList[actFaceIdx + 1]:
-                actFaceIdx += 2
-            else:
-                # print 'found a single Face: ', faceCodeList[actFaceIdx]
-                singleFaces.append(faceCodeList[actFaceIdx])
-                actFaceIdx += 1
-        else:
-            print('found a last Face: ', faceCodeList[actFaceIdx])
-            singleFaces.append(faceCodeList[actFaceIdx])
-            actFaceIdx += 1
-
-    output_mesh = []
+        element_table.setdefault(len(element_nodes), []).append(element_nodes)
+
+    faces_table = {3: [], 4: []}  # {number of face nodes: [array of face nodes, ...]}
+    for nodes_count, elements in element_table.items():
+        elements = np.array(elements, dtype=np.int64)
+        faceDef = face_dicts[nodes_count]
+        for key in sorted(faceDef):
+            faces_table[len(faceDef[key])].append(elements[:, faceDef[key]])
+
+    triangles = []
+    for face_nodes_count, faces in faces_table.items():
+        if not faces:
+            continue
+        single_faces = get_single_faces(np.concatenate(faces))
+        triangles.append(single_faces[:, :3])
+        if face_nodes_count == 4:
+            triangles.append(single_faces[:, [2, 3, 0]])
+    if triangles:
+        triangles = np.concatenate(triangles)
+    else:
+        triangles = np.zeros((0, 3), dtype=np.int64)
+
+    nodes = myFemMesh.Nodes
+    node_ids = list(nodes.keys())
+    node_coords = np.array([nodes[n] for n in node_ids], dtype=np.float64).reshape(len(node_ids), 3)
+    points = node_coords[get_index_of_ids(node_ids, triangles, 'node')]
+
     if myResults:
         print(myResults.Name)
-        for myFace in singleFaces:
-            face_nodes = faceCodeDict[myFace]
-            dispVec0 = myResults.DisplacementVectors[myResults.NodeNumbers.index(face_nodes[0])]
-            dispVec1 = myResults.DisplacementVectors[myResults.NodeNumbers.index(face_nodes[1])]
-            dispVec2 = myResults.DisplacementVectors[myResults.NodeNumbers.index(face_nodes[2])]
-            triangle = [myFemMesh.getNodeById(face_nodes[0]) + dispVec0,
-                        myFemMesh.getNodeById(face_nodes[1]) + dispVec1,
-                        myFemMesh.getNodeById(face_nodes[2]) + dispVec2]
-            output_mesh.extend(triangle)
-            # print 'my triangle: ', triangle
-            if len(face_nodes) == 4:
-                dispVec3 = myResults.DisplacementVectors[myResults.NodeNumbers.index(face_nodes[3])]
-                triangle = [myFemMesh.getNodeById(face_nodes[2]) + dispVec2,
-                            myFemMesh.getNodeById(face_nodes[3]) + dispVec3,
-                            myFemMesh.getNodeById(face_nodes[0]) + dispVec0]
-                output_mesh.extend(triangle)
-                # print 'my 2. triangle: ', triangle
+        displacements = np.array(myResults.DisplacementVectors, dtype=np.float64).reshape(len(myResults.DisplacementVectors), 3)
+        points = points + displacements[get_index_of_ids(myResults.NodeNumbers, triangles, 'result node')]
 
-    else:
-        for myFace in singleFaces:
-            face_nodes = faceCodeDict[myFace]
-            triangle = [myFemMesh.getNodeById(face_nodes[0]),
-                        myFemMesh.getNodeById(face_nodes[1]),
-                        myFemMesh.getNodeById(face_nodes[2])]
-            output_mesh.extend(triangle)
-            # print 'my triangle: ', triangle
-            if len(face_nodes) == 4:
-                triangle = [myFemMesh.getNodeById(face_nodes[2]),
-                            myFemMesh.getNodeById(face_nodes[3]),
-                            myFemMesh.getNodeById(face_nodes[0])]
-                output_mesh.extend(triangle)
-                # print 'my 2. triangle: ', triangle
+    output_mesh = [FreeCAD.Vector(x, y, z) for x, y, z in points.reshape(3 * len(triangles), 3).tolist()]
 
     end_time = time.clock()
     print('Mesh by surface search method: ', end_time - start_time)
     return output_mesh
+
+
+def get_single_faces(faces):
+    '''returns the rows of the faces array, which do not have a counterpart
+    with the same nodes in any order, this are the faces on the surface of the mesh
+    '''
+    face_codes = np.sort(faces, axis=1)
+    order = np.lexsort(face_codes.T[::-1])
+    face_codes = face_codes[order]
+    same_as_next = np.all(face_codes[1:] == face_codes[:-1], axis=1)
+    single = np.ones(len(face_codes), dtype=bool)
+    single[1:] &= ~same_as_next
+    single[:-1] &= ~same_as_next
+    return faces[order[single]]
+
+
+def get_index_of_ids(ids, id_array, id_name):
+    '''returns an array of the positions of the ids of id_array in the list ids'''
+    ids = np.asarray(ids, dtype=np.int64)
+    if not len(id_array):
+        return np.zeros(id_array.shape, dtype=np.int64)
+    index = np.full(max(int(ids.max()) if len(ids) else 0, int(id_array.max())) + 1, -1, dtype=np.int64)
+    index[ids] = np.arange(len(ids))
+    positions = index[id_array]
+    if (positions < 0).any():
+        raise ValueError('{} {} is not in list'.format(id_name, int(id_array[positions < 0][0])))
+    return positions
@@ -28,6 +28,8 @@ __url__ = "http://www.freecadweb.org"
 #  @{
 
 import FreeCAD
+import hashlib
+import numpy as np
 
 
 def get_femnodes_by_femobj_with_references(femmesh, femobj):
@@ -104,30 +106,158 @@ def get_femelement_table(femmesh):
     return femelement_table
 
 
+def get_femmesh_key(femmesh, femelement_table):
+    """ get_femmesh_key(femmesh, femelement_table): md5 hex digest of the node coordinates and the element nodes of a mesh
+    the nodes and the elements are collected into numpy arrays, each array is hashed as a whole
+    """
+    nodes = femmesh.Nodes
+    node_ids = sorted(nodes)
+    ele_ids = sorted(femelement_table)
+    ele_nodes = [femelement_table[e] for e in ele_ids]
+    ele_nodecount = [len(n) for n in ele_nodes]
+    arrays = [
+        np.array(node_ids, dtype=np.int64),
+        np.array([(v.x, v.y, v.z) for v in (nodes[n] for n in node_ids)], dtype=np.float64),
+        np.array(ele_ids, dtype=np.int64),
+        np.array(ele_nodecount, dtype=np.int64),
+        np.fromiter((n for e in ele_nodes for n in e), dtype=np.int64, count=sum(ele_nodecount))
+    ]
+    key = hashlib.md5()
+    for a in arrays:
+        key.update(np.ascontiguousarray(a).data)
+    return key.hexdigest()
+
+
+class FemElementConnectivity(object):
+    '''compact numpy representation of a femelement_table
+    The elements are grouped by their number of nodes (the element type, see get_femelement_table()),
+    every group holds the element ids and the element nodes as int arrays:
+        group_nodes[nodecount] --> array of shape (elementcount, nodecount)
+    All groups are stacked into one element row index (ele_ids, ele_nodecount, ele_full_mask).
+    The node --> element membership is stored in CSR layout indexed by the node id:
+        the rows of node n are node_ptr[n]:node_ptr[n + 1] in node_ele (element row) and node_bit (bit of the node position)
+    This replaces the femnodes_ele_table dict {nodeID : [[eleID, NodePosition], ...]}, see get_femnodes_ele_table()
+    '''
+    def __init__(self, femelement_table):
+        group_ids = {}
+        for ele in femelement_table:
+            group_ids.setdefault(len(femelement_table[ele]), []).append(ele)
+        self.group_ids = {}
+        self.group_nodes = {}
+        self.group_slices = {}
+        ele_ids = []
+        ele_nodecount = []
+        flat_nodes = []
+        flat_rows = []
+        flat_bits = []
+        row = 0
+        for nodecount in sorted(group_ids):
+            ids = np.array(sorted(group_ids[nodecount]), dtype=np.int64)
+            nodes = np.array([femelement_table[ele] for ele in ids], dtype=np.int64).reshape(len(ids), nodecount)
+            self.group_ids[nodecount] = ids
+            self.group_nodes[nodecount] = nodes
+            self.group_slices[nodecount] = (row, row + len(ids))
+            ele_ids.append(ids)
+            ele_nodecount.append(np.full(len(ids), nodecount, dtype=np.int64))
+            flat_nodes.append(nodes.ravel())
+            flat_rows.append(np.repeat(np.arange(row, row + len(ids), dtype=np.int64), nodecount))
+            flat_bits.append(np.tile(np.left_shift(1, np.arange(nodecount, dtype=np.int64)), len(ids)))
+            row += len(ids)
+        self.ele_ids = _concatenate_int_arrays(ele_ids)
+        self.ele_nodecount = _concatenate_int_arrays(ele_nodecount)
+        self.ele_full_mask = np.left_shift(1, self.ele_nodecount) - 1
+        flat_nodes = _concatenate_int_arrays(flat_nodes)
+        flat_rows = _concatenate_int_arrays(flat_rows)
+        flat_bits = _concatenate_int_arrays(flat_bits)
+        max_node = int(flat_nodes.max()) if len(flat_nodes) else 0
+        order = np.argsort(flat_nodes, kind='mergesort')
+        self.node_ptr = np.zeros(max_node + 2, dtype=np.int64)
+        np.cumsum(np.bincount(flat_nodes, minlength=max_node + 1), out=self.node_ptr[1:])
+        self.node_ele = flat_rows[order]
+        self.node_bit = flat_bits[order]
+
+    def __len__(self):
+        return len(self.ele_ids)
+
+    def _get_csr_index(self, node_set):
+        '''indices into node_ele and node_bit of all element memberships of the nodes in node_set
+        duplicate nodes and nodes not used by any element are ignored
+        '''
+        nodes = np.unique(np.asarray(list(node_set), dtype=np.int64))
+        nodes = nodes[(nodes >= 0) & (nodes < len(self.node_ptr) - 1)]
+        starts = self.node_ptr[nodes]
+        lengths = self.node_ptr[nodes + 1] - starts
+        ends = np.cumsum(lengths)
+        return np.arange(ends[-1] if len(ends) else 0, dtype=np.int64) + np.repeat(starts - ends + lengths, lengths)
+
+    def get_bit_patterns(self, node_set):
+        '''for every element row an integer (bit array), the bit of a node position is set
+        if the node is in node_set, see get_bit_pattern_dict()
+        '''
+        index = self._get_csr_index(node_set)
+        # the bits of one element are distinct, thus the sum is the bitwise or, float64 is exact up to 2**53
+        patterns = np.bincount(self.node_ele[index], weights=self.node_bit[index], minlength=len(self))
+        return patterns.astype(np.int64)
+
+    def get_node_counts(self, node_set):
+        '''for every element row the number of element nodes which are in node_set'''
+        index = self._get_csr_index(node_set)
+        return np.bincount(self.node_ele[index], minlength=len(self))
+
+    def get_femelements_by_femnodes(self, node_set):
+        '''sorted element ids of all elements with all their nodes in node_set'''
+        counts = self.get_node_counts(node_set)
+        return sorted(self.ele_ids[counts == self.ele_nodecount].tolist())
+
+    def get_ccxelement_faces(self, node_set, masks=None):
+        '''[[eleID, ccx_face_nr], ...] of all element faces with all their nodes in node_set
+        masks: {nodecount : {face_bit_mask : ccx_face_nr}}, default are the CalculiX volume element faces
+        '''
+        if masks is None:
+            masks = ccx_volume_face_masks
+        patterns = self.get_bit_patterns(node_set)
+        found_rows = []
+        found_faces = []
+        for nodecount in self.group_slices:
+            if nodecount not in masks:
+                continue
+            start, end = self.group_slices[nodecount]
+            group_patterns = patterns[start:end]
+            for key, face_nr in masks[nodecount].items():
+                rows = np.flatnonzero((group_patterns & key) == key) + start
+                found_rows.append(rows)
+                found_faces.append(np.full(len(rows), face_nr, dtype=np.int64))
+        rows = _concatenate_int_arrays(found_rows)
+        face_nrs = _concatenate_int_arrays(found_faces)
+        order = np.lexsort((face_nrs, self.ele_ids[rows]))
+        return [[int(ele), int(face)] for ele, face in zip(self.ele_ids[rows][order], face_nrs[order])]
+
+
+def _concatenate_int_arrays(arrays):
+    if arrays:
+        return np.concatenate(arrays)
+    return np.zeros(0, dtype=np.int64)
+
+
+def get_femelement_connectivity(femelement_table):
+    '''get_femelement_connectivity(femelement_table): FemElementConnectivity of the femelement_table'''
+    connectivity = FemElementConnectivity(femelement_table)
+    print('len femelement_connectivity: ' + str(len(connectivity)))
+    return connectivity
+
+
 def get_femnodes_ele_table(femnodes_mesh, femelement_table):
     '''the femnodes_ele_table contains for each node its membership in elements
-    {nodeID : [[eleID, NodePosition], [], ...], nodeID : [[], [], ...], ...}
     stored informatation are:
     element number, the number of nodes per element, the position of the node in the element.
     The position of the node in the element is coded as a set bit at that position in a bit array (integer)
-    Fixme: the number of nodes per element should be replaced by the type of the element
-    but I did not know, how to get this from the mesh.
     Since the femelement_table contains either volume or face or edgemesh the femnodes_ele_table only
     has either volume or face or edge elements, see get_femelement_table()
+    The table is returned as FemElementConnectivity, which holds the former
+    {nodeID : [[eleID, NodePosition], [], ...], nodeID : [[], [], ...], ...}
+    as numpy arrays in CSR layout. femnodes_mesh is not needed anymore, it is kept for compatibility.
     '''
-    femnodes_ele_table = {}  # node_dict in ulrichs class
-    for n in femnodes_mesh:  # initialize it with sorted node keys and empty lists
-        femnodes_ele_table[n] = []
-    for ele in femelement_table:
-        ele_list = femelement_table[ele]
-        # print(ele_list)
-        pos = int(1)
-        for ele_node in ele_list:
-            femnodes_ele_table[ele_node].append([ele, pos])
-            pos = pos << 1
-    print('len femnodes_ele_table:' + str(len(femnodes_ele_table)))
-    # print('femnodes_ele_table: ', femnodes_ele_table)
-    return femnodes_ele_table
+    return get_femelement_connectivity(femelement_table)
 
 
 def get_copy_of_empty_femelement_table(femelement_table):
@@ -149,77 +279,69 @@ def get_bit_pattern_dict(femelement_table, femnodes_ele_table, node_set):
     Is this element part of the node list (searching for elements) or  has this element a face we are searching for?
     The number in the ele_dict is organized as a bit array.
     The corresponding bit is set, if the node of the node_set is contained in the element.
+    femnodes_ele_table is a FemElementConnectivity, see get_femnodes_ele_table()
     '''
     print('len femnodes_ele_table:' + str(len(femnodes_ele_table)))
     print('len node_set: ' + str(len(node_set)))
-    # print('node_set: ', node_set)
-    bit_pattern_dict = get_copy_of_empty_femelement_table(femelement_table)
-    # # initializing the bit_pattern_dict
-    for ele in femelement_table:
-        len_ele = len(femelement_table[ele])
-        bit_pattern_dict[ele] = [len_ele, 0]
-    for node in node_set:
-        for nList in femnodes_ele_table[node]:
-            bit_pattern_dict[nList[0]][1] += nList[1]
+    patterns = femnodes_ele_table.get_bit_patterns(node_set)
+    bit_pattern_dict = {}
+    for ele, len_ele, pattern in zip(femnodes_ele_table.ele_ids.tolist(), femnodes_ele_table.ele_nodecount.tolist(), patterns.tolist()):
+        bit_pattern_dict[ele] = [len_ele, pattern]
     print('len bit_pattern_dict:' + str(len(bit_pattern_dict)))
-    # print('bit_pattern_dict: ', bit_pattern_dict)
     return bit_pattern_dict
 
 
-def get_ccxelement_faces_from_binary_search(bit_pattern_dict):
-    '''get the CalculiX element face numbers
-    '''
-    tet10_mask = {
-        119: 1,
-        411: 2,
-        717: 3,
-        814: 4}
-    tet4_mask = {
+# CalculiX element face numbers, {nodecount : {face_bit_mask : ccx_face_nr}}
+ccx_volume_face_masks = {
+    4: {  # tetra4
         7: 1,
         11: 2,
         13: 3,
-        14: 4}
-    hex8_mask = {
+        14: 4},
+    6: {  # penta6
+        56: 1,
+        7: 2,
+        54: 3,
+        45: 4,
+        27: 5},
+    8: {  # hexa8
         240: 1,
         15: 2,
         102: 3,
         204: 4,
         153: 5,
-        51: 6}
-    hex20_mask = {
+        51: 6},
+    10: {  # tetra10
+        119: 1,
+        411: 2,
+        717: 3,
+        814: 4},
+    15: {  # penta15
+        3640: 1,
+        455: 2,
+        25782: 3,
+        22829: 4,
+        12891: 5},
+    20: {  # hexa20
         61680: 1,
         3855: 2,
         402022: 3,
         804044: 4,
         624793: 5,
-        201011: 6}
-    pent6_mask = {
-        56: 1,
-        7: 2,
-        54: 3,
-        45: 4,
-        27: 5}
-    pent15_mask = {
-        3640: 1,
-        455: 2,
-        25782: 3,
-        22829: 4,
-        12891: 5}
-    vol_dict = {
-        4: tet4_mask,
-        6: pent6_mask,
-        8: hex8_mask,
-        10: tet10_mask,
-        15: pent15_mask,
-        20: hex20_mask}
+        201011: 6}}
+
+
+def get_ccxelement_faces_from_binary_search(bit_pattern_dict):
+    '''get the CalculiX element face numbers
+    '''
     faces = []
     for ele in bit_pattern_dict:
-        mask_dict = vol_dict[bit_pattern_dict[ele][0]]
+        mask_dict = ccx_volume_face_masks[bit_pattern_dict[ele][0]]
         for key in mask_dict:
             if (key & bit_pattern_dict[ele][1]) == key:
                 faces.append([ele, mask_dict[key]])
     print('found Faces: ', len(faces))
-    print('faces: ', faces)
+    # print('faces: ', faces)
     return faces
 
 
@@ -227,27 +349,12 @@ def get_femelements_by_femnodes_bin(femelement_table, femnodes_ele_table, node_l
     '''for every femelement of femelement_table
     if all nodes of the femelement are in node_list,
     the femelement is added to the list which is returned
-    blind fast binary search, but workd for volumes only
+    blind fast binary search on the FemElementConnectivity femnodes_ele_table, but workd for volumes only
     '''
     print('binary search: get_femelements_by_femnodes_bin')
-    vol_masks = {
-        4: 15,
-        6: 63,
-        8: 255,
-        10: 1023,
-        15: 32767,
-        20: 1048575}
-    # Now we are looking for nodes inside of the Volumes = filling the bit_pattern_dict
     print('len femnodes_ele_table:' + str(len(femnodes_ele_table)))
-    bit_pattern_dict = get_bit_pattern_dict(femelement_table, femnodes_ele_table, node_list)
-    # search
-    ele_list = []  # The ele_list contains the result of the search.
-    for ele in bit_pattern_dict:
-        # print('bit_pattern_dict[ele][0]: ', bit_pattern_dict[ele][0])
-        if bit_pattern_dict[ele][1] == vol_masks[bit_pattern_dict[ele][0]]:
-            ele_list.append(ele)
+    ele_list = femnodes_ele_table.get_femelements_by_femnodes(node_list)  # The ele_list contains the result of the search.
     print('found Volumes: ', len(ele_list))
-    print('   volumes: ', len(ele_list))
     return ele_list
 
 
@@ -258,13 +365,10 @@ def get_femelements_by_femnodes_std(femelement_table, node_list):
     e: elementlist
     nodes: nodelist '''
     print('std search: get_femelements_by_femnodes_std')
+    node_set = set(node_list)
     e = []  # elementlist
     for elementID in sorted(femelement_table):
-        nodecount = 0
-        for nodeID in femelement_table[elementID]:
-            if nodeID in node_list:
-                nodecount = nodecount + 1
-        if nodecount == len(femelement_table[elementID]):   # all nodes of the element are in the node_list!
+        if node_set.issuperset(femelement_table[elementID]):   # all nodes of the element are in the node_list!
             e.append(elementID)
     return e
 
@@ -277,51 +381,30 @@ def get_femvolumeelements_by_femfacenodes(femelement_table, node_list):
     if hexa20 volume element --> if exact 8 element nodes are in node_list --> add femelement
     if penta6 volume element --> if exact 3 or 6 element nodes are in node_list --> add femelement
     if penta15 volume element --> if exact 6 or 8 element nodes are in node_list --> add femelement
+    femelement_table could be a FemElementConnectivity too
     e: elementlist
     nodes: nodelist '''
-    e = []  # elementlist
-    for elementID in sorted(femelement_table):
-        nodecount = 0
-        el_nd_ct = len(femelement_table[elementID])
-        if el_nd_ct == 4:  # tetra4
-            for nodeID in femelement_table[elementID]:
-                if nodeID in node_list:
-                    nodecount = nodecount + 1
-            if nodecount == 3:
-                e.append(elementID)
-        elif el_nd_ct == 10:  # tetra10
-            for nodeID in femelement_table[elementID]:
-                if nodeID in node_list:
-                    nodecount = nodecount + 1
-            if nodecount == 4:
-                e.append(elementID)
-        elif el_nd_ct == 8:  # hexa8
-            for nodeID in femelement_table[elementID]:
-                if nodeID in node_list:
-                    nodecount = nodecount + 1
-            if nodecount == 4:
-                e.append(elementID)
-        elif el_nd_ct == 20:  # hexa20
-            for nodeID in femelement_table[elementID]:
-                if nodeID in node_list:
-                    nodecount = nodecount + 1
-            if nodecount == 8:
-                e.append(elementID)
-        elif el_nd_ct == 6:  # penta6
-            for nodeID in femelement_table[elementID]:
-                if nodeID in node_list:
-                    nodecount = nodecount + 1
-            if nodecount == 3 or nodecount == 4:
-                e.append(elementID)
-        elif el_nd_ct == 15:  # penta15
-            for nodeID in femelement_table[elementID]:
-                if nodeID in node_list:
-                    nodecount = nodecount + 1
-            if nodecount == 6 or nodecount == 8:
-                e.append(elementID)
-        else:
-            FreeCAD.Console.PrintError('Error in get_femvolumeelements_by_femfacenodes(): not known volume element: ' + el_nd_ct + '\n')
-    # print(sorted(e))
+    face_node_counts = {
+        4: (3, ),  # tetra4
+        10: (4, ),  # tetra10
+        8: (4, ),  # hexa8
+        20: (8, ),  # hexa20
+        6: (3, 4),  # penta6
+        15: (6, 8)}  # penta15
+    if isinstance(femelement_table, FemElementConnectivity):
+        connectivity = femelement_table
+    else:
+        connectivity = FemElementConnectivity(femelement_table)
+    for el_nd_ct in connectivity.group_slices:
+        if el_nd_ct not in face_node_counts:
+            FreeCAD.Console.PrintError('Error in get_femvolumeelements_by_femfacenodes(): not known volume element: ' + str(el_nd_ct) + '\n')
+    counts = connectivity.get_node_counts(node_list)
+    found = np.zeros(len(connectivity), dtype=bool)
+    for el_nd_ct, nodecounts in face_node_counts.items():
+        for nodecount in nodecounts:
+            found |= (connectivity.ele_nodecount == el_nd_ct) & (counts == nodecount)
+    e = sorted(connectivity.ele_ids[found].tolist())  # elementlist
+    # print(e)
     return e
 
 
@@ -343,6 +426,7 @@ def get_femelement_sets(femmesh, femelement_table, fem_objects, femnodes_ele_tab
             has_remaining_femelements = obj.Name
     # get remaining femelements for the fem_objects
     if has_remaining_femelements:
+        referenced_femelements = set(referenced_femelements)
         remaining_femelements = []
         for elemid in femelement_table:
             if elemid not in referenced_femelements:
@@ -554,9 +638,9 @@ def get_pressure_obj_faces(femmesh, femelement_table, femnodes_ele_table, femobj
         # get the nodes
         prs_face_node_set = get_femnodes_by_femobj_with_references(femmesh, femobj)  # sorted and duplicates removed
         # print('prs_face_node_set: ', prs_face_node_set)
-        # fill the bit_pattern_dict and search for the faces
-        bit_pattern_dict = get_bit_pattern_dict(femelement_table, femnodes_ele_table, prs_face_node_set)
-        pressure_faces = get_ccxelement_faces_from_binary_search(bit_pattern_dict)
+        # search the faces in the bit patterns of the FemElementConnectivity
+        pressure_faces = femnodes_ele_table.get_ccxelement_faces(prs_face_node_set)
+        print('found Faces: ', len(pressure_faces))
     elif is_face_femmesh(femmesh):
         pressure_faces = []
         # normally we should call get_femelements_by_references and the group check should be integrated there
@@ -637,13 +721,14 @@ def get_force_obj_face_nodeload_table(femmesh, femelement_table, femnodes_mesh,
 def get_ref_edgenodes_table(femmesh, femelement_table, refedge):
     edge_table = {}  # { meshedgeID : ( nodeID, ... , nodeID ) }
     refedge_nodes = femmesh.getNodesByEdge(refedge)
+    refedge_node_set = set(refedge_nodes)
     if is_solid_femmesh(femmesh):
         refedge_fem_volumeelements = []
         # if at least two nodes of a femvolumeelement are in refedge_nodes the volume is added to refedge_fem_volumeelements
         for elem in femelement_table:
             nodecount = 0
             for node in femelement_table[elem]:
-                if node in refedge_nodes:
+                if node in refedge_node_set:
                     nodecount += 1
             if nodecount > 1:
                 refedge_fem_volumeelements.append(elem)
@@ -651,7 +736,7 @@ def get_ref_edgenodes_table(femmesh, femelement_table, refedge):
         for elem in refedge_fem_volumeelements:
             fe_refedge_nodes = []
             for node in femelement_table[elem]:
-                if node in refedge_nodes:
+                if node in refedge_node_set:
                     fe_refedge_nodes.append(node)
                 edge_table[elem] = fe_refedge_nodes  # { volumeID : ( edgenodeID, ... , edgenodeID  )} # only the refedge nodes
         #  FIXME duplicate_mesh_elements: as soon as contact ans springs are supported the user should decide on which edge the load is applied
@@ -662,7 +747,7 @@ def get_ref_edgenodes_table(femmesh, femelement_table, refedge):
         for elem in femelement_table:
             nodecount = 0
             for node in femelement_table[elem]:
-                if node in refedge_nodes:
+                if node in refedge_node_set:
                     nodecount += 1
             if nodecount > 1:
                 refedge_fem_faceelements.append(elem)
@@ -670,7 +755,7 @@ def get_ref_edgenodes_table(femmesh, femelement_table, refedge):
         for elem in refedge_fem_faceelements:
             fe_refedge_nodes = []
             for node in femelement_table[elem]:
-                if node in refedge_nodes:
+                if node in refedge_node_set:
                     fe_refedge_nodes.append(node)
                 edge_table[elem] = fe_refedge_nodes  # { faceID : ( edgenodeID, ... , edgenodeID  )} # only the refedge nodes
         #  FIXME duplicate_mesh_elements: as soon as contact ans springs are supported the user should decide on which edge the load is applied
@@ -737,6 +822,7 @@ def get_ref_facenodes_table(femmesh, femelement_table, ref_face):
             # the problem if we retrive the nodes ourself is they are not sorted we just have the nodes. We need to sourt them according
             # the shell mesh notaion of tria3, tria6, quad4, quad8
             ref_face_nodes = femmesh.getNodesByFace(ref_face)
+            ref_face_node_set = set(ref_face_nodes)
             # try to use getccxVolumesByFace() to get the volume ids of element with elementfaces on the ref_face --> should work for tetra4 and tetra10
             ref_face_volume_elements = femmesh.getccxVolumesByFace(ref_face)  # list of tupels (mv, ccx_face_nr)
             if ref_face_volume_elements:  # mesh with tetras
@@ -745,7 +831,7 @@ def get_ref_facenodes_table(femmesh, femelement_table, ref_face):
                     veID = ve[0]
                     ve_ref_face_nodes = []
                     for nodeID in femelement_table[veID]:
-                        if nodeID in ref_face_nodes:
+                        if nodeID in ref_face_node_set:
                             ve_ref_face_nodes.append(nodeID)
                     face_table[veID] = ve_ref_face_nodes  # { volumeID : ( facenodeID, ... , facenodeID ) } only the ref_face nodes
             else:  # mesh with hexa or penta
@@ -754,7 +840,7 @@ def get_ref_facenodes_table(femmesh, femelement_table, ref_face):
                 for veID in ref_face_volume_elements:
                     ve_ref_face_nodes = []
                     for nodeID in femelement_table[veID]:
-                        if nodeID in ref_face_nodes:
+                        if nodeID in ref_face_node_set:
                             ve_ref_face_nodes.append(nodeID)
                     face_table[veID] = ve_ref_face_nodes  # { volumeID : ( facenodeID, ... , facenodeID ) } only the ref_face nodes
                 face_table = build_mesh_faces_of_volume_elements(face_table, femelement_table)  # we need to resort the nodes to make them build a element face
@@ -66,11 +66,13 @@ class Report(object):
         self.infos = []
         self.warnings = []
         self.errors = []
+        self.telemetry = []
 
     def extend(self, report):
         self.infos.extend(report.infos)
         self.warnings.extend(report.warnings)
         self.errors.extend(report.errors)
+        self.telemetry.extend(report.telemetry)
 
     def getLevel(self):
         if self.errors:
@@ -92,3 +94,9 @@ class Report(object):
 
     def error(self, msg):
         self.errors.append(msg)
+
+    def record(self, entry):
+        self.telemetry.append(entry)
+
+    def getSeries(self, key):
+        return [(e["time"], e[key]) for e in self.telemetry if key in e]
@@ -0,0 +1,167 @@
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+__title__ = "FemResultFields"
+__url__ = "http://www.freecadweb.org"
+
+## @package FemResultFields
+#  \ingroup FEM
+#  \brief user defined result formulas evaluated on numpy arrays of the result fields
+
+import ast
+import numpy as np
+
+
+# field name --> (result object property, vector component or None)
+# the short names are the ones the result task panel always used
+result_fields = {
+    'P1': ('PrincipalMax', None),
+    'P2': ('PrincipalMed', None),
+    'P3': ('PrincipalMin', None),
+    'Von': ('StressValues', None),
+    'vonMises': ('StressValues', None),
+    'MaxShear': ('MaxShear', None),
+    'Peeq': ('Peeq', None),
+    'T': ('Temperature', None),
+    'MF': ('MassFlowRate', None),
+    'NP': ('NetworkPressure', None),
+    'U': ('DisplacementLengths', None),
+    'x': ('DisplacementVectors', 0),
+    'y': ('DisplacementVectors', 1),
+    'z': ('DisplacementVectors', 2),
+    'disp_x': ('DisplacementVectors', 0),
+    'disp_y': ('DisplacementVectors', 1),
+    'disp_z': ('DisplacementVectors', 2),
+    'sx': ('StressVectors', 0),
+    'sy': ('StressVectors', 1),
+    'sz': ('StressVectors', 2),
+    'Sxx': ('StressVectors', 0),
+    'Syy': ('StressVectors', 1),
+    'Szz': ('StressVectors', 2),
+    'ex': ('StrainVectors', 0),
+    'ey': ('StrainVectors', 1),
+    'ez': ('StrainVectors', 2),
+    'Exx': ('StrainVectors', 0),
+    'Eyy': ('StrainVectors', 1),
+    'Ezz': ('StrainVectors', 2),
+}
+
+# numpy functions which may be used in formulas, all work element wise or reduce an array
+formula_functions = dict((name, getattr(np, name)) for name in (
+    'abs', 'sqrt', 'exp', 'log', 'log10', 'sin', 'cos', 'tan', 'arcsin', 'arccos', 'arctan', 'arctan2',
+    'sinh', 'cosh', 'tanh', 'minimum', 'maximum', 'where', 'clip', 'sign', 'floor', 'ceil', 'round',
+    'min', 'max', 'mean', 'sum', 'pi'))
+
+_allowed_nodes = tuple(getattr(ast, name) for name in (
+    'Expression', 'BinOp', 'UnaryOp', 'Compare', 'Call', 'Name', 'Load', 'Num', 'Constant',
+    'Add', 'Sub', 'Mult', 'Div', 'FloorDiv', 'Mod', 'Pow', 'USub', 'UAdd',
+    'Eq', 'NotEq', 'Lt', 'LtE', 'Gt', 'GtE', 'BitAnd', 'BitOr', 'Invert', 'keyword'
+) if hasattr(ast, name))
+
+
+class ResultFields(object):
+    '''Evaluates user defined formulas on the fields of a result object.
+    The numpy arrays of the fields are read from the result object once and kept until clear() is called.
+    Compiled formulas are cached as well. Derived fields defined by define() can be used in later formulas.
+    '''
+
+    def __init__(self, result_obj):
+        self.result_obj = result_obj
+        self._fields = {}
+        self._derived = {}
+        self._compiled = {}
+
+    def clear(self):
+        ''' forget the cached field arrays, needed if the result object has changed'''
+        self._fields = {}
+
+    def names(self):
+        return sorted(set(result_fields) | set(self._derived))
+
+    def get(self, name):
+        if name in self._derived:
+            return self._derived[name]
+        if name not in result_fields:
+            raise ValueError("Unknown result field '{}'. Known fields: {}".format(name, ', '.join(self.names())))
+        if name not in self._fields:
+            prop, component = result_fields[name]
+            values = np.array(getattr(self.result_obj, prop), dtype=np.float64)
+            if component is not None:
+                if len(values) == 0:
+                    values = values.reshape(0, 3)
+                values = np.ascontiguousarray(values[:, component])
+            if len(values) == 0:
+                raise ValueError("Result field '{}' is empty in {}.".format(name, self.result_obj.Label))
+            self._fields[name] = values
+        return self._fields[name]
+
+    def compile(self, formula):
+        ''' returns (code, used field names) of formula, the formula is checked to only use
+        arithmetic, comparisons, the formula_functions and the result field names
+        '''
+        if formula in self._compiled:
+            return self._compiled[formula]
+        try:
+            tree = ast.parse(formula.strip(), mode='eval')
+        except SyntaxError as e:
+            raise ValueError("Syntax error in formula: {}".format(e))
+        names = set()
+        for node in ast.walk(tree):
+            if not isinstance(node, _allowed_nodes):
+                raise ValueError("'{}' is not allowed in result formulas.".format(type(node).__name__))
+            if isinstance(node, ast.Call) and not (isinstance(node.func, ast.Name) and node.func.id in formula_functions):
+                raise ValueError("Only these functions are allowed in result formulas: {}".format(', '.join(sorted(formula_functions))))
+            if isinstance(node, ast.Name) and node.id not in formula_functions:
+                names.add(node.id)
+        compiled = (compile(tree, '<result formula>', 'eval'), names)
+        self._compiled[formula] = compiled
+        return compiled
+
+    def evaluate(self, formula):
+        ''' returns the values of formula for all result nodes as numpy array
+        errors of a formula which can't be evaluated (like a division by zero or wrong function arguments)
+        are raised as ValueError
+        '''
+        code, names = self.compile(formula)
+        variables = dict(formula_functions)
+        for name in names:
+            variables[name] = self.get(name)
+        count = len(self.result_obj.NodeNumbers)
+        try:
+            values = eval(code, {'__builtins__': {}}, variables)
+            return np.broadcast_to(np.asarray(values, dtype=np.float64), (count,))
+        except (ArithmeticError, NameError, TypeError, ValueError) as e:
+            raise ValueError("Formula '{}' could not be evaluated: {}".format(formula.strip(), e))
+
+    def define(self, name, formula):
+        ''' evaluates formula and keeps it as derived field name for later formulas'''
+        if name in result_fields or name in formula_functions:
+            raise ValueError("'{}' is a result field or function name.".format(name))
+        values = self.evaluate(formula)
+        self._derived[name] = values
+        return values
+
+    def save(self, name, prop='UserDefined'):
+        ''' saves the derived field name into the float list property prop of the result object,
+        prop is added to the result object if it does not exist yet
+        '''
+        if prop not in self.result_obj.PropertiesList:
+            self.result_obj.addProperty("App::PropertyFloatList", prop, "Derived Results", "Derived result field " + name)
+        setattr(self.result_obj, prop, self._derived[name].tolist())
@@ -31,6 +31,9 @@ import os.path
 import tempfile
 import threading
 import shutil
+import time
+
+from six.moves import queue
 
 import FreeCAD as App
 import FemSettings
@@ -150,6 +153,7 @@ class BaseTask(FemTask.Thread):
         super(BaseTask, self).__init__()
         self.solver = None
         self.directory = None
+        self.machine = None
 
     @property
     def analysis(self):
@@ -173,6 +177,7 @@ class Machine(BaseTask):
         self._state = CHECK
         self._pendingState = None
         self._isReset = False
+        self.phaseTimes = {}
 
     @property
     def state(self):
@@ -186,6 +191,7 @@ class Machine(BaseTask):
                 and self._pendingState <= self.target):
             task = self._getTask(self._pendingState)
             self._runTask(task)
+            self.phaseTimes[self._pendingState] = task.time
             self.report.extend(task.report)
             if task.failed:
                 self.fail()
@@ -214,6 +220,7 @@ class Machine(BaseTask):
         for t in tasks:
             t.solver = self.solver
             t.directory = self.directory
+            t.machine = self
 
     def _applyPending(self):
         if not self._isReset:
@@ -227,14 +234,19 @@ class Machine(BaseTask):
         def statusProxy(line):
             self.pushStatus(line)
 
+        def telemetryProxy(entry):
+            FemSignal.notify(self.signalTelemetry, entry)
+
         def killer():
             task.abort()
         self.signalAbort.add(killer)
         task.signalStatus.add(statusProxy)
+        task.signalTelemetry.add(telemetryProxy)
         task.start()
         task.join()
         self.signalAbort.remove(killer)
         task.signalStatus.remove(statusProxy)
+        task.signalTelemetry.remove(telemetryProxy)
 
     def _getTask(self, state):
         if state == CHECK:
@@ -290,7 +302,54 @@ class Check(BaseTask):
 
 
 class Solve(BaseTask):
-    pass
+
+    def __init__(self):
+        super(Solve, self).__init__()
+        self.keepOutput = False
+        self.output = None
+
+    def observeSolver(self, process, parse=None):
+        """ Pushes the stdout and stderr lines of process as status while
+        it runs and returns the stdout output once both streams are closed.
+
+        Both streams are read by their own threads so a full stderr pipe
+        can't block the solver. parse is called with every stdout line and
+        returns a dict of counters (like iteration or residual) or None.
+        Dicts are recorded on the report together with the time since the
+        task started.
+        """
+        lines = queue.Queue()
+
+        def reader(stream):
+            for line in iter(stream.readline, b""):
+                if not isinstance(line, str):
+                    line = line.decode("utf-8", "replace")
+                lines.put((stream, line))
+            lines.put((stream, None))
+
+        for stream in (process.stdout, process.stderr):
+            thread = threading.Thread(target=reader, args=(stream,))
+            thread.daemon = True
+            thread.start()
+        output = ""
+        first = True
+        openStreams = 2
+        while openStreams:
+            stream, line = lines.get()
+            if line is None:
+                openStreams -= 1
+                continue
+            if not first:
+                line = "\n%s" % line.rstrip()
+            first = False
+            self.pushStatus(line)
+            if stream is process.stdout:
+                output += line
+                entry = parse(line.strip()) if parse is not None else None
+                if entry:
+                    entry["time"] = time.time() - self.startTime
+                    self.pushTelemetry(entry)
+        return output
 
 
 class Prepare(BaseTask):
@@ -298,7 +357,11 @@ class Prepare(BaseTask):
 
 
 class Results(BaseTask):
-    pass
+
+    def __init__(self):
+        super(Results, self).__init__()
+        self.keepResults = False
+        self.output = None
 
 
 class _DocObserver(object):
@@ -0,0 +1,198 @@
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+__title__ = "FemSweep"
+__url__ = "http://www.freecadweb.org"
+
+
+import os.path
+import tempfile
+import threading
+import multiprocessing
+
+import FemMisc
+import FemRun
+import FemTask
+
+
+class Variant(object):
+    ''' One case of a sweep. changes is a list of
+    (document object, property name, value) tuples which are applied to the
+    document while the input files of the case are written and while its
+    results are loaded back.'''
+
+    def __init__(self, label, changes):
+        self.label = label
+        self.changes = changes
+        self.directory = None
+        self.machine = None
+        self._saved = []
+
+    @property
+    def state(self):
+        if self.machine is None:
+            return FemRun.CHECK
+        return self.machine.state
+
+    def apply(self):
+        self._saved = []
+        for obj, prop, value in self.changes:
+            self._saved.append((obj, prop, getattr(obj, prop)))
+            setattr(obj, prop, value)
+
+    def restore(self):
+        for obj, prop, value in reversed(self._saved):
+            setattr(obj, prop, value)
+        self._saved = []
+
+
+class Sweep(FemTask.Thread):
+    ''' Runs the solver of an analysis once for each variant.
+
+    Every variant gets its own working directory below directory and its own
+    machine. Check and prepare are done one variant after the other because
+    the variant is applied to the document while its input files are
+    written. The solver processes of the prepared variants are then run
+    concurrently, at most processes at a time (defaults to the number of
+    cores). The solve tasks keep the solver output to themselves instead of
+    writing it into the document, so the concurrent solvers don't share any
+    document object. At last the results are loaded into the analysis one
+    variant after the other. Every variant gets result and output objects of
+    its own; results of earlier variants are kept and their labels are
+    prefixed with the label of the variant.'''
+
+    def __init__(self, solver, variants, directory=None, processes=None):
+        super(Sweep, self).__init__()
+        self.solver = solver
+        self.variants = variants
+        self.directory = directory
+        self.processes = processes
+        self._running = set()
+        self._lock = threading.Lock()
+
+        def killer():
+            with self._lock:
+                running = list(self._running)
+            for m in running:
+                m.abort()
+        self.signalAbort.add(killer)
+
+    @property
+    def analysis(self):
+        return FemMisc.findAnalysisOfMember(self.solver)
+
+    def run(self):
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix="femsweep")
+        self._prepareAll()
+        self._solveAll()
+        self._loadAll()
+        failed = [v.label for v in self.variants if v.state != FemRun.DONE]
+        if failed:
+            self.report.error(
+                "Sweep variants failed: %s" % ", ".join(failed))
+            self.fail()
+
+    def _prepareAll(self):
+        for i, v in enumerate(self.variants):
+            if self.aborted:
+                return
+            self.pushStatus("Preparing variant %s (%d/%d)...\n"
+                            % (v.label, i + 1, len(self.variants)))
+            v.directory = self._getDirectory(v)
+            v.machine = self.solver.Proxy.createMachine(
+                self.solver, v.directory)
+            v.machine.solve.keepOutput = True
+            v.machine.results.keepResults = True
+            v.apply()
+            try:
+                self.analysis.Document.recompute()
+                self._runMachine(v, FemRun.PREPARE)
+            finally:
+                v.restore()
+
+    def _solveAll(self):
+        pending = [v for v in self.variants if v.state == FemRun.SOLVE]
+        pending.reverse()
+        count = len(pending)
+        solved = []
+
+        def worker():
+            while not self.aborted:
+                with self._lock:
+                    if not pending:
+                        return
+                    v = pending.pop()
+                self._runMachine(v, FemRun.SOLVE)
+                with self._lock:
+                    solved.append(v)
+                    self.pushStatus(
+                        "Solved variant %s (%d/%d)\n"
+                        % (v.label, len(solved), count))
+
+        processes = self.processes or multiprocessing.cpu_count()
+        workers = []
+        for i in range(min(processes, count)):
+            t = threading.Thread(target=worker)
+            t.daemon = True
+            t.start()
+            workers.append(t)
+        for t in workers:
+            t.join()
+
+    def _loadAll(self):
+        for v in self.variants:
+            if self.aborted:
+                return
+            if v.state != FemRun.RESULTS:
+                continue
+            self.pushStatus("Loading results of variant %s...\n" % v.label)
+            v.machine.results.output = v.machine.solve.output
+            before = set(self.analysis.Member)
+            v.apply()
+            try:
+                self._runMachine(v, FemRun.RESULTS)
+            finally:
+                v.restore()
+            for obj in self.analysis.Member:
+                if obj not in before:
+                    obj.Label = "%s_%s" % (v.label, obj.Label)
+        self.analysis.Document.recompute()
+
+    def _runMachine(self, variant, target):
+        m = variant.machine
+        m.target = target
+        with self._lock:
+            self._running.add(m)
+        m.start()
+        m.join()
+        with self._lock:
+            self._running.discard(m)
+        self.report.extend(m.report)
+        if m.failed:
+            self.pushStatus("Variant %s failed.\n" % variant.label)
+
+    def _getDirectory(self, variant):
+        path = FemRun._getUniquePath(
+            os.path.join(self.directory, variant.label))
+        FemRun._dirTypes[path] = None
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        return path
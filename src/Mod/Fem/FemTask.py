@@ -44,6 +44,7 @@ class Task(object):
         self.signalAbort = set()
         self.signalStatus = set()
         self.signalStatusCleared = set()
+        self.signalTelemetry = set()
         self.startTime = None
         self.stopTime = None
         self.running = False
@@ -106,6 +107,10 @@ class Task(object):
         self._status.append(line)
         FemSignal.notify(self.signalStatus, line)
 
+    def pushTelemetry(self, entry):
+        self.report.record(entry)
+        FemSignal.notify(self.signalTelemetry, entry)
+
     def clearStatus(self):
         self._status = []
         FemSignal.notify(self.signalStatusCleared)
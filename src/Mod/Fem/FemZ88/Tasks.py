@@ -86,8 +86,8 @@ class Solve(FemRun.Solve):
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE)
         self.signalAbort.add(self._process.terminate)
-        output = self._observeSolver(self._process)
-        self._process.communicate()
+        self.observeSolver(self._process)
+        self._process.wait()
         self.signalAbort.remove(self._process.terminate)
 
         self.pushStatus("Executing real solver...\n")
@@ -98,30 +98,18 @@ class Solve(FemRun.Solve):
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE)
         self.signalAbort.add(self._process.terminate)
-        output = self._observeSolver(self._process)
-        self._process.communicate()
+        self.observeSolver(self._process)
+        self._process.wait()
         self.signalAbort.remove(self._process.terminate)
 
-    def _observeSolver(self, process):
-        output = ""
-        line = process.stdout.readline()
-        self.pushStatus(line)
-        output += line
-        line = process.stdout.readline()
-        while line:
-            line = "\n%s" % line.rstrip()
-            self.pushStatus(line)
-            output += line
-            line = process.stdout.readline()
-        return output
-
 
 class Results(FemRun.Results):
 
     def run(self):
         prefs = App.ParamGet(
             "User parameter:BaseApp/Preferences/Mod/Fem/General")
-        if not prefs.GetBool("KeepResultsOnReRun", False):
+        if not (self.keepResults
+                or prefs.GetBool("KeepResultsOnReRun", False)):
             self.purge_results()
         self.load_results_z88o2()
 
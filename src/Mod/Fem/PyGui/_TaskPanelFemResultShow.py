@@ -28,7 +28,7 @@ __url__ = "http://www.freecadweb.org"
 #  \ingroup FEM
 
 import FreeCAD
-import numpy as np
+import FemResultFields
 
 import FreeCADGui
 import FemGui
@@ -42,6 +42,8 @@ class _TaskPanelFemResultShow:
     def __init__(self, obj):
         self.result_obj = obj
         self.mesh_obj = self.result_obj.Mesh
+        # the result field arrays are kept between the calculations of user defined formulas
+        self.result_fields = FemResultFields.ResultFields(self.result_obj)
         # task panel should be started by use of setEdit of view provider
         # in view provider checks: Mesh, active analysis and if Mesh and result are in active analysis
 
@@ -269,40 +271,25 @@ class _TaskPanelFemResultShow:
         FreeCAD.FEM_dialog["results_type"] = "None"
         self.update()
         self.restore_result_dialog()
-        # Convert existing values to numpy array
-        P1 = np.array(self.result_obj.PrincipalMax)
-        P2 = np.array(self.result_obj.PrincipalMed)
-        P3 = np.array(self.result_obj.PrincipalMin)
-        Von = np.array(self.result_obj.StressValues)
-        Peeq = np.array(self.result_obj.Peeq)
-        T = np.array(self.result_obj.Temperature)
-        MF = np.array(self.result_obj.MassFlowRate)
-        NP = np.array(self.result_obj.NetworkPressure)
-        dispvectors = np.array(self.result_obj.DisplacementVectors)
-        x = np.array(dispvectors[:, 0])
-        y = np.array(dispvectors[:, 1])
-        z = np.array(dispvectors[:, 2])
-        stressvectors = np.array(self.result_obj.StressVectors)
-        sx = np.array(stressvectors[:, 0])
-        sy = np.array(stressvectors[:, 1])
-        sz = np.array(stressvectors[:, 2])
-        strainvectors = np.array(self.result_obj.StrainVectors)
-        ex = np.array(strainvectors[:, 0])
-        ey = np.array(strainvectors[:, 1])
-        ez = np.array(strainvectors[:, 2])
         userdefined_eq = self.form.user_def_eq.toPlainText()  # Get equation to be used
-        UserDefinedFormula = eval(userdefined_eq).tolist()
-        self.result_obj.UserDefined = UserDefinedFormula
-        minm = min(UserDefinedFormula)
-        avg = sum(UserDefinedFormula) / len(UserDefinedFormula)
-        maxm = max(UserDefinedFormula)
+        try:
+            UserDefinedFormula = self.result_fields.evaluate(userdefined_eq)
+        except ValueError as e:
+            error_message = 'FEM: User defined result formula could not be calculated: {}\n'.format(e)
+            FreeCAD.Console.PrintError(error_message)
+            QtGui.QMessageBox.critical(None, 'User defined result formula', error_message)
+            return
+        user_defined_values = UserDefinedFormula.tolist()
+        self.result_obj.UserDefined = user_defined_values
+        minm = UserDefinedFormula.min()
+        avg = UserDefinedFormula.mean()
+        maxm = UserDefinedFormula.max()
 
         QApplication.setOverrideCursor(Qt.WaitCursor)
         if self.suitable_results:
-            self.mesh_obj.ViewObject.setNodeColorByScalars(self.result_obj.NodeNumbers, UserDefinedFormula)
+            self.mesh_obj.ViewObject.setNodeColorByScalars(self.result_obj.NodeNumbers, user_defined_values)
         self.set_result_stats("", minm, avg, maxm)
         QtGui.qApp.restoreOverrideCursor()
-        del x, y, z, T, Von, Peeq, P1, P2, P3, sx, sy, sz, ex, ey, ez, MF, NP  # Dummy use to get around flake8, varibles not being used
 
     def select_displacement_type(self, disp_type):
         QApplication.setOverrideCursor(Qt.WaitCursor)
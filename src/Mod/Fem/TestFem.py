@@ -110,6 +110,17 @@ class FemTest(unittest.TestCase):
         self.assertEqual(node_data, expected_nodes, "Nodes of Python created seg3 element are unexpected")
         self.assertEqual(edge_data, expected_edges, "Edges of Python created seg3 element are unexpected")
 
+    def test_mesh_bulk_python(self):
+        mesh = Fem.FemMesh()
+        nodes_count = mesh.addNodes([0, 0, 0, 2, 0, 0, 0, 2, 0, 0, 0, 2, 2, 2, 2], [1, 2, 3, 4, 5])
+        volumes_count = mesh.addElements('Volume', [1, 2, 3, 4, 2, 3, 4, 5], [1, 2])
+        faces_count = mesh.addElements('Face', [1, 2, 3], [3])
+
+        mesh_data = [nodes_count, volumes_count, faces_count, mesh.NodeCount, mesh.VolumeCount, mesh.FaceCount, mesh.getElementNodes(2), mesh.getElementNodes(3)]
+        expected = [5, 2, 1, 5, 2, 1, (2, 3, 4, 5), (1, 2, 3)]
+        self.assertEqual(mesh_data, expected, "Bulk created mesh is unexpected")
+        self.assertEqual(mesh.Nodes[5], FreeCAD.Vector(2.0, 2.0, 2.0), "Node of bulk created mesh is unexpected")
+
     def test_unv_save_load(self):
         tetra10 = Fem.FemMesh()
         tetra10.addNode(6, 12, 18, 1)
@@ -160,6 +171,18 @@ class FemTest(unittest.TestCase):
         self.assertTrue(True if read_node_line in expected else False,
                         "Problem in test_writeAbaqus_precision, \n{0}\n{1}".format(read_node_line, expected))
 
+    def test_femelement_connectivity(self):
+        import FemMeshTools
+        femelement_table = {1: (1, 2, 3, 4, 5, 6, 7, 8, 9, 10), 2: (2, 3, 4, 11)}
+        connectivity = FemMeshTools.get_femelement_connectivity(femelement_table)
+        # ccx face 1 of the tetra10 and ccx face 3 of the tetra4
+        face_nodes = [1, 2, 3, 5, 6, 7]
+        self.assertEqual(connectivity.get_ccxelement_faces(face_nodes), [[1, 1]], "Faces found by the element connectivity are unexpected")
+        self.assertEqual(connectivity.get_ccxelement_faces([2, 4, 11]), [[2, 3]], "Faces found by the element connectivity are unexpected")
+        self.assertEqual(connectivity.get_femelements_by_femnodes(range(1, 11)), [1], "Elements found by the element connectivity are unexpected")
+        self.assertEqual(FemMeshTools.get_femvolumeelements_by_femfacenodes(femelement_table, face_nodes), [], "Volumes found by the face nodes are unexpected")
+        self.assertEqual(FemMeshTools.get_femvolumeelements_by_femfacenodes(femelement_table, [2, 3, 4]), [2], "Volumes found by the face nodes are unexpected")
+
     def test_read_frd_massflow_networkpressure(self):
         # read data from frd file
         frd_file = test_file_dir + 'Flow1D_thermomech.frd'
@@ -340,6 +363,240 @@ class FemTest(unittest.TestCase):
         self.assertEqual(read_mflow, expected_mflow, "Values of read mflow result data are unexpected")
         self.assertEqual(read_npressure, expected_npressure, "Values of read npressure result data are unexpected")
 
+    def test_read_frd_result_sets(self):
+        frd_file = test_file_dir + 'cube_static.frd'
+        import importCcxFrdResults
+        frd_reader = importCcxFrdResults.FrdReader(frd_file)
+        node_ids, node_coords = frd_reader.read_nodes()
+        result_set = frd_reader.read_result_set(0)
+        read_data = [len(frd_reader.result_sets), len(node_ids), node_coords.shape[1], result_set['disp'][1].shape, result_set['stress'][1].shape]
+        expected = [1, len(node_ids), 3, (len(node_ids), 3), (len(node_ids), 6)]
+        self.assertEqual(read_data, expected, "Result sets read by FrdReader are unexpected")
+        frd_content = importCcxFrdResults.readResult(frd_file)
+        self.assertEqual(sorted(frd_content['Nodes'].keys()), sorted(node_ids.tolist()), "Nodes read by FrdReader are unexpected")
+
+    def test_calculate_stress_arrays(self):
+        import importToolsFem
+        import numpy as np
+        stress = [(100.0, 20.0, -30.0, 10.0, 0.0, 5.0), (0.0, 0.0, 0.0, 50.0, 0.0, 0.0)]
+        von_mises = importToolsFem.calculate_von_mises_array(np.array(stress))
+        principal = importToolsFem.calculate_principal_stress_array(np.array(stress))
+        for i, s in enumerate(stress):
+            self.assertAlmostEqual(von_mises[i], importToolsFem.calculate_von_mises(s), 10, "Von mises stress of stress array is unexpected")
+            for expected, read in zip(importToolsFem.calculate_principal_stress(s), principal[i]):
+                self.assertAlmostEqual(read, expected, 10, "Principal stress of stress array is unexpected")
+        self.assertAlmostEqual(von_mises[1], 50.0 * 3 ** 0.5, 10, "Von mises stress of pure shear is unexpected")
+        for expected, read in zip([50.0, 0.0, -50.0, 50.0], principal[1]):
+            self.assertAlmostEqual(read, expected, 10, "Principal stresses of pure shear are unexpected")
+
+    def test_write_vtu_appended(self):
+        import writeVTUResults
+        import numpy as np
+        import re
+        points = np.array([(0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0)])
+        temperature = np.array([1.0, 2.0, 3.0, 4.0])
+        vtu_file = temp_dir + '/tetra4_appended.vtu'
+        writeVTUResults.write_vtu_appended(vtu_file, points, np.array([0, 1, 2, 3]), np.array([4]), np.array([10]),
+                                           [('Temperature', 1, lambda: temperature)])
+        header, raw = open(vtu_file, 'rb').read().split(b'<AppendedData encoding="raw">\n_')
+        offsets = [int(o) for o in re.findall(b'offset="([0-9]+)"', header)]
+        self.assertEqual(len(offsets), 5, "Number of appended data arrays is unexpected")
+        size = int(np.frombuffer(raw[offsets[0]:offsets[0] + 8], dtype='<u8')[0])
+        read = np.frombuffer(raw[offsets[0] + 8:offsets[0] + 8 + size], dtype='<f8')
+        self.assertEqual(read.tolist(), temperature.tolist(), "Appended temperature field is unexpected")
+        size = int(np.frombuffer(raw[offsets[1]:offsets[1] + 8], dtype='<u8')[0])
+        read = np.frombuffer(raw[offsets[1] + 8:offsets[1] + 8 + size], dtype='<f8')
+        self.assertEqual(read.tolist(), points.ravel().tolist(), "Appended points are unexpected")
+
+    def test_result_fields_formula(self):
+        import FemResultFields
+
+        class Result(object):
+            Label = 'Result'
+            NodeNumbers = [1, 2, 3]
+            StressValues = [10.0, 20.0, 30.0]
+            DisplacementVectors = [FreeCAD.Vector(1, 0, 0), FreeCAD.Vector(0, 2, 0), FreeCAD.Vector(0, 0, 3)]
+            Temperature = []
+
+        fields = FemResultFields.ResultFields(Result())
+        self.assertEqual(fields.evaluate('Von * 2 + x').tolist(), [21.0, 40.0, 60.0], "User defined formula result is unexpected")
+        self.assertEqual(fields.evaluate('sqrt(disp_y ** 2) + 1').tolist(), [1.0, 3.0, 1.0], "User defined formula with function is unexpected")
+        fields.define('Half', 'vonMises / 2')
+        self.assertEqual(fields.evaluate('maximum(Half, 12)').tolist(), [12.0, 12.0, 15.0], "Derived result field is unexpected")
+        for formula in ('__import__("os")', 'Von.tolist()', 'T + 1', 'Unknown * 2', '[Von]'):
+            self.assertRaises(ValueError, fields.evaluate, formula)
+        # formulas which pass the check but fail while they are evaluated
+        for formula in ('1 / 0', '2.0 ** 10000', 'sqrt()', 'pi(Von)', 'maximum(Von, x, y, z, 1)', '~ Von', '(-1) ** 0.5'):
+            self.assertRaises(ValueError, fields.evaluate, formula)
+
+    def test_femmesh_2_mesh(self):
+        import FemMesh2Mesh
+        from test_files.ccx.cube_mesh import create_nodes_cube, create_elements_cube
+
+        def counts(out_mesh):
+            return (len(out_mesh) // 3, len(set((v.x, v.y, v.z) for v in out_mesh)))
+
+        tetra10 = Fem.FemMesh()
+        create_nodes_cube(tetra10)
+        create_elements_cube(tetra10)
+        self.assertEqual(counts(FemMesh2Mesh.femmesh_2_mesh(tetra10)), (96, 50), "Surface of the tetra10 cube is unexpected")
+
+        # 2 x 2 x 2 hexa8 elements, every node but the center one is on the surface
+        hexa8 = Fem.FemMesh()
+        for k in range(3):
+            for j in range(3):
+                for i in range(3):
+                    hexa8.addNode(i * 5.0, j * 5.0, k * 5.0, 1 + i + 3 * j + 9 * k)
+        for k in range(2):
+            for j in range(2):
+                for i in range(2):
+                    bottom = [1 + i + 3 * j + 9 * k, 2 + i + 3 * j + 9 * k, 5 + i + 3 * j + 9 * k, 4 + i + 3 * j + 9 * k]
+                    hexa8.addVolume(bottom + [n + 9 for n in bottom])
+        self.assertEqual(counts(FemMesh2Mesh.femmesh_2_mesh(hexa8)), (48, 26), "Surface of the hexa8 cube is unexpected")
+
+        # the surface of a result is moved by its displacements
+        result = ObjectsFem.makeResultMechanical('Result')
+        result.NodeNumbers = list(hexa8.Nodes.keys())
+        result.DisplacementVectors = [FreeCAD.Vector(1, 2, 3)] * len(result.NodeNumbers)
+        out_mesh = FemMesh2Mesh.femmesh_2_mesh(hexa8, result)
+        self.assertEqual(counts(out_mesh), (48, 26), "Surface of the hexa8 result is unexpected")
+        self.assertEqual(min((v.x, v.y, v.z) for v in out_mesh), (1.0, 2.0, 3.0), "Displacements are not applied")
+        self.assertEqual(max((v.x, v.y, v.z) for v in out_mesh), (11.0, 12.0, 13.0), "Displacements are not applied")
+
+    def test_femmesh_key_and_include_cache(self):
+        import FemInputWriter
+        import FemMeshTools
+        import six
+
+        def seg2(x):
+            mesh = Fem.FemMesh()
+            mesh.addNode(0, 0, 0, 1)
+            mesh.addNode(x, 0, 0, 2)
+            mesh.addNode(4, 0, 0, 3)
+            mesh.addEdge([1, 2])
+            mesh.addEdge([2, 3], 2)
+            return mesh
+
+        keys = [FemMeshTools.get_femmesh_key(m, FemMeshTools.get_femelement_table(m)) for m in (seg2(2), seg2(2), seg2(3))]
+        self.assertEqual(keys[0], keys[1], "Key of an equal mesh differs")
+        self.assertNotEqual(keys[0], keys[2], "Key of a mesh with a moved node is unchanged")
+
+        include_file = temp_dir + 'include_key.inp'
+        with open(include_file, 'w') as f:
+            f.write('*NSET,NSET=Fixed\n1,\n')
+        FemInputWriter.set_include_file_key(include_file, keys[0])
+        self.assertTrue(FemInputWriter.is_include_file_current(include_file, keys[1]), "Include file of an equal mesh is not reused")
+        self.assertFalse(FemInputWriter.is_include_file_current(include_file, keys[2]), "Include file of a changed mesh is reused")
+        os.utime(include_file, (0, 0))
+        self.assertFalse(FemInputWriter.is_include_file_current(include_file, keys[0]), "Include file changed on disk is reused")
+
+        class Writer(FemInputWriter.FemInputWriter):
+            def __init__(self):
+                self.dir_name = temp_dir
+        written = []
+
+        def write_sets(f):
+            written.append(1)
+            f.write('*NSET,NSET=Fixed\n1,\n')
+        texts = []
+        for key in keys:
+            f = six.StringIO()
+            Writer().write_cached_sets(f, 'Node_sets', key, write_sets)
+            texts.append(f.getvalue())
+        self.assertEqual(len(written), 2, "Cached sets are not reused for an equal mesh or reused for a changed one")
+        self.assertEqual(texts, ['*NSET,NSET=Fixed\n1,\n'] * 3, "Cached sets are unexpected")
+
+    def test_sweep_variants(self):
+        import FemRun
+        import FemSweep
+        import time
+
+        class Check(FemRun.Check):
+            def run(self):
+                pass
+
+        # like the CalculiX tasks the input file name is kept on the prepare task of each variant
+        class Prepare(FemRun.Prepare):
+            def run(self):
+                self.inputFileName = 'load%d' % self.solver.Load
+                with open(os.path.join(self.directory, self.inputFileName + '.txt'), 'w') as f:
+                    f.write(str(self.solver.Load))
+
+        class Solve(FemRun.Solve):
+            def run(self):
+                time.sleep(0.1)
+                with open(os.path.join(self.directory, self.machine.prepare.inputFileName + '.txt')) as f:
+                    self.output = 'load ' + f.read()
+
+        class Results(FemRun.Results):
+            def run(self):
+                result = self.analysis.Document.addObject('App::TextDocument', 'Result')
+                result.Label = 'Result'
+                result.Text = self.output
+                self.analysis.Member += [result]
+
+        class Solver(object):
+            def createMachine(self, obj, directory):
+                return FemRun.Machine(
+                    solver=obj, directory=directory, check=Check(),
+                    prepare=Prepare(), solve=Solve(), results=Results())
+
+        analysis = ObjectsFem.makeAnalysis('Analysis')
+        solver = self.active_doc.addObject('App::FeaturePython', 'Solver')
+        solver.addProperty('App::PropertyFloat', 'Load')
+        solver.Proxy = Solver()
+        analysis.Member = [solver]
+        variants = [FemSweep.Variant(label, [(solver, 'Load', load)]) for label, load in (('a', 1.0), ('b', 2.0), ('c', 3.0))]
+        sweep = FemSweep.Sweep(solver, variants, tempfile.mkdtemp(dir=temp_dir), processes=2)
+        sweep.start()
+        sweep.join()
+        self.assertFalse(sweep.failed, "Sweep failed")
+        self.assertEqual(solver.Load, 0.0, "Variant changes are not restored")
+        results = sorted((obj.Label, obj.Text) for obj in analysis.Member if obj.isDerivedFrom('App::TextDocument'))
+        self.assertEqual(results, [('a_Result', 'load 1.0'), ('b_Result', 'load 2.0'), ('c_Result', 'load 3.0')],
+                         "Results of the variants are unexpected")
+
+    def test_solver_convergence_parsers(self):
+        from FemCalculix import Tasks as CalculixTasks
+        from FemElmer import Tasks as ElmerTasks
+
+        elmer_output = [
+            'ComputeChange: NS (ITER=1) (NRM,RELC): (  7.6495651      2.0000000     ) :: heat equation',
+            'ComputeChange: NS (ITER=2) (NRM,RELC): (  7.6495651     0.12345678E-08 ) :: heat equation',
+            'SolveEquations: Steady state iteration: 1',
+            'ComputeChange: SS (ITER=1) (NRM,RELC): (  7.6495651      2.0000000     ) :: heat equation']
+        entries = [e for e in map(ElmerTasks._parseConvergence, elmer_output) if e]
+        self.assertEqual([(e['type'], e['iteration']) for e in entries], [('nonlinear', 1), ('nonlinear', 2), ('steady state', 1)],
+                         "Elmer iterations are unexpected")
+        self.assertEqual(entries[1]['equation'], 'heat equation', "Elmer equation is unexpected")
+        self.assertAlmostEqual(entries[1]['norm'], 7.6495651, msg="Elmer norm is unexpected")
+        self.assertAlmostEqual(entries[1]['change'], 0.12345678E-08, msg="Elmer change is unexpected")
+
+        ccx_output = [
+            'increment 1 attempt 1',
+            'increment size= 1.000000e+00',
+            'actual step time=1.000000e+00',
+            'iteration 1',
+            'average force= 3.333333',
+            'time avg. forc= 3.333333',
+            'largest residual force= 1.250000 in node 4 and dof 1',
+            'largest increment of disp= 2.131045e-03',
+            'largest correction to disp= 2.131045e-03 in node 13 and dof 3',
+            'no convergence',
+            'iteration 2',
+            'average force= 3.333333',
+            'largest residual force= 0.000010 in node 4 and dof 1',
+            'largest increment of disp= 2.131045e-03',
+            'largest correction to disp= 1.000000e-09 in node 13 and dof 3',
+            'convergence']
+        parser = CalculixTasks._ConvergenceParser()
+        entries = [e for e in map(parser.parse, ccx_output) if e]
+        self.assertEqual([(e['increment'], e['attempt'], e['iteration']) for e in entries], [(1, 1, 1), (1, 1, 2)],
+                         "CalculiX iterations are unexpected")
+        self.assertEqual([e['largest residual force'] for e in entries], [1.25, 0.00001], "CalculiX residuals are unexpected")
+        self.assertEqual(entries[1]['largest correction to disp'], 1e-09, "CalculiX correction is unexpected")
+        self.assertEqual(entries[0]['step time'], 1.0, "CalculiX step time is unexpected")
+
     def test_pyimport_all_FEM_modules(self):
         # collect all Python modules in Fem
         # Mod/Fem/
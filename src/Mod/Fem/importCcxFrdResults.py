@@ -32,6 +32,7 @@ __url__ = "http://www.freecadweb.org"
 
 import FreeCAD
 import os
+import numpy as np
 
 
 ########## generic FreeCAD import and export methods ##########
@@ -60,33 +61,36 @@ def insert(filename, docname):
 
 
 ########## module specific methods ##########
-def importFrd(filename, analysis=None, result_name_prefix=None):
+def importFrd(filename, analysis=None, result_name_prefix=None, result_steps=None):
+    '''imports the mesh and the result sets of a frd file
+    result_steps: list of indices of the result sets to import, None imports all result sets
+    The frd file is only indexed first, the result sets are read one by one
+    when their result object is created, thus only one of them is held in memory.
+    '''
     import importToolsFem
     import ObjectsFem
     if result_name_prefix is None:
         result_name_prefix = ''
-    m = readResult(filename)
+    frd_reader = FrdReader(filename)
+    node_ids, node_coords = frd_reader.read_nodes()
     result_mesh_object = None
-    if len(m['Nodes']) > 0:
+    if len(node_ids) > 0:
         if analysis:
             analysis_object = analysis
 
+        m = frd_reader.read_elements()
+        m['Nodes'] = (node_ids, node_coords)
         mesh = importToolsFem.make_femmesh(m)
         result_mesh_object = ObjectsFem.makeMeshResult('Result_mesh')
         result_mesh_object.FemMesh = mesh
 
-        positions = []
-        for k, v in m['Nodes'].items():
-            positions.append(v)
-        p_x_max, p_y_max, p_z_max = map(max, zip(*positions))
-        p_x_min, p_y_min, p_z_min = map(min, zip(*positions))
-        x_span = abs(p_x_max - p_x_min)
-        y_span = abs(p_y_max - p_y_min)
-        z_span = abs(p_z_max - p_z_min)
-        span = max(x_span, y_span, z_span)
-
-        number_of_increments = len(m['Results'])
-        for result_set in m['Results']:
+        span = float(np.max(node_coords.max(axis=0) - node_coords.min(axis=0)))
+
+        number_of_increments = len(frd_reader.result_sets)
+        if result_steps is None:
+            result_steps = range(number_of_increments)
+        for result_step in result_steps:
+            result_set = frd_reader.read_result_set(result_step)
             eigenmode_number = result_set['number']
             step_time = result_set['time']
             step_time = round(step_time, 2)
@@ -99,7 +103,7 @@ def importFrd(filename, analysis=None, result_name_prefix=None):
 
             results = ObjectsFem.makeResultMechanical(results_name)
             results.Mesh = result_mesh_object
-            results = importToolsFem.fill_femresult_mechanical(results, result_set, span)
+            results = importToolsFem.fill_femresult_mechanical(results, result_set_to_dict(result_set), span)
             if analysis:
                 analysis_object.Member = analysis_object.Member + [results]
 
@@ -115,7 +119,220 @@ def importFrd(filename, analysis=None, result_name_prefix=None):
 
 # read a calculix result file and extract the nodes, displacement vectores and stress values.
 def readResult(frd_input):
-    print('Read results from: ' + frd_input)
+    '''reads the whole frd file into dictionaries, see FrdReader for reading single result sets
+    '''
+    frd_reader = FrdReader(frd_input)
+    node_ids, node_coords = frd_reader.read_nodes()
+    frd_content = frd_reader.read_elements_tables()
+    frd_content['Nodes'] = nodes_to_dict(node_ids, node_coords)
+    results = []
+    for i in range(len(frd_reader.result_sets)):
+        results.append(result_set_to_dict(frd_reader.read_result_set(i)))
+    frd_content['Results'] = results
+    if not frd_reader.inout_nodes:
+        if results:
+            if 'mflow' in results[0] or 'npressure' in results[0]:
+                FreeCAD.Console.PrintError('We have mflow or npressure, but no inout_nodes file.\n')
+    if not frd_content['Nodes']:
+        FreeCAD.Console.PrintError('FEM: No nodes found in Frd file.\n')
+    return frd_content
+
+
+# frd element types: ccx element type number --> (FreeCAD element key, number of nodes, position of the FreeCAD element nodes in the frd element)
+# node order fits with node order in writeAbaqus() in FemMesh.cpp
+frd_element_types = {
+    1: ('Hexa8Elem', 8, (5, 6, 7, 4, 1, 2, 3, 0)),  # C3D8 CalculiX --> hexa8 FreeCAD, N6, N7, N8, N5, N2, N3, N4, N1
+    2: ('Penta6Elem', 6, (4, 5, 3, 1, 2, 0)),  # C3D6 Calculix --> penta6 FreeCAD, N5, N6, N4, N2, N3, N1
+    3: ('Tetra4Elem', 4, (1, 0, 2, 3)),  # C3D4 Calculix --> tetra4 FreeCAD, N2, N1, N3, N4
+    # C3D20 Calculix --> hexa20 FreeCAD
+    # CalculiX uses a different node order in input file *.inp and result file *.frd for hexa20 (C3D20)
+    # according to Guido (the developer of ccx)
+    # ccx (and thus the *.inp) follows the ABAQUS convention (documented in the ccx-documentation)
+    # cgx (and thus the *.frd) follows the FAM2 convention (documented in the cgx-documentation)
+    # FAM32 is from the company FEGS limited, maybe this company does not exist any more)
+    # hexa20 import works with the following frd file node assignment
+    # N8, N5, N6, N7, N4, N1, N2, N3, N20, N17, N18, N19, N12, N9, N10, N11, N16, N13, N14, N15
+    4: ('Hexa20Elem', 20, (7, 4, 5, 6, 3, 0, 1, 2, 19, 16, 17, 18, 11, 8, 9, 10, 15, 12, 13, 14)),
+    # C3D15 Calculix --> penta15 FreeCAD
+    # CalculiX uses a different node order in input file *.inp and result file *.frd for penta15 (C3D15)
+    # N5, N6, N4, N2, N3, N1, N14, N15, N13, N8, N9, N7, N11, N12, N10
+    5: ('Penta15Elem', 15, (4, 5, 3, 1, 2, 0, 13, 14, 12, 7, 8, 6, 10, 11, 9)),
+    6: ('Tetra10Elem', 10, (1, 0, 2, 3, 4, 6, 5, 8, 7, 9)),  # C3D10 Calculix --> tetra10 FreeCAD, N2, N1, N3, N4, N5, N7, N6, N9, N8, N10
+    7: ('Tria3Elem', 3, (0, 1, 2)),  # S3 Calculix --> tria3 FreeCAD
+    8: ('Tria6Elem', 6, (0, 1, 2, 3, 4, 5)),  # S6 CalculiX --> tria6 FreeCAD
+    9: ('Quad4Elem', 4, (0, 1, 2, 3)),  # S4 CalculiX --> quad4 FreeCAD
+    10: ('Quad8Elem', 8, (0, 1, 2, 3, 4, 5, 6, 7)),  # S8 CalculiX --> quad8 FreeCAD
+    11: ('Seg2Elem', 2, (0, 1)),  # B31 CalculiX --> seg2 FreeCAD
+    12: ('Seg3Elem', 3, (0, 2, 1))}  # B32 CalculiX --> seg3 FreeCAD, also D element, order in outputfile is N1, N3, N2
+
+# frd result blocks: (start of the block name, result key, number of values per node)
+frd_result_blocks = (
+    ('DISP', 'disp', 3),
+    ('STRESS', 'stress', 6),
+    ('TOSTRAIN', 'strain', 6),
+    ('PE', 'peeq', 1),
+    ('NDTEMP', 'temp', 1),
+    ('MAFLOW', 'mflow', 1),
+    ('STPRES', 'npressure', 1))
+
+
+class FrdReader(object):
+    '''streaming reader for CalculiX frd result files
+    On creation the file is read once to index the byte offsets of the node, element
+    and result blocks and to group the result blocks into result sets (eigenmodes, time steps).
+    The blocks are parsed on request in bulk into numpy arrays, a result set
+    is only read when read_result_set() is called.
+    '''
+    def __init__(self, frd_input):
+        print('Read results from: ' + frd_input)
+        self.frd_input = frd_input
+        self.inout_nodes = read_inout_nodes(frd_input)
+        self.nodes_block = None
+        self.elements_block = None
+        self.result_sets = []  # [{'number': eigenmode, 'time': timestep, 'blocks': {result_key: [block, ...]}}, ...]
+        self._index_file()
+
+    def _index_file(self):
+        offset = 0
+        block = None
+        pending_blocks = {}
+        eigenmode = 0
+        timestep = 0
+        mode_time_found = False
+        frd_file = pyopen(self.frd_input, 'rb')
+        for line in frd_file:
+            line_start = offset
+            offset += len(line)
+            key = line[1:3]
+            if key == b'-1' or key == b'-2':
+                continue
+            if line[4:6] == b'2C':
+                block = {'key': 'nodes', 'start': offset}
+            elif line[4:6] == b'3C':
+                block = {'key': 'elements', 'start': offset}
+            elif line[5:10] == b'PMODE':
+                eigenmode = int(line[30:36])
+            elif line[4:10] == b'1PSTEP':
+                mode_time_found = True
+            elif mode_time_found and line[2:7] == b'100CL':
+                timetemp = float(line[13:25])
+                if timetemp > timestep:
+                    timestep = timetemp
+            elif key == b'-4':
+                for name, result_key, values in frd_result_blocks:
+                    if line[5:5 + len(name)] == name.encode():
+                        block = {'key': result_key, 'values': values, 'start': offset}
+                        break
+            elif key == b'-3':
+                mode_time_found = False
+                if block:
+                    block['end'] = line_start
+                    if block['key'] == 'nodes':
+                        self.nodes_block = block
+                    elif block['key'] == 'elements':
+                        self.elements_block = block
+                    else:
+                        pending_blocks.setdefault(block['key'], []).append(block)
+                    block = None
+                # a result set is complete if all its result blocks are found
+                if self._add_result_set(pending_blocks, ('disp', 'stress', 'strain', 'temp', 'peeq'), eigenmode, timestep):
+                    eigenmode = 0
+                if self._add_result_set(pending_blocks, ('disp', 'stress', 'strain', 'peeq'), eigenmode, 0):  # Don't return time if static
+                    eigenmode = 0
+                if self._add_result_set(pending_blocks, ('mflow', 'npressure'), eigenmode, timestep):
+                    eigenmode = 0
+        frd_file.close()
+        print('Found {} result sets in frd file.'.format(len(self.result_sets)))
+
+    def _add_result_set(self, pending_blocks, result_keys, eigenmode, timestep):
+        for result_key in result_keys:
+            if result_key not in pending_blocks and result_key != 'peeq':  # peeq is optional
+                return False
+        blocks = {}
+        for result_key in result_keys:
+            if result_key in pending_blocks:
+                blocks[result_key] = pending_blocks.pop(result_key)
+        self.result_sets.append({'number': eigenmode, 'time': timestep, 'blocks': blocks})
+        return True
+
+    def _read_block_lines(self, block, frd_file):
+        frd_file.seek(block['start'])
+        return frd_file.read(block['end'] - block['start']).splitlines()
+
+    def _read_value_block(self, block, frd_file):
+        return parse_frd_value_lines(self._read_block_lines(block, frd_file), block['values'])
+
+    def read_nodes(self):
+        '''returns the node ids and the node coordinates as numpy arrays of shape (N, ) and (N, 3)'''
+        if self.nodes_block is None:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, 3))
+        frd_file = pyopen(self.frd_input, 'rb')
+        node_ids, node_coords = parse_frd_value_lines(self._read_block_lines(self.nodes_block, frd_file), 3)
+        frd_file.close()
+        return node_ids, node_coords
+
+    def read_elements(self):
+        '''returns {FreeCAD element key: (element ids, element nodes)} as numpy arrays of shape (E, ) and (E, nodes per element)'''
+        elements = {}
+        for element_key, nodes_count, node_order in frd_element_types.values():
+            elements[element_key] = (np.zeros(0, dtype=np.int64), np.zeros((0, nodes_count), dtype=np.int64))
+        if self.elements_block is None:
+            return elements
+        frd_file = pyopen(self.frd_input, 'rb')
+        lines = self._read_block_lines(self.elements_block, frd_file)
+        frd_file.close()
+        # collect the node lines of every element, an element could have more than one node line
+        element_lines = {}
+        elem = None
+        for line in lines:
+            key = line[1:3]
+            if key == b'-1':
+                elem = int(line[3:13])
+                elem_nodes = element_lines.setdefault(int(line[14:18]), ([], []))
+                elem_nodes[0].append(elem)
+                elem_nodes[1].append(b'')
+            elif key == b'-2' and elem is not None:
+                elem_nodes[1][-1] += line[3:].rstrip()
+        for elemType, (elem_ids, elem_node_lines) in element_lines.items():
+            if elemType not in frd_element_types:
+                FreeCAD.Console.PrintError('Not supported element type {} in frd file.\n'.format(elemType))
+                continue
+            element_key, nodes_count, node_order = frd_element_types[elemType]
+            nodes = parse_fixed_width_ints(elem_node_lines, 10, nodes_count)
+            elements[element_key] = (np.array(elem_ids, dtype=np.int64), nodes[:, node_order])
+        if self.inout_nodes:
+            elements['Seg3Elem'] = get_inout_seg3_elements(elements['Seg3Elem'], self.inout_nodes)
+        return elements
+
+    def read_elements_tables(self):
+        '''returns {FreeCAD element key: {element id: (node id, ...)}}'''
+        elements_tables = {}
+        for element_key, (elem_ids, elem_nodes) in self.read_elements().items():
+            elements_tables[element_key] = dict(zip(elem_ids.tolist(), map(tuple, elem_nodes.tolist())))
+        return elements_tables
+
+    def read_result_set(self, index):
+        '''returns the result set with the given index as
+        {'number': eigenmode, 'time': timestep, result_key: (node ids, values), ...}
+        the values are numpy arrays of shape (N, values per node)
+        '''
+        result_set = self.result_sets[index]
+        result_arrays = {'number': result_set['number'], 'time': result_set['time']}
+        frd_file = pyopen(self.frd_input, 'rb')
+        for result_key, blocks in result_set['blocks'].items():
+            arrays = [self._read_value_block(block, frd_file) for block in blocks]
+            node_ids = np.concatenate([a[0] for a in arrays])
+            values = np.concatenate([a[1] for a in arrays])
+            if result_key == 'mflow':
+                values = values * 1000  # convert units to kg/s from t/s
+            if result_key in ('mflow', 'npressure') and self.inout_nodes:
+                node_ids, values = add_inout_nodes_values(node_ids, values, self.inout_nodes)
+            result_arrays[result_key] = (node_ids, values)
+        frd_file.close()
+        return result_arrays
+
+
+def read_inout_nodes(frd_input):
     inout_nodes = []
     inout_nodes_file = frd_input.rsplit('.', 1)[0] + '_inout_nodes.txt'
     if os.path.exists(inout_nodes_file):
@@ -127,420 +344,103 @@ def readResult(frd_input):
             inout_nodes.append(a)
         f.close()
         print(inout_nodes)
-    frd_file = pyopen(frd_input, "r")
+    return inout_nodes
+
+
+def parse_fixed_width_ints(lines, width, count):
+    '''parses count integers of the given column width of every line into a numpy array of shape (len(lines), count)'''
+    return _parse_fixed_width(lines, width, count).astype(np.int64)
+
+
+def parse_frd_value_lines(lines, values_count):
+    '''parses the " -1" lines of a frd node or result block in bulk
+    returns the node ids with shape (N, ) and the values with shape (N, values_count) as numpy arrays
+    '''
+    value_lines = [line[3:] for line in lines if line[1:3] == b'-1']
+    if not value_lines:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, values_count))
+    # node number: 10 characters, values: 12 characters each
+    fields = _parse_fixed_width(value_lines, (10, ) + (12, ) * values_count, values_count + 1)
+    return fields[:, 0].astype(np.int64), fields[:, 1:].astype(np.float64)
+
+
+def _parse_fixed_width(lines, widths, count):
+    '''splits fixed width columns of all lines at once, widths is a column width or a tuple of column widths
+    returns a numpy string array of shape (len(lines), count)
+    '''
+    if not isinstance(widths, tuple):
+        widths = (widths, ) * count
+    line_width = sum(widths)
+    chars = np.frombuffer(b''.join(line[:line_width].ljust(line_width) for line in lines), dtype='S1')
+    chars = chars.reshape(len(lines), line_width)
+    columns = []
+    column_start = 0
+    for width in widths:
+        column = np.ascontiguousarray(chars[:, column_start:column_start + width])
+        columns.append(column.view('S{}'.format(width)).reshape(len(lines)))
+        column_start += width
+    return np.array(columns).T
+
+
+def get_inout_seg3_elements(seg3_elements, inout_nodes):
+    '''fluid inlet and outlet node numbering of the D elements of a 1DFlow analysis'''
+    elem_ids = []
+    elem_nodes = []
+    for elem, (nd1, nd2, nd3) in zip(seg3_elements[0].tolist(), seg3_elements[1].tolist()):
+        nodes = None
+        for i in range(len(inout_nodes)):
+            if nd1 == int(inout_nodes[i][1]):
+                nodes = (int(inout_nodes[i][2]), nd3, nd1)  # fluid inlet node numbering
+            elif nd3 == int(inout_nodes[i][1]):
+                nodes = (nd1, int(inout_nodes[i][2]), nd3)  # fluid outlet node numbering
+        if nodes:
+            elem_ids.append(elem)
+            elem_nodes.append(nodes)
+    return np.array(elem_ids, dtype=np.int64), np.array(elem_nodes, dtype=np.int64).reshape(len(elem_ids), 3)
+
+
+def add_inout_nodes_values(node_ids, values, inout_nodes):
+    '''the fluid inlet and outlet nodes get the value of their frd node, they are inserted after it'''
+    inout_map = {}
+    for i in range(len(inout_nodes)):
+        inout_map.setdefault(int(inout_nodes[i][1]), []).append(int(inout_nodes[i][2]))
+    rows = []
+    inout_ids = []
+    for row, node in enumerate(node_ids.tolist()):
+        rows.append(row)
+        inout_ids.append(node)
+        for inout_node in inout_map.get(node, []):
+            rows.append(row)
+            inout_ids.append(inout_node)
+    return np.array(inout_ids, dtype=np.int64), values[rows]
+
+
+def nodes_to_dict(node_ids, node_coords):
     nodes = {}
-    elements_hexa8 = {}
-    elements_penta6 = {}
-    elements_tetra4 = {}
-    elements_tetra10 = {}
-    elements_penta15 = {}
-    elements_hexa20 = {}
-    elements_tria3 = {}
-    elements_tria6 = {}
-    elements_quad4 = {}
-    elements_quad8 = {}
-    elements_seg2 = {}
-    elements_seg3 = {}
-    results = []
-    mode_results = {}
-    mode_disp = {}
-    mode_stress = {}
-    mode_stressv = {}
-    mode_strain = {}
-    mode_peeq = {}
-    mode_temp = {}
-    mode_massflow = {}
-    mode_networkpressure = {}
-
-    mode_disp_found = False
-    nodes_found = False
-    mode_stress_found = False
-    mode_strain_found = False
-    mode_peeq_found = False
-    mode_temp_found = False
-    mode_massflow_found = False
-    mode_networkpressure_found = False
-    mode_time_found = False
-    elements_found = False
-    input_continues = False
-    eigenmode = 0
-    elem = -1
-    elemType = 0
-    timestep = 0
-    timetemp = 0
-
-    for line in frd_file:
-        # Check if we found nodes section
-        if line[4:6] == "2C":
-            nodes_found = True
-        # first lets extract the node and coordinate information from the results file
-        if nodes_found and (line[1:3] == "-1"):
-            elem = int(line[4:13])
-            nodes_x = float(line[13:25])
-            nodes_y = float(line[25:37])
-            nodes_z = float(line[37:49])
-            nodes[elem] = FreeCAD.Vector(nodes_x, nodes_y, nodes_z)
-        # Check if we found nodes section
-        if line[4:6] == "3C":
-            elements_found = True
-        # first lets extract element number
-        if elements_found and (line[1:3] == "-1"):
-            elem = int(line[4:13])
-            elemType = int(line[14:18])
-        # then import elements
-        if elements_found and (line[1:3] == "-2"):
-            # node order fits with node order in writeAbaqus() in FemMesh.cpp
-            if elemType == 1:
-                # C3D8 CalculiX --> hexa8 FreeCAD
-                # N6, N7, N8, N5, N2, N3, N4, N1
-                nd1 = int(line[3:13])
-                nd2 = int(line[13:23])
-                nd3 = int(line[23:33])
-                nd4 = int(line[33:43])
-                nd5 = int(line[43:53])
-                nd6 = int(line[53:63])
-                nd7 = int(line[63:73])
-                nd8 = int(line[73:83])
-                elements_hexa8[elem] = (nd6, nd7, nd8, nd5, nd2, nd3, nd4, nd1)
-            elif elemType == 2:
-                # C3D6 Calculix --> penta6 FreeCAD
-                # N5, N6, N4, N2, N3, N1
-                nd1 = int(line[3:13])
-                nd2 = int(line[13:23])
-                nd3 = int(line[23:33])
-                nd4 = int(line[33:43])
-                nd5 = int(line[43:53])
-                nd6 = int(line[53:63])
-                elements_penta6[elem] = (nd5, nd6, nd4, nd2, nd3, nd1)
-            elif elemType == 3:
-                # C3D4 Calculix --> tetra4 FreeCAD
-                # N2, N1, N3, N4
-                nd1 = int(line[3:13])
-                nd2 = int(line[13:23])
-                nd3 = int(line[23:33])
-                nd4 = int(line[33:43])
-                elements_tetra4[elem] = (nd2, nd1, nd3, nd4)
-            elif elemType == 4 and input_continues is False:
-                # first line
-                # C3D20 Calculix --> hexa20 FreeCAD
-                # N6, N7, N8, N5, N2, N3, N4, N1, N14, N15, N16, N13, N10, N11, N12, N9, N18, N19, N20, N17
-                nd1 = int(line[3:13])
-                nd2 = int(line[13:23])
-                nd3 = int(line[23:33])
-                nd4 = int(line[33:43])
-                nd5 = int(line[43:53])
-                nd6 = int(line[53:63])
-                nd7 = int(line[63:73])
-                nd8 = int(line[73:83])
-                nd9 = int(line[83:93])
-                nd10 = int(line[93:103])
-                input_continues = True
-            elif elemType == 4 and input_continues is True:
-                # second line
-                nd11 = int(line[3:13])
-                nd12 = int(line[13:23])
-                nd13 = int(line[23:33])
-                nd14 = int(line[33:43])
-                nd15 = int(line[43:53])
-                nd16 = int(line[53:63])
-                nd17 = int(line[63:73])
-                nd18 = int(line[73:83])
-                nd19 = int(line[83:93])
-                nd20 = int(line[93:103])
-                input_continues = False
-                # CalculiX uses a different node order in input file *.inp and result file *.frd for hexa20 (C3D20)
-                # according to Guido (the developer of ccx)
-                # ccx (and thus the *.inp) follows the ABAQUS convention (documented in the ccx-documentation)
-                # cgx (and thus the *.frd) follows the FAM2 convention (documented in the cgx-documentation)
-                # FAM32 is from the company FEGS limited, maybe this company does not exist any more)
-                # elements_hexa20[elem] = (nd6, nd7, nd8, nd5, nd2, nd3, nd4, nd1, nd14, nd15,
-                #                          nd16, nd13, nd10, nd11, nd12, nd9, nd18, nd19, nd20, nd17)
-                # elements_hexa20[elem] = (nd6, nd7, nd8, nd5, nd2, nd3, nd4, nd1, nd14, nd15,
-                #                          nd16, nd13, nd18, nd19, nd20, nd17, nd10, nd11, nd12, nd9)
-                # hexa20 import works with the following frd file node assignment
-                elements_hexa20[elem] = (nd8, nd5, nd6, nd7, nd4, nd1, nd2, nd3, nd20, nd17,
-                                         nd18, nd19, nd12, nd9, nd10, nd11, nd16, nd13, nd14, nd15)
-                # print elements_hexa20[elem]
-            elif elemType == 5 and input_continues is False:
-                # first line
-                # C3D15 Calculix --> penta15 FreeCAD
-                # N5, N6, N4, N2, N3, N1, N11, N12, N10, N8, N9, N7, N14, N15, N13
-                nd1 = int(line[3:13])
-                nd2 = int(line[13:23])
-                nd3 = int(line[23:33])
-                nd4 = int(line[33:43])
-                nd5 = int(line[43:53])
-                nd6 = int(line[53:63])
-                nd7 = int(line[63:73])
-                nd8 = int(line[73:83])
-                nd9 = int(line[83:93])
-                nd10 = int(line[93:103])
-                input_continues = True
-            elif elemType == 5 and input_continues is True:
-                # second line
-                nd11 = int(line[3:13])
-                nd12 = int(line[13:23])
-                nd13 = int(line[23:33])
-                nd14 = int(line[33:43])
-                nd15 = int(line[43:53])
-                input_continues = False
-                # CalculiX uses a different node order in input file *.inp and result file *.frd for penta15 (C3D15)
-                # elements_penta15[elem] = (nd5, nd6, nd4, nd2, nd3, nd1, nd11, nd12, nd10, nd8,
-                #                           nd9, nd7, nd14, nd15, nd13)  # order of the *.inp file
-                elements_penta15[elem] = (nd5, nd6, nd4, nd2, nd3, nd1, nd14, nd15, nd13, nd8,
-                                          nd9, nd7, nd11, nd12, nd10)
-            elif elemType == 6:
-                # C3D10 Calculix --> tetra10 FreeCAD
-                # N2, N1, N3, N4, N5, N7, N6, N9, N8, N10
-                nd1 = int(line[3:13])
-                nd2 = int(line[13:23])
-                nd3 = int(line[23:33])
-                nd4 = int(line[33:43])
-                nd5 = int(line[43:53])
-                nd6 = int(line[53:63])
-                nd7 = int(line[63:73])
-                nd8 = int(line[73:83])
-                nd9 = int(line[83:93])
-                nd10 = int(line[93:103])
-                elements_tetra10[elem] = (nd2, nd1, nd3, nd4, nd5, nd7, nd6, nd9, nd8, nd10)
-            elif elemType == 7:
-                # S3 Calculix --> tria3 FreeCAD
-                # N1, N2, N3
-                nd1 = int(line[3:13])
-                nd2 = int(line[13:23])
-                nd3 = int(line[23:33])
-                elements_tria3[elem] = (nd1, nd2, nd3)
-            elif elemType == 8:
-                # S6 CalculiX --> tria6 FreeCAD
-                # N1, N2, N3, N4, N5, N6
-                nd1 = int(line[3:13])
-                nd2 = int(line[13:23])
-                nd3 = int(line[23:33])
-                nd4 = int(line[33:43])
-                nd5 = int(line[43:53])
-                nd6 = int(line[53:63])
-                elements_tria6[elem] = (nd1, nd2, nd3, nd4, nd5, nd6)
-            elif elemType == 9:
-                # S4 CalculiX --> quad4 FreeCAD
-                # N1, N2, N3, N4
-                nd1 = int(line[3:13])
-                nd2 = int(line[13:23])
-                nd3 = int(line[23:33])
-                nd4 = int(line[33:43])
-                elements_quad4[elem] = (nd1, nd2, nd3, nd4)
-            elif elemType == 10:
-                # S8 CalculiX --> quad8 FreeCAD
-                # N1, N2, N3, N4, N5, N6, N7, N8
-                nd1 = int(line[3:13])
-                nd2 = int(line[13:23])
-                nd3 = int(line[23:33])
-                nd4 = int(line[33:43])
-                nd5 = int(line[43:53])
-                nd6 = int(line[53:63])
-                nd7 = int(line[63:73])
-                nd8 = int(line[73:83])
-                elements_quad8[elem] = (nd1, nd2, nd3, nd4, nd5, nd6, nd7, nd8)
-            elif elemType == 11:
-                # B31 CalculiX --> seg2 FreeCAD
-                # N1, N2
-                nd1 = int(line[3:13])
-                nd2 = int(line[13:23])
-                elements_seg2[elem] = (nd1, nd2)
-            elif elemType == 12:
-                # B32 CalculiX --> seg3 FreeCAD
-                # Also D element element number
-                # N1, N3 ,N2 Order in outpufile is 1,3,2
-                nd1 = int(line[3:13])
-                nd3 = int(line[13:23])
-                nd2 = int(line[23:33])
-                if inout_nodes:
-                    for i in range(len(inout_nodes)):
-                        if nd1 == int(inout_nodes[i][1]):
-                            elements_seg3[elem] = (int(inout_nodes[i][2]), nd3, nd1)  # fluid inlet node numbering
-                        elif nd3 == int(inout_nodes[i][1]):
-                            elements_seg3[elem] = (nd1, int(inout_nodes[i][2]), nd3)  # fluid outlet node numbering
-                else:
-                    elements_seg3[elem] = (nd1, nd2, nd3)  # normal node numbering for D, B32 elements
-
-        # Check if we found new eigenmode
-        if line[5:10] == "PMODE":
-            eigenmode = int(line[30:36])
-        # Check if we found displacement section
-        if line[5:9] == "DISP":
-            mode_disp_found = True
-        # we found a displacement line in the frd file
-        if mode_disp_found and (line[1:3] == "-1"):
-            elem = int(line[4:13])
-            mode_disp_x = float(line[13:25])
-            mode_disp_y = float(line[25:37])
-            mode_disp_z = float(line[37:49])
-            mode_disp[elem] = FreeCAD.Vector(mode_disp_x, mode_disp_y, mode_disp_z)
-        if line[5:11] == "STRESS":
-            mode_stress_found = True
-        # we found a stress line in the frd file
-        if mode_stress_found and (line[1:3] == "-1"):
-            elem = int(line[4:13])
-            stress_1 = float(line[13:25])
-            stress_2 = float(line[25:37])
-            stress_3 = float(line[37:49])
-            stress_4 = float(line[49:61])
-            stress_5 = float(line[61:73])
-            stress_6 = float(line[73:85])
-            mode_stress[elem] = (stress_1, stress_2, stress_3, stress_4, stress_5, stress_6)
-            mode_stressv[elem] = FreeCAD.Vector(stress_1, stress_2, stress_3)
-        if line[5:13] == "TOSTRAIN":
-            mode_strain_found = True
-        # we found a strain line in the frd file
-        if mode_strain_found and (line[1:3] == "-1"):
-            elem = int(line[4:13])
-            strain_1 = float(line[13:25])
-            strain_2 = float(line[25:37])
-            strain_3 = float(line[37:49])
-#            strain_4 = float(line[49:61])  #Not used in vector
-#            strain_5 = float(line[61:73])
-#            strain_6 = float(line[73:85])
-            mode_strain[elem] = FreeCAD.Vector(strain_1, strain_2, strain_3)
-
-        if line[5:7] == "PE":
-            mode_peeq_found = True
-        # we found an equivalent plastic strain line in the frd file
-        if mode_peeq_found and (line[1:3] == "-1"):
-            elem = int(line[4:13])
-            peeq = float(line[13:25])
-            mode_peeq[elem] = (peeq)
-        # Check if we found a time step
-        if line[4:10] == "1PSTEP":
-            mode_time_found = True
-        if mode_time_found and (line[2:7] == "100CL"):
-            timetemp = float(line[13:25])
-            if timetemp > timestep:
-                timestep = timetemp
-        if line[5:11] == "NDTEMP":
-            mode_temp_found = True
-        # we found a temperatures line in the frd file
-        if mode_temp_found and (line[1:3] == "-1"):
-            elem = int(line[4:13])
-            temperature = float(line[13:25])
-            mode_temp[elem] = (temperature)
-        if line[5:11] == "MAFLOW":
-            mode_massflow_found = True
-        # we found a mass flow line in the frd file
-        if mode_massflow_found and (line[1:3] == "-1"):
-            elem = int(line[4:13])
-            massflow = float(line[13:25])
-            mode_massflow[elem] = (massflow * 1000)  # convert units to kg/s from t/s
-            if inout_nodes:
-                for i in range(len(inout_nodes)):
-                    if elem == int(inout_nodes[i][1]):
-                        node = int(inout_nodes[i][2])
-                        mode_massflow[node] = (massflow * 1000)  # convert units to kg/s from t/s
-        if line[5:11] == "STPRES":
-            mode_networkpressure_found = True
-        # we found a network pressure line in the frd file
-        if mode_networkpressure_found and (line[1:3] == "-1"):
-            elem = int(line[4:13])
-            networkpressure = float(line[13:25])
-            mode_networkpressure[elem] = (networkpressure)
-            if inout_nodes:
-                for i in range(len(inout_nodes)):
-                    if elem == int(inout_nodes[i][1]):
-                        node = int(inout_nodes[i][2])
-                        mode_networkpressure[node] = (networkpressure)
-        # Check for the end of a section
-        if line[1:3] == "-3":
-            if mode_disp_found:
-                mode_disp_found = False
-
-            if mode_stress_found:
-                mode_stress_found = False
-
-            if mode_strain_found:
-                mode_strain_found = False
-
-            if mode_peeq_found:
-                mode_peeq_found = False
-
-            if mode_temp_found:
-                mode_temp_found = False
-
-            if mode_time_found:
-                mode_time_found = False
-
-            if mode_massflow_found:
-                mode_massflow_found = False
-
-            if mode_networkpressure_found:
-                mode_networkpressure_found = False
-
-            if mode_disp and mode_stress and mode_strain and mode_temp:
-                mode_results = {}
-                mode_results['number'] = eigenmode
-                mode_results['disp'] = mode_disp
-                mode_results['stress'] = mode_stress
-                mode_results['stressv'] = mode_stressv
-                mode_results['strainv'] = mode_strain
-                mode_results['peeq'] = mode_peeq
-                mode_results['temp'] = mode_temp
-                mode_results['time'] = timestep
-                results.append(mode_results)
-                mode_disp = {}
-                mode_stress = {}
-                mode_stressv = {}
-                mode_strain = {}
-                mode_peeq = {}
-                mode_temp = {}
-                eigenmode = 0
-
-            if mode_disp and mode_stress and mode_strain:
-                mode_results = {}
-                mode_results['number'] = eigenmode
-                mode_results['disp'] = mode_disp
-                mode_results['stress'] = mode_stress
-                mode_results['stressv'] = mode_stressv
-                mode_results['strainv'] = mode_strain
-                mode_results['peeq'] = mode_peeq
-                mode_results['time'] = 0  # Don't return time if static
-                results.append(mode_results)
-                mode_disp = {}
-                mode_stress = {}
-                mode_stressv = {}
-                mode_strain = {}
-                mode_peeq = {}
-                eigenmode = 0
-
-            if mode_massflow and mode_networkpressure:
-                mode_results = {}
-                mode_results['number'] = eigenmode
-                mode_results['mflow'] = mode_massflow
-                mode_results['npressure'] = mode_networkpressure
-                mode_results['time'] = timestep
-                results.append(mode_results)
-                mode_massflow = {}
-                mode_networkpressure = {}
-                eigenmode = 0
-            nodes_found = False
-            elements_found = False
-
-    frd_file.close()
-    if not inout_nodes:
-        if results:
-            if 'mflow' in results[0] or 'npressure' in results[0]:
-                FreeCAD.Console.PrintError('We have mflow or npressure, but no inout_nodes file.\n')
-    if not nodes:
-        FreeCAD.Console.PrintError('FEM: No nodes found in Frd file.\n')
-    return {
-        'Nodes': nodes,
-        'Seg2Elem': elements_seg2,
-        'Seg3Elem': elements_seg3,
-        'Tria3Elem': elements_tria3,
-        'Tria6Elem': elements_tria6,
-        'Quad4Elem': elements_quad4,
-        'Quad8Elem': elements_quad8,
-        'Tetra4Elem': elements_tetra4,
-        'Tetra10Elem': elements_tetra10,
-        'Hexa8Elem': elements_hexa8,
-        'Hexa20Elem': elements_hexa20,
-        'Penta6Elem': elements_penta6,
-        'Penta15Elem': elements_penta15,
-        'Results': results
-    }
+    for node, (x, y, z) in zip(node_ids.tolist(), node_coords.tolist()):
+        nodes[node] = FreeCAD.Vector(x, y, z)
+    return nodes
+
+
+def result_set_to_dict(result_arrays):
+    '''converts a result set of FrdReader.read_result_set() into the dictionaries of readResult()
+    '''
+    result_set = {'number': result_arrays['number']}
+    if 'disp' in result_arrays:
+        node_ids, values = result_arrays['disp']
+        result_set['disp'] = nodes_to_dict(node_ids, values)
+    if 'stress' in result_arrays:
+        node_ids, values = result_arrays['stress']
+        result_set['stress'] = dict(zip(node_ids.tolist(), map(tuple, values.tolist())))
+        result_set['stressv'] = nodes_to_dict(node_ids, values[:, :3])
+    if 'strain' in result_arrays:
+        node_ids, values = result_arrays['strain']
+        result_set['strainv'] = nodes_to_dict(node_ids, values[:, :3])
+    for result_key in ('peeq', 'temp', 'mflow', 'npressure'):
+        if result_key in result_arrays:
+            node_ids, values = result_arrays[result_key]
+            result_set[result_key] = dict(zip(node_ids.tolist(), values[:, 0].tolist()))
+    if 'disp' in result_arrays and 'peeq' not in result_set:
+        result_set['peeq'] = {}
+    result_set['time'] = result_arrays['time']
+    return result_set
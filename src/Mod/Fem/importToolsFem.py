@@ -29,7 +29,6 @@ __url__ = "http://www.freecadweb.org"
 #  \brief FreeCAD FEM import tools
 
 import FreeCAD
-from math import pow, sqrt
 import numpy as np
 
 
@@ -118,88 +117,52 @@ def get_MaxDimElementFromList(elem_list):
     return elem_list[-1]
 
 
+# element keys of the FEM mesh data --> (FemMesh element type, number of nodes)
+# the order is the order the elements are added to the FemMesh
+femmesh_element_types = (
+    ('Hexa8Elem', 'Volume', 8),
+    ('Penta6Elem', 'Volume', 6),
+    ('Tetra4Elem', 'Volume', 4),
+    ('Tetra10Elem', 'Volume', 10),
+    ('Penta15Elem', 'Volume', 15),
+    ('Hexa20Elem', 'Volume', 20),
+    ('Tria3Elem', 'Face', 3),
+    ('Tria6Elem', 'Face', 6),
+    ('Quad4Elem', 'Face', 4),
+    ('Quad8Elem', 'Face', 8),
+    ('Seg2Elem', 'Edge', 2),
+    ('Seg3Elem', 'Edge', 3))
+
+
 def make_femmesh(mesh_data):
     ''' makes an FreeCAD FEM Mesh object from FEM Mesh data
+    every entry of the mesh data could be a dictionary {id: (value, ...)}
+    or a tuple (ids, values) of sequences or numpy arrays
+    the nodes and the elements of every element type are added in one call
     '''
     import Fem
     mesh = Fem.FemMesh()
     m = mesh_data
     if ('Nodes' in m) and (len(m['Nodes']) > 0):
         print("Found: nodes")
-        if (
-                ('Seg2Elem' in m) or
-                ('Seg3Elem' in m) or
-                ('Tria3Elem' in m) or
-                ('Tria6Elem' in m) or
-                ('Quad4Elem' in m) or
-                ('Quad8Elem' in m) or
-                ('Tetra4Elem' in m) or
-                ('Tetra10Elem' in m) or
-                ('Penta6Elem' in m) or
-                ('Penta15Elem' in m) or
-                ('Hexa8Elem' in m) or
-                ('Hexa20Elem' in m)
-        ):
-
-            nds = m['Nodes']
+        element_keys = [key for key, element_type, nodes_count in femmesh_element_types]
+        if [key for key in element_keys if key in m]:
             print("Found: elements")
-            for i in nds:
-                n = nds[i]
-                mesh.addNode(n[0], n[1], n[2], i)
-            elms_hexa8 = m['Hexa8Elem']
-            for i in elms_hexa8:
-                e = elms_hexa8[i]
-                mesh.addVolume([e[0], e[1], e[2], e[3], e[4], e[5], e[6], e[7]], i)
-            elms_penta6 = m['Penta6Elem']
-            for i in elms_penta6:
-                e = elms_penta6[i]
-                mesh.addVolume([e[0], e[1], e[2], e[3], e[4], e[5]], i)
-            elms_tetra4 = m['Tetra4Elem']
-            for i in elms_tetra4:
-                e = elms_tetra4[i]
-                mesh.addVolume([e[0], e[1], e[2], e[3]], i)
-            elms_tetra10 = m['Tetra10Elem']
-            for i in elms_tetra10:
-                e = elms_tetra10[i]
-                mesh.addVolume([e[0], e[1], e[2], e[3], e[4], e[5], e[6], e[7], e[8], e[9]], i)
-            elms_penta15 = m['Penta15Elem']
-            for i in elms_penta15:
-                e = elms_penta15[i]
-                mesh.addVolume([e[0], e[1], e[2], e[3], e[4], e[5], e[6], e[7], e[8], e[9],
-                                e[10], e[11], e[12], e[13], e[14]], i)
-            elms_hexa20 = m['Hexa20Elem']
-            for i in elms_hexa20:
-                e = elms_hexa20[i]
-                mesh.addVolume([e[0], e[1], e[2], e[3], e[4], e[5], e[6], e[7], e[8], e[9],
-                                e[10], e[11], e[12], e[13], e[14], e[15], e[16], e[17], e[18], e[19]], i)
-            elms_tria3 = m['Tria3Elem']
-            for i in elms_tria3:
-                e = elms_tria3[i]
-                mesh.addFace([e[0], e[1], e[2]], i)
-            elms_tria6 = m['Tria6Elem']
-            for i in elms_tria6:
-                e = elms_tria6[i]
-                mesh.addFace([e[0], e[1], e[2], e[3], e[4], e[5]], i)
-            elms_quad4 = m['Quad4Elem']
-            for i in elms_quad4:
-                e = elms_quad4[i]
-                mesh.addFace([e[0], e[1], e[2], e[3]], i)
-            elms_quad8 = m['Quad8Elem']
-            for i in elms_quad8:
-                e = elms_quad8[i]
-                mesh.addFace([e[0], e[1], e[2], e[3], e[4], e[5], e[6], e[7]], i)
-            elms_seg2 = m['Seg2Elem']
-            for i in elms_seg2:
-                e = elms_seg2[i]
-                mesh.addEdge([e[0], e[1]], i)
-            elms_seg3 = m['Seg3Elem']
-            for i in elms_seg3:
-                e = elms_seg3[i]
-                mesh.addEdge([e[0], e[1], e[2]], i)
+            node_ids, node_coords = get_mesh_data_arrays(m['Nodes'], 3, np.float64)
+            mesh.addNodes(node_coords, node_ids)
+            elements_count = {}
+            for key, element_type, nodes_count in femmesh_element_types:
+                elements_count[key] = 0
+                if key in m:
+                    elem_ids, elem_nodes = get_mesh_data_arrays(m[key], nodes_count, np.int64)
+                    if elem_ids:
+                        elements_count[key] = mesh.addElements(element_type, elem_nodes, elem_ids)
             print("imported mesh: {} nodes, {} HEXA8, {} PENTA6, {} TETRA4, {} TETRA10, {} PENTA15".format(
-                  len(nds), len(elms_hexa8), len(elms_penta6), len(elms_tetra4), len(elms_tetra10), len(elms_penta15)))
+                  len(node_ids), elements_count['Hexa8Elem'], elements_count['Penta6Elem'], elements_count['Tetra4Elem'],
+                  elements_count['Tetra10Elem'], elements_count['Penta15Elem']))
             print("imported mesh: {} HEXA20, {} TRIA3, {} TRIA6, {} QUAD4, {} QUAD8, {} SEG2, {} SEG3".format(
-                  len(elms_hexa20), len(elms_tria3), len(elms_tria6), len(elms_quad4), len(elms_quad8), len(elms_seg2), len(elms_seg3)))
+                  elements_count['Hexa20Elem'], elements_count['Tria3Elem'], elements_count['Tria6Elem'], elements_count['Quad4Elem'],
+                  elements_count['Quad8Elem'], elements_count['Seg2Elem'], elements_count['Seg3Elem']))
         else:
             FreeCAD.Console.PrintError("No Elements found!\n")
     else:
@@ -207,6 +170,20 @@ def make_femmesh(mesh_data):
     return mesh
 
 
+def get_mesh_data_arrays(mesh_data_entry, values_count, dtype):
+    ''' returns the ids and the values of an entry of the FEM mesh data as flat lists
+    the entry is a dictionary {id: (value, ...)} or a tuple (ids, values)
+    '''
+    if isinstance(mesh_data_entry, dict):
+        ids = list(mesh_data_entry.keys())
+        values = [mesh_data_entry[i] for i in ids]
+    else:
+        ids, values = mesh_data_entry
+        ids = np.asarray(ids).tolist()
+    values = np.asarray(values, dtype=dtype).reshape(len(ids) * values_count)
+    return ids, values.tolist()
+
+
 def fill_femresult_mechanical(results, result_set, span):
     ''' fills  an FreeCAD FEM mechanical result object with result data
     '''
@@ -223,11 +200,9 @@ def fill_femresult_mechanical(results, result_set, span):
     if 'disp' in result_set:
         disp = result_set['disp']
         no_of_values = len(disp)
-        displacement = []
-        for k, v in disp.items():
-            displacement.append(v)
+        displacement = vectors_to_array(disp.values())
 
-        x_max, y_max, z_max = map(max, zip(*displacement))
+        x_max, y_max, z_max = displacement.max(axis=0).tolist()
         if eigenmode_number > 0:
             max_disp = max(x_max, y_max, z_max)
             # Allow for max displacement to be 0.1% of the span
@@ -239,7 +214,7 @@ def fill_femresult_mechanical(results, result_set, span):
 
         results.DisplacementVectors = list(map((lambda x: x * scale), disp.values()))
         results.NodeNumbers = list(disp.keys())
-        results.DisplacementLengths = calculate_disp_abs(displacement)
+        results.DisplacementLengths = calculate_disp_abs_array(displacement).tolist()
 
         if 'stressv' in result_set:
             stressv = result_set['stressv']
@@ -252,31 +227,18 @@ def fill_femresult_mechanical(results, result_set, span):
         if 'stress' in result_set:
             stress = result_set['stress']
             if len(stress) > 0:
-                mstress = []
-                prinstress1 = []
-                prinstress2 = []
-                prinstress3 = []
-                shearstress = []
-                for i in stress.values():
-                    mstress.append(calculate_von_mises(i))
-                    prin1, prin2, prin3, shear = calculate_principal_stress(i)
-                    prinstress1.append(prin1)
-                    prinstress2.append(prin2)
-                    prinstress3.append(prin3)
-                    shearstress.append(shear)
+                stress_array = np.array(list(stress.values()), dtype=np.float64).reshape(len(stress), 6)
+                mstress = calculate_von_mises_array(stress_array)
+                prinstress = calculate_principal_stress_array(stress_array)
                 if eigenmode_number > 0:
-                    results.StressValues = list(map((lambda x: x * scale), mstress))
-                    results.PrincipalMax = list(map((lambda x: x * scale), prinstress1))
-                    results.PrincipalMed = list(map((lambda x: x * scale), prinstress2))
-                    results.PrincipalMin = list(map((lambda x: x * scale), prinstress3))
-                    results.MaxShear = list(map((lambda x: x * scale), shearstress))
+                    mstress = mstress * scale
+                    prinstress = prinstress * scale
                     results.Eigenmode = eigenmode_number
-                else:
-                    results.StressValues = mstress
-                    results.PrincipalMax = prinstress1
-                    results.PrincipalMed = prinstress2
-                    results.PrincipalMin = prinstress3
-                    results.MaxShear = shearstress
+                results.StressValues = mstress.tolist()
+                results.PrincipalMax = prinstress[:, 0].tolist()
+                results.PrincipalMed = prinstress[:, 1].tolist()
+                results.PrincipalMin = prinstress[:, 2].tolist()
+                results.MaxShear = prinstress[:, 3].tolist()
             stress_keys = list(stress.keys())
             if (results.NodeNumbers != 0 and results.NodeNumbers != stress_keys):
                 print("Inconsistent FEM results: element number for Stress doesn't equal element number for Displacement {} != {}"
@@ -338,9 +300,9 @@ def fill_femresult_mechanical(results, result_set, span):
     temp_min = temp_avg = temp_max = mflow_min = mflow_avg = mflow_max = npress_min = npress_avg = npress_max = 0
 
     if results.DisplacementVectors:
-        x_max, y_max, z_max = map(max, zip(*displacement))
-        x_min, y_min, z_min = map(min, zip(*displacement))
-        sum_list = map(sum, zip(*displacement))
+        x_max, y_max, z_max = displacement.max(axis=0).tolist()
+        x_min, y_min, z_min = displacement.min(axis=0).tolist()
+        sum_list = map(sum, zip(*displacement.tolist()))
         x_avg, y_avg, z_avg = [i / no_of_values for i in sum_list]
         a_min = min(results.DisplacementLengths)
         a_avg = sum(results.DisplacementLengths) / no_of_values
@@ -403,36 +365,63 @@ def fill_femresult_mechanical(results, result_set, span):
 
 
 # helper
+def vectors_to_array(vectors):
+    '''stacks FreeCAD vectors or 3-tuples into a numpy array of shape (N, 3)'''
+    if isinstance(vectors, np.ndarray):
+        return vectors.reshape(len(vectors), 3)
+    return np.array([(v[0], v[1], v[2]) for v in vectors], dtype=np.float64).reshape(-1, 3)
+
+
 def calculate_von_mises(i):
+    return float(calculate_von_mises_array(np.array([i], dtype=np.float64))[0])
+
+
+def calculate_von_mises_array(stress):
+    '''von mises stress of all nodes at once
+    stress: numpy array of shape (N, 6) with the columns s11, s22, s33, s12, s23, s31
+    '''
     # Von mises stress (http://en.wikipedia.org/wiki/Von_Mises_yield_criterion)
-    s11 = i[0]
-    s22 = i[1]
-    s33 = i[2]
-    s12 = i[3]
-    s23 = i[4]
-    s31 = i[5]
-    s11s22 = pow(s11 - s22, 2)
-    s22s33 = pow(s22 - s33, 2)
-    s33s11 = pow(s33 - s11, 2)
-    s12s23s31 = 6 * (pow(s12, 2) + pow(s23, 2) + pow(s31, 2))
-    vm_stress = sqrt(0.5 * (s11s22 + s22s33 + s33s11 + s12s23s31))
+    s11 = stress[:, 0]
+    s22 = stress[:, 1]
+    s33 = stress[:, 2]
+    s12 = stress[:, 3]
+    s23 = stress[:, 4]
+    s31 = stress[:, 5]
+    s11s22 = np.square(s11 - s22)
+    s22s33 = np.square(s22 - s33)
+    s33s11 = np.square(s33 - s11)
+    s12s23s31 = 6 * (np.square(s12) + np.square(s23) + np.square(s31))
+    vm_stress = np.sqrt(0.5 * (s11s22 + s22s33 + s33s11 + s12s23s31))
     return vm_stress
 
 
 def calculate_principal_stress(i):
-    sigma = np.array([[i[0], i[3], i[4]],
-                      [i[3], i[1], i[5]],
-                      [i[4], i[5], i[2]]])
-    # compute principal stresses
-    eigvals = list(np.linalg.eigvalsh(sigma))
-    eigvals.sort()
-    eigvals.reverse()
-    maxshear = (eigvals[0] - eigvals[2]) / 2.0
-    return (eigvals[0], eigvals[1], eigvals[2], maxshear)
+    prin1, prin2, prin3, maxshear = calculate_principal_stress_array(np.array([i], dtype=np.float64))[0].tolist()
+    return (prin1, prin2, prin3, maxshear)
+
+
+def calculate_principal_stress_array(stress):
+    '''principal stresses and max shear of all nodes at once
+    stress: numpy array of shape (N, 6) with the columns s11, s22, s33, s12, s23, s31
+    returns a numpy array of shape (N, 4) with the columns max principal, med principal, min principal, max shear
+    '''
+    sigma = np.empty((len(stress), 3, 3))
+    sigma[:, 0, 0] = stress[:, 0]
+    sigma[:, 1, 1] = stress[:, 1]
+    sigma[:, 2, 2] = stress[:, 2]
+    sigma[:, 0, 1] = sigma[:, 1, 0] = stress[:, 3]
+    sigma[:, 0, 2] = sigma[:, 2, 0] = stress[:, 4]
+    sigma[:, 1, 2] = sigma[:, 2, 1] = stress[:, 5]
+    # compute principal stresses, eigvalsh returns them in ascending order
+    eigvals = np.linalg.eigvalsh(sigma)[:, ::-1]
+    maxshear = (eigvals[:, 0] - eigvals[:, 2]) / 2.0
+    return np.column_stack((eigvals, maxshear))
 
 
 def calculate_disp_abs(displacements):
-    disp_abs = []
-    for d in displacements:
-        disp_abs.append(sqrt(pow(d[0], 2) + pow(d[1], 2) + pow(d[2], 2)))
-    return disp_abs
+    return calculate_disp_abs_array(vectors_to_array(displacements)).tolist()
+
+
+def calculate_disp_abs_array(displacements):
+    '''displacement lengths of all nodes at once, displacements: numpy array of shape (N, 3)'''
+    return np.sqrt(np.square(displacements[:, 0]) + np.square(displacements[:, 1]) + np.square(displacements[:, 2]))
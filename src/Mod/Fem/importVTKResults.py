@@ -69,7 +69,12 @@ def export(objectslist, filename):
     if not obj.isDerivedFrom("Fem::FemResultObject"):
         FreeCAD.Console.PrintError("object selcted is not FemResultObject.\n")
         return
-    Fem.writeResult(filename, obj)
+    if filename.lower().endswith('.vtu') and hasattr(obj, 'DisplacementVectors'):
+        # mechanical results are written with appended raw binary data, much faster and smaller than the generic writer
+        import writeVTUResults
+        writeVTUResults.write_result_vtu(obj, filename)
+    else:
+        Fem.writeResult(filename, obj)
 
 
 ########## module specific methods ##########
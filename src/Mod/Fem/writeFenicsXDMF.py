@@ -29,6 +29,7 @@ from importToolsFem import \
     get_FemMeshObjectMeshGroups
 from xml.etree import ElementTree as ET  # parsing xml files and exporting
 import numpy as np
+import os
 
 
 __title__ = "FreeCAD Fenics XDMF mesh writer"
@@ -41,6 +42,7 @@ __url__ = "http://www.freecadweb.org"
 
 ENCODING_ASCII = 'ASCII'
 ENCODING_HDF5 = 'HDF5'
+ENCODING_BINARY = 'Binary'  # raw little endian heavy data in a .bin file beside the xdmf file
 
 FreeCAD_Group_Dimensions = {
     "Vertex": 0,
@@ -73,6 +75,26 @@ def numpy_array_to_str(npa):
     return res
 
 
+def numpy_array_to_binary(npa, dataitem, heavydata):
+    """
+        Appends the array to the open heavy data file and sets
+        the binary format attributes of the data item pointing to it
+    """
+    dt = str(npa.dtype)
+    if 'int' in dt:
+        npa = np.ascontiguousarray(npa, dtype='<i8')
+        dataitem.set("NumberType", "Int")
+    else:
+        npa = np.ascontiguousarray(npa, dtype='<f8')
+        dataitem.set("NumberType", "Float")
+    dataitem.set("Precision", "8")
+    dataitem.set("Format", "Binary")
+    dataitem.set("Endian", "Little")
+    dataitem.set("Seek", str(heavydata.tell()))
+    dataitem.text = os.path.basename(heavydata.name)
+    heavydata.write(npa.tobytes())
+
+
 def points_to_numpy(pts, dim=3):
     return np.array([[p.x, p.y, p.z] for p in pts])[:, :dim]
 
@@ -81,9 +103,10 @@ def tuples_to_numpy(tpls, numbers_per_line):
     return np.array([list(t) for t in tpls])[:, :numbers_per_line]
 
 
-def write_fenics_mesh_points_xdmf(fem_mesh_obj, geometrynode, encoding=ENCODING_ASCII):
+def write_fenics_mesh_points_xdmf(fem_mesh_obj, geometrynode, encoding=ENCODING_ASCII, heavydata=None):
     """
-        Writes either into hdf5 file or into open mesh file
+        Writes either into hdf5 file, into open mesh file or into
+        the open heavydata file for binary encoding
     """
 
     numnodes = fem_mesh_obj.FemMesh.NodeCount
@@ -106,6 +129,14 @@ def write_fenics_mesh_points_xdmf(fem_mesh_obj, geometrynode, encoding=ENCODING_
             recalc_nodes_ind_dict[key] = ind
 
         dataitem.text = numpy_array_to_str(points_to_numpy(nodes, dim=effective_dim))
+    elif encoding == ENCODING_BINARY:
+        dataitem = ET.SubElement(geometrynode, "DataItem", Dimensions="%d %d" % (numnodes, effective_dim))
+        nodes = []
+        for (ind, (key, node)) in enumerate(fem_mesh_obj.FemMesh.Nodes.iteritems()):
+            nodes.append(node)
+            recalc_nodes_ind_dict[key] = ind
+
+        numpy_array_to_binary(points_to_numpy(nodes, dim=effective_dim), dataitem, heavydata)
     elif encoding == ENCODING_HDF5:
         pass
 
@@ -116,7 +147,8 @@ def write_fenics_mesh_codim_xdmf(fem_mesh_obj,
                                  topologynode,
                                  nodes_dict,
                                  codim=0,
-                                 encoding=ENCODING_ASCII):
+                                 encoding=ENCODING_ASCII,
+                                 heavydata=None):
     mesh_dimension = get_FemMeshObjectDimension(fem_mesh_obj)
 
     element_types = get_FemMeshObjectElementTypes(fem_mesh_obj, remove_zero_element_entries=True)
@@ -153,13 +185,16 @@ def write_fenics_mesh_codim_xdmf(fem_mesh_obj,
     if encoding == ENCODING_ASCII:
         dataitem = ET.SubElement(topologynode, "DataItem", NumberType="UInt", Dimensions="%d %d" % (num_topo, nodes_per_element), Format="XML")
         dataitem.text = numpy_array_to_str(tuples_to_numpy(nodeindices, nodes_per_element))
+    elif encoding == ENCODING_BINARY:
+        dataitem = ET.SubElement(topologynode, "DataItem", Dimensions="%d %d" % (num_topo, nodes_per_element))
+        numpy_array_to_binary(tuples_to_numpy(nodeindices, nodes_per_element), dataitem, heavydata)
     elif encoding == ENCODING_HDF5:
         pass
 
     return fc_topo
 
 
-def write_fenics_mesh_scalar_cellfunctions(name, cell_array, attributenode, encoding=ENCODING_ASCII):
+def write_fenics_mesh_scalar_cellfunctions(name, cell_array, attributenode, encoding=ENCODING_ASCII, heavydata=None):
     attributenode.set("AttributeType", "Scalar")
     attributenode.set("Center", "Cell")
     attributenode.set("Name", name)
@@ -169,6 +204,9 @@ def write_fenics_mesh_scalar_cellfunctions(name, cell_array, attributenode, enco
     if encoding == ENCODING_ASCII:
         dataitem = ET.SubElement(attributenode, "DataItem", Dimensions="%d %d" % (num_cells, num_dims), Format="XML")
         dataitem.text = numpy_array_to_str(cell_array)
+    elif encoding == ENCODING_BINARY:
+        dataitem = ET.SubElement(attributenode, "DataItem", Dimensions="%d %d" % (num_cells, num_dims))
+        numpy_array_to_binary(cell_array, dataitem, heavydata)
     elif encoding == ENCODING_HDF5:
         pass
 
@@ -214,6 +252,7 @@ Example: mesh with two topologies and one mesh function for the facet one
 def write_fenics_mesh_xdmf(fem_mesh_obj, outputfile, group_values_dict={}, encoding=ENCODING_ASCII):
     """
         For the export of xdmf.
+        With ENCODING_BINARY the arrays are written into outputfile with .bin extension.
     """
 
     FreeCAD_to_Fenics_dict = {
@@ -248,10 +287,14 @@ def write_fenics_mesh_xdmf(fem_mesh_obj, outputfile, group_values_dict={}, encod
     # TOOD: for every marked group write own grid node with topology (ref if cells)
     #       geometry ref, attribute
 
+    heavydata = None
+    if encoding == ENCODING_BINARY:
+        heavydata = open(os.path.splitext(outputfile)[0] + ".bin", "wb")
+
     #####################################
     # write base topo and geometry
-    nodes_dict = write_fenics_mesh_points_xdmf(fem_mesh_obj, base_geometry, encoding=encoding)
-    write_fenics_mesh_codim_xdmf(fem_mesh_obj, base_topology, nodes_dict, codim=0, encoding=encoding)
+    nodes_dict = write_fenics_mesh_points_xdmf(fem_mesh_obj, base_geometry, encoding=encoding, heavydata=heavydata)
+    write_fenics_mesh_codim_xdmf(fem_mesh_obj, base_topology, nodes_dict, codim=0, encoding=encoding, heavydata=heavydata)
     #####################################
 
     fem_mesh = fem_mesh_obj.FemMesh
@@ -274,7 +317,8 @@ def write_fenics_mesh_xdmf(fem_mesh_obj, outputfile, group_values_dict={}, encod
         mesh_function_topology_description = write_fenics_mesh_codim_xdmf(fem_mesh_obj,
                                                                           mesh_function_topology,
                                                                           nodes_dict,
-                                                                          codim=mesh_function_codim, encoding=encoding)
+                                                                          codim=mesh_function_codim, encoding=encoding,
+                                                                          heavydata=heavydata)
 
         mesh_function_geometry = ET.SubElement(mesh_function_grid, "Geometry", Reference="XML")
         mesh_function_geometry.text = "/Xdmf/Domain/Grid/Geometry"
@@ -294,10 +338,13 @@ def write_fenics_mesh_xdmf(fem_mesh_obj, outputfile, group_values_dict={}, encod
         topo_array = np.vstack((val_array,)).T
         write_fenics_mesh_scalar_cellfunctions(mesh_function_name,
                                                topo_array,
-                                               mesh_function_attribute, encoding=ENCODING_ASCII)
+                                               mesh_function_attribute, encoding=encoding, heavydata=heavydata)
 
     # TODO: improve cell functions support
 
+    if heavydata is not None:
+        heavydata.close()
+
     fp = open(outputfile, "w")
     fp.write('''<?xml version="1.0"?>\n<!DOCTYPE Xdmf SYSTEM "Xdmf.dtd" []>\n''')
     fp.write(ET.tostring(root))
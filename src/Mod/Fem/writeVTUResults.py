@@ -0,0 +1,193 @@
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+__title__ = "FreeCAD Result VTU writer with appended raw data"
+__url__ = "http://www.freecadweb.org"
+
+## @package writeVTUResults
+#  \ingroup FEM
+#  \brief FreeCAD VTU writer for mechanical results, the heavy data is appended as raw binary data
+
+import FreeCAD
+import importToolsFem
+import numpy as np
+
+
+# (element dimension, number of nodes) --> vtk cell type, the node order of FreeCAD and vtk is the same
+vtk_cell_types = {
+    (2, 3): 5,  # VTK_TRIANGLE
+    (2, 4): 9,  # VTK_QUAD
+    (2, 6): 22,  # VTK_QUADRATIC_TRIANGLE
+    (2, 8): 23,  # VTK_QUADRATIC_QUAD
+    (3, 4): 10,  # VTK_TETRA
+    (3, 5): 14,  # VTK_PYRAMID
+    (3, 6): 13,  # VTK_WEDGE
+    (3, 8): 12,  # VTK_HEXAHEDRON
+    (3, 10): 24,  # VTK_QUADRATIC_TETRA
+    (3, 20): 25,  # VTK_QUADRATIC_HEXAHEDRON
+}
+
+# result object property --> vtk array name, the same names as Fem.writeResult uses
+vtu_result_vectors = (
+    ('DisplacementVectors', 'Displacement'),
+    ('StrainVectors', 'Strain vectors'),
+    ('StressVectors', 'Stress vectors'),
+)
+vtu_result_scalars = (
+    ('UserDefined', 'User Defined Results'),
+    ('Temperature', 'Temperature'),
+    ('PrincipalMax', 'Maximum Principal stress'),
+    ('PrincipalMed', 'Median Principal stress'),
+    ('PrincipalMin', 'Minimum Principal stress'),
+    ('MaxShear', 'Max shear stress (Tresca)'),
+    ('StressValues', 'Von Mises stress'),
+    ('MassFlowRate', 'Mass Flow Rate'),
+    ('NetworkPressure', 'Network Pressure'),
+    ('Peeq', 'Peeq'),
+)
+
+vtu_types = {
+    np.dtype('<f8'): 'Float64',
+    np.dtype('<i8'): 'Int64',
+    np.dtype('u1'): 'UInt8',
+}
+
+
+def get_femmesh_cells(femmesh, node_ids):
+    ''' connectivity, offsets and vtk cell types of the face and volume elements of femmesh,
+    the connectivity uses the indices of the nodes in the sorted node_ids array
+    '''
+    cell_nodes = []
+    cell_types = []
+    for dim, elements in ((2, femmesh.Faces), (3, femmesh.Volumes)):
+        for e in elements:
+            nodes = femmesh.getElementNodes(e)
+            cell_type = vtk_cell_types.get((dim, len(nodes)))
+            if cell_type is None:
+                FreeCAD.Console.PrintWarning('Element {} with {} nodes is not supported by the VTU writer.\n'.format(e, len(nodes)))
+                continue
+            cell_nodes.extend(nodes)
+            cell_types.append((cell_type, len(nodes)))
+    types = np.array([t for t, n in cell_types], dtype='u1')
+    offsets = np.cumsum([n for t, n in cell_types], dtype='<i8')
+    connectivity = np.searchsorted(node_ids, np.array(cell_nodes, dtype=np.int64)).astype('<i8')
+    return connectivity, offsets, types
+
+
+def get_result_fields(result_obj, node_ids, scale):
+    ''' generator of (vtk array name, number of components, get_array) of all not empty result fields,
+    get_array returns the values in the order of node_ids, nodes without value get 0.0
+    the fields are only read from the result object when get_array is called
+    '''
+    result_ids = np.array(result_obj.NodeNumbers, dtype=np.int64)
+    index = np.searchsorted(node_ids, result_ids)
+
+    def field_getter(prop, components, factor):
+        def get_array():
+            values = getattr(result_obj, prop)
+            if components == 3:
+                values = importToolsFem.vectors_to_array(values)
+            else:
+                values = np.array(values, dtype=np.float64)
+            field = np.zeros((len(node_ids), components) if components > 1 else len(node_ids))
+            field[index] = values * factor
+            return field
+        return get_array
+
+    for prop, name in vtu_result_vectors:
+        if len(getattr(result_obj, prop)) > 1:
+            factor = scale if prop == 'DisplacementVectors' else 1.0
+            yield name, 3, field_getter(prop, 3, factor)
+    for prop, name in vtu_result_scalars:
+        if hasattr(result_obj, prop) and len(getattr(result_obj, prop)) > 1:
+            yield name, 1, field_getter(prop, 1, 1.0)
+
+
+def write_result_vtu(result_obj, filename, scale=None):
+    ''' writes the mechanical result result_obj and its mesh into the VTU file filename,
+    all arrays are appended raw binary data, one field after the other is read from the result object and written
+    scale is applied to the node coordinates and the displacements, it defaults to the scale Fem.writeResult uses
+    '''
+    if scale is None:
+        unit_schema = FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Units").GetInt("UserSchema", 0)
+        scale = 0.001 if unit_schema == 0 else 1.0  # mm in FreeCAD --> SI length in result file
+    femmesh = result_obj.Mesh.FemMesh
+    nodes = femmesh.Nodes
+    node_ids = np.array(sorted(nodes), dtype=np.int64)
+    points = importToolsFem.vectors_to_array([nodes[n] for n in node_ids]) * scale
+    connectivity, offsets, types = get_femmesh_cells(femmesh, node_ids)
+    fields = list(get_result_fields(result_obj, node_ids, scale))
+    write_vtu_appended(filename, points, connectivity, offsets, types, fields)
+
+
+def write_vtu_appended(filename, points, connectivity, offsets, types, point_fields=()):
+    ''' writes an unstructured grid VTU file with all data arrays as appended raw binary data
+    point_fields: list of (name, number of components, get_array) of Float64 point data,
+    get_array is called when the field is written, thus only one field needs to be in memory at once
+    '''
+    num_points = len(points)
+    arrays = []  # (xml data array attributes, number of bytes, get_array)
+    for name, components, get_array in point_fields:
+        arrays.append(({'Name': name, 'type': 'Float64', 'NumberOfComponents': components},
+                       num_points * components * 8, lambda get_array=get_array: get_array().astype('<f8')))
+    point_data_count = len(arrays)
+    mesh_arrays = (
+        ({'type': 'Float64', 'NumberOfComponents': 3}, points.astype('<f8')),
+        ({'Name': 'connectivity'}, connectivity.astype('<i8')),
+        ({'Name': 'offsets'}, offsets.astype('<i8')),
+        ({'Name': 'types'}, types.astype('u1')),
+    )
+    for attributes, array in mesh_arrays:
+        attributes['type'] = vtu_types[array.dtype]
+        arrays.append((attributes, array.nbytes, lambda array=array: array))
+
+    # every appended array is prefixed by its size in bytes as UInt64
+    xml_arrays = []
+    offset = 0
+    for attributes, nbytes, get_array in arrays:
+        attributes = ' '.join('{}="{}"'.format(k, attributes[k]) for k in sorted(attributes))
+        xml_arrays.append('<DataArray {} format="appended" offset="{}"/>'.format(attributes, offset))
+        offset += 8 + nbytes
+
+    f = open(filename, 'wb')
+    header = [
+        '<?xml version="1.0"?>',
+        '<VTKFile type="UnstructuredGrid" version="1.0" byte_order="LittleEndian" header_type="UInt64">',
+        '<UnstructuredGrid>',
+        '<Piece NumberOfPoints="{}" NumberOfCells="{}">'.format(num_points, len(types)),
+        '<PointData>'] + xml_arrays[:point_data_count] + [
+        '</PointData>',
+        '<Points>', xml_arrays[point_data_count], '</Points>',
+        '<Cells>'] + xml_arrays[point_data_count + 1:] + [
+        '</Cells>',
+        '</Piece>',
+        '</UnstructuredGrid>',
+        '<AppendedData encoding="raw">',
+        '_']
+    f.write('\n'.join(header).encode('utf-8'))
+    for attributes, nbytes, get_array in arrays:
+        array = np.ascontiguousarray(get_array())
+        if array.nbytes != nbytes:
+            f.close()
+            raise ValueError('Size of data array {} does not match the mesh.'.format(attributes.get('Name', 'Points')))
+        f.write(np.array([nbytes], dtype='<u8').tobytes())
+        f.write(array.tobytes())
+    f.write('\n</AppendedData>\n</VTKFile>\n'.encode('utf-8'))
+    f.close()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+'''
+Memoization of Path.Area.makeSections.
+
+Operations build a Path.Area from their base geometry and section it at each step down
+on every recompute, although most recomputes only change feeds, start points and the
+like. makeSections() here returns the section shapes of an area from a cache, keyed by
+the geometry of the shapes added to the area, its work plane, its parameters and the
+section heights. The geometry is compared by a digest of its BREP, so envelopes which
+are rebuilt from unchanged geometry, and operations sharing base geometry, hit the cache.
+'''
+
+import PathScripts.PathLog as PathLog
+import hashlib
+
+from collections import OrderedDict
+
+PathLog.setLevel(PathLog.Level.INFO, PathLog.thisModule())
+
+# number of makeSections calls the results are kept of
+CacheSize = 64
+
+
+def shapeKey(shape):
+    '''shapeKey(shape) ... returns a digest of the geometry of shape, which is equal for shapes
+    with equal geometry even if they are different objects.'''
+    data = shape.exportBrepToString()
+    if not isinstance(data, bytes):
+        data = data.encode('utf-8')
+    return hashlib.sha1(data).hexdigest()
+
+
+class SectionCache(object):
+    '''SectionCache([size=CacheSize]) ... keeps the section shapes of the last size makeSections
+    calls, evicting the least recently used ones first.'''
+
+    def __init__(self, size=CacheSize):
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, area, mode, project, heights):
+        '''key(area, mode, project, heights) ... returns the key of the sections of area.'''
+        shapes = tuple((shapeKey(shape), op) for (shape, op) in area.Shapes)
+        try:
+            plane = area.Workplane
+            plane = None if plane is None or plane.isNull() else shapeKey(plane)
+        except Exception:
+            plane = None
+        params = tuple(sorted(area.getParams().items()))
+        return (shapes, plane, params, mode, bool(project), tuple(heights or []))
+
+    def makeSections(self, area, mode=0, project=False, heights=None):
+        '''makeSections(area, [mode=0], [project=False], [heights=None]) ... returns the shapes of
+        area.makeSections(mode=mode, project=project, heights=heights) as a list, from the cache
+        if possible.'''
+        key = self.key(area, mode, project, heights)
+        shapes = self.entries.pop(key, None)
+        if shapes is None:
+            self.misses += 1
+            shapes = [section.getShape() for section in area.makeSections(mode=mode, project=project, heights=heights)]
+        else:
+            self.hits += 1
+            PathLog.debug("reusing %d sections" % len(shapes))
+        self.entries[key] = shapes
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+        return list(shapes)
+
+    def clear(self):
+        '''clear() ... removes all entries.'''
+        self.entries.clear()
+
+
+_cache = SectionCache()
+
+def makeSections(area, mode=0, project=False, heights=None):
+    '''makeSections(area, [mode=0], [project=False], [heights=None]) ... returns the section shapes
+    of area from the cache shared by all operations, see SectionCache.makeSections.'''
+    return _cache.makeSections(area, mode, project, heights)
+
+def clearCache():
+    '''clearCache() ... empties the cache shared by all operations.'''
+    _cache.clear()
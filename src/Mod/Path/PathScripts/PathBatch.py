@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+'''
+Headless batch processing of Path jobs: creates a job for each of a list of models,
+recomputes its operations and posts its G-code, without any dialogs.
+
+The job of each model comes from a template, which is either
+ * a FreeCAD document with a job, its operations and tool controllers. The shape of
+   the base object of the job, which has to be a plain Part::Feature, is replaced by
+   the model and the document recomputed.
+ * a job template (job_*.xml, see Path_ExportTemplate) with the post processor settings
+   and tool controllers. A setup script can add the operations, it is run with job, doc,
+   base and model (the file name) defined.
+The models are processed in a pool of worker processes, one model per process at a time.
+A summary with the timings of each model is printed, and optionally written as CSV.
+
+From the command line:
+    FreeCADCmd -c "from PathScripts import PathBatch; PathBatch.main()" -- -t job.FCStd part*.step
+'''
+
+from __future__ import print_function
+
+import FreeCAD
+import Part
+import PathScripts.PathLog as PathLog
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+import traceback
+
+from PathScripts import PathCycleTime
+from PathScripts import PathJob
+from PathScripts import PathPost
+from PathScripts import PathToolController
+from PathScripts import PostUtils
+from PathScripts.PathPostProcessor import PostProcessor
+from PathScripts.PathPreferences import PathPreferences
+
+PathLog.setLevel(PathLog.Level.INFO, PathLog.thisModule())
+
+# output file of each model, %D is replaced by the directory of the model, %m by its
+# name without extension and %j by the label of the job
+DefaultOutput = '%D/%m.ngc'
+
+Columns = ['model', 'status', 'operations', 'commands', 'load', 'recompute', 'post', 'total', 'cycle', 'output']
+
+
+class Options(object):
+    '''Options(template, [output], [script], [postProcessor], [postArgs], [processes]) ... how each model
+    is processed, see main() for the meaning of each. postProcessor and postArgs default to the job's.'''
+
+    def __init__(self, template, output=DefaultOutput, script=None, postProcessor=None, postArgs=None, processes=0):
+        self.template = template
+        self.output = output
+        self.script = script
+        self.postProcessor = postProcessor
+        self.postArgs = postArgs
+        self.processes = processes
+
+
+def loadModel(doc, filename):
+    '''loadModel(doc, filename) ... returns a Part::Feature in doc with the shape read from filename.'''
+    obj = doc.addObject('Part::Feature', os.path.splitext(os.path.basename(filename))[0])
+    obj.Shape = Part.read(filename)
+    return obj
+
+def findJob(doc):
+    '''findJob(doc) ... returns the first job of doc.'''
+    for obj in doc.Objects:
+        if hasattr(obj, 'Proxy') and isinstance(obj.Proxy, PathJob.ObjectPathJob):
+            return obj
+    raise ValueError("no job in %s" % doc.FileName)
+
+def createJob(model, options):
+    '''createJob(model, options) ... returns (doc, job) of model, created from options.template.'''
+    if options.template.lower().endswith('.fcstd'):
+        doc = FreeCAD.openDocument(options.template)
+        job = findJob(doc)
+        if job.Base is None or job.Base.TypeId != 'Part::Feature':
+            FreeCAD.closeDocument(doc.Name)
+            raise ValueError("the base of %s in %s is not a Part::Feature" % (job.Label, options.template))
+        job.Base.Shape = Part.read(model)
+        base = job.Base
+    else:
+        doc = FreeCAD.newDocument()
+        base = loadModel(doc, model)
+        job = doc.addObject("Path::FeatureCompoundPython", "Job")
+        PathJob.ObjectPathJob(job, base, options.template)
+    FreeCAD.setActiveDocument(doc.Name)
+    if options.script:
+        namespace = {'job': job, 'doc': doc, 'base': base, 'model': model}
+        with open(options.script) as f:
+            exec(compile(f.read(), options.script, 'exec'), namespace)
+    return (doc, job)
+
+def outputFile(pattern, model, job):
+    '''outputFile(pattern, model, job) ... returns the output file of model, see DefaultOutput.'''
+    filename = pattern.replace('%D', os.path.dirname(os.path.abspath(model)))
+    filename = filename.replace('%m', os.path.splitext(os.path.basename(model))[0])
+    return filename.replace('%j', job.Label)
+
+def postJob(job, filename, postProcessor=None, postArgs=None):
+    '''postJob(job, filename, [postProcessor], [postArgs]) ... posts job to filename, and returns the
+    G-code if filename is '-'. postProcessor and postArgs default to the job's, or the preferences if the job has none.'''
+    postname = postProcessor or job.PostProcessor or PathPreferences.defaultPostProcessor()
+    if not postname or not PostProcessor.exists(postname):
+        raise ValueError("post processor '%s' not found" % postname)
+    if postArgs is None:
+        postArgs = job.PostProcessorArgs if job.PostProcessor else PathPreferences.defaultPostProcessorArgs()
+    processor = PostProcessor.load(postname)
+    return processor.export(PathPost.buildPostList(job), filename, postArgs, PathPreferences.postProcessorProcesses())
+
+def jobOperations(job):
+    '''jobOperations(job) ... returns the active operations of job, its tool controllers have a Path too.'''
+    return [obj for obj in job.Group if hasattr(obj, 'Path') and getattr(obj, 'Active', True)
+            and not isinstance(getattr(obj, 'Proxy', None), PathToolController.ToolController)]
+
+def _invalid(doc):
+    return [obj.Label for obj in doc.Objects if not obj.isValid()]
+
+def processModel(task):
+    '''processModel((model, options)) ... creates, recomputes and posts the job of model and returns
+    its summary as a dictionary with an entry for each of Columns.'''
+    (model, options) = task
+    result = dict((column, '') for column in Columns)
+    result['model'] = model
+    begin = time.time()
+    doc = None
+    try:
+        (doc, job) = createJob(model, options)
+        result['load'] = time.time() - begin
+        start = time.time()
+        for obj in job.Group:
+            obj.touch()
+        doc.recompute()
+        result['recompute'] = time.time() - start
+        invalid = _invalid(doc)
+        if invalid:
+            raise ValueError("recompute failed: %s" % ', '.join(invalid))
+        operations = jobOperations(job)
+        result['operations'] = len(operations)
+        result['commands'] = sum(len(obj.Path.Commands) for obj in operations)
+        result['cycle'] = PathCycleTime.formatTime(PathCycleTime.estimateJob(job)[0].time)
+        start = time.time()
+        filename = outputFile(options.output, model, job)
+        postJob(job, filename, options.postProcessor, options.postArgs)
+        result['post'] = time.time() - start
+        result['output'] = filename
+        result['status'] = 'ok'
+    except Exception as e:
+        PathLog.debug(traceback.format_exc())
+        result['status'] = 'failed: %s' % e
+    finally:
+        if doc is not None:
+            FreeCAD.closeDocument(doc.Name)
+    result['total'] = time.time() - begin
+    PathLog.info("%s: %s (%.2fs)" % (model, result['status'], result['total']))
+    return result
+
+def run(models, options):
+    '''run(models, options) ... processes each of models with options in options.processes worker
+    processes (0 for one per cpu) and returns the list of their summaries, see processModel().'''
+    tasks = [(model, options) for model in models]
+    return list(PostUtils.imapPool(processModel, tasks, options.processes))
+
+def _format(value):
+    if isinstance(value, float):
+        return "%.2f" % value
+    return str(value)
+
+def report(results, elapsed, out=sys.stdout):
+    '''report(results, elapsed, [out=sys.stdout]) ... prints the summaries of results as a table.'''
+    rows = [Columns] + [[_format(r[c]) for c in Columns] for r in results]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(Columns))]
+    for row in rows:
+        print('  '.join(cell.ljust(width) for (cell, width) in zip(row, widths)).rstrip(), file=out)
+    failed = len([r for r in results if r['status'] != 'ok'])
+    busy = sum(r['total'] for r in results)
+    print("%d models, %d failed, %.2fs (%.2fs in total in all processes)" % (len(results), failed, elapsed, busy), file=out)
+
+def writeCsv(results, filename):
+    '''writeCsv(results, filename) ... writes the summaries of results to filename.'''
+    with open(filename, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(Columns)
+        for r in results:
+            writer.writerow([_format(r[c]) for c in Columns])
+
+def main(argv=None):
+    '''main([argv]) ... the command line entry point, argv defaults to the arguments after '--'
+    on the command line, or all of them if there is none.'''
+    if argv is None:
+        argv = sys.argv[1:]
+        if '--' in argv:
+            argv = argv[argv.index('--') + 1:]
+    parser = argparse.ArgumentParser(prog='PathBatch', description='Create, recompute and post a Path job for each model.')
+    parser.add_argument('models', nargs='+', help='model files (STEP, IGES, BREP), glob patterns are expanded')
+    parser.add_argument('-t', '--template', required=True, help='FreeCAD document with a job, or job template (.xml)')
+    parser.add_argument('-o', '--output', default=DefaultOutput, help='output file of each model, %%D is the directory of the model, %%m its name and %%j the job label (default %s)' % DefaultOutput.replace('%', '%%'))
+    parser.add_argument('-s', '--script', help='python script run on each job after it is created')
+    parser.add_argument('--post', help='post processor, instead of the one of the job')
+    parser.add_argument('--post-args', help='post processor arguments, instead of the ones of the job')
+    parser.add_argument('-j', '--processes', type=int, default=0, help='number of worker processes, 0 for one per cpu (default)')
+    parser.add_argument('--csv', help='also write the summary to this file')
+    args = parser.parse_args(argv)
+
+    models = []
+    for pattern in args.models:
+        models.extend(sorted(glob.glob(pattern)) or [pattern])
+    options = Options(args.template, args.output, args.script, args.post, args.post_args, args.processes)
+    begin = time.time()
+    results = run(models, options)
+    report(results, time.time() - begin)
+    if args.csv:
+        writeCsv(results, args.csv)
+    return 0 if all(r['status'] == 'ok' for r in results) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -27,6 +27,7 @@ import FreeCAD
 import Path
 import PathScripts.PathLog as PathLog
 from PySide import QtCore, QtGui
+from PathScripts import PathAreaCache
 from PathScripts import PathUtils
 import ArchPanel
 import Part
@@ -169,8 +170,7 @@ class ObjectContour:
         obj.AreaParams = str(profile.getParams())
 
         PathLog.debug("Contour with params: {}".format(profile.getParams()))
-        sections = profile.makeSections(mode=0, project=True, heights=heights)
-        shapelist = [sec.getShape() for sec in sections]
+        shapelist = PathAreaCache.makeSections(profile, mode=0, project=True, heights=heights)
 
         params = {'shapes': shapelist,
                   'feedrate': self.horizFeed,
@@ -201,7 +201,7 @@ class ObjectContour:
             profileparams['Thicken'] = True
             profileparams['ToolRadius'] = self.radius - self.radius * .005
             profile.setParams(**profileparams)
-            sec = profile.makeSections(mode=0, project=False, heights=heights)[-1].getShape()
+            sec = PathAreaCache.makeSections(profile, mode=0, project=False, heights=heights)[-1]
             simobj = sec.extrude(FreeCAD.Vector(0, 0, baseobject.BoundBox.ZMax))
 
         return pp, simobj
@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+'''
+Cycle time estimation of paths, taking the acceleration of the machine into account.
+
+The moves of a path are planned the way motion controllers like grbl and LinuxCNC do:
+each move runs at its feed rate, limited by the velocity and acceleration limits of the
+axes it moves, and slows down for corners according to the junction deviation. Each move
+accelerates, cruises and decelerates in a trapezoidal velocity profile.
+
+The commands are only looked at once to collect the end points of the moves, everything
+else is done with numpy on arrays of all moves. Like in Path itself, lengths are in mm,
+velocities in mm/s and accelerations in mm/s^2.
+'''
+
+import PathScripts.PathLog as PathLog
+import math
+import numpy
+import time
+
+from PathScripts.PathGeom import PathGeom
+
+PathLog.setLevel(PathLog.Level.INFO, PathLog.thisModule())
+
+# default limits of the X, Y and Z axes
+MaxVelocity = (100.0, 100.0, 50.0)
+Acceleration = (500.0, 500.0, 250.0)
+# distance of the path through a corner from the corner itself, which determines the corner speed
+JunctionDeviation = 0.01
+
+CmdDrill = ['G73', 'G81', 'G82', 'G83', 'G84', 'G85', 'G86', 'G87', 'G88', 'G89']
+# drill cycles which feed back out of the hole
+CmdDrillFeedOut = ['G84', 'G85', 'G89']
+
+_Rapid = 0
+_Feed = 1
+_CW = 2
+_CCW = 3
+
+
+class Machine(object):
+    '''Machine([maxVelocity], [acceleration], [junctionDeviation], [toolChangeTime=0]) ... the
+    kinematic limits of a machine. maxVelocity and acceleration are tuples of the limits of
+    the X, Y and Z axes, rapid moves run at maxVelocity unless the tool controller limits them.
+    toolChangeTime is added for each M6.'''
+
+    def __init__(self, maxVelocity=MaxVelocity, acceleration=Acceleration, junctionDeviation=JunctionDeviation, toolChangeTime=0.0):
+        self.maxVelocity = numpy.array(maxVelocity, dtype=float)
+        self.acceleration = numpy.array(acceleration, dtype=float)
+        self.junctionDeviation = junctionDeviation
+        self.toolChangeTime = toolChangeTime
+
+
+class Feeds(object):
+    '''Feeds([horizFeed=0], [vertFeed=0], [horizRapid=0], [vertRapid=0]) ... the feed rates used
+    for moves without F parameter, and the rapid rates, as set by a tool controller.
+    0 means there is no limit besides the machine's.'''
+
+    def __init__(self, horizFeed=0.0, vertFeed=0.0, horizRapid=0.0, vertRapid=0.0):
+        self.horizFeed = horizFeed
+        self.vertFeed = vertFeed
+        self.horizRapid = horizRapid
+        self.vertRapid = vertRapid
+
+    @classmethod
+    def fromToolController(cls, tc):
+        '''fromToolController(tc) ... returns the Feeds of tool controller tc, or no limits if tc is None.'''
+        if tc is None:
+            return cls()
+        return cls(tc.HorizFeed.Value, tc.VertFeed.Value, tc.HorizRapid.Value, tc.VertRapid.Value)
+
+
+class Estimate(object):
+    '''The result of an estimation. All times are in seconds, distances in mm.
+    time is the sum of feedTime, rapidTime and dwellTime, the latter including tool changes.
+    nominalTime is what the moves take at their feed rate, without acceleration.
+    times and lengths hold the time and the length of each move, and end the position the moves
+    end at, for the Estimate of a single path.'''
+
+    def __init__(self):
+        self.time = 0.0
+        self.feedTime = 0.0
+        self.rapidTime = 0.0
+        self.dwellTime = 0.0
+        self.nominalTime = 0.0
+        self.feedDistance = 0.0
+        self.rapidDistance = 0.0
+        self.moves = 0
+        self.times = numpy.zeros(0)
+        self.lengths = numpy.zeros(0)
+        self.end = None
+
+    def __add__(self, other):
+        result = Estimate()
+        for attr in ['time', 'feedTime', 'rapidTime', 'dwellTime', 'nominalTime', 'feedDistance', 'rapidDistance', 'moves']:
+            setattr(result, attr, getattr(self, attr) + getattr(other, attr))
+        return result
+
+    def __str__(self):
+        return "%s (%d moves, feed %.0f mm in %.1fs, rapid %.0f mm in %.1fs, dwell %.1fs)" % (
+                formatTime(self.time), self.moves, self.feedDistance, self.feedTime,
+                self.rapidDistance, self.rapidTime, self.dwellTime)
+
+
+def formatTime(seconds):
+    '''formatTime(seconds) ... returns seconds as h:mm:ss.'''
+    seconds = int(round(seconds))
+    return "%d:%02d:%02d" % (seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+def moves(commands, position=None, toolChangeTime=0.0):
+    '''moves(commands, [position=None], [toolChangeTime=0]) ... returns the moves of commands as
+    (ends, kinds, centers, feeds, stops, dwell), starting at position:
+     * ends: (n, 3) array of the end points
+     * kinds: the kind of each move, rapid, straight, clockwise or counter clockwise arc
+     * centers: (n, 2) array of the arc centers, nan for straight moves
+     * feeds: the F parameter of each move, nan if there is none
+     * stops: True for moves the machine starts from standstill, after dwells, M codes etc.
+     * dwell: the time spent in dwells and tool changes
+    Drill cycles are split up in the moves they consist of. Axes without a position, at the
+    beginning of a path without start position, start at the first position they move to.'''
+    nan = float('nan')
+    pos = {} if position is None else {'X': position[0], 'Y': position[1], 'Z': position[2]}
+    records = []
+    stop = True
+    dwell = 0.0
+    feed = nan
+    retractInitial = True
+    kinds = dict([(name, _Rapid) for name in PathGeom.CmdMoveRapid] + [(name, _Feed) for name in PathGeom.CmdMoveStraight]
+            + [(name, _CW) for name in PathGeom.CmdMoveCW] + [(name, _CCW) for name in PathGeom.CmdMoveCCW])
+
+    for cmd in commands:
+        name = cmd.Name
+        kind = kinds.get(name)
+        if kind is not None:
+            params = cmd.Parameters
+            center = (nan, nan)
+            if kind >= _CW:
+                center = (pos.get('X', nan) + params.get('I', 0.0), pos.get('Y', nan) + params.get('J', 0.0))
+            pos.update(params)
+            if kind != _Rapid:
+                feed = params.get('F', feed)
+            records.append((pos.get('X', nan), pos.get('Y', nan), pos.get('Z', nan), kind, center[0], center[1], nan if kind == _Rapid else feed, stop))
+            stop = False
+        elif name in CmdDrill:
+            params = cmd.Parameters
+            x = params.get('X', pos.get('X', nan))
+            y = params.get('Y', pos.get('Y', nan))
+            z = params.get('Z', pos.get('Z', nan))
+            initial = pos.get('Z', nan)
+            retract = params.get('R', initial)
+            feed = params.get('F', feed)
+            back = initial if retractInitial else retract
+            records.append((x, y, initial, _Rapid, nan, nan, nan, stop))
+            records.append((x, y, retract, _Rapid, nan, nan, nan, False))
+            peck = params.get('Q', 0.0) if name == 'G83' else 0.0
+            depth = retract
+            while peck > 0 and depth - peck > z:
+                depth -= peck
+                records.append((x, y, depth, _Feed, nan, nan, feed, False))
+                records.append((x, y, retract, _Rapid, nan, nan, nan, False))
+                records.append((x, y, depth, _Rapid, nan, nan, nan, False))
+            records.append((x, y, z, _Feed, nan, nan, feed, False))
+            if name in ['G82', 'G89']:
+                dwell += params.get('P', 0.0)
+            # tapping stops to reverse the spindle, reversing the direction of a move stops anyway
+            if name in CmdDrillFeedOut:
+                records.append((x, y, retract, _Feed, nan, nan, feed, name == 'G84'))
+                records.append((x, y, back, _Rapid, nan, nan, nan, False))
+            else:
+                records.append((x, y, back, _Rapid, nan, nan, nan, False))
+            pos.update({'X': x, 'Y': y, 'Z': back})
+            stop = True
+        elif name in ['G98', 'G99']:
+            retractInitial = name == 'G98'
+        elif name in ['G4', 'G04']:
+            dwell += cmd.Parameters.get('P', 0.0)
+            stop = True
+        elif name.startswith('M'):
+            if name in ['M6', 'M06']:
+                dwell += toolChangeTime
+            stop = True
+
+    if not records:
+        return (numpy.zeros((0, 3)), numpy.zeros(0, dtype=int), numpy.zeros((0, 2)), numpy.zeros(0), numpy.zeros(0, dtype=bool), dwell)
+    records = numpy.array(records, dtype=float)
+    return (records[:, 0:3], records[:, 3].astype(int), records[:, 4:6], records[:, 6], records[:, 7] != 0, dwell)
+
+def _fillStart(ends, position):
+    '''returns the start points of the moves ending at ends. Axes without known position take
+    the first position they move to, in ends as well.'''
+    for axis in range(3):
+        unknown = numpy.isnan(ends[:, axis])
+        if unknown.any():
+            known = numpy.flatnonzero(~unknown)
+            ends[unknown, axis] = ends[known[0], axis] if len(known) else 0.0
+    starts = numpy.empty_like(ends)
+    starts[1:] = ends[:-1]
+    starts[0] = ends[0]
+    if position is not None:
+        starts[0] = numpy.where(numpy.isnan(position), ends[0], position)
+    return starts
+
+def _directionLimit(limits, direction):
+    '''returns the largest rate along direction for which no axis exceeds its limit.'''
+    with numpy.errstate(divide='ignore'):
+        return (limits / numpy.abs(direction)).min(axis=1)
+
+def estimate(commands, feeds=None, machine=None, position=None):
+    '''estimate(commands, [feeds=None], [machine=None], [position=None]) ... returns the Estimate
+    for commands, executed by machine (a default Machine if None) starting at position.
+    Moves without F parameter use the feed rates of feeds, see Feeds, rapid moves run at its
+    rapid rates.'''
+    begin = time.time()
+    feeds = feeds or Feeds()
+    machine = machine or Machine()
+    (ends, kinds, centers, F, stops, dwell) = moves(commands, position, machine.toolChangeTime)
+    result = Estimate()
+    result.dwellTime = dwell
+    result.time = dwell
+    if len(ends) == 0:
+        return result
+    starts = _fillStart(ends, position)
+    result.end = ends[-1].copy()
+    delta = ends - starts
+    isArc = kinds >= _CW
+    isRapid = kinds == _Rapid
+
+    # length and direction at both ends of each move
+    length = numpy.sqrt((delta * delta).sum(axis=1))
+    tangent0 = delta.copy()
+    tangent1 = delta.copy()
+    horizontal = numpy.hypot(delta[:, 0], delta[:, 1])
+    radius = numpy.full(len(ends), numpy.inf)
+    if isArc.any():
+        i = numpy.flatnonzero(isArc)
+        # an arc from an unknown start is taken as a straight move
+        centers = numpy.where(numpy.isnan(centers[i]), starts[i, :2], centers[i])
+        r0 = starts[i, :2] - centers
+        r1 = ends[i, :2] - centers
+        r = numpy.hypot(r0[:, 0], r0[:, 1])
+        a0 = numpy.arctan2(r0[:, 1], r0[:, 0])
+        a1 = numpy.arctan2(r1[:, 1], r1[:, 0])
+        cw = kinds[i] == _CW
+        sweep = numpy.where(cw, a0 - a1, a1 - a0) % (2 * math.pi)
+        sweep[sweep < 1e-9] = 2 * math.pi
+        horizontal[i] = r * sweep
+        length[i] = numpy.hypot(horizontal[i], delta[i, 2])
+        radius[i] = r
+        # the tangents of a counter clockwise arc point 90 degrees to the left of the radius
+        sign = numpy.where(cw, -1.0, 1.0)
+        tangent0[i, 0] = -sign * numpy.sin(a0) * horizontal[i]
+        tangent0[i, 1] = sign * numpy.cos(a0) * horizontal[i]
+        tangent1[i, 0] = -sign * numpy.sin(a1) * horizontal[i]
+        tangent1[i, 1] = sign * numpy.cos(a1) * horizontal[i]
+        tangent1[i, 2] = tangent0[i, 2]
+
+    # drop moves which don't go anywhere, the next move starts from standstill if they did
+    keep = length > 1e-9
+    if not keep.all():
+        kept = numpy.flatnonzero(keep)
+        carried = numpy.searchsorted(kept, numpy.flatnonzero(stops & ~keep))
+        stops = stops.copy()
+        stops[kept[carried[carried < len(kept)]]] = True
+        (length, horizontal, radius, tangent0, tangent1, kinds, F, stops, isArc, isRapid, delta) = [a[keep] for a in
+                (length, horizontal, radius, tangent0, tangent1, kinds, F, stops, isArc, isRapid, delta)]
+    count = len(length)
+    result.moves = count
+    if count == 0:
+        return result
+    tangent0 /= numpy.sqrt((tangent0 * tangent0).sum(axis=1))[:, None]
+    tangent1 /= numpy.sqrt((tangent1 * tangent1).sum(axis=1))[:, None]
+
+    # for the axis limits arcs move X and Y alike, and everything else in the direction of the move
+    direction = numpy.abs(delta) / length[:, None]
+    if isArc.any():
+        direction[isArc, 0] = horizontal[isArc] / length[isArc]
+        direction[isArc, 1] = direction[isArc, 0]
+        direction[isArc, 2] = numpy.abs(delta[isArc, 2]) / length[isArc]
+    slope = numpy.column_stack([horizontal / length, numpy.abs(delta[:, 2]) / length])
+
+    # the speed each move runs at, and its acceleration
+    unlimited = float('inf')
+    feedLimits = numpy.array([feeds.horizFeed or unlimited, feeds.vertFeed or unlimited])
+    rapidLimits = numpy.array([feeds.horizRapid or unlimited, feeds.vertRapid or unlimited])
+    speed = numpy.where(isRapid, _directionLimit(rapidLimits, slope), _directionLimit(feedLimits, slope))
+    hasFeed = ~isRapid & ~numpy.isnan(F) & (numpy.nan_to_num(F) > 0)
+    speed[hasFeed] = F[hasFeed]
+    speed = numpy.minimum(speed, _directionLimit(machine.maxVelocity, direction))
+    accel = _directionLimit(machine.acceleration, direction)
+    # the centripetal acceleration on an arc can't exceed the acceleration of X and Y
+    speed = numpy.minimum(speed, numpy.sqrt(machine.acceleration[:2].min() * radius))
+    nominal = length / speed
+
+    # the largest speed through each junction, see grbl's planner
+    junction = numpy.zeros(count + 1)
+    cosTheta = -(tangent1[:-1] * tangent0[1:]).sum(axis=1)
+    sinHalf = numpy.sqrt(numpy.clip((1 - cosTheta) / 2, 0.0, 1.0))
+    with numpy.errstate(divide='ignore'):
+        limit = numpy.minimum(accel[:-1], accel[1:]) * machine.junctionDeviation * sinHalf / (1 - sinHalf)
+    junction[1:-1] = numpy.minimum(limit, numpy.minimum(speed[:-1], speed[1:]) ** 2)
+    junction[:-1][stops] = 0.0
+
+    # the squared speed changes at most by 2 * accel * length along a move, which makes the
+    # backward and the forward pass of the planner running minima
+    cumulated = numpy.zeros(count + 1)
+    numpy.cumsum(2 * accel * length, out=cumulated[1:])
+    entry = numpy.minimum.accumulate((junction + cumulated)[::-1])[::-1] - cumulated
+    entry = numpy.minimum.accumulate(entry - cumulated) + cumulated
+    entry = numpy.maximum(entry, 0.0)
+
+    # trapezoidal velocity profile of each move, or a triangle if it doesn't reach its speed
+    w0 = entry[:-1]
+    w1 = entry[1:]
+    cruise = speed * speed
+    peak = numpy.minimum(cruise, (2 * accel * length + w0 + w1) / 2)
+    vPeak = numpy.sqrt(peak)
+    rampUp = (peak - w0) / (2 * accel)
+    rampDown = (peak - w1) / (2 * accel)
+    times = (vPeak - numpy.sqrt(w0)) / accel + (vPeak - numpy.sqrt(w1)) / accel
+    times += numpy.maximum(length - rampUp - rampDown, 0.0) / vPeak
+
+    result.times = times
+    result.lengths = length
+    result.rapidTime = float(times[isRapid].sum())
+    result.feedTime = float(times[~isRapid].sum())
+    result.rapidDistance = float(length[isRapid].sum())
+    result.feedDistance = float(length[~isRapid].sum())
+    result.nominalTime = float(nominal.sum())
+    result.time = result.rapidTime + result.feedTime + dwell
+    PathLog.debug("estimated %d moves in %.3fs" % (count, time.time() - begin))
+    return result
+
+def estimateJob(job, machine=None):
+    '''estimateJob(job, [machine=None]) ... returns (total, estimates) for the active operations of
+    job, estimates being a list of (operation, Estimate) tuples. Each operation starts where
+    the previous one ended. Tool controllers and other objects of the job which aren't
+    operations are skipped.'''
+    from PathScripts import PathToolController
+    from PathScripts import PathUtil
+    total = Estimate()
+    estimates = []
+    position = None
+    for obj in job.Group:
+        if not hasattr(obj, 'Path') or not getattr(obj, 'Active', True):
+            continue
+        if isinstance(getattr(obj, 'Proxy', None), PathToolController.ToolController):
+            continue
+        tc = PathUtil.toolControllerForOp(obj)
+        commands = obj.Path.Commands
+        estimated = estimate(commands, Feeds.fromToolController(tc), machine, position)
+        estimates.append((obj, estimated))
+        total = total + estimated
+        if estimated.end is not None:
+            position = estimated.end
+    return (total, estimates)
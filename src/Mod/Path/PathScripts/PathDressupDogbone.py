@@ -26,6 +26,7 @@ import DraftGeomUtils
 import FreeCAD
 import FreeCADGui
 import math
+import numpy
 import Part
 import Path
 import PathScripts.PathLog as PathLog
@@ -98,6 +99,39 @@ def pointFromCommand(cmd, pt, X='X', Y='Y', Z='Z'):
     z = cmd.Parameters.get(Z, pt.z)
     return FreeCAD.Vector(x, y, z)
 
+def chordsOf(commands):
+    '''chordsOf(commands) ... returns (moves, starts, ends) of the move commands of commands, moves
+    being their indices into commands and starts and ends (n, 3) arrays of the points they move from
+    and to. As for Chord the first move starts at the origin.'''
+    nan = float('nan')
+    moves = []
+    points = [(0.0, 0.0, 0.0)]
+    for (i, cmd) in enumerate(commands):
+        if cmd.Name in movecommands:
+            params = cmd.Parameters
+            moves.append(i)
+            points.append((params.get('X', nan), params.get('Y', nan), params.get('Z', nan)))
+    points = numpy.array(points, dtype=float)
+    # each axis keeps its position until a move changes it
+    index = numpy.arange(len(points))
+    for axis in range(3):
+        known = numpy.maximum.accumulate(numpy.where(numpy.isnan(points[:, axis]), 0, index))
+        points[:, axis] = points[known, axis]
+    return (moves, points[:-1], points[1:])
+
+def cornersOf(starts, ends, side):
+    '''cornersOf(starts, ends, side) ... returns a boolean array, entry i being True if the chord
+    from starts[i+1] to ends[i+1] folds back or turns to side relative to the chord before it,
+    see Chord.foldsBackOrTurns.'''
+    vectors = ends - starts
+    A = vectors[:-1]
+    B = vectors[1:]
+    # identical vectors head straight on, see Chord.getDirectionOfVector
+    same = (numpy.abs(A - B) <= numpy.finfo(float).eps).all(axis=1)
+    d = -A[:, 0] * B[:, 1] + A[:, 1] * B[:, 0]
+    turns = d < 0 if side == Side.Left else d > 0
+    return ~same & ((d == 0) | turns)
+
 def edgesForCommands(cmds, startPt):
     edges = []
     lastPt = startPt
@@ -270,6 +304,27 @@ class Chord (object):
     def connectsTo(self, chord):
         return PathGeom.pointsCoincide(self.End, chord.Start)
 
+# size of the grid cells chords connected to plunges are filed under by their start point, it has
+# to be larger than the tolerance of Chord.connectsTo for the adjacent cells to cover all candidates
+ConnectCellSize = 0.01
+
+def _connectCell(point):
+    return (int(math.floor(point.x / ConnectCellSize)), int(math.floor(point.y / ConnectCellSize)), int(math.floor(point.z / ConnectCellSize)))
+
+def addConnectedChord(grid, k, chord):
+    '''addConnectedChord(grid, k, chord) ... files chord, the k'th chord of the path, under the grid cell of its start.'''
+    grid.setdefault(_connectCell(chord.Start), []).append((k, chord))
+
+def connectedChords(grid, chord):
+    '''connectedChords(grid, chord) ... returns the chords in grid chord connects to, in the order they were added.'''
+    (x, y, z) = _connectCell(chord.End)
+    found = []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            for dz in (-1, 0, 1):
+                found.extend(item for item in grid.get((x + dx, y + dy, z + dz), []) if chord.connectsTo(item[1]))
+    return [c for (k, c) in sorted(found, key=lambda item: item[0])]
+
 class Bone:
     def __init__(self, boneId, obj, lastCommand, inChord, outChord, smooth):
         self.obj = obj
@@ -587,13 +642,13 @@ class ObjectDressup:
     def boneIsBlacklisted(self, bone):
         blacklisted = False
         parentConsumed = False
-        if bone.boneId in bone.obj.BoneBlacklist:
+        # the blacklists are read from the properties once per execute
+        if bone.boneId in self.boneBlacklist:
             blacklisted = True
         elif bone.location() in self.locationBlacklist:
-            bone.obj.BoneBlacklist.append(bone.boneId)
             blacklisted = True
-        elif hasattr(bone.obj.Base, 'BoneBlacklist'):
-            parentConsumed = bone.boneId not in bone.obj.Base.BoneBlacklist
+        elif self.baseBlacklist is not None:
+            parentConsumed = bone.boneId not in self.baseBlacklist
             blacklisted = parentConsumed
         if blacklisted:
             self.locationBlacklist.add(bone.location())
@@ -651,7 +706,7 @@ class ObjectDressup:
                             continue
                         #debugMarker(pt, "it", (0.0, 1.0, 1.0))
                         # 1. remove all redundant commands
-                        commands = commands[:-(len(inEdges) - i)]
+                        del commands[-(len(inEdges) - i):]
                         # 2., correct where c1 ends
                         c1 = bone1.outCommands[i]
                         c1Params = c1.Parameters
@@ -687,53 +742,57 @@ class ObjectDressup:
 
         self.setup(obj, False)
 
+        # The chords of all moves, and which of them form a corner with the one before, are
+        # determined up front. Chord objects are only created for moves which end up in a bone.
+        baseCommands = obj.Base.Path.Commands
+        (moves, starts, ends) = chordsOf(baseCommands)
+        plunges = (numpy.abs(ends[:, 2] - starts[:, 2]) > PathGeom.Tolerance).tolist()
+        candidates = [baseCommands[i].Name in movestraight and not plunge for (i, plunge) in zip(moves, plunges)]
+        corners = cornersOf(starts, ends, self.theOtherSideOf(obj.Side)).tolist()
+        starts = starts.tolist()
+        ends = ends.tolist()
+
+        def chordOf(k):
+            return Chord(FreeCAD.Vector(*starts[k]), FreeCAD.Vector(*ends[k]))
+
         commands = []           # the dressed commands
-        lastChord = Chord()     # the last chord
         lastCommand = None      # the command that generated the last chord
         lastBone = None         # track last bone for optimizations
-        oddsAndEnds = []        # track chords that are connected to plunges - in case they form a loop
+        oddsAndEnds = {}        # track chords that are connected to plunges - in case they form a loop
 
         boneId = 1
         self.bones = []
         self.locationBlacklist = set()
-        boneIserted = False
-
-        for (i, thisCommand) in enumerate(obj.Base.Path.Commands):
-            #if i > 14:
-            #    if lastCommand:
-            #        commands.append(lastCommand)
-            #        lastCommand = None
-            #    commands.append(thisCommand)
-            #    continue
-            PathLog.info("%3d: %s" % (i, thisCommand))
+        self.boneBlacklist = set(obj.BoneBlacklist)
+        self.baseBlacklist = set(obj.Base.BoneBlacklist) if hasattr(obj.Base, 'BoneBlacklist') else None
+
+        k = -1                  # index of the last move
+        for thisCommand in baseCommands:
             if thisCommand.Name in movecommands:
-                thisChord = lastChord.moveToParameters(thisCommand.Parameters)
-                thisIsACandidate = self.canAttachDogbone(thisCommand, thisChord)
+                k += 1
+                thisIsACandidate = candidates[k]
 
-                if thisIsACandidate and lastCommand and self.shouldInsertDogbone(obj, lastChord, thisChord):
+                # lastCommand is only set if the previous command was a move
+                if thisIsACandidate and lastCommand and corners[k - 1]:
                     PathLog.info("  Found bone corner")
-                    bone = Bone(boneId, obj, lastCommand, lastChord, thisChord, Smooth.InAndOut)
+                    bone = Bone(boneId, obj, lastCommand, chordOf(k - 1), chordOf(k), Smooth.InAndOut)
                     bones = self.insertBone(bone)
                     boneId += 1
                     if lastBone:
-                        PathLog.info("  removing potential path crossing")
-                        #debugMarker(thisChord.Start, "it", (1.0, 0.0, 1.0))
                         commands, bones = self.removePathCrossing(commands, lastBone, bone)
                     commands.extend(bones[:-1])
                     lastCommand = bones[-1]
                     lastBone = bone
-                elif lastCommand and thisChord.isAPlungeMove():
-                    PathLog.info("  Looking for connection in odds and ends")
+                elif lastCommand and plunges[k]:
+                    lastChord = chordOf(k - 1)
                     haveNewLastCommand = False
-                    for chord in (chord for chord in oddsAndEnds if lastChord.connectsTo(chord)):
+                    for chord in connectedChords(oddsAndEnds, lastChord):
                         if self.shouldInsertDogbone(obj, lastChord, chord):
-                            PathLog.info("    and there is one")
+                            PathLog.info("  Found bone corner in odds and ends")
                             bone = Bone(boneId, obj, lastCommand, lastChord, chord, Smooth.In)
                             bones = self.insertBone(bone)
                             boneId += 1
                             if lastBone:
-                                PathLog.info("    removing potential path crossing")
-                                #debugMarker(chord.Start, "it", (0.0, 1.0, 1.0))
                                 commands, bones = self.removePathCrossing(commands, lastBone, bone)
                             commands.extend(bones[:-1])
                             lastCommand = bones[-1]
@@ -744,26 +803,20 @@ class ObjectDressup:
                     commands.append(thisCommand)
                     lastBone = None
                 elif thisIsACandidate:
-                    PathLog.info("  is a candidate, keeping for later")
                     if lastCommand:
                         commands.append(lastCommand)
                     lastCommand = thisCommand
                     lastBone = None
                 else:
-                    PathLog.info("  nope")
                     if lastCommand:
                         commands.append(lastCommand)
                         lastCommand = None
                     commands.append(thisCommand)
                     lastBone = None
 
-                if lastChord.isAPlungeMove() and thisIsACandidate:
-                    PathLog.info("  adding to odds and ends")
-                    oddsAndEnds.append(thisChord)
-
-                lastChord = thisChord
+                if k > 0 and plunges[k - 1] and thisIsACandidate:
+                    addConnectedChord(oddsAndEnds, k, chordOf(k))
             else:
-                PathLog.info("  Clean slate")
                 if lastCommand:
                     commands.append(lastCommand)
                     lastCommand = None
@@ -29,9 +29,11 @@ import PathScripts
 import PathScripts.PathLog as PathLog
 import PathScripts.PathPreferencesPathDressup as PathPreferencesPathDressup
 import PathScripts.PathUtils as PathUtils
+import bisect
 import copy
 import math
 
+from collections import OrderedDict
 from PathScripts import PathUtils
 from PathScripts.PathGeom import PathGeom
 from PathScripts.PathDressupTagPreferences import HoldingTagPreferences
@@ -91,6 +93,10 @@ def debugCone(vector, r1, r2, height, label, color = None):
             obj.ViewObject.ShapeColor = color
 
 
+# number of tag shapes createSolidsAt keeps the solid of
+TagSolidCacheSize = 32
+_tagSolids = OrderedDict()
+
 class Tag:
     def __init__(self, id, x, y, width, height, angle, radius, enabled=True):
         PathLog.track("%.2f, %.2f, %.2f, %.2f, %.2f, %.2f, %d" % (x, y, width, height, angle, radius, enabled))
@@ -122,13 +128,35 @@ class Tag:
         self.toolRadius = R
         r1 = self.fullWidth() / 2
         self.r1 = r1
-        self.r2 = r1
+        # the solid only depends on the shape of the tag, tags of the same shape share it
+        key = (r1, self.height, self.angle, self.radius)
+        cached = _tagSolids.pop(key, None)
+        if cached is None:
+            cached = self.createSolid(r1)
+        _tagSolids[key] = cached
+        while len(_tagSolids) > TagSolidCacheSize:
+            _tagSolids.popitem(last=False)
+        (solid, self.isSquare, self.r2, self.actualHeight, self.realRadius) = cached
+        self.solid = solid.copy()
+        if not R == 0: # testing is easier if the solid is not rotated
+            angle = -PathGeom.getAngle(self.originAt(0)) * 180 / math.pi
+            PathLog.debug("solid.rotate(%f)" % angle)
+            self.solid.rotate(FreeCAD.Vector(0,0,0), FreeCAD.Vector(0,0,1), angle)
+        orig = self.originAt(z - 0.01 * self.actualHeight)
+        PathLog.debug("solid.translate(%s)" % orig)
+        self.solid.translate(orig)
+
+    def createSolid(self, r1):
+        # returns the solid of the tag at the origin and its dimensions
+        r2 = r1
+        isSquare = False
+        actualHeight = self.height
         height = self.height * 1.01
         radius = 0
         if self.angle == 90 and height > 0:
             # cylinder
-            self.isSquare = True
-            self.solid = Part.makeCylinder(r1, height)
+            isSquare = True
+            solid = Part.makeCylinder(r1, height)
             radius = min(min(self.radius, r1), self.height)
             PathLog.debug("Part.makeCone(%f, %f)" % (r1, height))
         elif self.angle > 0.0 and height > 0.0:
@@ -145,26 +173,18 @@ class Tag:
                 # triangular
                 r2 = 0
                 height = r1 * tangens * 1.01
-                self.actualHeight = height
-            self.r2 = r2
+                actualHeight = height
             PathLog.debug("Part.makeCone(%f, %f, %f)" % (r1, r2, height))
-            self.solid = Part.makeCone(r1, r2, height)
+            solid = Part.makeCone(r1, r2, height)
         else:
             # degenerated case - no tag
             PathLog.debug("Part.makeSphere(%f / 10000)" % (r1))
-            self.solid = Part.makeSphere(r1 / 10000)
-        if not R == 0: # testing is easier if the solid is not rotated
-            angle = -PathGeom.getAngle(self.originAt(0)) * 180 / math.pi
-            PathLog.debug("solid.rotate(%f)" % angle)
-            self.solid.rotate(FreeCAD.Vector(0,0,0), FreeCAD.Vector(0,0,1), angle)
-        orig = self.originAt(z - 0.01 * self.actualHeight)
-        PathLog.debug("solid.translate(%s)" % orig)
-        self.solid.translate(orig)
+            solid = Part.makeSphere(r1 / 10000)
         radius = min(self.radius, radius)
-        self.realRadius = radius
         if radius != 0:
             PathLog.debug("makeFillet(%.4f)" % radius)
-            self.solid = self.solid.makeFillet(radius, [self.solid.Edges[0]])
+            solid = solid.makeFillet(radius, [solid.Edges[0]])
+        return (solid, isSquare, r2, actualHeight, radius)
 
     def filterIntersections(self, pts, face):
         if type(face.Surface) == Part.Cone or type(face.Surface) == Part.Cylinder or type(face.Surface) == Part.Toroid:
@@ -490,6 +510,48 @@ class _RapidEdges:
                     return True
         return False
 
+class TagIndex:
+    '''Grid over the bounding boxes of the tag solids, so edges are only intersected with the
+    tags they can possibly intersect with.'''
+
+    def __init__(self, tags):
+        self.tags = tags
+        self.boxes = [tag.solid.BoundBox for tag in tags]
+        self.size = max([max(bb.XLength, bb.YLength) for bb in self.boxes] + [1.0])
+        self.cells = {}
+        for i, bb in enumerate(self.boxes):
+            for cell in self.cellsFor(bb):
+                self.cells.setdefault(cell, []).append(i)
+
+    def cellsFor(self, bb, limit=None):
+        tol = PathGeom.Tolerance
+        x0 = int(math.floor((bb.XMin - tol) / self.size))
+        x1 = int(math.floor((bb.XMax + tol) / self.size))
+        y0 = int(math.floor((bb.YMin - tol) / self.size))
+        y1 = int(math.floor((bb.YMax + tol) / self.size))
+        if limit is not None and (x1 - x0 + 1) * (y1 - y0 + 1) > limit:
+            return None
+        return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+    def overlaps(self, tb, bb):
+        tol = PathGeom.Tolerance
+        return (tb.XMin - tol <= bb.XMax and bb.XMin <= tb.XMax + tol and
+                tb.YMin - tol <= bb.YMax and bb.YMin <= tb.YMax + tol and
+                tb.ZMin - tol <= bb.ZMax and bb.ZMin <= tb.ZMax + tol)
+
+    def candidates(self, edge):
+        '''candidates(edge) ... returns the sorted indices of the tags whose bounding box overlaps edge's.'''
+        bb = edge.BoundBox
+        cells = self.cellsFor(bb, len(self.tags))
+        if cells is None:
+            # the edge is long, looking at all tags is faster
+            found = range(len(self.tags))
+        else:
+            found = set()
+            for cell in cells:
+                found.update(self.cells.get(cell, []))
+        return sorted(i for i in found if self.overlaps(self.boxes[i], bb))
+
 class PathData:
     def __init__(self, obj):
         PathLog.track(obj.Base.Name)
@@ -715,11 +777,12 @@ class ObjectTagDressup:
         PathLog.track()
         commands = []
         lastEdge = 0
-        lastTag = 0
         sameTag = None
         t = 0
         inters = None
         edge = None
+        candidates = None
+        tagIndex = TagIndex(tags)
 
         segm = 50
         if hasattr(obj, 'SegmentationFactor'):
@@ -732,30 +795,40 @@ class ObjectTagDressup:
         mapper = None
 
         while edge or lastEdge < len(pathData.edges):
-            PathLog.debug("------- lastEdge = %d/%d.%d/%d" % (lastEdge, lastTag, t, len(tags)))
+            PathLog.debug("------- lastEdge = %d/%d/%d" % (lastEdge, t, len(tags)))
             if not edge:
                 edge = pathData.edges[lastEdge]
                 debugEdge(edge, "=======  new edge: %d/%d" % (lastEdge, len(pathData.edges)))
                 lastEdge += 1
                 sameTag = None
+                candidates = None
 
             if mapper:
                 mapper.add(edge)
                 if mapper.mappingComplete():
                     commands.extend(mapper.commands)
                     edge = mapper.tail
+                    candidates = None
                     mapper = None
                 else:
                     edge = None
 
             if edge:
-                tIndex = (t + lastTag) % len(tags)
-                t += 1
-                i = tags[tIndex].intersects(edge, edge.FirstParameter)
-                if i and self.isValidTagStartIntersection(edge, i):
-                    mapper = MapWireToTag(edge, tags[tIndex], i, segm, pathData.maxZ)
-                    self.mappers.append(mapper)
-                    edge = mapper.tail
+                # skip the tags the edge can't intersect with
+                if candidates is None:
+                    candidates = tagIndex.candidates(edge)
+                k = bisect.bisect_left(candidates, t)
+                if k < len(candidates):
+                    tIndex = candidates[k]
+                    t = tIndex + 1
+                    i = tags[tIndex].intersects(edge, edge.FirstParameter)
+                    if i and self.isValidTagStartIntersection(edge, i):
+                        mapper = MapWireToTag(edge, tags[tIndex], i, segm, pathData.maxZ)
+                        self.mappers.append(mapper)
+                        edge = mapper.tail
+                        candidates = None
+                else:
+                    t = len(tags)
 
 
             if not mapper and t >= len(tags):
@@ -768,6 +841,7 @@ class ObjectTagDressup:
                     else:
                         commands.extend(PathGeom.cmdsForEdge(edge, segm=segm))
                 edge = None
+                candidates = None
                 t = 0
 
         lastCmd = Path.Command('G0', {'X': 0.0, 'Y': 0.0, 'Z': 0.0});
@@ -821,7 +895,7 @@ class ObjectTagDressup:
         for i, tag in enumerate(self.pathData.sortedTags(rawTags)):
             if tag.enabled:
                 if prev:
-                    if prev.solid.common(tag.solid).Faces:
+                    if prev.solid.BoundBox.intersect(tag.solid.BoundBox) and prev.solid.common(tag.solid).Faces:
                         PathLog.notice("Tag #%d intersects with previous tag - disabling\n" % i)
                         PathLog.debug("this tag = %d [%s]" % (i, tag.solid.BoundBox))
                         tag.enabled = False
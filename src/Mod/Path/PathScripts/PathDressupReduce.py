@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import FreeCADGui
+import Path
+import PathScripts.PathLog as PathLog
+
+from PathScripts import PathPointReduction
+from PathScripts import PathUtil
+from PathScripts import PathUtils
+from PathScripts.PathPreferences import PathPreferences
+from PySide import QtCore
+
+"""Reduce Dressup object and FreeCAD command"""
+
+PathLog.setLevel(PathLog.Level.INFO, PathLog.thisModule())
+
+# Qt tanslation handling
+def translate(context, text, disambig=None):
+    return QtCore.QCoreApplication.translate(context, text, disambig)
+
+
+class ObjectDressup:
+    '''Replaces runs of straight moves of the base path, as they result from tessellated
+    curves and surfaces, by fewer straight moves and arcs within Tolerance.'''
+
+    def __init__(self, obj, base):
+        obj.addProperty("App::PropertyLink", "ToolController", "Path", QtCore.QT_TRANSLATE_NOOP("App::Property", "The tool controller that will be used to calculate the path"))
+        obj.addProperty("App::PropertyLink", "Base", "Base", QtCore.QT_TRANSLATE_NOOP("PathDressup_Reduce", "The base path to modify"))
+        obj.addProperty("App::PropertyDistance", "Tolerance", "Dressup", QtCore.QT_TRANSLATE_NOOP("PathDressup_Reduce", "Maximum distance of the points of the base path from the reduced path"))
+        obj.addProperty("App::PropertyBool", "FitArcs", "Dressup", QtCore.QT_TRANSLATE_NOOP("PathDressup_Reduce", "Replace runs of moves along an arc by G2/G3 moves"))
+        obj.FitArcs = True
+        obj.addProperty("App::PropertyPercent", "Reduction", "Result", QtCore.QT_TRANSLATE_NOOP("PathDressup_Reduce", "Number of commands removed from the base path, in percent"))
+        obj.setEditorMode('Reduction', 1)  # read only
+        obj.addProperty("App::PropertyDistance", "Deviation", "Result", QtCore.QT_TRANSLATE_NOOP("PathDressup_Reduce", "Maximum distance of the points of the base path from the reduced path"))
+        obj.setEditorMode('Deviation', 1)  # read only
+        obj.Proxy = self
+        obj.Base = base
+
+    def __getstate__(self):
+        return None
+
+    def __setstate__(self, state):
+        return None
+
+    def setup(self, obj):
+        job = PathUtils.findParentJob(obj.Base)
+        try:
+            obj.Tolerance = job.GeometryTolerance
+        except AttributeError:
+            obj.Tolerance = PathPreferences.defaultGeometryTolerance()
+
+    def execute(self, obj):
+        if not obj.Base or not obj.Base.isDerivedFrom("Path::Feature") or not obj.Base.Path:
+            return
+        tolerance = obj.Tolerance.Value
+        if tolerance <= 0:
+            obj.Path = obj.Base.Path
+            return
+
+        before = obj.Base.Path.Commands
+        (commands, deviation) = PathPointReduction.reduceCommands(before, tolerance, obj.FitArcs)
+        if before:
+            obj.Reduction = int(100 * (len(before) - len(commands)) / len(before))
+        obj.Deviation = deviation
+        PathLog.info("%s: %d -> %d commands, deviation %.4f" % (obj.Label, len(before), len(commands), deviation))
+        obj.Path = Path.Path(commands)
+
+
+class ViewProviderDressup:
+
+    def __init__(self, vobj):
+        vobj.Proxy = self
+
+    def attach(self, vobj):
+        self.obj = vobj.Object
+        if self.obj and self.obj.Base:
+            for i in self.obj.Base.InList:
+                if hasattr(i, "Group"):
+                    group = i.Group
+                    for g in group:
+                        if g.Name == self.obj.Base.Name:
+                            group.remove(g)
+                    i.Group = group
+
+    def claimChildren(self):
+        return [self.obj.Base]
+
+    def __getstate__(self):
+        return None
+
+    def __setstate__(self, state):
+        return None
+
+    def onDelete(self, arg1=None, arg2=None):
+        '''this makes sure that the base operation is added back to the project and visible'''
+        FreeCADGui.ActiveDocument.getObject(arg1.Object.Base.Name).Visibility = True
+        job = PathUtils.findParentJob(arg1.Object)
+        PathUtils.addObjectToJob(arg1.Object.Base, job)
+        arg1.Object.Base = None
+        return True
+
+
+def Create(base, name='ReduceDressup'):
+    '''
+    Create(base, name='ReduceDressup') ... reduces the straight moves of the given path object.
+    '''
+    obj = FreeCAD.ActiveDocument.addObject('Path::FeaturePython', name)
+    dbo = ObjectDressup(obj, base)
+    job = PathUtils.findParentJob(base)
+    PathUtils.addObjectToJob(obj, job)
+
+    if FreeCAD.GuiUp:
+        ViewProviderDressup(obj.ViewObject)
+        obj.Base.ViewObject.Visibility = False
+
+    dbo.setup(obj)
+    obj.ToolController = PathUtil.toolControllerForOp(base)
+    return obj
+
+
+class CommandPathDressupReduce:
+
+    def GetResources(self):
+        return {'Pixmap': 'Path-Dressup',
+                'MenuText': QtCore.QT_TRANSLATE_NOOP("PathDressup_Reduce", "Reduce Dress-up"),
+                'ToolTip': QtCore.QT_TRANSLATE_NOOP("PathDressup_Reduce", "Creates a Dress-up object which reduces the number of straight moves of a selected path and fits arcs")}
+
+    def IsActive(self):
+        if FreeCAD.ActiveDocument is not None:
+            for o in FreeCAD.ActiveDocument.Objects:
+                if o.Name[:3] == "Job":
+                        return True
+        return False
+
+    def Activated(self):
+
+        # check that the selection contains exactly what we want
+        selection = FreeCADGui.Selection.getSelection()
+        if len(selection) != 1:
+            FreeCAD.Console.PrintError(translate("PathDressup_Reduce", "Please select one path object\n"))
+            return
+        baseObject = selection[0]
+        if not baseObject.isDerivedFrom("Path::Feature"):
+            FreeCAD.Console.PrintError(translate("PathDressup_Reduce", "The selected object is not a path\n"))
+            return
+        if baseObject.isDerivedFrom("Path::FeatureCompoundPython"):
+            FreeCAD.Console.PrintError(translate("PathDressup_Reduce", "Please select a Path object"))
+            return
+
+        # everything ok!
+        FreeCAD.ActiveDocument.openTransaction(translate("PathDressup_Reduce", "Create Reduce Dress-up"))
+        FreeCADGui.addModule('PathScripts.PathDressupReduce')
+        FreeCADGui.doCommand("PathScripts.PathDressupReduce.Create(FreeCAD.ActiveDocument.%s)" % baseObject.Name)
+        FreeCAD.ActiveDocument.commitTransaction()
+        FreeCAD.ActiveDocument.recompute()
+
+
+if FreeCAD.GuiUp:
+    # register the FreeCAD command
+    FreeCADGui.addCommand('PathDressup_Reduce', CommandPathDressupReduce())
+
+FreeCAD.Console.PrintLog("Loading PathDressupReduce... done\n")
@@ -197,7 +197,7 @@ class ObjectDrilling:
             if obj.Enabled[i] > 0:
                 locations.append({'x': obj.Positions[i].x, 'y': obj.Positions[i].y})
         if len(locations) > 0:
-            locations = PathUtils.sort_jobs(locations, ['x', 'y'])
+            locations = PathUtils.sort_jobs(locations, ['x', 'y'], optimize=True)
             output += "G90 " + obj.ReturnLevel + "\n"
             # rapid to clearance height
             output += "G0 Z" + str(obj.ClearanceHeight.Value) + "F " + PathUtils.fmt(self.vertRapid) + "\n"
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+'''
+Streaming G-code reader, for loading large programs for inspection and simulation.
+
+The input is memory mapped and tokenized with a single compiled regular expression,
+a chunk of lines at a time, and the commands of each chunk are returned as a batch
+of Path.Commands. Words are assigned to the G or M word preceding them on their
+line, as Path.Path does when it parses G-code. In addition the reader tracks the
+modal state of the program:
+ * lines with axis words but no G or M word repeat the active motion command
+ * words on lines without axis words or commands (S1000, F200, T3) are added
+   to the next command
+ * incremental moves (G91) are converted to absolute ones, and inch values (G20)
+   to mm, so the G90/G91 and G20/G21 commands themselves are dropped. They take
+   effect for the whole line they are on, and the words following them on the
+   line go to the line's motion command (G0 G90 X10 is G0 X10)
+ * line numbers (N) and program numbers (O) are dropped
+'''
+
+import Path
+import PathScripts.PathLog as PathLog
+import itertools
+import mmap
+import re
+import sys
+import time
+
+PathLog.setLevel(PathLog.Level.INFO, PathLog.thisModule())
+
+# size of the chunks the input is tokenized in, each returns one batch of commands
+ChunkSize = 1 << 20
+
+# a word, a comment or the end of a line - anything else (blanks, '%', '\r') is skipped
+_Tokens = re.compile(br'([A-Za-z])[ \t]*([-+]?(?:[0-9]+\.?[0-9]*|\.[0-9]+))|(\([^)\n]*\)?|;[^\n]*)|(\n)')
+_EndOfLine = [(b'', b'', b'', b'\n')]
+
+if sys.version_info[0] >= 3:
+    def _text(b):
+        return b.decode('utf-8', 'replace')
+    _Letters = dict((bytes([c]), chr(c).upper()) for c in range(ord('A'), ord('z') + 1) if chr(c).isalpha())
+else:
+    def _text(b):
+        return b
+    _Letters = dict((chr(c), chr(c).upper()) for c in range(ord('A'), ord('z') + 1) if chr(c).isalpha())
+
+Axes = ['X', 'Y', 'Z', 'A', 'B', 'C']
+# the parameters scaled from inch to mm, rotary axes and P, S, T etc. are left as they are
+Lengths = ['X', 'Y', 'Z', 'I', 'J', 'K', 'R', 'Q', 'F']
+# G codes which set the motion mode
+MotionModes = [0, 1, 2, 3, 73, 76, 81, 82, 83, 84, 85, 86, 87, 88, 89]
+# G codes which only change the state of the reader
+ModalModes = [20, 21, 90, 91]
+# words which are dropped
+Skipped = ['N', 'O']
+
+
+class GCodeReader(object):
+    '''GCodeReader([comments=True]) ... turns G-code into Path.Commands, see module documentation.
+    The modal state carries over from one call to the next, call reset() to start a new program.
+    If comments is False comments are skipped.'''
+
+    def __init__(self, comments=True):
+        self.comments = comments
+        self.codes = {}
+        self.reset()
+
+    def reset(self):
+        '''reset() ... resets the modal state to the beginning of a program.'''
+        self.motion = None
+        self.incremental = False
+        self.scale = 1.0
+        self.position = dict((axis, 0.0) for axis in Axes)
+        self.pending = {}
+
+    def _modal(self, number):
+        # applies one of ModalModes
+        if number in (90, 91):
+            self.incremental = number == 91
+        else:
+            self.scale = 25.4 if number == 20 else 1.0
+
+    def _command(self, name, number, params):
+        '''returns the Path.Command for name and params.
+        number is the number of G codes, None for anything else.'''
+        if number is not None:
+            if number in MotionModes:
+                self.motion = name
+            elif number == 80:
+                self.motion = None
+        if self.pending:
+            pending = self.pending
+            pending.update(params)
+            params = pending
+            self.pending = {}
+        if self.scale != 1.0:
+            for p in Lengths:
+                if p in params:
+                    params[p] *= self.scale
+        if self.incremental:
+            position = self.position
+            for axis in Axes:
+                if axis in params:
+                    params[axis] += position[axis]
+                    position[axis] = params[axis]
+        else:
+            # the other parameters end up in there as well, which doesn't hurt
+            self.position.update(params)
+        return Path.Command(name, params)
+
+    def _code(self, letter, value):
+        # returns name and number of a G or M word
+        code = self.codes.get((letter, value))
+        if code is None:
+            name = letter + _text(value)
+            code = (name, float(value) if letter == 'G' else None)
+            self.codes[(letter, value)] = code
+        return code
+
+    def _line(self, line, loose, commands):
+        # appends the commands of a line to commands, line being the (name, number, params) of its
+        # G and M words and loose the words in front of the first of them
+        codes = []
+        motion = None
+        for code in line:
+            number = code[1]
+            if number in ModalModes:
+                self._modal(number)
+                # the words following a modal G code belong to the rest of the line
+                loose.update(code[2])
+            else:
+                if number in MotionModes:
+                    motion = len(codes)
+                codes.append(code)
+        if loose:
+            if motion is not None:
+                target = motion
+            elif any(axis in loose for axis in Axes):
+                if not self.motion:
+                    PathLog.warning("skipping axis words without motion mode: %s" % sorted(loose.items()))
+                    loose = {}
+                else:
+                    codes.append((self.motion, None, {}))
+                    target = len(codes) - 1
+            elif codes:
+                target = 0
+            else:
+                self.pending.update(loose)
+                loose = {}
+            if loose:
+                (name, number, params) = codes[target]
+                loose.update(params)
+                codes[target] = (name, number, loose)
+        for (name, number, params) in codes:
+            commands.append(self._command(name, number, params))
+
+    def batch(self, data):
+        '''batch(data) ... returns the commands of data, a bytes like object holding complete lines
+        of G-code, as a list.'''
+        letters = _Letters
+        commands = []
+        line = []
+        notes = []
+        words = {}
+        loose = words
+        # the sentinel ends a last line without line end
+        for (letter, value, comment, eol) in itertools.chain(_Tokens.findall(data), _EndOfLine):
+            if letter:
+                letter = letters[letter]
+                if letter == 'G' or letter == 'M':
+                    words = {}
+                    line.append(self._code(letter, value) + (words,))
+                elif letter not in Skipped:
+                    words[letter] = float(value)
+            elif comment:
+                if self.comments:
+                    text = _text(comment)
+                    if text[0] == ';':
+                        text = '(' + text[1:].strip() + ')'
+                    elif text[-1] != ')':
+                        text += ')'
+                    notes.append(Path.Command(text))
+            else:
+                if line or loose:
+                    self._line(line, loose, commands)
+                    line = []
+                if notes:
+                    # comments follow the commands of their line
+                    commands.extend(notes)
+                    notes = []
+                words = {}
+                loose = words
+        return commands
+
+    def batches(self, data, size=ChunkSize):
+        '''batches(data, [size=ChunkSize]) ... generator returning the commands of data, a bytes like
+        object, in batches of roughly size bytes of G-code each.'''
+        begin = 0
+        count = len(data)
+        while begin < count:
+            end = data.find(b'\n', min(begin + size, count - 1))
+            end = count if end < 0 else end + 1
+            yield self.batch(data[begin:end])
+            begin = end
+
+    def commands(self, data):
+        '''commands(data) ... generator returning the commands of data, a bytes like object, one by one.'''
+        for batch in self.batches(data):
+            for cmd in batch:
+                yield cmd
+
+
+class MappedFile(object):
+    '''MappedFile(filename) ... context manager returning the content of filename memory mapped,
+    or as bytes if it can't be mapped, for instance because it is empty.'''
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def __enter__(self):
+        self.file = open(self.filename, 'rb')
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, EnvironmentError):
+            self.data = self.file.read()
+        return self.data
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+        return False
+
+
+def readBatches(filename, comments=True, size=ChunkSize):
+    '''readBatches(filename, [comments=True], [size=ChunkSize]) ... generator returning the commands
+    of the G-code file filename in batches, see GCodeReader.'''
+    reader = GCodeReader(comments)
+    with MappedFile(filename) as data:
+        for batch in reader.batches(data, size):
+            yield batch
+
+def readPath(filename, comments=True):
+    '''readPath(filename, [comments=True]) ... returns the Path.Path of the G-code file filename.'''
+    begin = time.time()
+    commands = []
+    for batch in readBatches(filename, comments):
+        commands.extend(batch)
+    path = Path.Path(commands)
+    PathLog.info("read %d commands from %s in %.2fs" % (len(commands), filename, time.time() - begin))
+    return path
@@ -198,7 +198,7 @@ def features_by_centers(base, features):
     try:
         from scipy.spatial import KDTree
     except ImportError:
-        from PathScripts.kdtree import KDTree
+        from PathScripts.kdtree import ArrayKDTree as KDTree
 
     features = sorted(features,
                       key=lambda feature: getattr(base.Shape, feature).Surface.Radius,
@@ -117,9 +117,9 @@ class ObjectPathJob:
                 if job.get(JobTemplate.Description):
                     obj.Description = job.get(JobTemplate.Description)
             for tc in tree.getroot().iter(JobTemplate.ToolController):
-                PathToolController.CommandPathToolController.FromTemplate(obj, tc)
+                PathToolController.CommandPathToolController.FromTemplate(obj, tc, FreeCAD.GuiUp)
         else:
-            PathToolController.CommandPathToolController.Create(obj.Name)
+            PathToolController.CommandPathToolController.Create(obj.Name, FreeCAD.GuiUp)
 
     def templateAttrs(self, obj):
         '''templateAttrs(obj) ... answer a dictionary with all properties of the receiver that should be stored in a template file.'''
@@ -24,7 +24,7 @@
 
 import FreeCAD
 import os
-import traceback
+import sys
 
 class Level:
     """Enumeration of log levels, used for setLevel and getLevel."""
@@ -83,8 +83,10 @@ def thisModule():
 
 def _caller():
     """internal function to determine the calling module."""
-    file, line, func, text = traceback.extract_stack(limit=3)[0]
-    return os.path.splitext(os.path.basename(file))[0], line, func
+    # the frame of whoever called the public function calling this one, looking it up with
+    # traceback would also read the source line of each frame
+    frame = sys._getframe(2)
+    return os.path.splitext(os.path.basename(frame.f_code.co_filename))[0], frame.f_lineno, frame.f_code.co_name
 
 def _log(level, module_line_func, msg):
     """internal function to do the logging"""
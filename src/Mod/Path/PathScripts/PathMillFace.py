@@ -27,6 +27,7 @@ import FreeCAD
 import Path
 import PathScripts.PathLog as PathLog
 from PySide import QtCore, QtGui
+from PathScripts import PathAreaCache
 from PathScripts import PathUtils
 import Part
 from PathScripts.PathUtils import waiting_effects
@@ -202,7 +203,7 @@ class ObjectFace:
         heights = [i for i in self.depthparams]
         boundary.setParams(**pocketparams)
         obj.AreaParams = str(boundary.getParams())
-        sections = boundary.makeSections(mode=0, project=False, heights=heights)
+        sections = PathAreaCache.makeSections(boundary, mode=0, project=False, heights=heights)
 
         params = {'feedrate': self.horizFeed,
                   'feedrate_v': self.vertFeed,
@@ -219,8 +220,7 @@ class ObjectFace:
         obj.PathParams = str(params)
         PathLog.debug("Generating Path with params: {}".format(params))
 
-        for sec in sections:
-            shape = sec.getShape()
+        for shape in sections:
             respath = Path.fromShapes(shape, **params)
             # Insert any entry code to the layer
 
@@ -25,6 +25,7 @@
 import FreeCAD
 import Path
 from PySide import QtCore, QtGui
+from PathScripts import PathAreaCache
 from PathScripts import PathUtils
 import PathScripts.PathLog as PathLog
 from PathScripts.PathUtils import waiting_effects, depth_params
@@ -206,9 +207,7 @@ class ObjectPocket:
 
         heights = [i for i in self.depthparams]
         PathLog.debug('pocket section heights: {}'.format(heights))
-        sections = pocket.makeSections(mode=0, project=False, heights=heights)
-
-        shapelist = [sec.getShape() for sec in sections]
+        shapelist = PathAreaCache.makeSections(pocket, mode=0, project=False, heights=heights)
 
         params = {'shapes': shapelist,
                   'feedrate': self.horizFeed,
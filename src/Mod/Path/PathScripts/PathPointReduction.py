@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+'''
+Tolerance bounded reduction of polylines, given as (n, 3) numpy arrays of points.
+Runs of points within tolerance of a straight line are reduced to their end
+points, runs of points within tolerance of a circular arc in the XY plane can be
+replaced by a single G2/G3 move. No point of the polyline ends up further than
+the tolerance away from the reduced path. Like G2/G3, arcs move Z evenly with the angle.
+'''
+
+import Path
+import numpy
+
+from PathScripts.PathGeom import PathGeom
+
+# smallest number of points replaced by an arc
+ArcMinPoints = 5
+# shortest run of straight moves reduceCommands reduces
+RunMinMoves = 3
+# simplify starts out with every SimplifyChunk'th point, which bounds the work per point
+SimplifyChunk = 512
+
+
+def simplify(points, tolerance):
+    '''simplify(points, tolerance) ... returns the indices of the points to keep,
+    such that no point is further than tolerance from the polyline through the
+    kept points. The first and the last point are always kept.'''
+    count = len(points)
+    if count < 3:
+        return list(range(count))
+    keep = numpy.zeros(count, dtype=bool)
+    keep[::SimplifyChunk] = True
+    keep[-1] = True
+    bounds = numpy.flatnonzero(keep)
+    stack = list(zip(bounds[:-1], bounds[1:]))
+    while stack:
+        begin, end = stack.pop()
+        if end - begin < 2:
+            continue
+        distance = segmentDistance(points[begin + 1:end], points[begin], points[end])
+        i = int(numpy.argmax(distance))
+        if distance[i] > tolerance:
+            i += begin + 1
+            keep[i] = True
+            stack.append((begin, i))
+            stack.append((i, end))
+    # drop the chunk bounds which aren't needed after all, every other one at a time
+    # so each round looks at every point at most once
+    candidates = list(bounds[1:-1])
+    while candidates:
+        kept = numpy.flatnonzero(keep)
+        for bound in candidates[::2]:
+            k = numpy.searchsorted(kept, bound)
+            begin, end = kept[k - 1], kept[k + 1]
+            if segmentDistance(points[begin + 1:end], points[begin], points[end]).max() <= tolerance:
+                keep[bound] = False
+        candidates = candidates[1::2]
+    return list(numpy.flatnonzero(keep))
+
+def segmentDistance(points, p0, p1):
+    '''segmentDistance(points, p0, p1) ... returns the distance of each of points to the segment p0-p1.'''
+    d = p1 - p0
+    length = numpy.dot(d, d)
+    if length == 0:
+        return numpy.sqrt(((points - p0) ** 2).sum(axis=1))
+    t = numpy.clip(numpy.dot(points - p0, d) / length, 0.0, 1.0)
+    foot = p0 + t[:, None] * d
+    return numpy.sqrt(((points - foot) ** 2).sum(axis=1))
+
+def _circle(p0, p1, p2):
+    '''returns center and radius of the circle through the XY projection of the 3 points, or None.'''
+    ax, ay = p1[0] - p0[0], p1[1] - p0[1]
+    bx, by = p2[0] - p0[0], p2[1] - p0[1]
+    det = 2.0 * (ax * by - ay * bx)
+    if det == 0:
+        return None
+    a2 = ax * ax + ay * ay
+    b2 = bx * bx + by * by
+    cx = (by * a2 - ay * b2) / det
+    cy = (ax * b2 - bx * a2) / det
+    return (numpy.array([p0[0] + cx, p0[1] + cy]), numpy.hypot(cx, cy))
+
+def _sweep(xy):
+    '''returns the signed angle between each pair of consecutive vectors of xy.'''
+    return numpy.arctan2(xy[:-1, 0] * xy[1:, 1] - xy[:-1, 1] * xy[1:, 0], (xy[:-1] * xy[1:]).sum(axis=1))
+
+def _arcDistance(span, center, radius, sweep):
+    '''returns the distance of each of span's points to the arc from span[0] to span[-1] around center,
+    which moves Z evenly with the angle like G2/G3 do. sweep is the _sweep() of the points.'''
+    xy = span[:, :2] - center
+    angle = numpy.concatenate(([0.0], numpy.cumsum(sweep)))
+    z = span[0, 2] + (span[-1, 2] - span[0, 2]) * angle / angle[-1]
+    return numpy.hypot(numpy.hypot(xy[:, 0], xy[:, 1]) - radius, span[:, 2] - z)
+
+def _arc(points, begin, end, tolerance):
+    '''returns (center, clockwise) of an arc from points[begin] to points[end] which
+    is within tolerance of all points in between, or None if there is no such arc.'''
+    span = points[begin:end + 1]
+    circle = _circle(span[0], span[(end - begin) // 2], span[-1])
+    if circle is None:
+        return None
+    center, radius = circle
+    # the points have to sweep the arc in one direction, and less than a full circle
+    sweep = _sweep(span[:, :2] - center)
+    if not ((sweep > 0).all() or (sweep < 0).all()) or numpy.abs(sweep.sum()) >= 2 * numpy.pi - 1e-6:
+        return None
+    if _arcDistance(span, center, radius, sweep).max() > tolerance:
+        return None
+    # the arc bulges out of the chord between two points by its sagitta
+    chord = numpy.hypot(*(span[1:, :2] - span[:-1, :2]).T).max()
+    if radius - numpy.sqrt(max(radius * radius - chord * chord / 4.0, 0.0)) > tolerance:
+        return None
+    return (center, sweep[0] < 0)
+
+def _turns(points, tolerance):
+    '''returns the direction each interior point turns the polyline in the XY plane, 0 for no turn or a change in Z.'''
+    d = points[1:] - points[:-1]
+    cross = d[:-1, 0] * d[1:, 1] - d[:-1, 1] * d[1:, 0]
+    turns = numpy.sign(cross)
+    turns[numpy.abs(d[:-1, 2]) + numpy.abs(d[1:, 2]) > tolerance] = 0
+    return turns
+
+def fitArcs(points, tolerance, minPoints=ArcMinPoints):
+    '''fitArcs(points, tolerance, [minPoints]) ... returns a list of (begin, end, center, clockwise)
+    tuples, one for each run of at least minPoints points which can be replaced by an arc.'''
+    count = len(points)
+    if count < minPoints:
+        return []
+    # an arc can only start where the next minPoints-2 interior points turn the same way
+    turns = _turns(points, tolerance)
+    window = minPoints - 2
+    same = numpy.convolve(turns, numpy.ones(window), 'valid')
+    candidates = numpy.flatnonzero(numpy.abs(same) == window)
+    arcs = []
+    i = 0
+    for begin in candidates:
+        if begin < i:
+            continue
+        end = begin + minPoints - 1
+        arc = _arc(points, begin, end, tolerance)
+        if arc is None:
+            continue
+        # grow the arc exponentially, then bisect between the last fit and the first miss
+        good, step = end, minPoints
+        bad = None
+        while bad is None:
+            end = min(good + step, count - 1)
+            if end == good:
+                break
+            fit = _arc(points, begin, end, tolerance)
+            if fit is None:
+                bad = end
+            else:
+                good, arc = end, fit
+                step *= 2
+        while bad is not None and bad - good > 1:
+            end = (good + bad) // 2
+            fit = _arc(points, begin, end, tolerance)
+            if fit is None:
+                bad = end
+            else:
+                good, arc = end, fit
+        # a run which is straight within tolerance is left to simplify
+        if segmentDistance(points[begin + 1:good], points[begin], points[good]).max() > tolerance:
+            arcs.append((begin, good, arc[0], arc[1]))
+        i = good
+    return arcs
+
+def moves(points, tolerance, arcs=True):
+    '''moves(points, tolerance, [arcs=True]) ... returns the reduced moves from points[0] to points[-1]
+    as a list of (end, center, clockwise) tuples, end being the index of the point the move ends at
+    and center None for straight moves. If arcs is True runs of points along an arc are
+    replaced by a single move.'''
+    points = numpy.asarray(points, dtype=float)
+    result = []
+
+    def lines(begin, end):
+        for i in simplify(points[begin:end + 1], tolerance)[1:]:
+            result.append((begin + i, None, False))
+
+    last = 0
+    for (begin, end, center, clockwise) in (fitArcs(points, tolerance) if arcs else []):
+        lines(last, begin)
+        result.append((end, center, clockwise))
+        last = end
+    lines(last, len(points) - 1)
+    return result
+
+def deviation(points, moves):
+    '''deviation(points, moves) ... returns the largest distance of any of points to the moves
+    replacing them, see moves().'''
+    points = numpy.asarray(points, dtype=float)
+    result = 0.0
+    begin = 0
+    for (end, center, clockwise) in moves:
+        if end - begin > 1:
+            span = points[begin + 1:end]
+            if center is None:
+                d = segmentDistance(span, points[begin], points[end])
+            else:
+                arc = points[begin:end + 1]
+                radius = numpy.hypot(*(arc[0][:2] - center))
+                d = _arcDistance(arc, center, radius, _sweep(arc[:, :2] - center))[1:-1]
+            result = max(result, float(d.max()))
+        begin = end
+    return result
+
+def commandsFor(points, moves, params=None):
+    '''commandsFor(points, moves, [params=None]) ... returns moves as Path commands, see moves().
+    params are added to the parameters of each command.'''
+    cmds = []
+    begin = 0
+    for (end, center, clockwise) in moves:
+        p = points[end]
+        parameters = {'X': float(p[0]), 'Y': float(p[1]), 'Z': float(p[2])}
+        if center is None:
+            name = 'G1'
+        else:
+            name = 'G2' if clockwise else 'G3'
+            parameters['I'] = float(center[0] - points[begin][0])
+            parameters['J'] = float(center[1] - points[begin][1])
+        if params:
+            parameters.update(params)
+        cmds.append(Path.Command(name, parameters))
+        begin = end
+    return cmds
+
+def commands(points, tolerance, arcs=True, params=None):
+    '''commands(points, tolerance, [arcs=True], [params=None]) ... returns the moves from points[0]
+    through all points to points[-1] as Path commands, reduced within tolerance.
+    If arcs is True runs of points along an arc are replaced by G2/G3 moves.
+    params are added to the parameters of each command.'''
+    points = numpy.asarray(points, dtype=float)
+    return commandsFor(points, moves(points, tolerance, arcs), params)
+
+def _reduceRun(start, run, points, tolerance, arcs, feed):
+    if len(run) < RunMinMoves:
+        return (run, 0.0)
+    points = numpy.array([start] + points, dtype=float)
+    m = moves(points, tolerance, arcs)
+    params = None if feed is None else {'F': feed}
+    return (commandsFor(points, m, params), deviation(points, m))
+
+def reduceCommands(commands, tolerance, arcs=True):
+    '''reduceCommands(commands, tolerance, [arcs=True]) ... returns (commands, deviation) where each
+    run of straight moves in commands is reduced within tolerance, see moves(), and deviation
+    is the largest distance of any of the original end points to the reduced moves.
+    A run ends at any other command, and at moves with a different feed rate.'''
+    result = []
+    maxDeviation = 0.0
+    position = {}
+    start = None
+    run = []
+    points = []
+    feed = None
+    for cmd in commands:
+        params = cmd.Parameters
+        if start is not None and cmd.Name in PathGeom.CmdMoveStraight and all(p in 'XYZF' for p in params) and params.get('F', feed) == feed:
+            position.update(params)
+            run.append(cmd)
+            points.append((position['X'], position['Y'], position['Z']))
+            continue
+        if run:
+            (cmds, d) = _reduceRun(start, run, points, tolerance, arcs, feed)
+            result.extend(cmds)
+            maxDeviation = max(maxDeviation, d)
+            start = points[-1]
+            run = []
+            points = []
+        position.update((p, params[p]) for p in 'XYZ' if p in params)
+        result.append(cmd)
+        if cmd.Name.startswith('('):
+            continue
+        start = None
+        if cmd.Name in PathGeom.CmdMoveStraight and all(p in 'XYZF' for p in params) and all(p in position for p in 'XYZ'):
+            # this move starts a new run, and is kept as it is
+            start = (position['X'], position['Y'], position['Z'])
+            feed = params.get('F', feed)
+        elif cmd.Name in PathGeom.CmdMoveRapid + PathGeom.CmdMoveArc and all(p in position for p in 'XYZ'):
+            start = (position['X'], position['Y'], position['Z'])
+            feed = None
+    if run:
+        (cmds, d) = _reduceRun(start, run, points, tolerance, arcs, feed)
+        result.extend(cmds)
+        maxDeviation = max(maxDeviation, d)
+    return (result, maxDeviation)
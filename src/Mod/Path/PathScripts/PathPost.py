@@ -83,6 +83,22 @@ class DlgSelectPostProcessor:
             return posts[0].text()
         return None
 
+
+def buildPostList(job):
+    '''buildPostList(job) ... returns the ordered list of operations and tool changes of job to post.'''
+    postlist = []
+    currTool = None
+    for obj in job.Group:
+        PathLog.debug("obj: {}".format(obj.Name))
+        if not isinstance(obj.Proxy, PathToolController.ToolController):
+            tc = PathUtil.toolControllerForOp(obj)
+            if tc is not None:
+                if tc.ToolNumber != currTool:
+                    postlist.append(tc)
+            postlist.append(obj)
+    return postlist
+
+
 class CommandPathPost:
 
     def resolveFileName(self, job):
@@ -171,7 +187,7 @@ class CommandPathPost:
 
         return False
 
-    def exportObjectsWith(self, objs, job, needFilename = True):
+    def exportObjectsWith(self, objs, job, needFilename = True, processes = None):
         PathLog.track()
         # check if the user has a project and has set the default post and
         # output filename
@@ -181,6 +197,9 @@ class CommandPathPost:
         elif hasattr(job, "PostProcessor") and job.PostProcessor:
             postArgs = ''
 
+        if processes is None:
+            processes = PathPreferences.postProcessorProcesses()
+
         postname = self.resolvePostProcessor(job)
         filename = '-'
         if postname and needFilename:
@@ -189,7 +208,7 @@ class CommandPathPost:
         if postname and filename:
             print("post: %s(%s, %s)" % (postname, filename, postArgs))
             processor = PostProcessor.load(postname)
-            gcode = processor.export(objs, filename, postArgs)
+            gcode = processor.export(objs, filename, postArgs, processes)
             return (False, gcode)
         else:
             return (True, '')
@@ -242,18 +261,7 @@ class CommandPathPost:
 
         PathLog.debug("about to postprocess job: {}".format(job.Name))
 
-        # Build up an ordered list of operations and tool changes.
-        # Then post-the ordered list
-        postlist = []
-        currTool = None
-        for obj in job.Group:
-            PathLog.debug("obj: {}".format(obj.Name))
-            if not isinstance(obj.Proxy, PathToolController.ToolController):
-                tc = PathUtil.toolControllerForOp(obj)
-                if tc is not None:
-                    if tc.ToolNumber != currTool:
-                        postlist.append(tc)
-                postlist.append(obj)
+        postlist = buildPostList(job)
 
         fail = True
         rc = ''
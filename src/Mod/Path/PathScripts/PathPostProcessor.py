@@ -99,6 +99,21 @@ class PostProcessor:
 
     def __init__(self, script):
         self.script = script
-
-    def export(self, obj, filename, args):
-        return self.script.export(obj, filename, args)
+        self.parallel = hasattr(script, "PROCESSES")
+
+    def export(self, obj, filename, args, processes=None):
+        '''export(obj, filename, args, [processes]) ... posts obj to filename and returns the G-code.
+        Post processors writing through PostUtils.GCodeWriter stream the G-code into the file instead
+        and return None, unless the editor is shown or filename is '-'.
+        processes sets how many processes a post processor supporting it formats the paths in,
+        an explicit --processes argument takes precedence. Only post processors with a module level
+        PROCESSES setting support it (of the bundled ones linuxcnc_post), the others ignore processes.
+        The setting of the post processor is restored afterwards.'''
+        if processes is None or not self.parallel:
+            return self.script.export(obj, filename, args)
+        saved = self.script.PROCESSES
+        self.script.PROCESSES = processes
+        try:
+            return self.script.export(obj, filename, args)
+        finally:
+            self.script.PROCESSES = saved
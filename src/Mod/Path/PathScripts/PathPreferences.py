@@ -39,6 +39,10 @@ class PathPreferences:
     PostProcessorBlacklist    = "PostProcessorBlacklist"
     PostProcessorOutputFile   = "PostProcessorOutputFile"
     PostProcessorOutputPolicy = "PostProcessorOutputPolicy"
+    PostProcessorProcesses    = "PostProcessorProcesses"
+
+    # Number of processes the surface operation runs OpenCamLib in
+    SurfaceProcesses    = "SurfaceProcesses"
 
     # Linear tolerance to use when generating Paths, eg when tesselating geometry
     GeometryTolerance   = "GeometryTolerance"
@@ -85,6 +89,17 @@ class PathPreferences:
         pref = cls.preferences()
         return pref.GetString(cls.PostProcessorDefaultArgs, "")
 
+    @classmethod
+    def postProcessorProcesses(cls):
+        '''number of processes a post processor may format the paths in, 0 for one per cpu.
+        Only post processors with a PROCESSES setting (like linuxcnc_post) make use of it.'''
+        return cls.preferences().GetInt(cls.PostProcessorProcesses, 1)
+
+    @classmethod
+    def surfaceProcesses(cls):
+        '''number of processes the surface operation calculates waterlines and drop cutter lines in, 0 for one per cpu'''
+        return cls.preferences().GetInt(cls.SurfaceProcesses, 1)
+
     @classmethod
     def defaultGeometryTolerance(cls):
         return cls.preferences().GetFloat(cls.GeometryTolerance, 0.01)
@@ -28,6 +28,7 @@ import numpy
 import ArchPanel
 import Part
 
+from PathScripts import PathAreaCache
 from PathScripts import PathUtils
 from PathScripts.PathUtils import depth_params
 import PathScripts.PathLog as PathLog
@@ -197,8 +198,7 @@ class ObjectProfile:
 
         heights = [i for i in self.depthparams]
 
-        sections = profile.makeSections(mode=0, project=True, heights=heights)
-        shapelist = [sec.getShape() for sec in sections]
+        shapelist = PathAreaCache.makeSections(profile, mode=0, project=True, heights=heights)
 
         params = {'shapes': shapelist,
                   'feedrate': self.horizFeed,
@@ -233,7 +233,7 @@ class ObjectProfile:
             profileparams['Thicken'] = True
             profileparams['ToolRadius'] = self.radius - self.radius * .005
             profile.setParams(**profileparams)
-            sec = profile.makeSections(mode=0, project=False, heights=heights)[-1].getShape()
+            sec = PathAreaCache.makeSections(profile, mode=0, project=False, heights=heights)[-1]
             simobj = sec.extrude(FreeCAD.Vector(0, 0, baseobject.BoundBox.ZMax))
 
         return pp, simobj
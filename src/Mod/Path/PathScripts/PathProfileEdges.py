@@ -25,6 +25,7 @@
 import FreeCAD
 import Path
 import Part
+from PathScripts import PathAreaCache
 from PathScripts import PathUtils
 from PathScripts.PathUtils import depth_params
 from DraftGeomUtils import findWires
@@ -189,8 +190,7 @@ class ObjectProfile:
         PathLog.debug("About to profile with params: {}".format(profile.getParams()))
 
         heights = [i for i in self.depthparams]
-        sections = profile.makeSections(mode=0, project=True, heights=heights)
-        shapelist = [sec.getShape() for sec in sections]
+        shapelist = PathAreaCache.makeSections(profile, mode=0, project=True, heights=heights)
 
         params = {'shapes': shapelist,
                   'feedrate': self.horizFeed,
@@ -218,7 +218,7 @@ class ObjectProfile:
             profileparams['Thicken'] = True
             profileparams['ToolRadius'] = self.radius - self.radius * .005
             profile.setParams(**profileparams)
-            sec = profile.makeSections(mode=0, project=False, heights=heights)[-1].getShape()
+            sec = PathAreaCache.makeSections(profile, mode=0, project=False, heights=heights)[-1]
             simobj = sec.extrude(FreeCAD.Vector(0, 0, baseobject.BoundBox.ZMax))
 
         return pp, simobj
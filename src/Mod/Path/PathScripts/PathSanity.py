@@ -30,6 +30,7 @@ from PySide import QtCore
 import FreeCAD
 import FreeCADGui
 import PathScripts
+import PathScripts.PathCycleTime as PathCycleTime
 import PathScripts.PathLog as PathLog
 # import PathScripts.PathCollision as PC
 # Qt tanslation handling
@@ -130,6 +131,11 @@ class CommandPathSanity:
         if toolcontrolcount == 0: #need at least one active TC
             FreeCAD.Console.PrintWarning(translate("Path_Sanity", "A Tool Controller was not found. Default values are used which is dangerous.  Please add a Tool Controller.\n"))
 
+        (total, estimates) = PathCycleTime.estimateJob(obj)
+        for (op, estimate) in estimates:
+            FreeCAD.Console.PrintMessage("%s: %s\n" % (op.Label, estimate))
+        FreeCAD.Console.PrintMessage(translate("Path_Sanity", "Estimated cycle time") + ": %s\n" % total)
+
     def __checkTC(self, item):
         if item.ToolNumber == 0:
             FreeCAD.Console.PrintWarning(translate("Path_Sanity", "Tool Controller: " + str(item.Label) + " is using ID 0 which the undefined default. Please set a real tool.\n"))
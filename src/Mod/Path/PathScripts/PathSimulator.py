@@ -0,0 +1,403 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+'''
+Stock removal simulation on a heightmap, without any OCC booleans.
+
+The stock is a regular grid of columns, each reaching from the bottom of the stock up
+to its height. The moves of a path are split into short pieces, and all pieces of a
+batch are swept over a fixed window of cells at once, lowering each column to the
+bottom of the tool. Horizontal moves and plunges are swept exactly, for other moves
+the tool is sampled along the move about once per cell.
+
+This can't represent overhangs, which 3 axis machining doesn't produce. The result
+is a map of the remaining stock, and, given the surface of the model, a map of the
+places where the tool cut into the model.
+'''
+
+import PathScripts.PathLog as PathLog
+import math
+import numpy
+import time
+
+from PathScripts.PathGeom import PathGeom
+
+PathLog.setLevel(PathLog.Level.INFO, PathLog.thisModule())
+
+# default cell size of the heightmap in mm
+Resolution = 0.5
+# the cell size is increased if the heightmap would have more cells than that
+MaxCells = 4000000
+# upper bound of the number of cell samples of one batch of pieces
+BatchSize = 1 << 21
+
+CmdDrill = ['G73', 'G81', 'G82', 'G83', 'G84', 'G85', 'G86', 'G87', 'G88', 'G89']
+
+
+class Heightmap(object):
+    '''Heightmap(xmin, ymin, xmax, ymax, zmin, zmax, [resolution=Resolution]) ... stock as a grid
+    of square columns of size resolution, starting out as a box from zmin to zmax.
+    height[j, i] is the height of the column with its center at x[i], y[j].'''
+
+    def __init__(self, xmin, ymin, xmax, ymax, zmin, zmax, resolution=Resolution):
+        area = max(xmax - xmin, resolution) * max(ymax - ymin, resolution)
+        if area / (resolution * resolution) > MaxCells:
+            resolution = math.sqrt(area / MaxCells)
+        self.resolution = float(resolution)
+        self.xmin = float(xmin)
+        self.ymin = float(ymin)
+        self.zmin = float(zmin)
+        self.nx = max(int(math.ceil((xmax - xmin) / resolution)), 1)
+        self.ny = max(int(math.ceil((ymax - ymin) / resolution)), 1)
+        self.x = self.xmin + (numpy.arange(self.nx) + 0.5) * self.resolution
+        self.y = self.ymin + (numpy.arange(self.ny) + 0.5) * self.resolution
+        self.height = numpy.full((self.ny, self.nx), float(zmax))
+
+    @classmethod
+    def fromBoundBox(cls, bb, resolution=Resolution):
+        '''fromBoundBox(bb, [resolution=Resolution]) ... returns the heightmap of a box shaped stock.'''
+        return cls(bb.XMin, bb.YMin, bb.XMax, bb.YMax, bb.ZMin, bb.ZMax, resolution)
+
+    def copy(self):
+        '''copy() ... returns a copy of the heightmap.'''
+        other = Heightmap.__new__(Heightmap)
+        other.__dict__.update(self.__dict__)
+        other.height = self.height.copy()
+        return other
+
+    def volume(self):
+        '''volume() ... returns the volume of the stock.'''
+        return float((self.height - self.zmin).sum()) * self.resolution * self.resolution
+
+    def surface(self, triangles):
+        '''surface(triangles) ... returns the height of the highest of the (n, 3, 3) array of triangles
+        above each cell center, -inf for cells without any triangle above them.'''
+        result = numpy.full((self.ny, self.nx), -numpy.inf)
+        res = self.resolution
+        for (a, b, c) in numpy.asarray(triangles, dtype=float):
+            det = (b[0] - a[0]) * (c[1] - a[1]) - (c[0] - a[0]) * (b[1] - a[1])
+            if abs(det) < 1e-12:
+                # vertical faces are covered by their neighbours
+                continue
+            i0 = max(int(math.ceil((min(a[0], b[0], c[0]) - self.xmin) / res - 0.5)), 0)
+            i1 = min(int(math.floor((max(a[0], b[0], c[0]) - self.xmin) / res - 0.5)), self.nx - 1)
+            j0 = max(int(math.ceil((min(a[1], b[1], c[1]) - self.ymin) / res - 0.5)), 0)
+            j1 = min(int(math.floor((max(a[1], b[1], c[1]) - self.ymin) / res - 0.5)), self.ny - 1)
+            if i1 < i0 or j1 < j0:
+                continue
+            px = self.x[i0:i1 + 1][numpy.newaxis, :] - a[0]
+            py = self.y[j0:j1 + 1][:, numpy.newaxis] - a[1]
+            u = (px * (c[1] - a[1]) - py * (c[0] - a[0])) / det
+            v = (py * (b[0] - a[0]) - px * (b[1] - a[1])) / det
+            inside = (u >= -1e-9) & (v >= -1e-9) & (u + v <= 1 + 1e-9)
+            z = numpy.where(inside, a[2] + u * (b[2] - a[2]) + v * (c[2] - a[2]), -numpy.inf)
+            window = result[j0:j1 + 1, i0:i1 + 1]
+            numpy.maximum(window, z, out=window)
+        return result
+
+
+class Cutter(object):
+    '''Cutter(diameter, [cornerRadius=0], [angle=0]) ... the shape of a tool's cutting end.
+    A cornerRadius of half the diameter makes a ball end mill, an angle between 0 and 180
+    degrees a cone with that included angle, everything else a flat end mill.'''
+
+    def __init__(self, diameter, cornerRadius=0.0, angle=0.0):
+        self.radius = diameter / 2.0
+        self.cornerRadius = min(cornerRadius, self.radius)
+        self.angle = angle
+
+    @classmethod
+    def fromTool(cls, tool):
+        '''fromTool(tool) ... returns the cutter of a Path.Tool, see PathSurfaceEngine.cutterFor.'''
+        from PathScripts import PathSurfaceEngine
+        description = PathSurfaceEngine.cutterFor(tool)
+        if description[0] == 'BallCutter':
+            return cls(tool.Diameter, tool.Diameter / 2.0)
+        if description[0] == 'ConeCutter':
+            return cls(tool.Diameter, angle=math.degrees(2 * description[2]))
+        if description[0] == 'BullCutter':
+            return cls(tool.Diameter, tool.CornerRadius)
+        return cls(tool.Diameter)
+
+    def profile(self, r):
+        '''profile(r) ... returns the height of the tool above its tip at the distances r from
+        its axis, inf where r is beyond the tool.'''
+        r = numpy.asarray(r, dtype=float)
+        return self.profileSquared(r * r)
+
+    def profileSquared(self, r2):
+        '''profileSquared(r2) ... returns profile() of the square roots of r2, which saves taking
+        them for flat and ball end mills.'''
+        outside = r2 > self.radius * self.radius
+        if 0 < self.angle < 180:
+            z = numpy.sqrt(r2) / math.tan(math.radians(self.angle / 2.0))
+        elif self.cornerRadius >= self.radius:
+            z = self.radius - numpy.sqrt(numpy.maximum(self.radius * self.radius - r2, 0.0))
+        elif self.cornerRadius > 0:
+            rc = self.cornerRadius
+            d = numpy.maximum(numpy.sqrt(r2) - (self.radius - rc), 0.0)
+            z = rc - numpy.sqrt(numpy.maximum(rc * rc - d * d, 0.0))
+        else:
+            z = numpy.zeros(numpy.shape(r2))
+        z[outside] = numpy.inf
+        return z
+
+
+class Simulation(object):
+    '''Simulation(stock, [target=None]) ... removes the material the moves of paths cut from stock,
+    a Heightmap which is modified in place. target is the surface of the model on the same grid,
+    see Heightmap.surface(), used to find gouges.'''
+
+    def __init__(self, stock, target=None):
+        self.stock = stock
+        self.target = target
+        self.cutter = None
+        self.position = numpy.zeros(3)
+        self.initialVolume = stock.volume()
+        # cells rapid moves cut material from
+        self.rapidCuts = numpy.zeros(stock.height.shape, dtype=bool)
+        self.moves = 0
+
+    def setCutter(self, cutter):
+        '''setCutter(cutter) ... sets the Cutter used for the following moves.'''
+        self.cutter = cutter
+
+    def removedVolume(self):
+        '''removedVolume() ... returns the volume removed from the stock so far.'''
+        return self.initialVolume - self.stock.volume()
+
+    def remaining(self):
+        '''remaining() ... returns the thickness of the stock left above the target surface,
+        or above the bottom of the stock where there is no target.'''
+        if self.target is None:
+            return self.stock.height - self.stock.zmin
+        return self.stock.height - numpy.maximum(self.target, self.stock.zmin)
+
+    def gouges(self, tolerance=0.0):
+        '''gouges([tolerance=0]) ... returns a boolean map of the cells the tool cut deeper than
+        tolerance into the target surface.'''
+        if self.target is None:
+            return numpy.zeros(self.stock.height.shape, dtype=bool)
+        return self.stock.height < self.target - tolerance
+
+    def segments(self, commands):
+        '''segments(commands) ... returns the (n, 3) arrays of start and end points of the straight
+        moves commands consist of, after splitting up arcs and drill cycles, and which of them are rapid.'''
+        pos = self.position.copy()
+        starts = []
+        ends = []
+        rapid = []
+        retractInitial = True
+        tolerance = self.stock.resolution / 4.0
+
+        def move(p, isRapid):
+            starts.append(pos.copy())
+            ends.append(p)
+            rapid.append(isRapid)
+            pos[:] = p
+
+        for cmd in commands:
+            name = cmd.Name
+            if name in ['G98', 'G99']:
+                retractInitial = name == 'G98'
+                continue
+            if not (name in PathGeom.CmdMoveRapid or name in PathGeom.CmdMove or name in CmdDrill):
+                continue
+            params = cmd.Parameters
+            end = numpy.array([params.get('X', pos[0]), params.get('Y', pos[1]), params.get('Z', pos[2])])
+            if name in CmdDrill:
+                initial = pos[2]
+                retract = params.get('R', initial)
+                move(numpy.array([end[0], end[1], pos[2]]), True)
+                move(numpy.array([end[0], end[1], retract]), True)
+                move(end, False)
+                move(numpy.array([end[0], end[1], initial if retractInitial else retract]), True)
+            elif name in PathGeom.CmdMoveArc:
+                center = pos[:2] + (params.get('I', 0.0), params.get('J', 0.0))
+                radius = math.hypot(pos[0] - center[0], pos[1] - center[1])
+                a0 = math.atan2(pos[1] - center[1], pos[0] - center[0])
+                a1 = math.atan2(end[1] - center[1], end[0] - center[0])
+                if name in PathGeom.CmdMoveCW:
+                    sweep = -((a0 - a1) % (2 * math.pi) or 2 * math.pi)
+                else:
+                    sweep = (a1 - a0) % (2 * math.pi) or 2 * math.pi
+                step = 2 * math.acos(1 - tolerance / radius) if radius > tolerance else math.pi / 2
+                count = max(int(math.ceil(abs(sweep) / step)), 1)
+                z0 = pos[2]
+                for k in range(1, count):
+                    a = a0 + sweep * k / count
+                    move(numpy.array([center[0] + radius * math.cos(a), center[1] + radius * math.sin(a), z0 + (end[2] - z0) * k / count]), False)
+                move(end, False)
+            else:
+                move(end, name in PathGeom.CmdMoveRapid)
+        self.position = pos
+        if not starts:
+            return (numpy.zeros((0, 3)), numpy.zeros((0, 3)), numpy.zeros(0, dtype=bool))
+        return (numpy.array(starts), numpy.array(ends), numpy.array(rapid))
+
+    def run(self, commands):
+        '''run(commands) ... removes the material the moves of commands cut from the stock,
+        starting at the end of the previous commands.'''
+        if self.cutter is None:
+            raise ValueError("no cutter set")
+        begin = time.time()
+        (starts, ends, rapid) = self.segments(commands)
+        self.cut(starts, ends, rapid)
+        self.moves += len(starts)
+        PathLog.debug("%d moves took %.2fs" % (len(starts), time.time() - begin))
+
+    def cut(self, starts, ends, rapid):
+        '''cut(starts, ends, rapid) ... removes the material the moves from starts to ends cut from the stock.
+        Material removed by rapid moves is marked in rapidCuts.'''
+        if not len(starts):
+            return
+        res = self.stock.resolution
+        radius = self.cutter.radius
+        # the pieces are at most this long in the XY plane, so they all fit in the same window,
+        # which is as small as most of the moves allow
+        d = ends - starts
+        lengths = numpy.hypot(d[:, 0], d[:, 1])
+        length = numpy.percentile(lengths, 90)
+        length = max(min(length, radius), res)
+        size = int(math.ceil((length + 2 * radius) / res)) + 2
+        samples = int(math.ceil(length / res)) + 1
+
+        # split the moves into pieces
+        count = numpy.maximum(numpy.ceil(lengths / length), 1).astype(int)
+        move = numpy.repeat(numpy.arange(len(starts)), count)
+        k = numpy.arange(len(move)) - numpy.repeat(numpy.cumsum(count) - count, count)
+        t0 = (k / count[move].astype(float))[:, numpy.newaxis]
+        t1 = ((k + 1) / count[move].astype(float))[:, numpy.newaxis]
+        p0 = starts[move] + t0 * d[move]
+        p1 = starts[move] + t1 * d[move]
+        pieceRapid = rapid[move]
+
+        # batches of consecutive pieces, split where rapid and feed moves alternate so
+        # rapidCuts only reports material which wasn't removed by an earlier feed move
+        perBatch = max(BatchSize // (size * size * samples), 1)
+        bounds = set(numpy.flatnonzero(pieceRapid[1:] != pieceRapid[:-1]) + 1)
+        bounds.update(range(0, len(move), perBatch))
+        bounds = sorted(bounds) + [len(move)]
+        for (b0, b1) in zip(bounds[:-1], bounds[1:]):
+            self._cutPieces(p0[b0:b1], p1[b0:b1], pieceRapid[b0], size, samples)
+
+    def _cutPieces(self, p0, p1, isRapid, size, samples):
+        stock = self.stock
+        res = stock.resolution
+        radius = self.cutter.radius
+        # window of cells around each piece
+        i0 = numpy.floor((numpy.minimum(p0[:, 0], p1[:, 0]) - radius - stock.xmin) / res).astype(int)
+        j0 = numpy.floor((numpy.minimum(p0[:, 1], p1[:, 1]) - radius - stock.ymin) / res).astype(int)
+        i = i0[:, numpy.newaxis, numpy.newaxis] + numpy.arange(size)[numpy.newaxis, numpy.newaxis, :]
+        j = j0[:, numpy.newaxis, numpy.newaxis] + numpy.arange(size)[numpy.newaxis, :, numpy.newaxis]
+        (i, j) = numpy.broadcast_arrays(i, j)
+        cx = stock.xmin + (i + 0.5) * res
+        cy = stock.ymin + (j + 0.5) * res
+
+        d = p1 - p0
+        dz = numpy.abs(d[:, 2])
+        level = (dz < 1e-9) | ((d[:, 0] == 0) & (d[:, 1] == 0))
+        value = numpy.full(cx.shape, numpy.inf)
+
+        # horizontal moves and plunges: the tool is lowest where it is closest to the cell
+        if level.any():
+            q0 = p0[level][:, numpy.newaxis, numpy.newaxis, :]
+            dl = d[level][:, numpy.newaxis, numpy.newaxis, :]
+            rx = cx[level] - q0[..., 0]
+            ry = cy[level] - q0[..., 1]
+            l2 = dl[..., 0] ** 2 + dl[..., 1] ** 2
+            t = numpy.clip((rx * dl[..., 0] + ry * dl[..., 1]) / numpy.where(l2 > 0, l2, 1.0), 0.0, 1.0)
+            dist2 = (rx - t * dl[..., 0]) ** 2 + (ry - t * dl[..., 1]) ** 2
+            z = numpy.minimum(p0[level, 2], p1[level, 2])[:, numpy.newaxis, numpy.newaxis]
+            value[level] = z + self.cutter.profileSquared(dist2)
+
+        # everything else is sampled along the move
+        sloped = ~level
+        if sloped.any():
+            q0 = p0[sloped][:, numpy.newaxis, numpy.newaxis, :]
+            dl = d[sloped][:, numpy.newaxis, numpy.newaxis, :]
+            rx = cx[sloped] - q0[..., 0]
+            ry = cy[sloped] - q0[..., 1]
+            best = numpy.full(rx.shape, numpy.inf)
+            for t in numpy.linspace(0.0, 1.0, samples):
+                dist2 = (rx - t * dl[..., 0]) ** 2 + (ry - t * dl[..., 1]) ** 2
+                numpy.minimum(best, q0[..., 2] + t * dl[..., 2] + self.cutter.profileSquared(dist2), out=best)
+            value[sloped] = best
+
+        # lower the columns to the lowest value any piece reached
+        inside = (i >= 0) & (i < stock.nx) & (j >= 0) & (j < stock.ny) & numpy.isfinite(value)
+        index = (j * stock.nx + i)[inside]
+        value = value[inside]
+        height = stock.height.reshape(-1)
+        lower = value < height[index]
+        index = index[lower]
+        value = value[lower]
+        if not len(index):
+            return
+        order = numpy.argsort(index)
+        index = index[order]
+        first = numpy.ones(len(index), dtype=bool)
+        first[1:] = index[1:] != index[:-1]
+        first = numpy.flatnonzero(first)
+        height[index[first]] = numpy.minimum.reduceat(value[order], first)
+        if isRapid:
+            self.rapidCuts.reshape(-1)[index[first]] = True
+
+
+def _stockOf(job):
+    for obj in job.Group:
+        if hasattr(obj, 'Proxy') and type(obj.Proxy).__name__ == 'Stock' and hasattr(obj, 'Shape'):
+            return obj
+    return None
+
+def simulateJob(job, resolution=Resolution):
+    '''simulateJob(job, [resolution=Resolution]) ... returns the Simulation of all operations of job,
+    on the stock object of the job or the bounding box of its base object. The target surface is
+    the base object of the job, meshed with the job's GeometryTolerance.'''
+    from PathScripts import PathUtil
+    begin = time.time()
+    stockObject = _stockOf(job)
+    stock = Heightmap.fromBoundBox((stockObject or job.Base).Shape.BoundBox, resolution)
+
+    target = None
+    if job.Base is not None and hasattr(job.Base, 'Shape'):
+        import MeshPart
+        from PathScripts import PathSurfaceEngine
+        try:
+            deflection = job.GeometryTolerance.Value
+        except AttributeError:
+            deflection = 0.01
+        mesh = MeshPart.meshFromShape(job.Base.Shape, Deflection=deflection)
+        target = stock.surface(PathSurfaceEngine.meshTriangles(mesh))
+
+    sim = Simulation(stock, target)
+    sim.position[2] = stock.height.max()
+    for obj in job.Group:
+        if not hasattr(obj, 'Path') or obj is stockObject:
+            continue
+        tc = PathUtil.toolControllerForOp(obj)
+        if tc is None or tc.Tool.Diameter <= 0:
+            continue
+        sim.setCutter(Cutter.fromTool(tc.Tool))
+        sim.run(obj.Path.Commands)
+    PathLog.info("%s: simulated %d moves in %.2fs, removed %.0f mm^3" % (job.Label, sim.moves, time.time() - begin, sim.removedVolume()))
+    return sim
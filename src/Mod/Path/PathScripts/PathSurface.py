@@ -27,12 +27,11 @@ import FreeCAD
 import Path
 from PathScripts import PathUtils
 import PathScripts.PathLog as PathLog
+import numpy
+from PathScripts import PathPointReduction
+from PathScripts import PathSurfaceEngine
+from PathScripts.PathPreferences import PathPreferences
 from PathScripts.PathUtils import waiting_effects
-import sys
-
-# xrange is not available in python3
-if sys.version_info.major >= 3:
-    xrange = range
 
 if False:
     PathLog.setLevel(PathLog.Level.DEBUG, PathLog.thisModule())
@@ -88,6 +87,9 @@ class ObjectSurface:
         self.vertRapid = 0.0
         self.horizRapid = 0.0
         self.radius = 0.0
+        self.cutter = None
+        self.tolerance = 0.0
+        self.processes = 0
 
         if FreeCAD.GuiUp:
             ViewProviderSurface(obj.ViewObject)
@@ -133,148 +135,60 @@ class ObjectSurface:
         pass
 
     def _waterline(self, obj, s, bb):
-        import ocl
-        from PathScripts.PathUtils import depth_params, fmt
-        import time
-
-        def drawLoops(loops):
-            nloop = 0
-            waterlinestring = ""
-            waterlinestring += "(waterline begin)"
-            for loop in loops:
-                p = loop[0]
-                loopstring = "(loop begin)" + "\n"
-                loopstring += "G0 Z" + str(obj.SafeHeight.Value) + "F " + PathUtils.fmt(self.vertRapid) + "\n"
-                loopstring += "G0 X" + \
-                    str(fmt(p.x)) + " Y" + str(fmt(p.y)) + "F " + PathUtils.fmt(self.horizRapid) + "\n"
-                loopstring += "G1 Z" + str(fmt(p.z)) + "\n"
-                for p in loop[1:]:
-                    loopstring += "G1 X" + \
-                        str(fmt(p.x)) + " Y" + str(fmt(p.y)) + \
-                        " Z" + str(fmt(p.z)) + "\n"
-                    zheight = p.z
-                p = loop[0]
-                loopstring += "G1 X" + \
-                    str(fmt(p.x)) + " Y" + str(fmt(p.y)) + \
-                    " Z" + str(fmt(zheight)) + "\n"
-                loopstring += "(loop end)" + "\n"
-                print("    loop ", nloop, " with ", len(loop), " points")
-                nloop = nloop + 1
-                waterlinestring += loopstring
-            waterlinestring += "(waterline end)" + "\n"
-            return waterlinestring
+        from PathScripts.PathUtils import depth_params
 
         depthparams = depth_params(obj.ClearanceHeight.Value, obj.SafeHeight.Value,
                                    obj.StartDepth.Value, obj.StepDown, obj.FinishDepth.Value, obj.FinalDepth.Value)
-        # stlfile = "../../stl/gnu_tux_mod.stl"
-        # surface = STLSurfaceSource(stlfile)
-        surface = s
-
-        t_before = time.time()
         zheights = [i for i in depthparams]
 
-        wl = ocl.Waterline()
-        # wl = ocl.AdaptiveWaterline() # this is slower, ca 60 seconds on i7
-        # CPU
-        wl.setSTL(surface)
-        diam = 0.5
-        length = 10.0
-        # any ocl MillingCutter class should work here
-        cutter = ocl.BallCutter(diam, length)
-        wl.setCutter(cutter)
         # this should be smaller than the smallest details in the STL file
-        wl.setSampling(obj.SampleInterval)
-        # AdaptiveWaterline() also has settings for minimum sampling interval
-        # (see c++ code)
-        all_loops = []
-        for zh in zheights:
-            print("calculating Waterline at z= ", zh)
-            wl.reset()
-            wl.setZ(zh)  # height for this waterline
-            wl.run()
-            all_loops.append(wl.getLoops())
-        t_after = time.time()
-        calctime = t_after - t_before
-        n = 0
-        output = ""
-        for loops in all_loops:  # at each z-height, we may get many loops
-            print("  %d/%d:" % (n, len(all_loops)))
-            output += drawLoops(loops)
-            n = n + 1
-        print("(" + str(calctime) + ")")
-        return output
+        levels = PathSurfaceEngine.waterline(s, self.cutter, zheights, obj.SampleInterval, self.processes)
+
+        commands = []
+        for loops in levels:  # at each z-height, we may get many loops
+            for loop in loops:
+                if len(loop) == 0:
+                    continue
+                # close the loop at the height of its last point
+                loop = numpy.vstack((loop, (loop[0][0], loop[0][1], loop[-1][2])))
+                commands.append(Path.Command('G0', {'Z': obj.SafeHeight.Value, 'F': self.vertRapid}))
+                commands.append(Path.Command('G0', {'X': float(loop[0][0]), 'Y': float(loop[0][1]), 'F': self.horizRapid}))
+                commands.append(Path.Command('G1', {'Z': float(loop[0][2])}))
+                commands.extend(PathPointReduction.commands(loop, self.tolerance))
+        return commands
 
     def _dropcutter(self, obj, s, bb):
-        import ocl
-        import time
-
-        cutter = ocl.CylCutter(self.radius * 2, 5)
-        pdc = ocl.PathDropCutter()   # create a pdc
-        pdc.setSTL(s)
-        pdc.setCutter(cutter)
-        pdc.minimumZ = 0.25
-        pdc.setSampling(obj.SampleInterval)
-
-        # some parameters for this "zigzig" pattern
-        xmin = bb.XMin - cutter.getDiameter()
-        xmax = bb.XMax + cutter.getDiameter()
-        ymin = bb.YMin - cutter.getDiameter()
-        ymax = bb.YMax + cutter.getDiameter()
-
-        # number of lines in the y-direction
-        Ny = int(bb.YLength / cutter.getDiameter())
-        dy = float(ymax - ymin) / Ny  # the y step-over
-
-        path = ocl.Path()                   # create an empty path object
-
-        # add Line objects to the path in this loop
-        for n in xrange(0, Ny):
-            y = ymin + n * dy
-            p1 = ocl.Point(xmin, y, 0)   # start-point of line
-            p2 = ocl.Point(xmax, y, 0)   # end-point of line
-            if (n % 2 == 0):  # even
-                l = ocl.Line(p1, p2)     # line-object
-            else:  # odd
-                l = ocl.Line(p2, p1)     # line-object
-
-            path.append(l)        # add the line to the path
-
-        pdc.setPath(path)
-
-        # run drop-cutter on the path
-        t_before = time.time()
-        pdc.run()
-        t_after = time.time()
-        print("calculation took ", t_after - t_before, " s")
-
-        # retrieve the points
-        clp = pdc.getCLPoints()
-        print("points received: " + str(len(clp)))
+        lines = PathSurfaceEngine.zigzagLines(bb, self.radius * 2)
+        clp = [points for points in PathSurfaceEngine.dropCutter(s, self.cutter, lines, obj.SampleInterval, 0.25, self.processes) if len(points)]
+        PathLog.debug("points received: %d" % sum(len(points) for points in clp))
+        if not clp:
+            return []
 
         # generate the path commands
-        output = ""
-        output += "G0 Z" + str(obj.ClearanceHeight.Value) + "F " + PathUtils.fmt(self.vertRapid) + "\n"
-        output += "G0 X" + str(clp[0].x) + " Y" + str(clp[0].y) + "F " + PathUtils.fmt(self.horizRapid) + "\n"
-        output += "G1 Z" + str(clp[0].z) + " F" + str(self.vertFeed) + "\n"
-
-        for c in clp:
-            output += "G1 X" + str(c.x) + " Y" + \
-                str(c.y) + " Z" + str(c.z) + "\n"
-
-        return output
+        start = clp[0][0]
+        commands = []
+        commands.append(Path.Command('G0', {'Z': obj.ClearanceHeight.Value, 'F': self.vertRapid}))
+        commands.append(Path.Command('G0', {'X': float(start[0]), 'Y': float(start[1]), 'F': self.horizRapid}))
+        commands.append(Path.Command('G1', {'Z': float(start[2]), 'F': self.vertFeed}))
+        for points in clp:
+            # the first point of each line is connected to the end of the previous one
+            commands.append(Path.Command('G1', {'X': float(points[0][0]), 'Y': float(points[0][1]), 'Z': float(points[0][2])}))
+            commands.extend(PathPointReduction.commands(points, self.tolerance))
+        return commands
 
     @waiting_effects
     def execute(self, obj):
         import MeshPart
         FreeCAD.Console.PrintWarning(
             translate("Path_Surface", "Hold on.  This might take a minute.\n"))
-        output = ""
+        commands = []
         if obj.Comment != "":
-            output += '(' + str(obj.Comment)+')\n'
+            commands.append(Path.Command('(' + str(obj.Comment) + ')'))
 
         toolLoad = obj.ToolController
         if toolLoad is None or toolLoad.ToolNumber == 0:
             FreeCAD.Console.PrintError("No Tool Controller is selected. We need a tool to build a Path.")
+            return
         else:
             self.vertFeed = toolLoad.VertFeed.Value
             self.horizFeed = toolLoad.HorizFeed.Value
@@ -286,9 +200,10 @@ class ObjectSurface:
                 return
             else:
                 self.radius = tool.Diameter/2
+                self.cutter = PathSurfaceEngine.cutterFor(tool)
 
-        output += "(" + obj.Label + ")"
-        output += "(Compensated Tool Path. Diameter: " + str(self.radius * 2) + ")"
+        commands.append(Path.Command("(" + obj.Label + ")"))
+        commands.append(Path.Command("(Compensated Tool Path. Diameter: " + str(self.radius * 2) + ")"))
 
         # if obj.Base:
         #     for b in obj.Base:
@@ -309,36 +224,32 @@ class ObjectSurface:
                         translate("Path_Surface", "This operation requires OpenCamLib to be installed.\n"))
                 return
 
+        # try/except is for Path Jobs created before GeometryTolerance
+        try:
+            deflection = parentJob.GeometryTolerance
+        except AttributeError:
+            deflection = PathPreferences.defaultGeometryTolerance()
+
         if mesh.TypeId.startswith('Mesh'):
             mesh = mesh.Mesh
         else:
-            # try/except is for Path Jobs created before GeometryTolerance
-            try:
-                deflection = parentJob.GeometryTolerance
-            except AttributeError:
-                from PathScripts.PathPreferences import PathPreferences
-                deflection = PathPreferences.defaultGeometryTolerance()
-
             mesh = MeshPart.meshFromShape(mesh.Shape, Deflection=deflection)
 
         bb = mesh.BoundBox
 
-        s = ocl.STLSurf()
-        for f in mesh.Facets:
-            p = f.Points[0]
-            q = f.Points[1]
-            r = f.Points[2]
-            t = ocl.Triangle(ocl.Point(p[0], p[1], p[2]), ocl.Point(
-                q[0], q[1], q[2]), ocl.Point(r[0], r[1], r[2]))
-            s.addTriangle(t)
+        s = PathSurfaceEngine.stlSurface(PathSurfaceEngine.meshTriangles(mesh))
+
+        # the toolpath is reduced to the same tolerance the mesh is generated with
+        self.tolerance = float(deflection)
+        self.processes = PathPreferences.surfaceProcesses()
 
         if obj.Algorithm == 'OCL Dropcutter':
-            output = self._dropcutter(obj, s, bb)
+            commands.extend(self._dropcutter(obj, s, bb))
         elif obj.Algorithm == 'OCL Waterline':
-            output = self._waterline(obj, s, bb)
+            commands.extend(self._waterline(obj, s, bb))
 
         if obj.Active:
-            path = Path.Path(output)
+            path = Path.Path(commands)
             obj.Path = path
             obj.ViewObject.Visibility = True
 
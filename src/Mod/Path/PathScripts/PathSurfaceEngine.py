@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+'''
+OpenCamLib drop cutter and waterline calculations for the surface operation.
+
+The waterline levels and batches of drop cutter lines are independent of each
+other and are calculated in a pool of worker processes (see PostUtils.imapPool).
+OpenCamLib objects can't be pickled, the workers are forked and use the surface
+in _surface, the tasks only carry a description of the cutter and the geometry.
+Every worker sets up its drop cutter once and reuses it for all of its lines.
+The cutter location points are returned as (n, 3) numpy arrays.
+By default everything is calculated in the calling process, more processes
+have to be asked for explicitly.
+'''
+
+import PathScripts.PathLog as PathLog
+import math
+import multiprocessing
+import numpy
+import time
+
+from PathScripts import PostUtils
+
+PathLog.setLevel(PathLog.Level.INFO, PathLog.thisModule())
+
+# the surface the workers run on, only set while a calculation is running
+_surface = None
+# (settings, drop cutter, cutter) of the worker, reused as long as the settings don't change
+_dropCutter = None
+
+
+def meshTriangles(mesh):
+    '''meshTriangles(mesh) ... returns the facets of mesh as a (n, 3, 3) array of points.'''
+    return numpy.array([f.Points for f in mesh.Facets], dtype=float).reshape(-1, 3, 3)
+
+def stlSurface(triangles):
+    '''stlSurface(triangles) ... returns an ocl.STLSurf of the (n, 3, 3) array of triangles.'''
+    import ocl
+    surface = ocl.STLSurf()
+    for (p, q, r) in triangles.tolist():
+        surface.addTriangle(ocl.Triangle(ocl.Point(*p), ocl.Point(*q), ocl.Point(*r)))
+    return surface
+
+def cutterFor(tool, length=10.0):
+    '''cutterFor(tool, [length=10.0]) ... returns a picklable description of the ocl cutter
+    matching the shape of tool, see cutter().'''
+    if tool.CuttingEdgeHeight > 0:
+        length = tool.CuttingEdgeHeight
+    if tool.ToolType == 'BallEndMill':
+        return ('BallCutter', tool.Diameter, length)
+    if tool.ToolType in ['ChamferMill', 'Engraver', 'CounterSink'] and 0 < tool.CuttingEdgeAngle < 180:
+        return ('ConeCutter', tool.Diameter, math.radians(tool.CuttingEdgeAngle / 2.0), length)
+    if tool.CornerRadius > 0 and 2 * tool.CornerRadius < tool.Diameter:
+        return ('BullCutter', tool.Diameter, tool.CornerRadius, length)
+    return ('CylCutter', tool.Diameter, length)
+
+def cutter(description):
+    '''cutter(description) ... returns the ocl cutter for a description returned by cutterFor().'''
+    import ocl
+    return getattr(ocl, description[0])(*description[1:])
+
+def _waterlineTask(task):
+    import ocl
+    (z, description, sampling) = task
+    wl = ocl.Waterline()
+    wl.setSTL(_surface)
+    wl.setCutter(cutter(description))
+    wl.setSampling(sampling)
+    wl.setZ(z)
+    wl.run()
+    return [numpy.array([(p.x, p.y, p.z) for p in loop], dtype=float).reshape(-1, 3) for loop in wl.getLoops()]
+
+def _pathDropCutter(description, sampling, minimumZ):
+    global _dropCutter
+    import ocl
+    settings = (description, sampling, minimumZ)
+    if _dropCutter is None or _dropCutter[0] != settings:
+        c = cutter(description)
+        pdc = ocl.PathDropCutter()
+        pdc.setSTL(_surface)
+        pdc.setCutter(c)
+        pdc.minimumZ = minimumZ
+        pdc.setSampling(sampling)
+        _dropCutter = (settings, pdc, c)
+    return _dropCutter[1]
+
+def _dropCutterTask(task):
+    import ocl
+    (lines, description, sampling, minimumZ) = task
+    pdc = _pathDropCutter(description, sampling, minimumZ)
+    result = []
+    for (x0, y0, x1, y1) in lines:
+        path = ocl.Path()
+        path.append(ocl.Line(ocl.Point(x0, y0, 0), ocl.Point(x1, y1, 0)))
+        pdc.setPath(path)
+        pdc.run()
+        result.append(numpy.array([(p.x, p.y, p.z) for p in pdc.getCLPoints()], dtype=float).reshape(-1, 3))
+    return result
+
+def _run(surface, function, tasks, processes):
+    global _surface, _dropCutter
+    _surface = surface
+    begin = time.time()
+    try:
+        results = list(PostUtils.imapPool(function, tasks, processes))
+    finally:
+        _surface = None
+        _dropCutter = None
+    PathLog.info("%d tasks took %.2fs" % (len(tasks), time.time() - begin))
+    return results
+
+def waterline(surface, description, zheights, sampling, processes=1):
+    '''waterline(surface, description, zheights, sampling, [processes=1]) ... returns a list with
+    the waterline loops at each of zheights, each loop a (n, 3) array of points.
+    The levels are calculated in processes worker processes, 0 for one per cpu.'''
+    tasks = [(z, description, sampling) for z in zheights]
+    return _run(surface, _waterlineTask, tasks, processes)
+
+def zigzagLines(bb, diameter):
+    '''zigzagLines(bb, diameter) ... returns the (x0, y0, x1, y1) lines of a zigzag pattern
+    covering bb and extending it by diameter, one diameter apart.'''
+    xmin = bb.XMin - diameter
+    xmax = bb.XMax + diameter
+    ymin = bb.YMin - diameter
+    ymax = bb.YMax + diameter
+    count = max(int(bb.YLength / diameter), 1)
+    dy = float(ymax - ymin) / count
+    lines = []
+    for n in range(count):
+        y = ymin + n * dy
+        if n % 2 == 0:
+            lines.append((xmin, y, xmax, y))
+        else:
+            lines.append((xmax, y, xmin, y))
+    return lines
+
+def dropCutter(surface, description, lines, sampling, minimumZ, processes=1):
+    '''dropCutter(surface, description, lines, sampling, minimumZ, [processes=1]) ... returns
+    the cutter location points along each of lines as a (n, 3) array of points.
+    The lines are split into batches, which are calculated in processes worker processes,
+    0 for one per cpu.'''
+    if not processes:
+        processes = multiprocessing.cpu_count()
+    # a few batches per process evens out lines which take longer than others
+    size = max(1, len(lines) // (4 * processes) if processes > 1 else len(lines))
+    tasks = [(lines[i:i + size], description, sampling, minimumZ) for i in range(0, len(lines), size)]
+    return [points for batch in _run(surface, _dropCutterTask, tasks, processes) for points in batch]
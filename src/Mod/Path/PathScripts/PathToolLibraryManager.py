@@ -24,6 +24,7 @@
 
 from __future__ import print_function
 import FreeCAD
+import bisect
 import xml.sax
 import FreeCADGui
 import Path
@@ -34,6 +35,11 @@ from PathScripts import PathUtils
 
 import PathScripts.PathLog as PathLog
 
+try:
+    import xml.etree.cElementTree as ElementTree
+except ImportError:
+    import xml.etree.ElementTree as ElementTree
+
 LOG_MODULE = 'PathToolLibraryManager'
 PathLog.setLevel(PathLog.Level.INFO, LOG_MODULE)
 #PathLog.trackModule('PathToolLibraryManager')
@@ -41,6 +47,41 @@ PathLog.setLevel(PathLog.Level.INFO, LOG_MODULE)
 def translate(context, text, disambig=None):
     return QtCore.QCoreApplication.translate(context, text, disambig)
 
+def toolFromAttributes(attributes):
+    '''toolFromAttributes(attributes) ... returns the Path.Tool of the attributes of a Tool element.'''
+    tool = Path.Tool()
+    tool.Name = str(attributes["name"])
+    tool.ToolType = str(attributes.get("type", "Undefined"))
+    tool.Material = str(attributes.get("mat", "Undefined"))
+    tool.Diameter = float(attributes.get("diameter", 0))
+    tool.LengthOffset = float(attributes.get("length", 0))
+    tool.FlatRadius = float(attributes.get("flat", 0))
+    tool.CornerRadius = float(attributes.get("corner", 0))
+    tool.CuttingEdgeAngle = float(attributes.get("angle", 0))
+    tool.CuttingEdgeHeight = float(attributes.get("height", 0))
+    return tool
+
+def parseTools(root):
+    '''parseTools(root) ... returns a dictionary of the Path.Tools in the Toolslot elements of root,
+    an ElementTree element, by tool number. Slots without number or tool are skipped.'''
+    tools = {}
+    for slot in root.iter("Toolslot"):
+        number = int(slot.get("number", 0))
+        tool = slot.find("Tool")
+        if number and tool is not None:
+            tools[number] = toolFromAttributes(tool.attrib)
+    return tools
+
+def tooltableOf(tools):
+    '''tooltableOf(tools) ... returns a Path.Tooltable holding tools, a dictionary of Path.Tools by number.'''
+    tooltable = Path.Tooltable()
+    tooltable.Tools = tools
+    return tooltable
+
+def readTooltable(filename):
+    '''readTooltable(filename) ... returns the Path.Tooltable of a tooltable file in FreeCAD's XML format.'''
+    return tooltableOf(parseTools(ElementTree.parse(filename).getroot()))
+
 # Tooltable XML readers
 class FreeCADTooltableHandler(xml.sax.ContentHandler):
     # http://www.tutorialspoint.com/python/python_xml_processing.htm
@@ -57,18 +98,7 @@ class FreeCADTooltableHandler(xml.sax.ContentHandler):
         elif tag == "Toolslot":
             self.number = int(attributes["number"])
         elif tag == "Tool":
-            self.tool = Path.Tool()
-            self.tool.Name = str(attributes["name"])
-            self.tool.ToolType = str(attributes["type"])
-            self.tool.Material = str(attributes["mat"])
-            # for some reason without the following line I get an error
-            #print attributes["diameter"]
-            self.tool.Diameter = float(attributes["diameter"])
-            self.tool.LengthOffset = float(attributes["length"])
-            self.tool.FlatRadius = float(attributes["flat"])
-            self.tool.CornerRadius = float(attributes["corner"])
-            self.tool.CuttingEdgeAngle = float(attributes["angle"])
-            self.tool.CuttingEdgeHeight = float(attributes["height"])
+            self.tool = toolFromAttributes(attributes)
 
     # Call when an elements ends
     def endElement(self, tag):
@@ -133,6 +163,80 @@ class HeeksTooltableHandler(xml.sax.ContentHandler):
                 self.tool = None
 
 
+class ToolIndex(object):
+    '''ToolIndex(tools) ... index of tools, a dictionary of Path.Tools by number, for looking
+    them up by number, name, type and diameter range. The index is a snapshot of the tools,
+    it has to be rebuilt when they change.'''
+
+    def __init__(self, tools):
+        self.tools = tools
+        self.names = {}
+        self.types = {}
+        for number in sorted(tools):
+            tool = tools[number]
+            self.names.setdefault(tool.Name, []).append(number)
+            self.types.setdefault(tool.ToolType, []).append(number)
+        bydiameter = sorted((tool.Diameter, number) for (number, tool) in tools.items())
+        self.diameters = [d for (d, number) in bydiameter]
+        self.numbers = [number for (d, number) in bydiameter]
+
+    def __len__(self):
+        return len(self.tools)
+
+    def getTool(self, number):
+        '''getTool(number) ... returns a copy of the tool with the given number, or None.'''
+        tool = self.tools.get(number)
+        return tool.copy() if tool is not None else None
+
+    def withName(self, name):
+        '''withName(name) ... returns the numbers of the tools with the given name.'''
+        return list(self.names.get(name, []))
+
+    def withType(self, toolType):
+        '''withType(toolType) ... returns the numbers of the tools of the given type.'''
+        return list(self.types.get(toolType, []))
+
+    def withDiameter(self, minimum, maximum):
+        '''withDiameter(minimum, maximum) ... returns the numbers of the tools with a diameter
+        between minimum and maximum, inclusive, ordered by diameter.'''
+        begin = bisect.bisect_left(self.diameters, minimum)
+        end = bisect.bisect_right(self.diameters, maximum)
+        return self.numbers[begin:end]
+
+    def find(self, name=None, toolType=None, minDiameter=None, maxDiameter=None):
+        '''find([name], [toolType], [minDiameter], [maxDiameter]) ... returns the sorted numbers of
+        the tools matching all of the given criteria.'''
+        numbers = set(self.tools)
+        if name is not None:
+            numbers.intersection_update(self.names.get(name, []))
+        if toolType is not None:
+            numbers.intersection_update(self.types.get(toolType, []))
+        if minDiameter is not None or maxDiameter is not None:
+            minimum = minDiameter if minDiameter is not None else float('-inf')
+            maximum = maxDiameter if maxDiameter is not None else float('inf')
+            numbers.intersection_update(self.withDiameter(minimum, maximum))
+        return sorted(numbers)
+
+
+# the parsed main library as (content, tooltable, index), valid as long as
+# the preferences hold the same content
+_mainLibrary = None
+
+def mainLibrary(content):
+    '''mainLibrary(content) ... returns (tooltable, index) of content, the main library as stored
+    in the preferences. The result is reused until the content changes.'''
+    global _mainLibrary
+    if _mainLibrary is None or _mainLibrary[0] != content:
+        tools = parseTools(ElementTree.fromstring(content)) if content else {}
+        _mainLibrary = (content, tooltableOf(tools), ToolIndex(tools))
+    return _mainLibrary[1:]
+
+def invalidateMainLibrary():
+    '''invalidateMainLibrary() ... drops the parsed main library.'''
+    global _mainLibrary
+    _mainLibrary = None
+
+
 class ToolLibraryManager():
     '''
     The Tool Library is a list of individual tool tables.  Each
@@ -148,6 +252,7 @@ class ToolLibraryManager():
         '''Persists the permanent library to FreeCAD user preferences'''
         tmpstring = tooltable.Content
         self.prefs.SetString("ToolLibrary", tmpstring)
+        invalidateMainLibrary()
         return True
 
     def getLists(self):
@@ -166,27 +271,32 @@ class ToolLibraryManager():
     def _findList(self, listname):
         tt = None
         if listname == "<Main>":
-            tmpstring = self.prefs.GetString("ToolLibrary", "")
-            if tmpstring != "":
-                Handler = FreeCADTooltableHandler()
-                xml.sax.parseString(tmpstring, Handler)
-                tt = Handler.tooltable
-            else:
-                tt = Path.Tooltable()
+            # the caller is free to modify the returned table
+            tt = mainLibrary(self.prefs.GetString("ToolLibrary", ""))[0].copy()
         else:
             for o in FreeCAD.ActiveDocument.Objects:
                 if o.Label == listname:
                     tt = o.Tooltable
         return tt
 
+    def index(self, listname):
+        '''index(listname) ... returns the ToolIndex of the given list, or None if there is no such list.'''
+        if listname == "<Main>":
+            return mainLibrary(self.prefs.GetString("ToolLibrary", ""))[1]
+        tt = self._findList(listname)
+        if tt is None:
+            return None
+        return ToolIndex(tt.Tools)
+
     def getTool(self, listname, toolnum):
+        if listname == "<Main>":
+            return self.index(listname).getTool(toolnum)
         tt = self._findList(listname)
         return tt.getTool(toolnum)
 
     def getTools(self, tablename):
         '''returns the tool data for a given table'''
-        tooldata = []
-        tt = self._findList(tablename)
+        index = self.index(tablename)
         headers = ["","Tool Num.","Name","Tool Type","Material","Diameter","Length Offset","Flat Radius","Corner Radius","Cutting Edge Angle","Cutting Edge Height"]
         model = QtGui.QStandardItemModel()
         model.setHorizontalHeaderLabels(headers)
@@ -196,10 +306,8 @@ class ToolLibraryManager():
             displayed_val = val.UserString      #just the displayed value-not the internal one
             return displayed_val
 
-        if tt:
-            if len(tt.Tools) == 0:
-                tooldata.append([])
-            for number, t in tt.Tools.iteritems():
+        if index:
+            for number, t in sorted(index.tools.items()):
 
                 itemcheck = QtGui.QStandardItem()
                 itemcheck.setCheckable(True)
@@ -222,24 +330,23 @@ class ToolLibraryManager():
     # methods for importing and exporting
     def read(self, filename, listname):
         "imports a tooltable from a file"
-        parser = xml.sax.make_parser()
-        parser.setFeature(xml.sax.handler.feature_namespaces, 0)
-        if os.path.splitext(filename[0])[1].lower() == ".tooltable":
-            Handler = HeeksTooltableHandler()
-        else:
-            Handler = FreeCADTooltableHandler()
-
         try:
-            parser.setContentHandler(Handler)
-            parser.parse(unicode(filename[0]))
-            if not Handler.tooltable:
+            if os.path.splitext(filename[0])[1].lower() == ".tooltable":
+                parser = xml.sax.make_parser()
+                parser.setFeature(xml.sax.handler.feature_namespaces, 0)
+                Handler = HeeksTooltableHandler()
+                parser.setContentHandler(Handler)
+                parser.parse(unicode(filename[0]))
+                ht = Handler.tooltable
+            else:
+                ht = readTooltable(filename[0])
+            if not ht:
                 return None
 
-            ht = Handler.tooltable
+            tools = ht.Tools
             tt = self._findList(listname)
-            for t in ht.Tools:
-                newt = ht.getTool(t).copy()
-                tt.addTools(newt)
+            # the tools are appended in one go, behind the existing ones
+            tt.addTools([tools[number] for number in sorted(tools)])
             if listname == "<Main>":
                 self.saveMainLibrary(tt)
             return True
@@ -251,19 +358,20 @@ class ToolLibraryManager():
         tt = self._findList(listname)
         if tt:
             try:
-                file = open(unicode(filename[0]), "wb")
+                file = open(filename[0], "w")
 
                 if filename[1] == 'LinuxCNC tooltable (*.tbl)':
-                    for key in tt.Tools:
-                        t = tt.Tools[key]
-                        file.write("T{} P{} Y{} Z{} A{} B{} C{} U{} V{} W{} D{} I{} J{} Q{} ;{}\n".format(key,key,0,t.LengthOffset,0,0,0,0,0,0,t.Diameter,0,0,0,t.Name))
+                    lines = []
+                    for key, t in sorted(tt.Tools.items()):
+                        lines.append("T{} P{} Y{} Z{} A{} B{} C{} U{} V{} W{} D{} I{} J{} Q{} ;{}\n".format(key,key,0,t.LengthOffset,0,0,0,0,0,0,t.Diameter,0,0,0,t.Name))
+                    file.write(''.join(lines))
 
                 else:
                     file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
                     file.write(tt.Content)
 
                 file.close()
-                print("Written ", unicode(filename[0]))
+                print("Written ", filename[0])
 
             except Exception as e:
                 print("Could not write file:", e)
@@ -274,7 +382,7 @@ class ToolLibraryManager():
         tt = self._findList(listname)
         if position is None:
             tt.addTools(tool)
-            newID = tt.Tools.keys()[-1]
+            newID = max(tt.Tools)
         else:
             tt.setTool(position, tool)
             newID = position
@@ -299,10 +407,10 @@ class ToolLibraryManager():
         target = number - 1
         tt = self._findList(listname)
 
-        t1 = tt.getTool(number).copy()
+        t1 = tt.getTool(number)
         tt.deleteTool(number)
-        if target in tt.Tools.keys():
-            t2 = tt.getTool(target).copy()
+        t2 = tt.getTool(target)
+        if t2 is not None:
             tt.deleteTool(target)
             tt.setTool(number, t2)
         tt.setTool(target, t1)
@@ -314,10 +422,10 @@ class ToolLibraryManager():
         "moves a tool to a higher number, if possible"
         tt = self._findList(listname)
         target = number + 1
-        t1 = tt.getTool(number).copy()
+        t1 = tt.getTool(number)
         tt.deleteTool(number)
-        if target in tt.Tools.keys():
-            t2 = tt.getTool(target).copy()
+        t2 = tt.getTool(target)
+        if t2 is not None:
             tt.deleteTool(target)
             tt.setTool(number, t2)
         tt.setTool(target, t1)
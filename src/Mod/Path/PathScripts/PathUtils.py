@@ -667,54 +667,200 @@ def rampPlunge(edge, rampangle, destZ, startZ):
     return rampCmds
 
 
-def sort_jobs(locations, keys, attractors=[]):
+def _distinct_rows(rows):
+    """ returns the distinct rows of an integer or float array, sorted, and the number of times each occurs """
+    rows = rows[numpy.lexsort(rows.T[::-1])]
+    first = numpy.ones(len(rows), dtype=bool)
+    first[1:] = (rows[1:] != rows[:-1]).any(axis=1)
+    starts = numpy.flatnonzero(first)
+    return (rows[starts], numpy.diff(numpy.append(starts, len(rows))))
+
+def _location_grid(points, crowding=3.0):
+    """ returns (origin, size, cells), a grid of cubic cells with about one of the
+        points per cell, cells mapping the index of a cell to the indices of its points.
+        The size starts at the one of points spread evenly over their bounding box and
+        is halved as long as a point shares its cell with more than crowding points on
+        average, so clusters and outliers don't end up in a few crowded cells.
+        Points on top of each other are counted once. """
+    count, dims = points.shape
+    origin = points.min(axis=0)
+    extent = (points.max(axis=0) - origin).max()
+    size = max(extent / max(1, int(count ** (1.0 / dims))), 1e-6)
+    distinct = _distinct_rows(points)[0]
+    while size > 1e-6:
+        occupancy = _distinct_rows(numpy.floor((distinct - origin) / size).astype(numpy.int64))[1]
+        if (occupancy ** 2).sum() <= crowding * len(distinct):
+            break
+        size = max(size / 2, 1e-6)
+    cells = {}
+    for i, cell in enumerate(numpy.floor((points - origin) / size).astype(int).tolist()):
+        cells.setdefault(tuple(cell), []).append(i)
+    return (origin, size, cells)
+
+def _grid_ring(dims, k, rings={}):
+    """ returns the offsets of the cells at Chebyshev distance k from a cell """
+    if (dims, k) not in rings:
+        import itertools
+        rings[(dims, k)] = [o for o in itertools.product(range(-k, k + 1), repeat=dims) if max(abs(c) for c in o) == k]
+    return rings[(dims, k)]
+
+def _nearest_neighbour_order(points, weights):
+    """ returns the indices of points in the order the nearest neighbour method visits them,
+        starting at the origin. The cost of a move is the squared distance plus the weight
+        of the next point, ties go to the point with the lower index. """
+    count, dims = points.shape
+    origin, size, cells = _location_grid(points)
+    remaining = numpy.ones(count, dtype=bool)
+    # the points by descending weight, the last remaining one has the lowest weight
+    minWeight = list(numpy.argsort(weights, kind='mergesort')[::-1])
+
+    def linear(q):
+        cost = ((points - q) ** 2).sum(axis=1) + weights
+        cost[~remaining] = numpy.inf
+        return int(numpy.argmin(cost))
+
+    # the lowest weight in each cell, so cells which can't hold a better point are skipped
+    cellWeight = dict((cell, min(weights[i] for i in indices)) for cell, indices in cells.items())
+    pts = points.tolist()
+    wts = weights.tolist()
+    low = origin.tolist()
+    order = [linear(numpy.zeros(dims))]
+    while len(order) < count:
+        last = order[-1]
+        remaining[last] = False
+        q = pts[last]
+        cell = tuple(int(math.floor((a - o) / size)) for a, o in zip(q, low))
+        cells[cell].remove(last)
+        while not remaining[minWeight[-1]]:
+            minWeight.pop()
+        lowest = wts[minWeight[-1]]
+
+        best = numpy.inf
+        bestIndex = None
+        scanned = 0
+        k = 0
+        while True:
+            # all points in ring k are at least k-1 cells away
+            if k > 0 and ((k - 1) * size) ** 2 + lowest > best:
+                break
+            if scanned > 4 * (count - len(order)):
+                # the nearby cells are empty, looking at all points is cheaper
+                bestIndex = linear(points[last])
+                break
+            for offset in _grid_ring(dims, k):
+                scanned += 1
+                c = tuple(a + b for a, b in zip(cell, offset))
+                indices = cells.get(c)
+                if not indices:
+                    continue
+                # the squared distance to the nearest point of the cell
+                bound = 0.0
+                for a, b, o in zip(q, c, low):
+                    b = o + b * size
+                    if a < b:
+                        bound += (b - a) ** 2
+                    elif a > b + size:
+                        bound += (a - b - size) ** 2
+                if bound + cellWeight[c] > best:
+                    continue
+                for i in indices:
+                    cost = sum((a - b) ** 2 for a, b in zip(pts[i], q)) + wts[i]
+                    if cost < best or (cost == best and i < bestIndex):
+                        best = cost
+                        bestIndex = i
+            k += 1
+        order.append(bestIndex)
+    return order
+
+def _two_opt(points, order, passes=10):
+    """ returns order improved by 2-opt moves between close points, which shorten the
+        travel distance. The first point stays the first one. Each point is looked at
+        again when one of its edges changed, up to passes times the number of points. """
+    import collections
+
+    count, dims = points.shape
+    if count < 4:
+        return order
+    origin, size, cells = _location_grid(points)
+
+    def dist(a, b):
+        return numpy.sqrt(((points[a] - points[b]) ** 2).sum(axis=1))
+
+    # the candidates for a new edge are the points in the same and the neighbouring cells
+    neighbours = []
+    for i, cell in enumerate(numpy.floor((points - origin) / size).astype(int).tolist()):
+        close = []
+        for k in [0, 1]:
+            for offset in _grid_ring(dims, k):
+                close.extend(cells.get(tuple(c + o for c, o in zip(cell, offset)), ()))
+        close.remove(i)
+        neighbours.append(numpy.array(close, dtype=int))
+
+    tour = numpy.array(order)
+    pos = numpy.empty(count, dtype=int)
+    pos[tour] = numpy.arange(count)
+    queue = collections.deque(tour)
+    queued = numpy.ones(count, dtype=bool)
+    budget = passes * count
+    while queue and budget > 0:
+        budget -= 1
+        a = queue.popleft()
+        queued[a] = False
+        if not len(neighbours[a]):
+            continue
+        # replace the edges i,i+1 and j,j+1 by i,j and i+1,j+1 for each neighbour
+        i = numpy.minimum(pos[a], pos[neighbours[a]])
+        j = numpy.maximum(pos[a], pos[neighbours[a]])
+        valid = j - i >= 2
+        if not valid.any():
+            continue
+        i = i[valid]
+        j = j[valid]
+        last = j + 1 >= count
+        A, B, C, D = tour[i], tour[i + 1], tour[j], tour[numpy.minimum(j + 1, count - 1)]
+        delta = dist(A, C) - dist(A, B) + numpy.where(last, 0.0, dist(B, D) - dist(C, D))
+        m = int(numpy.argmin(delta))
+        if delta[m] < -1e-9:
+            i, j = i[m], j[m]
+            tour[i + 1:j + 1] = tour[i + 1:j + 1][::-1].copy()
+            pos[tour[i + 1:j + 1]] = numpy.arange(i + 1, j + 1)
+            for p in [a, A[m], B[m], C[m], D[m]]:
+                if not queued[p]:
+                    queued[p] = True
+                    queue.append(p)
+    return [int(i) for i in tour]
+
+def travel_distance(locations, keys):
+    """ returns the length of the straight moves from the first of locations through all of them """
+    d = 0.0
+    for a, b in zip(locations, locations[1:]):
+        d += math.sqrt(sum((a[k] - b[k]) ** 2 for k in keys))
+    return d
+
+def sort_jobs(locations, keys, attractors=[], optimize=False):
     """ sort holes by the nearest neighbor method
         keys: two-element list of keys for X and Y coordinates. for example ['x','y']
+        attractors: keys of values added to the squared distance, locations with a low
+            absolute value are picked first. Defaults to the X coordinate.
+        optimize: if True the order is improved by 2-opt moves, which shorten the
+            travel distance but don't take the attractors into account
         originally written by m0n5t3r for PathHelix
     """
-    from Queue import PriorityQueue
-    from collections import defaultdict
+    if not locations:
+        return []
 
     attractors = attractors or [keys[0]]
 
-    def sqdist(a, b):
-        """ square Euclidean distance """
-        d = 0
-        for k in keys:
-            d += (a[k] - b[k]) ** 2
+    points = numpy.array([[location[k] for k in keys] for location in locations], dtype=float)
+    weights = numpy.array([sum(abs(location[k]) for k in attractors) for location in locations], dtype=float)
 
-        return d
+    order = _nearest_neighbour_order(points, weights)
+    PathLog.debug("sort_jobs: %d locations, travel distance %.2f" % (len(order), travel_distance([locations[i] for i in order], keys)))
+    if optimize:
+        order = _two_opt(points, order)
+        PathLog.debug("sort_jobs: travel distance after 2-opt %.2f" % travel_distance([locations[i] for i in order], keys))
 
-    def weight(location):
-        w = 0
-
-        for k in attractors:
-            w += abs(location[k])
-
-        return w
-
-    def find_closest(location_list, location, dist):
-        q = PriorityQueue()
-
-        for j in location_list:
-            q.put((dist(j, location) + weight(j), j))
-
-        prio, result = q.get()
-
-        return result
-
-    out = []
-    zero = defaultdict(lambda: 0)
-
-    out.append(find_closest(locations, zero, sqdist))
-    locations.remove(out[-1])
-
-    while locations:
-        closest = find_closest(locations, out[-1], sqdist)
-        out.append(closest)
-        locations.remove(closest)
-
-    return out
+    return [locations[i] for i in order]
 
 def guessDepths(objshape, subs=None):
     """
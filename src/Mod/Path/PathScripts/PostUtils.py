@@ -28,6 +28,8 @@ These are a common functions and classes for creating custom post processors.
 
 from PySide import QtCore, QtGui
 import FreeCAD
+import multiprocessing
+import os
 
 FreeCADGui = None
 if FreeCAD.GuiUp:
@@ -170,3 +172,238 @@ def fcoms(string,commentsym):
 
 
 
+
+
+class GCodeWriter(object):
+    '''Collects the output of a post processor and streams it into a file.
+    Text is written through write() as it is generated and flushed to the file
+    in chunks, so the program never has to be assembled by concatenation.
+    A command line is built by passing its words to command(), which hands
+    them to the formatter; a post processor can pass its own formatter if it
+    lays out its lines differently.
+    Flushed chunks are dropped, so the memory used doesn't grow with the program.
+    Only if the editor is to be shown or no file is given ('-') the output is
+    kept in memory, and close() returns the complete program.'''
+
+    def __init__(self, filename='-', showEditor=False, commandSpace=' ', formatter=None, chunkSize=1000):
+        self.filename = filename
+        self.showEditor = showEditor
+        self.commandSpace = commandSpace
+        self.formatter = formatter if formatter else self.formatWords
+        self.chunkSize = chunkSize
+        self.chunks = []
+        self.gfile = None
+        if filename != '-' and not showEditor:
+            self.gfile = open(filename, "wb")
+
+    def formatWords(self, words):
+        '''default formatter, joins the words of a command line with commandSpace'''
+        return "".join(w + self.commandSpace for w in words).strip() + "\n"
+
+    def write(self, text):
+        '''append text to the output'''
+        self.chunks.append(text)
+        if self.gfile and len(self.chunks) >= self.chunkSize:
+            self.flush()
+
+    def writeLines(self, text, linenumber=None):
+        '''append each line of text, prefixed with linenumber() if given'''
+        for line in text.splitlines(True):
+            if linenumber:
+                self.write(linenumber() + line)
+            else:
+                self.write(line)
+
+    def command(self, words):
+        '''format words into a command line and append it, nothing is written for an empty line'''
+        if words:
+            self.write(self.formatter(words))
+
+    def flush(self):
+        '''write the pending chunks to the file and drop them'''
+        if self.gfile and self.chunks:
+            self.gfile.write(_encode("".join(self.chunks)))
+            self.chunks = []
+
+    def close(self):
+        '''finish the output, show the editor if requested and return the final program.
+        Returns None if the program was streamed into a file.'''
+        if self.gfile:
+            self.flush()
+            self.gfile.close()
+            self.gfile = None
+            return None
+        gcode = "".join(self.chunks)
+        final = editor(gcode) if self.showEditor else gcode
+        if self.filename != '-':
+            gfile = open(self.filename, "wb")
+            gfile.write(_encode(final))
+            gfile.close()
+        return final
+
+
+_feedFactors = {}
+
+def feedFactor(unitFormat):
+    '''returns the factor converting an internal feed rate into unitFormat (like 'mm/min')'''
+    factor = _feedFactors.get(unitFormat)
+    if factor is None:
+        speed = FreeCAD.Units.Quantity(1, FreeCAD.Units.Velocity)
+        factor = float(speed.getValueAs(unitFormat))
+        _feedFactors[unitFormat] = factor
+    return factor
+
+
+class CommandFormatter(object):
+    '''Turns Path commands into the words of a G-code line.
+    The format of every parameter is resolved once when the formatter is
+    created, and feed rates are converted with a factor computed once for
+    unitFormat, so formatting a command only touches the parameters it has.
+    params gives the order of the parameters, others are dropped.
+    wordFormats overrides the format of single parameters, either with a
+    template like 'T%d' or with a function taking the value.
+    If modal is set a command is left out when it is the same as the one
+    before, like MODAL of the post processors. The parameters in modalParams
+    are left out of a move when they have the same value as on the previous
+    one, the state is dropped by any command which is not a move. Between G91
+    and G90 nothing is left out, a repeated value is a move in incremental mode.
+    A formatter can be pickled together with its modal state, to carry on
+    formatting in a worker process, as long as its wordFormats are picklable.'''
+
+    Moves = ['G0', 'G00', 'G1', 'G01', 'G2', 'G02', 'G3', 'G03']
+    Absolute = ['G90']
+    Incremental = ['G91']
+
+    def __init__(self, params, precision=4, feedPrecision=None, unitFormat='mm/min', rapidMoves=None, modal=False, modalParams=None, wordFormats=None):
+        self.args = (params, precision, feedPrecision, unitFormat, rapidMoves, modal, modalParams, wordFormats)
+        self.order = dict((p, i) for i, p in enumerate(params))
+        self.rapidMoves = rapidMoves if rapidMoves is not None else ['G0', 'G00']
+        self.modal = modal
+        self.modalParams = set(modalParams) if modalParams else set()
+        if feedPrecision is None:
+            feedPrecision = precision
+        factor = feedFactor(unitFormat)
+        self.formats = {}
+        for p in params:
+            fmt = wordFormats.get(p) if wordFormats else None
+            if fmt is None:
+                if p == 'F':
+                    fmt = self._feedFormat(p + '%%.%sf' % feedPrecision, factor)
+                elif p == 'T':
+                    fmt = 'T%d'
+                else:
+                    fmt = p + '%%.%sf' % precision
+            if not callable(fmt):
+                fmt = fmt.__mod__
+            self.formats[p] = fmt
+        self.incremental = False
+        self.reset()
+
+    @staticmethod
+    def _feedFormat(template, factor):
+        return lambda value: template % (value * factor)
+
+    def __getstate__(self):
+        return (self.args, self.lastCommand, self.lastWords, self.incremental)
+
+    def __setstate__(self, state):
+        args, lastCommand, lastWords, incremental = state
+        self.__init__(*args)
+        self.lastCommand = lastCommand
+        self.lastWords = lastWords
+        self.incremental = incremental
+
+    def reset(self):
+        '''forget the modal state, the next command is written out completely.
+        The distance mode is kept, it is a state of the machine.'''
+        self.lastCommand = None
+        self.lastWords = {}
+
+    def incrementalAfter(self, commands):
+        '''returns if the formatter is in incremental mode after the (Name, Parameters) tuples of commands'''
+        incremental = self.incremental
+        for name, parameters in commands:
+            if name in self.Incremental:
+                incremental = True
+            elif name in self.Absolute:
+                incremental = False
+        return incremental
+
+    def words(self, command, name=None):
+        '''returns the list of words for command, name replaces the command's name if given'''
+        if name is None:
+            name = command.Name
+        return self.wordsOf(name, command.Parameters)
+
+    def wordsOf(self, name, parameters):
+        '''returns the list of words for a command given by its name and parameters'''
+        words = []
+        if not (self.modal and name == self.lastCommand):
+            words.append(name)
+        self.lastCommand = name
+
+        order = self.order
+        params = [p for p in parameters if p in order]
+        if len(params) > 1:
+            params.sort(key=order.__getitem__)
+        last = None
+        rapid = False
+        if name in self.Moves:
+            if not self.incremental:
+                last = self.lastWords
+            rapid = name in self.rapidMoves
+        elif not name.startswith('(') and name != 'message':
+            self.lastWords = {}
+            if name in self.Incremental:
+                self.incremental = True
+            elif name in self.Absolute:
+                self.incremental = False
+        modalParams = self.modalParams
+        formats = self.formats
+        for p in params:
+            if rapid and p == 'F':
+                continue
+            word = formats[p](parameters[p])
+            if last is not None and p in modalParams:
+                if last.get(p) == word:
+                    continue
+                last[p] = word
+            words.append(word)
+        return words
+
+
+def serializeCommands(commands):
+    '''returns commands as a list of (Name, Parameters) tuples, which can be sent to another process'''
+    return [(c.Name, c.Parameters) for c in commands]
+
+def imapPool(function, tasks, processes=0):
+    '''Calls function for each of tasks and yields the results in order.
+    With more than one process the tasks are handed to a pool of forked
+    worker processes, function and tasks have to be picklable then. The
+    results are yielded as soon as they are available in order, so the
+    caller can write them out while later tasks are still running.
+    processes=0 uses one process per cpu. Where processes can't be forked,
+    or in a worker process of another pool, the tasks are run one after the other.'''
+    if not processes:
+        processes = multiprocessing.cpu_count()
+    processes = min(processes, len(tasks))
+    if processes < 2 or not hasattr(os, 'fork') or multiprocessing.current_process().daemon:
+        for task in tasks:
+            yield function(task)
+        return
+    if hasattr(multiprocessing, 'get_context'):
+        pool = multiprocessing.get_context('fork').Pool(processes)
+    else:
+        pool = multiprocessing.Pool(processes)
+    try:
+        for result in pool.imap(function, tasks):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _encode(text):
+    if isinstance(text, bytes):
+        return text
+    return text.encode('utf-8')
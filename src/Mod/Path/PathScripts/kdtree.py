@@ -40,7 +40,7 @@ from heapq import heappush, heappop
 
 __all__ = ['minkowski_distance_p', 'minkowski_distance',
            'distance_matrix',
-           'Rectangle', 'KDTree']
+           'Rectangle', 'KDTree', 'ArrayKDTree']
 
 
 def minkowski_distance_p(x, y, p=2):
@@ -110,8 +110,8 @@ class Rectangle(object):
     """
     def __init__(self, maxes, mins):
         """Construct a hyperrectangle."""
-        self.maxes = np.maximum(maxes,mins).astype(np.float)
-        self.mins = np.minimum(maxes,mins).astype(np.float)
+        self.maxes = np.maximum(maxes,mins).astype(float)
+        self.mins = np.minimum(maxes,mins).astype(float)
         self.m, = self.maxes.shape
 
     def __repr__(self):
@@ -510,17 +510,17 @@ class KDTree(object):
         retshape = np.shape(x)[:-1]
         if retshape != ():
             if k is None:
-                dd = np.empty(retshape,dtype=np.object)
-                ii = np.empty(retshape,dtype=np.object)
+                dd = np.empty(retshape,dtype=object)
+                ii = np.empty(retshape,dtype=object)
             elif k > 1:
-                dd = np.empty(retshape+(k,),dtype=np.float)
+                dd = np.empty(retshape+(k,),dtype=float)
                 dd.fill(np.inf)
-                ii = np.empty(retshape+(k,),dtype=np.int)
+                ii = np.empty(retshape+(k,),dtype=int)
                 ii.fill(self.n)
             elif k == 1:
-                dd = np.empty(retshape,dtype=np.float)
+                dd = np.empty(retshape,dtype=float)
                 dd.fill(np.inf)
-                ii = np.empty(retshape,dtype=np.int)
+                ii = np.empty(retshape,dtype=int)
                 ii.fill(self.n)
             else:
                 raise ValueError("Requested %s nearest neighbors; acceptable numbers are integers greater than or equal to one, or None")
@@ -549,9 +549,9 @@ class KDTree(object):
                 else:
                     return np.inf, self.n
             elif k > 1:
-                dd = np.empty(k,dtype=np.float)
+                dd = np.empty(k,dtype=float)
                 dd.fill(np.inf)
-                ii = np.empty(k,dtype=np.int)
+                ii = np.empty(k,dtype=int)
                 ii.fill(self.n)
                 for j in range(len(hits)):
                     dd[j], ii[j] = hits[j]
@@ -632,7 +632,7 @@ class KDTree(object):
             return self.__query_ball_point(x, r, p, eps)
         else:
             retshape = x.shape[:-1]
-            result = np.empty(retshape, dtype=np.object)
+            result = np.empty(retshape, dtype=object)
             for c in np.ndindex(retshape):
                 result[c] = self.__query_ball_point(x[c], r, p=p, eps=eps)
             return result
@@ -891,6 +891,293 @@ class KDTree(object):
             raise ValueError("r must be either a single value or a one-dimensional array of values")
 
 
+class ArrayKDTree(object):
+    """
+    kd-tree for quick nearest-neighbor lookup of many points at once
+
+    The tree is the same as the one built by KDTree, but its nodes are
+    stored in flat arrays instead of node objects, it is built and
+    traversed without recursion, and every query handles a whole array
+    of points per visited node. Querying the neighbors of N points
+    therefore costs a number of numpy operations proportional to the
+    number of visited nodes rather than N times as many Python calls.
+
+    Parameters
+    ----------
+    data : (N,K) array_like
+        The data points to be indexed.
+    leafsize : int, optional
+        The number of points at which the algorithm switches over to
+        brute-force.  Has to be positive.
+
+    Notes
+    -----
+    The nodes are split by the "sliding midpoint" rule, see KDTree, but
+    each node keeps the tight bounding box of its points, which prunes
+    more of the tree during queries. Node ``i`` holds the points
+    ``indices[start[i]:end[i]]``; ``less[i]`` and ``greater[i]`` are the
+    children of an inner node and -1 for a leaf.
+
+    """
+    def __init__(self, data, leafsize=10):
+        self.data = np.asarray(data, dtype=float)
+        self.n, self.m = np.shape(self.data)
+        self.leafsize = int(leafsize)
+        if self.leafsize < 1:
+            raise ValueError("leafsize must be at least 1")
+        self.maxes = np.amax(self.data,axis=0)
+        self.mins = np.amin(self.data,axis=0)
+        self.__build()
+
+    def __build(self):
+        self.indices = np.arange(self.n)
+        start, end, less, greater, split_dim, split, mins, maxes = [], [], [], [], [], [], [], []
+        stack = [(0, self.n, -1, False)]
+        while stack:
+            (lo, hi, parent, isGreater) = stack.pop()
+            node = len(start)
+            if parent >= 0:
+                if isGreater:
+                    greater[parent] = node
+                else:
+                    less[parent] = node
+            idx = self.indices[lo:hi]
+            data = self.data[idx]
+            nodeMaxes = np.amax(data,axis=0)
+            nodeMins = np.amin(data,axis=0)
+            start.append(lo)
+            end.append(hi)
+            less.append(-1)
+            greater.append(-1)
+            mins.append(nodeMins)
+            maxes.append(nodeMaxes)
+            d = np.argmax(nodeMaxes-nodeMins)
+            split_dim.append(d)
+            split.append(0.0)
+            if hi - lo <= self.leafsize or nodeMaxes[d] == nodeMins[d]:
+                continue
+            # sliding midpoint rule; the bounding box is tight, so neither side is
+            # empty unless the midpoint rounds to one of the bounds
+            split[-1] = (nodeMaxes[d]+nodeMins[d])/2
+            lessMask = data[:,d] <= split[-1]
+            if lessMask.all():
+                lessMask = data[:,d] < nodeMaxes[d]
+                split[-1] = np.amax(data[lessMask,d])
+            middle = lo + np.count_nonzero(lessMask)
+            self.indices[lo:hi] = np.concatenate((idx[lessMask], idx[~lessMask]))
+            stack.append((middle, hi, node, True))
+            stack.append((lo, middle, node, False))
+        self.start = np.array(start, dtype=int)
+        self.end = np.array(end, dtype=int)
+        self.less = np.array(less, dtype=int)
+        self.greater = np.array(greater, dtype=int)
+        self.split_dim = np.array(split_dim, dtype=int)
+        self.split = np.array(split, dtype=float)
+        self.node_mins = np.array(mins, dtype=float).reshape(-1, self.m)
+        self.node_maxes = np.array(maxes, dtype=float).reshape(-1, self.m)
+        # the points of each leaf, padded with -1, to gather the leaves of many queries at once
+        leaves = np.flatnonzero(self.less < 0)
+        sizes = self.end[leaves] - self.start[leaves]
+        self.leaf_members = np.full((len(self.start), np.amax(sizes)), -1, dtype=int)
+        for leaf in leaves:
+            members = self.indices[self.start[leaf]:self.end[leaf]]
+            self.leaf_members[leaf, :len(members)] = members
+
+    def __seeds(self, x, k):
+        # descend to the leaf each point falls into, and keep track of the smallest
+        # node on the way down holding at least k points
+        node = np.zeros(len(x), dtype=int)
+        seed = np.zeros(len(x), dtype=int)
+        inner = np.flatnonzero(self.less[node] >= 0)
+        while len(inner):
+            n = node[inner]
+            lessSide = x[inner, self.split_dim[n]] <= self.split[n]
+            node[inner] = np.where(lessSide, self.less[n], self.greater[n])
+            n = node[inner]
+            big = self.end[n] - self.start[n] >= k
+            seed[inner[big]] = n[big]
+            inner = inner[self.less[n] >= 0]
+        return node, seed
+
+    def __points(self, x):
+        x = np.asarray(x, dtype=float)
+        if np.shape(x)[-1] != self.m:
+            raise ValueError("x must consist of vectors of length %d but has shape %s" % (self.m, np.shape(x)))
+        return np.shape(x)[:-1], x.reshape(-1, self.m)
+
+    def __min_distance_p(self, node, x, p):
+        side = np.maximum(0, np.maximum(self.node_mins[node]-x, x-self.node_maxes[node]))
+        return minkowski_distance_p(side, 0, p)
+
+    def __max_distance_p(self, node, x, p):
+        side = np.maximum(np.abs(x-self.node_mins[node]), np.abs(x-self.node_maxes[node]))
+        return minkowski_distance_p(side, 0, p)
+
+    def __ball(self, x, inner, outer, r, p):
+        # returns the (query, point) pairs of points within p-distance r of the queries,
+        # skipping nodes further than inner and taking nodes nearer than outer as a whole
+        hitsQ = []
+        hitsI = []
+        stack = [(0, np.arange(len(x)))]
+        while stack:
+            node, q = stack.pop()
+            q = q[self.__min_distance_p(node, x[q], p) <= inner[q]]
+            if not len(q):
+                continue
+            members = self.indices[self.start[node]:self.end[node]]
+            whole = self.__max_distance_p(node, x[q], p) <= outer[q]
+            if whole.any():
+                hitsQ.append(np.repeat(q[whole], len(members)))
+                hitsI.append(np.tile(members, np.count_nonzero(whole)))
+                q = q[~whole]
+                if not len(q):
+                    continue
+            if self.less[node] < 0:
+                d = minkowski_distance_p(x[q][:,np.newaxis,:], self.data[members][np.newaxis,:,:], p)
+                rows, cols = np.nonzero(d <= r[q][:,np.newaxis])
+                hitsQ.append(q[rows])
+                hitsI.append(members[cols])
+            else:
+                stack.append((self.greater[node], q))
+                stack.append((self.less[node], q))
+        if not hitsQ:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+        return np.concatenate(hitsQ), np.concatenate(hitsI)
+
+    def query(self, x, k=1, eps=0, p=2, distance_upper_bound=np.inf):
+        """
+        Query the kd-tree for nearest neighbors
+
+        Parameters
+        ----------
+        x : array_like, last dimension self.m
+            An array of points to query.
+        k : integer
+            The number of nearest neighbors to return.
+        eps : nonnegative float
+            Accepted for compatibility with KDTree.query, the neighbors
+            returned are always the exact ones.
+        p : float, 1<=p<=infinity
+            Which Minkowski p-norm to use.
+        distance_upper_bound : nonnegative float
+            Return only neighbors within this distance.
+
+        Returns
+        -------
+        d : array of floats
+            The distances to the nearest neighbors, see KDTree.query.
+            Unlike KDTree, k=None is not supported.
+        i : array of integers
+            The locations of the neighbors in self.data. i is the same
+            shape as d.
+
+        Examples
+        --------
+        >>> from PathScripts import kdtree
+        >>> x, y = np.mgrid[0:5, 2:8]
+        >>> tree = kdtree.ArrayKDTree(np.c_[x.ravel(), y.ravel()])
+        >>> pts = np.array([[0, 0], [2.1, 2.9]])
+        >>> tree.query(pts)
+        (array([ 2.        ,  0.14142136]), array([ 0, 13]))
+
+        """
+        retshape, x = self.__points(x)
+        if p < 1:
+            raise ValueError("Only p-norms with 1<=p<=infinity permitted")
+        if k is None or k < 1:
+            raise ValueError("Requested %s nearest neighbors; acceptable numbers are integers greater than or equal to one" % k)
+        bound = distance_upper_bound if p == np.inf else distance_upper_bound**p
+
+        # the k nearest neighbors are no further than the kth nearest point of the leaf
+        # each query falls into, or than the far corner of a node with at least k points
+        leaf, seed = self.__seeds(x, k)
+        members = self.leaf_members[leaf]
+        d = minkowski_distance_p(x[:,np.newaxis,:], self.data[np.maximum(members, 0)], p)
+        d[members < 0] = np.inf
+        if d.shape[1] >= k:
+            radius = np.sort(d, axis=1)[:, k-1]
+        else:
+            radius = np.full(len(x), np.inf)
+        radius = np.minimum(radius, self.__max_distance_p(seed, x, p))
+        radius = np.minimum(radius, bound)
+
+        hitsQ, hitsI = self.__ball(x, radius, radius, radius, p)
+        d = minkowski_distance_p(x[hitsQ], self.data[hitsI], p)
+        within = d < bound
+        hitsQ, hitsI, d = hitsQ[within], hitsI[within], d[within]
+        order = np.lexsort((hitsI, d, hitsQ))
+        hitsQ, hitsI, d = hitsQ[order], hitsI[order], d[order]
+        rank = np.arange(len(hitsQ)) - np.searchsorted(hitsQ, hitsQ)
+        nearest = rank < k
+
+        dd = np.empty((len(x), k), dtype=float)
+        dd.fill(np.inf)
+        ii = np.empty((len(x), k), dtype=int)
+        ii.fill(self.n)
+        dd[hitsQ[nearest], rank[nearest]] = d[nearest]
+        ii[hitsQ[nearest], rank[nearest]] = hitsI[nearest]
+        if p != np.inf and p != 1:
+            dd = dd**(1./p)
+        if k == 1:
+            dd, ii = dd[:, 0], ii[:, 0]
+            shape = retshape
+        else:
+            shape = retshape + (k,)
+        dd = dd.reshape(shape)
+        ii = ii.reshape(shape)
+        if retshape == () and k == 1:
+            return dd[()], ii[()]
+        return dd, ii
+
+    def query_ball_point(self, x, r, p=2., eps=0):
+        """Find all points within distance r of point(s) x.
+
+        Parameters
+        ----------
+        x : array_like, shape tuple + (self.m,)
+            The point or points to search for neighbors of.
+        r : positive float or array_like of shape tuple
+            The radius of points to return, either one for all points or
+            one for each of x.
+        p : float, optional
+            Which Minkowski p-norm to use.  Should be in the range [1, inf].
+        eps : nonnegative float, optional
+            Approximate search, see KDTree.query_ball_point.
+
+        Returns
+        -------
+        results : list or array of lists
+            If `x` is a single point, returns a sorted list of the indices
+            of the neighbors of `x`. If `x` is an array of points, returns
+            an object array of shape tuple containing sorted lists of
+            neighbors.
+
+        Examples
+        --------
+        >>> from PathScripts import kdtree
+        >>> x, y = np.mgrid[0:4, 0:4]
+        >>> tree = kdtree.ArrayKDTree(np.c_[x.ravel(), y.ravel()])
+        >>> tree.query_ball_point([2, 0], 1)
+        [4, 8, 9, 12]
+
+        """
+        retshape, x = self.__points(x)
+        r = np.broadcast_to(np.asarray(r, dtype=float), retshape).ravel()
+        if p == np.inf:
+            hitsQ, hitsI = self.__ball(x, r/(1.+eps), r*(1.+eps), r, p)
+        else:
+            hitsQ, hitsI = self.__ball(x, (r/(1.+eps))**p, (r*(1.+eps))**p, r**p, p)
+        order = np.lexsort((hitsI, hitsQ))
+        hitsI = hitsI[order]
+        bounds = np.searchsorted(hitsQ[order], np.arange(len(x) + 1))
+        if retshape == ():
+            return hitsI[bounds[0]:bounds[1]].tolist()
+        result = np.empty(len(x), dtype=object)
+        for c in range(len(x)):
+            result[c] = hitsI[bounds[c]:bounds[c + 1]].tolist()
+        return result.reshape(retshape)
+
+
 def distance_matrix(x,y,p=2,threshold=1000000):
     """
     Compute the distance matrix.
@@ -933,7 +1220,7 @@ def distance_matrix(x,y,p=2,threshold=1000000):
     if m*n*k <= threshold:
         return minkowski_distance(x[:,np.newaxis,:],y[np.newaxis,:,:],p)
     else:
-        result = np.empty((m,n),dtype=np.float)  # FIXME: figure out the best dtype
+        result = np.empty((m,n),dtype=float)  # FIXME: figure out the best dtype
         if m < n:
             for i in range(m):
                 result[i,:] = minkowski_distance(x[i],y,p)
@@ -31,6 +31,9 @@ FreeCAD, via the GUI importer or via python scripts with:
 
 import centroid_post
 centroid_post.export(object,"/path/to/file.ncc","")
+
+export() returns the G-code only if the editor is shown or the file name is "-",
+otherwise the G-code is streamed into the file and None is returned.
 '''
 
 TOOLTIP_ARGS='''
@@ -43,7 +46,6 @@ Arguments for centroid:
     --axis-precision=4               ... number of digits of precision for axis moves.  Default=4
 '''
 import FreeCAD
-from FreeCAD import Units
 import datetime
 import PathScripts
 from PathScripts import PostUtils
@@ -74,6 +76,11 @@ AXIS_PRECISION=4
 FEED_PRECISION=1
 SPINDLE_DECIMALS = 0
 
+# params = ['X','Y','Z','A','B','I','J','K','F','S'] #This list control
+# the order of parameters
+# centroid doesn't want K properties on XY plane  Arcs need work.
+PARAMS = ['X', 'Y', 'Z', 'A', 'B', 'I', 'J', 'F', 'S', 'T', 'Q', 'R', 'L', 'H']
+
 COMMENT = ";"
 
 HEADER = '''
@@ -112,10 +119,6 @@ POST_OPERATION = ''''''
 TOOL_CHANGE = ''''''
 
 
-# to distinguish python built-in open function from the one declared below
-if open.__module__ == '__builtin__':
-    pythonopen = open
-
 def processArguments(argstring):
     global OUTPUT_HEADER
     global OUTPUT_COMMENTS
@@ -163,24 +166,26 @@ def export(objectslist, filename, argstring):
     #             return
 
     print("postprocessing...")
-    gcode = ""
+    writer = PostUtils.GCodeWriter(filename, SHOW_EDITOR, COMMAND_SPACE)
 
     # write header
     if OUTPUT_HEADER:
-        gcode += HEADER
+        writer.write(HEADER)
 
-    gcode += SAFETYBLOCK
+    writer.write(SAFETYBLOCK)
 
     # Write the preamble
     if OUTPUT_COMMENTS:
         for item in objectslist:
             if isinstance (item.Proxy, PathScripts.PathToolController.ToolController):
-                gcode += ";T{}={}\n".format(item.ToolNumber, item.Name)
-        gcode += linenumber() + ";begin preamble\n"
-    for line in PREAMBLE.splitlines(True):
-        gcode += linenumber() + line
+                writer.write(";T{}={}\n".format(item.ToolNumber, item.Name))
+        writer.write(linenumber() + ";begin preamble\n")
+    writer.writeLines(PREAMBLE, linenumber)
 
-    gcode += linenumber() + UNITS + "\n"
+    writer.write(linenumber() + UNITS + "\n")
+
+    formatter = PostUtils.CommandFormatter(PARAMS, AXIS_PRECISION, FEED_PRECISION, UNIT_FORMAT, modal=MODAL,
+            wordFormats={'H': 'H%d', 'S': lambda s: 'S' + PostUtils.fmt(s, SPINDLE_DECIMALS, "G21")})
 
     for obj in objectslist:
         #skip postprocessing tools
@@ -190,46 +195,27 @@ def export(objectslist, filename, argstring):
 
         # do the pre_op
         if OUTPUT_COMMENTS:
-            gcode += linenumber() + ";begin operation\n"
-        for line in PRE_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            writer.write(linenumber() + ";begin operation\n")
+        writer.writeLines(PRE_OPERATION, linenumber)
 
-        gcode += parse(obj)
+        parse(obj, writer, formatter)
 
         # do the post_op
         if OUTPUT_COMMENTS:
-            gcode += linenumber() + ";end operation: %s\n" % obj.Label
-        for line in POST_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            writer.write(linenumber() + ";end operation: %s\n" % obj.Label)
+        writer.writeLines(POST_OPERATION, linenumber)
 
     # do the post_amble
 
     if OUTPUT_COMMENTS:
-        gcode += ";begin postamble\n"
-    for line in TOOLRETURN.splitlines(True):
-        gcode += linenumber() + line
-    for line in SAFETYBLOCK.splitlines(True):
-        gcode += linenumber() + line
-    for line in POSTAMBLE.splitlines(True):
-        gcode += linenumber() + line
-
-    if SHOW_EDITOR:
-        dia = PostUtils.GCodeEditorDialog()
-        dia.editor.setText(gcode)
-        result = dia.exec_()
-        if result:
-            final = dia.editor.toPlainText()
-        else:
-            final = gcode
-    else:
-        final = gcode
+        writer.write(";begin postamble\n")
+    writer.writeLines(TOOLRETURN, linenumber)
+    writer.writeLines(SAFETYBLOCK, linenumber)
+    writer.writeLines(POSTAMBLE, linenumber)
 
-    print("done postprocessing.")
+    final = writer.close()
 
-    if not filename == '-':
-        gfile = pythonopen(filename, "wb")
-        gfile.write(final)
-        gfile.close()
+    print("done postprocessing.")
 
     return final
 
@@ -241,80 +227,38 @@ def linenumber():
         return "N" + str(LINENR) + " "
     return ""
 
-def parse(pathobj):
-    global AXIS_PRECISION
-    global FEED_PRECISION
-    out = ""
-    lastcommand = None
-    axis_precision_string = '.' + str(AXIS_PRECISION) +'f'
-    feed_precision_string = '.' + str(FEED_PRECISION) +'f'
-    # params = ['X','Y','Z','A','B','I','J','K','F','S'] #This list control
-    # the order of parameters
-    # centroid doesn't want K properties on XY plane  Arcs need work.
-    params = ['X', 'Y', 'Z', 'A', 'B', 'I', 'J', 'F', 'S', 'T', 'Q', 'R', 'L', 'H']
-
+def parse(pathobj, writer, formatter):
     if hasattr(pathobj, "Group"):  # We have a compound or project.
         # if OUTPUT_COMMENTS:
-        #     out += linenumber() + "(compound: " + pathobj.Label + ")\n"
+        #     writer.write(linenumber() + "(compound: " + pathobj.Label + ")\n")
         for p in pathobj.Group:
-            out += parse(p)
-        return out
+            parse(p, writer, formatter)
+        return
     else:  # parsing simple path
 
         # groups might contain non-path things like stock.
         if not hasattr(pathobj, "Path"):
-            return out
+            return
 
         # if OUTPUT_COMMENTS:
-        #     out += linenumber() + "(" + pathobj.Label + ")\n"
+        #     writer.write(linenumber() + "(" + pathobj.Label + ")\n")
 
+        formatter.reset()
         for c in pathobj.Path.Commands:
-            commandlist = [] #list of elements in the command, code and params.
             command = c.Name #command M or G code or comment string
 
             if command[0]=='(':
                 command = PostUtils.fcoms(command, COMMENT)
 
-            commandlist.append(command)
-            # if modal: only print the command if it is not the same as the
-            # last one
-            if MODAL is True:
-                if command == lastcommand:
-                    commandlist.pop(0)
-
-            # Now add the remaining parameters in order
-            for param in params:
-                if param in c.Parameters:
-                    if param == 'F':
-                        if c.Name not in ["G0", "G00"]: #centroid doesn't use rapid speeds
-                            speed = Units.Quantity(c.Parameters['F'], FreeCAD.Units.Velocity)
-                            commandlist.append(
-                                param + format(float(speed.getValueAs(UNIT_FORMAT)), feed_precision_string) )
-                    elif param == 'H':
-                        commandlist.append(param + str(int(c.Parameters['H'])))
-                    elif param == 'S':
-                        commandlist.append(param + PostUtils.fmt(c.Parameters['S'], SPINDLE_DECIMALS, "G21"))
-                    elif param == 'T':
-                        commandlist.append(param + str(int(c.Parameters['T'])))
-                    else:
-                        commandlist.append(
-                            param + format(c.Parameters[param], axis_precision_string))
-            outstr = str(commandlist)
-            outstr =outstr.replace('[','')
-            outstr =outstr.replace(']','')
-            outstr =outstr.replace("'",'')
-            outstr =outstr.replace(",",'')
-            #out += outstr + '\n'
-
-            # store the latest command
-            lastcommand = command
+            # list of elements in the command, code and params.
+            # centroid doesn't use rapid speeds
+            commandlist = formatter.words(c, command)
 
             # Check for Tool Change:
             if command == 'M6':
                 # if OUTPUT_COMMENTS:
-                #     out += linenumber() + "(begin toolchange)\n"
-                for line in TOOL_CHANGE.splitlines(True):
-                    out += linenumber() + line
+                #     writer.write(linenumber() + "(begin toolchange)\n")
+                writer.writeLines(TOOL_CHANGE, linenumber)
 
             # if command == "message":
             #     if OUTPUT_COMMENTS is False:
@@ -328,11 +272,7 @@ def parse(pathobj):
                     commandlist.insert(0, (linenumber()))
 
                 # append the line to the final output
-                for w in commandlist:
-                    out += w + COMMAND_SPACE
-                out = out.strip() + "\n"
-
-        return out
+                writer.command(commandlist)
 
 
 print(__name__ + " gcode postprocessor loaded.")
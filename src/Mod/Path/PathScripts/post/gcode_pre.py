@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+'''
+This is a preprocessor for large G-code files. The file is read with
+PathGCodeReader, which maps it into memory and tracks the modal state of the
+program, so lines without a G or M word, incremental moves and inch programs
+are imported as the equivalent absolute mm commands.
+'''
+
+import os
+import FreeCAD
+
+from PathScripts import PathGCodeReader
+
+
+def open(filename):
+    "called when freecad opens a file."
+    docname = os.path.splitext(os.path.basename(filename))[0]
+    doc = FreeCAD.newDocument(docname)
+    insert(filename, doc.Name)
+
+
+def insert(filename, docname):
+    "called when freecad imports a file"
+    doc = FreeCAD.getDocument(docname)
+    obj = doc.addObject("Path::Feature", "Path")
+    obj.Path = PathGCodeReader.readPath(filename)
+
+
+print(__name__ + " gcode preprocessor loaded.")
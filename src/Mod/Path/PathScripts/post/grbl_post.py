@@ -27,6 +27,9 @@ Generate g-code compatible with grbl from a Path.
 
 import grbl_post
 grbl_post.export(object,"/path/to/file.ncc")
+
+export() returns the G-code only if the editor is shown or the file name is "-",
+otherwise the G-code is streamed into the file and None is returned.
 '''
 
 import datetime
@@ -75,11 +78,6 @@ POST_OPERATION = ''''''
 TOOL_CHANGE = ''''''
 
 
-# to distinguish python built-in open function from the one declared below
-if open.__module__ == '__builtin__':
-    pythonopen = open
-
-
 def export(objectslist,filename,args):
     global UNITS
     for obj in objectslist:
@@ -88,7 +86,7 @@ def export(objectslist,filename,args):
             return
 
     print "postprocessing..."
-    gcode = ""
+    writer = PostUtils.GCodeWriter(filename, SHOW_EDITOR, COMMAND_SPACE)
 
     #Find the machine.
     #The user my have overridden post processor defaults in the GUI.  Make sure we're using the current values in the Machine Def.
@@ -109,53 +107,36 @@ def export(objectslist,filename,args):
 
     # write header
     if OUTPUT_HEADER:
-        gcode += linenumber() + "(Exported by FreeCAD)\n"
-        gcode += linenumber() + "(Post Processor: " + __name__ +")\n"
-        gcode += linenumber() + "(Output Time:"+str(now)+")\n"
+        writer.write(linenumber() + "(Exported by FreeCAD)\n")
+        writer.write(linenumber() + "(Post Processor: " + __name__ +")\n")
+        writer.write(linenumber() + "(Output Time:"+str(now)+")\n")
 
     #Write the preamble
-    if OUTPUT_COMMENTS: gcode += linenumber() + "(begin preamble)\n"
-    for line in PREAMBLE.splitlines(True):
-        gcode += linenumber() + line
-    gcode += linenumber() + UNITS + "\n"
+    if OUTPUT_COMMENTS: writer.write(linenumber() + "(begin preamble)\n")
+    writer.writeLines(PREAMBLE, linenumber)
+    writer.write(linenumber() + UNITS + "\n")
 
     for obj in objectslist:
 
         #do the pre_op
-        if OUTPUT_COMMENTS: gcode += linenumber() + "(begin operation: " + obj.Label + ")\n"
-        for line in PRE_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+        if OUTPUT_COMMENTS: writer.write(linenumber() + "(begin operation: " + obj.Label + ")\n")
+        writer.writeLines(PRE_OPERATION, linenumber)
 
-        gcode += parse(obj)
+        parse(obj, writer)
 
         #do the post_op
-        if OUTPUT_COMMENTS: gcode += linenumber() + "(finish operation: " + obj.Label + ")\n"
-        for line in POST_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+        if OUTPUT_COMMENTS: writer.write(linenumber() + "(finish operation: " + obj.Label + ")\n")
+        writer.writeLines(POST_OPERATION, linenumber)
 
     #do the post_amble
 
-    if OUTPUT_COMMENTS: gcode += "(begin postamble)\n"
-    for line in POSTAMBLE.splitlines(True):
-        gcode += linenumber() + line
+    if OUTPUT_COMMENTS: writer.write("(begin postamble)\n")
+    writer.writeLines(POSTAMBLE, linenumber)
 
-    if SHOW_EDITOR:
-        dia = PostUtils.GCodeEditorDialog()
-        dia.editor.setText(gcode)
-        result = dia.exec_()
-        if result:
-            final = dia.editor.toPlainText()
-        else:
-            final = gcode
-    else:
-        final = gcode
+    final = writer.close()
 
     print "done postprocessing."
 
-    gfile = pythonopen(filename,"wb")
-    gfile.write(gcode)
-    gfile.close()
-
 
 def linenumber():
     global LINENR
@@ -164,24 +145,23 @@ def linenumber():
         return "N" + str(LINENR) + " "
     return ""
 
-def parse(pathobj):
-    out = ""
+def parse(pathobj, writer):
     lastcommand = None
 
     #params = ['X','Y','Z','A','B','I','J','K','F','S'] #This list control the order of parameters
     params = ['X','Y','Z','A','B','I','J','F','S','T','Q','R','L'] #linuxcnc doesn't want K properties on XY plane  Arcs need work.
 
     if hasattr(pathobj,"Group"): #We have a compound or project.
-        if OUTPUT_COMMENTS: out += linenumber() + "(compound: " + pathobj.Label + ")\n"
+        if OUTPUT_COMMENTS: writer.write(linenumber() + "(compound: " + pathobj.Label + ")\n")
         for p in pathobj.Group:
-            out += parse(p)
-        return out
+            parse(p, writer)
+        return
     else: #parsing simple path
 
         if not hasattr(pathobj,"Path"): #groups might contain non-path things like stock.
-            return out
+            return
 
-        if OUTPUT_COMMENTS: out += linenumber() + "(Path: " + pathobj.Label + ")\n"
+        if OUTPUT_COMMENTS: writer.write(linenumber() + "(Path: " + pathobj.Label + ")\n")
 
         for c in pathobj.Path.Commands:
             outstring = []
@@ -209,16 +189,15 @@ def parse(pathobj):
 
             # Check for Tool Change:
             if command == 'M6':
-                if OUTPUT_COMMENTS: out += linenumber() + "(begin toolchange)\n"
+                if OUTPUT_COMMENTS: writer.write(linenumber() + "(begin toolchange)\n")
                 if not OUTPUT_TOOL_CHANGE:
                     outstring.insert(0, ";")
                 else:
-                    for line in TOOL_CHANGE.splitlines(True):
-                        out += linenumber() + line
+                    writer.writeLines(TOOL_CHANGE, linenumber)
 
             if command == "message":
                 if OUTPUT_COMMENTS == False:
-                    out = []
+                    outstring = []
                 else:
                     outstring.pop(0) #remove the command
 
@@ -230,12 +209,8 @@ def parse(pathobj):
                 if OUTPUT_LINE_NUMBERS:
                     outstring.insert(0,(linenumber()))
 
-                #append the line to the final output
-                for w in outstring:
-                    out += w + COMMAND_SPACE
-                out = out.strip() + "\n"
-
-        return out
+                # append the line to the final output
+                writer.command(outstring)
 
 
 print __name__ + " gcode postprocessor loaded."
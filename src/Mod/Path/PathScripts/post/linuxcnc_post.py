@@ -31,6 +31,9 @@ FreeCAD, via the GUI importer or via python scripts with:
 
 import linuxcnc_post
 linuxcnc_post.export(object,"/path/to/file.ncc","")
+
+export() returns the G-code only if the editor is shown or the file name is "-",
+otherwise the G-code is streamed into the file and None is returned.
 '''
 
 TOOLTIP_ARGS='''
@@ -40,9 +43,11 @@ Arguments for linuxcnc:
     --line-numbers,--no-line-numbers ... prefix with line numbers (--no-lin-numbers)
     --show-editor, --no-show-editor  ... pop up editor before writing output(--show-editor)
     --output-precision=4             ... number of digits of precision.  Default=4
+    --modal                          ... suppress a command if it is the same as the previous one
+    --axis-modal                     ... suppress axis words which did not change since the previous move
+    --processes=1                    ... number of processes formatting the paths, 0 for one per cpu.  Default=1
 '''
 import FreeCAD
-from FreeCAD import Units
 import datetime
 from PathScripts import PostUtils
 from PathScripts import PathUtils
@@ -58,6 +63,7 @@ if FreeCAD.GuiUp:
 else:
     SHOW_EDITOR = False
 MODAL = False  # if true commands are suppressed if the same as previous line.
+OUTPUT_DOUBLES = True  # if false axis words are suppressed if the same as previous move.
 COMMAND_SPACE = " "
 LINENR = 100  # line number starting value
 
@@ -68,6 +74,13 @@ MACHINE_NAME = "LinuxCNC"
 CORNER_MIN = {'x': 0, 'y': 0, 'z': 0}
 CORNER_MAX = {'x': 500, 'y': 300, 'z': 300}
 PRECISION=4
+PROCESSES = 1  # paths are formatted in a pool of processes if more than 1, 0 uses all cpus
+
+# params = ['X','Y','Z','A','B','I','J','K','F','S'] #This list control
+# the order of parameters
+# linuxcnc doesn't want K properties on XY plane  Arcs need work.
+PARAMS = ['X', 'Y', 'Z', 'A', 'B', 'I', 'J', 'F', 'S', 'T', 'Q', 'R', 'L', 'H']
+AXIS_PARAMS = ['X', 'Y', 'Z', 'A', 'B', 'F']
 
 # Preamble text will appear at the beginning of the GCODE output file.
 PREAMBLE = '''G17 G90
@@ -91,16 +104,15 @@ POST_OPERATION = ''''''
 TOOL_CHANGE = ''''''
 
 
-# to distinguish python built-in open function from the one declared below
-if open.__module__ == '__builtin__':
-    pythonopen = open
-
 def processArguments(argstring):
     global OUTPUT_HEADER
     global OUTPUT_COMMENTS
     global OUTPUT_LINE_NUMBERS
     global SHOW_EDITOR
     global PRECISION
+    global MODAL
+    global OUTPUT_DOUBLES
+    global PROCESSES
 
     for arg in argstring.split():
         if arg == '--header':
@@ -121,6 +133,12 @@ def processArguments(argstring):
             SHOW_EDITOR = False
         elif arg.split('=')[0] == '--output-precision':
             PRECISION = arg.split('=')[1]
+        elif arg == '--modal':
+            MODAL = True
+        elif arg == '--axis-modal':
+            OUTPUT_DOUBLES = False
+        elif arg.split('=')[0] == '--processes':
+            PROCESSES = int(arg.split('=')[1])
 
 def export(objectslist, filename, argstring):
     processArguments(argstring)
@@ -133,78 +151,60 @@ def export(objectslist, filename, argstring):
             return
 
     print("postprocessing...")
-    gcode = ""
+    writer = PostUtils.GCodeWriter(filename, SHOW_EDITOR, COMMAND_SPACE)
 
     # write header
     if OUTPUT_HEADER:
-        gcode += linenumber() + "(Exported by FreeCAD)\n"
-        gcode += linenumber() + "(Post Processor: " + __name__ + ")\n"
-        gcode += linenumber() + "(Output Time:" + str(now) + ")\n"
+        writer.write(linenumber() + "(Exported by FreeCAD)\n")
+        writer.write(linenumber() + "(Post Processor: " + __name__ + ")\n")
+        writer.write(linenumber() + "(Output Time:" + str(now) + ")\n")
 
     # Write the preamble
     if OUTPUT_COMMENTS:
-        gcode += linenumber() + "(begin preamble)\n"
-    for line in PREAMBLE.splitlines(True):
-        gcode += linenumber() + line
-    gcode += linenumber() + UNITS + "\n"
-
+        writer.write(linenumber() + "(begin preamble)\n")
+    writer.writeLines(PREAMBLE, linenumber)
+    writer.write(linenumber() + UNITS + "\n")
+
+    fragments = None
+    if PROCESSES != 1:
+        # the paths are formatted in a pool of processes and their
+        # fragments written in order as they come back
+        tasks = []
+        unitFormat = UNIT_FORMAT
+        for obj in objectslist:
+            unitFormat = machineDetails(obj, UNITS, unitFormat)[2]
+            collectTasks(obj, unitFormat, tasks)
+        fragments = PostUtils.imapPool(formatTask, tasks, PROCESSES)
+
+    formatter = None
     for obj in objectslist:
 
         # fetch machine details
-        job = PathUtils.findParentJob(obj)
-
-        myMachine = 'not set'
-
-        if hasattr(job,"MachineName"):
-            myMachine = job.MachineName
-
-        if hasattr(job, "MachineUnits"):
-            if job.MachineUnits == "Metric":
-               UNITS = "G21"
-               UNIT_FORMAT = 'mm/min'
-            else:
-               UNITS = "G20"
-               UNIT_FORMAT = 'in/min'
+        myMachine, UNITS, UNIT_FORMAT = machineDetails(obj, UNITS, UNIT_FORMAT)
 
         # do the pre_op
         if OUTPUT_COMMENTS:
-            gcode += linenumber() + "(begin operation: %s)\n" % obj.Label
-            gcode += linenumber() + "(machine: %s, %s)\n" % (myMachine, UNIT_FORMAT)
-        for line in PRE_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            writer.write(linenumber() + "(begin operation: %s)\n" % obj.Label)
+            writer.write(linenumber() + "(machine: %s, %s)\n" % (myMachine, UNIT_FORMAT))
+        writer.writeLines(PRE_OPERATION, linenumber)
 
-        gcode += parse(obj)
+        formatter = newFormatter(UNIT_FORMAT, formatter)
+        parse(obj, writer, formatter, fragments)
 
         # do the post_op
         if OUTPUT_COMMENTS:
-            gcode += linenumber() + "(finish operation: %s)\n" % obj.Label
-        for line in POST_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            writer.write(linenumber() + "(finish operation: %s)\n" % obj.Label)
+        writer.writeLines(POST_OPERATION, linenumber)
 
     # do the post_amble
 
     if OUTPUT_COMMENTS:
-        gcode += "(begin postamble)\n"
-    for line in POSTAMBLE.splitlines(True):
-        gcode += linenumber() + line
-
-    if SHOW_EDITOR:
-        dia = PostUtils.GCodeEditorDialog()
-        dia.editor.setText(gcode)
-        result = dia.exec_()
-        if result:
-            final = dia.editor.toPlainText()
-        else:
-            final = gcode
-    else:
-        final = gcode
+        writer.write("(begin postamble)\n")
+    writer.writeLines(POSTAMBLE, linenumber)
 
-    print("done postprocessing.")
+    final = writer.close()
 
-    if not filename == '-':
-        gfile = pythonopen(filename, "wb")
-        gfile.write(final)
-        gfile.close()
+    print("done postprocessing.")
 
     return final
 
@@ -216,83 +216,105 @@ def linenumber():
         return "N" + str(LINENR) + " "
     return ""
 
-def parse(pathobj):
-    global PRECISION
-    out = ""
-    lastcommand = None
-    precision_string = '.' + str(PRECISION) +'f'
+def machineDetails(obj, units, unitFormat):
+    '''returns the machine name, units and feed rate format of the job of obj'''
+    job = PathUtils.findParentJob(obj)
+
+    myMachine = 'not set'
 
-    # params = ['X','Y','Z','A','B','I','J','K','F','S'] #This list control
-    # the order of parameters
-    # linuxcnc doesn't want K properties on XY plane  Arcs need work.
-    params = ['X', 'Y', 'Z', 'A', 'B', 'I', 'J', 'F', 'S', 'T', 'Q', 'R', 'L', 'H']
+    if hasattr(job,"MachineName"):
+        myMachine = job.MachineName
 
+    if hasattr(job, "MachineUnits"):
+        if job.MachineUnits == "Metric":
+           units = "G21"
+           unitFormat = 'mm/min'
+        else:
+           units = "G20"
+           unitFormat = 'in/min'
+    return myMachine, units, unitFormat
+
+def newFormatter(unitFormat, previous=None):
+    '''returns a formatter for unitFormat, in the distance mode of the previous formatter if given'''
+    formatter = PostUtils.CommandFormatter(PARAMS, PRECISION, unitFormat=unitFormat, modal=MODAL,
+            modalParams=None if OUTPUT_DOUBLES else AXIS_PARAMS)
+    if previous is not None:
+        formatter.incremental = previous.incremental
+    return formatter
+
+def parse(pathobj, writer, formatter, fragments=None):
     if hasattr(pathobj, "Group"):  # We have a compound or project.
         # if OUTPUT_COMMENTS:
-        #     out += linenumber() + "(compound: " + pathobj.Label + ")\n"
+        #     writer.write(linenumber() + "(compound: " + pathobj.Label + ")\n")
         for p in pathobj.Group:
-            out += parse(p)
-        return out
+            parse(p, writer, formatter, fragments)
+        return
     else:  # parsing simple path
 
         # groups might contain non-path things like stock.
         if not hasattr(pathobj, "Path"):
-            return out
+            return
 
         # if OUTPUT_COMMENTS:
-        #     out += linenumber() + "(" + pathobj.Label + ")\n"
-
-        for c in pathobj.Path.Commands:
-            outstring = []
-            command = c.Name
-            outstring.append(command)
-            # if modal: only print the command if it is not the same as the
-            # last one
-            if MODAL is True:
-                if command == lastcommand:
-                    outstring.pop(0)
-
-            # Now add the remaining parameters in order
-            for param in params:
-                if param in c.Parameters:
-                    if param == 'F':
-                        if c.Name not in ["G0", "G00"]: #linuxcnc doesn't use rapid speeds
-                            speed = Units.Quantity(c.Parameters['F'], FreeCAD.Units.Velocity)
-                            outstring.append(
-                                param + format(float(speed.getValueAs(UNIT_FORMAT)), precision_string) )
-                    elif param == 'T':
-                        outstring.append(param + str(int(c.Parameters['T'])))
-                    else:
-                        outstring.append(
-                            param + format(c.Parameters[param], precision_string))
-
-            # store the latest command
-            lastcommand = command
-
-            # Check for Tool Change:
-            if command == 'M6':
-                # if OUTPUT_COMMENTS:
-                #     out += linenumber() + "(begin toolchange)\n"
-                for line in TOOL_CHANGE.splitlines(True):
-                    out += linenumber() + line
-
-            if command == "message":
-                if OUTPUT_COMMENTS is False:
-                    out = []
-                else:
-                    outstring.pop(0)  # remove the command
-
-            # prepend a line number and append a newline
-            if len(outstring) >= 1:
-                if OUTPUT_LINE_NUMBERS:
-                    outstring.insert(0, (linenumber()))
-
-                # append the line to the final output
-                for w in outstring:
-                    out += w + COMMAND_SPACE
-                out = out.strip() + "\n"
-
-        return out
+        #     writer.write(linenumber() + "(" + pathobj.Label + ")\n")
+
+        if fragments is None:
+            formatter.reset()
+            lines = formatPath(((c.Name, c.Parameters) for c in pathobj.Path.Commands), formatter)
+        else:
+            lines = next(fragments)
+
+        # prepend a line number and append the lines to the final output
+        for line in lines:
+            writer.write(linenumber() + line)
+
+def collectTasks(pathobj, unitFormat, tasks):
+    '''collects the serialized commands of the paths parse() visits, together
+    with a formatter in the modal state at the beginning of each path'''
+    if hasattr(pathobj, "Group"):
+        for p in pathobj.Group:
+            collectTasks(p, unitFormat, tasks)
+    elif hasattr(pathobj, "Path"):
+        formatter = newFormatter(unitFormat)
+        if tasks:
+            # the distance mode carries over from the previous path
+            (commands, previous) = tasks[-1]
+            formatter.incremental = previous.incrementalAfter(commands)
+        tasks.append((PostUtils.serializeCommands(pathobj.Path.Commands), formatter))
+
+def formatTask(task):
+    '''formats a path in a worker process'''
+    commands, formatter = task
+    return formatPath(commands, formatter)
+
+def formatPath(commands, formatter):
+    '''Formats the (Name, Parameters) tuples of a path into lines. Line numbers
+    are left to the caller, a line of words starts with COMMAND_SPACE if they
+    are enabled.'''
+    lines = []
+    for command, parameters in commands:
+        # the formatter leaves out the feed rate of rapids,
+        # linuxcnc doesn't use rapid speeds
+        outstring = formatter.wordsOf(command, parameters)
+
+        # Check for Tool Change:
+        if command == 'M6':
+            # if OUTPUT_COMMENTS:
+            #     lines.append("(begin toolchange)\n")
+            lines.extend(TOOL_CHANGE.splitlines(True))
+
+        if command == "message":
+            if OUTPUT_COMMENTS is False:
+                outstring = []
+            else:
+                outstring.pop(0)  # remove the command
+
+        if len(outstring) >= 1:
+            line = COMMAND_SPACE.join(outstring) + "\n"
+            if OUTPUT_LINE_NUMBERS:
+                line = COMMAND_SPACE + line
+            lines.append(line)
+    return lines
 
 
 print(__name__ + " gcode postprocessor loaded.")
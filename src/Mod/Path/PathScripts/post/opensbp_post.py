@@ -34,6 +34,9 @@ inside FreeCAD, via the GUI importer or via python scripts with:
 
 import Path
 Path.write(object,"/path/to/file.ncc","post_opensbp")
+
+export() returns the G-code only if the editor is shown or the file name is "-",
+otherwise the G-code is streamed into the file and None is returned.
 '''
 
 '''
@@ -79,10 +82,6 @@ POST_OPERATION = ''''''
 # Tool Change commands will be inserted before a tool change
 TOOL_CHANGE = ''''''
 
-# to distinguish python built-in open function from the one declared below
-if open.__module__ == '__builtin__':
-    pythonopen = open
-
 CurrentState = {}
 
 def getMetricValue(val):
@@ -123,59 +122,42 @@ def export(objectslist, filename, argstring):
         'JSXY': 0, 'JSZ': 0, 'MSXY': 0, 'MSZ': 0
     }
     print("postprocessing...")
-    gcode = ""
+    writer = PostUtils.GCodeWriter(filename, SHOW_EDITOR, COMMAND_SPACE)
 
     # write header
     if OUTPUT_HEADER:
-        gcode += linenumber() + "'Exported by FreeCAD\n"
-        gcode += linenumber() + "'Post Processor: " + __name__ + "\n"
-        gcode += linenumber() + "'Output Time:" + str(now) + "\n"
+        writer.write(linenumber() + "'Exported by FreeCAD\n")
+        writer.write(linenumber() + "'Post Processor: " + __name__ + "\n")
+        writer.write(linenumber() + "'Output Time:" + str(now) + "\n")
 
     # Write the preamble
     if OUTPUT_COMMENTS:
-        gcode += linenumber() + "'(begin preamble)\n"
-    for line in PREAMBLE.splitlines(True):
-        gcode += linenumber() + line
+        writer.write(linenumber() + "'(begin preamble)\n")
+    writer.writeLines(PREAMBLE, linenumber)
 
     for obj in objectslist:
 
         # do the pre_op
         if OUTPUT_COMMENTS:
-            gcode += linenumber() + "'(begin operation: " + obj.Label + ")\n"
-        for line in PRE_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            writer.write(linenumber() + "'(begin operation: " + obj.Label + ")\n")
+        writer.writeLines(PRE_OPERATION, linenumber)
 
-        gcode += parse(obj)
+        parse(obj, writer)
 
         # do the post_op
         if OUTPUT_COMMENTS:
-            gcode += linenumber() + "'(finish operation: " + obj.Label + ")\n"
-        for line in POST_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            writer.write(linenumber() + "'(finish operation: " + obj.Label + ")\n")
+        writer.writeLines(POST_OPERATION, linenumber)
 
     # do the post_amble
     if OUTPUT_COMMENTS:
-        gcode += "'(begin postamble)\n"
-    for line in POSTAMBLE.splitlines(True):
-        gcode += linenumber() + line
-
-    if SHOW_EDITOR:
-        dia = PostUtils.GCodeEditorDialog()
-        dia.editor.setText(gcode)
-        result = dia.exec_()
-        if result:
-            final = dia.editor.toPlainText()
-        else:
-            final = gcode
-    else:
-        final = gcode
+        writer.write("'(begin postamble)\n")
+    writer.writeLines(POSTAMBLE, linenumber)
 
-    print("done postprocessing.")
+    final = writer.close()
 
-    # Write the output
-    gfile = pythonopen(filename, "wb")
-    gfile.write(final)
-    gfile.close()
+    print("done postprocessing.")
+    return final
 
 
 def move(command):
@@ -329,36 +311,34 @@ scommands = {
 }
 
 
-def parse(pathobj):
+def parse(pathobj, writer):
     global CurrentState
 
-    output = ""
     params = ['X', 'Y', 'Z', 'A', 'B', 'I', 'J', 'K', 'F', 'S', 'T']
     # Above list controls the order of parameters
 
     if hasattr(pathobj, "Group"):  # We have a compound or project.
         if OUTPUT_COMMENTS:
-            output += linenumber() + "'(compound: " + pathobj.Label + ")\n"
+            writer.write(linenumber() + "'(compound: " + pathobj.Label + ")\n")
         for p in pathobj.Group:
-            output += parse(p)
+            parse(p, writer)
     else:  # parsing simple path
         # groups might contain non-path things like stock.
         if not hasattr(pathobj, "Path"):
-            return output
+            return
         if OUTPUT_COMMENTS:
-            output += linenumber() + "'(Path: " + pathobj.Label + ")\n"
+            writer.write(linenumber() + "'(Path: " + pathobj.Label + ")\n")
         for c in pathobj.Path.Commands:
             command = c.Name
             if command in scommands:
-                output += scommands[command](c)
+                writer.write(scommands[command](c))
                 if c.Parameters:
                     CurrentState.update(c.Parameters)
             elif command[0] == '(':
-                output += "' " + command + "\n"
+                writer.write("' " + command + "\n")
             else:
                 print("I don't know what the hell the command: ",end='')
                 print(command + " means.  Maybe I should support it.")
-    return output
 
 
 def linenumber():
@@ -31,6 +31,9 @@ FreeCAD, via the GUI importer or via python scripts with:
 
 import smoothie_post
 linuxcnc_post.export(object,"/path/to/file.ncc","")
+
+export() returns the G-code only if the editor is shown or the file name is "-",
+otherwise the G-code is streamed into the file and None is returned.
 '''
 
 TOOLTIP_ARGS='''
@@ -43,7 +46,6 @@ Arguments for smoothieboard:
 
 '''
 import FreeCAD
-from FreeCAD import Units
 import datetime
 from PathScripts import PostUtils
 
@@ -73,6 +75,11 @@ MACHINE_NAME = "SmoothieBoard"
 CORNER_MIN = {'x': 0, 'y': 0, 'z': 0}
 CORNER_MAX = {'x': 500, 'y': 300, 'z': 300}
 
+# params = ['X','Y','Z','A','B','I','J','K','F','S'] #This list control
+# the order of parameters
+# linuxcnc doesn't want K properties on XY plane  Arcs need work.
+PARAMS = ['X', 'Y', 'Z', 'A', 'B', 'I', 'J', 'F', 'S', 'T', 'Q', 'R', 'L']
+
 # Preamble text will appear at the beginning of the GCODE output file.
 PREAMBLE = '''G17 G90
 '''
@@ -95,10 +102,6 @@ POST_OPERATION = ''''''
 TOOL_CHANGE = ''''''
 
 
-# to distinguish python built-in open function from the one declared below
-if open.__module__ == '__builtin__':
-    pythonopen = open
-
 def processArguments(argstring):
     global OUTPUT_HEADER
     global OUTPUT_COMMENTS
@@ -139,7 +142,9 @@ def export(objectslist, filename, argstring):
             return
 
     FreeCAD.Console.PrintMessage("postprocessing...\n")
-    gcode = ""
+    # the program is sent to the board as a whole, only stream it to a file
+    # when it is not uploaded
+    writer = PostUtils.GCodeWriter('-' if IP_ADDR is not None else filename, SHOW_EDITOR, COMMAND_SPACE)
 
     # Find the machine.
     # The user my have overridden post processor defaults in the GUI.  Make
@@ -158,59 +163,43 @@ def export(objectslist, filename, argstring):
 
     # write header
     if OUTPUT_HEADER:
-        gcode += linenumber() + "(Exported by FreeCAD)\n"
-        gcode += linenumber() + "(Post Processor: " + __name__ + ")\n"
-        gcode += linenumber() + "(Output Time:" + str(now) + ")\n"
+        writer.write(linenumber() + "(Exported by FreeCAD)\n")
+        writer.write(linenumber() + "(Post Processor: " + __name__ + ")\n")
+        writer.write(linenumber() + "(Output Time:" + str(now) + ")\n")
 
     # Write the preamble
     if OUTPUT_COMMENTS:
-        gcode += linenumber() + "(begin preamble)\n"
-    for line in PREAMBLE.splitlines(True):
-        gcode += linenumber() + line
-    gcode += linenumber() + UNITS + "\n"
+        writer.write(linenumber() + "(begin preamble)\n")
+    writer.writeLines(PREAMBLE, linenumber)
+    writer.write(linenumber() + UNITS + "\n")
+
+    formatter = PostUtils.CommandFormatter(PARAMS, 4, feedPrecision=2, unitFormat=UNIT_FORMAT, modal=MODAL,
+            wordFormats={'T': 'T%s', 'S': 'S%s'})
 
     for obj in objectslist:
 
         # do the pre_op
         if OUTPUT_COMMENTS:
-            gcode += linenumber() + "(begin operation: " + obj.Label + ")\n"
-        for line in PRE_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            writer.write(linenumber() + "(begin operation: " + obj.Label + ")\n")
+        writer.writeLines(PRE_OPERATION, linenumber)
 
-        gcode += parse(obj)
+        parse(obj, writer, formatter)
 
         # do the post_op
         if OUTPUT_COMMENTS:
-            gcode += linenumber() + "(finish operation: " + obj.Label + ")\n"
-        for line in POST_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            writer.write(linenumber() + "(finish operation: " + obj.Label + ")\n")
+        writer.writeLines(POST_OPERATION, linenumber)
 
     # do the post_amble
 
     if OUTPUT_COMMENTS:
-        gcode += "(begin postamble)\n"
-    for line in POSTAMBLE.splitlines(True):
-        gcode += linenumber() + line
-
-    if SHOW_EDITOR:
-        dia = PostUtils.GCodeEditorDialog()
-        dia.editor.setText(gcode)
-        result = dia.exec_()
-        if result:
-            final = dia.editor.toPlainText()
-        else:
-            final = gcode
-    else:
-        final = gcode
+        writer.write("(begin postamble)\n")
+    writer.writeLines(POSTAMBLE, linenumber)
+
+    final = writer.close()
 
     if IP_ADDR is not None:
         sendToSmoothie(IP_ADDR, final, filename)
-    else:
-
-        if not filename == '-':
-            gfile = pythonopen(filename, "wb")
-            gfile.write(final)
-            gfile.close()
 
     FreeCAD.Console.PrintMessage("done postprocessing.\n")
     return final
@@ -297,73 +286,42 @@ def linenumber():
         return "N" + str(LINENR) + " "
     return ""
 
-def parse(pathobj):
-    out = ""
-    lastcommand = None
+def parse(pathobj, writer, formatter):
     global SPINDLE_SPEED
 
-    # params = ['X','Y','Z','A','B','I','J','K','F','S'] #This list control
-    # the order of parameters
-    # linuxcnc doesn't want K properties on XY plane  Arcs need work.
-    params = ['X', 'Y', 'Z', 'A', 'B', 'I', 'J', 'F', 'S', 'T', 'Q', 'R', 'L']
-
     if hasattr(pathobj, "Group"):  # We have a compound or project.
         # if OUTPUT_COMMENTS:
-        #     out += linenumber() + "(compound: " + pathobj.Label + ")\n"
+        #     writer.write(linenumber() + "(compound: " + pathobj.Label + ")\n")
         for p in pathobj.Group:
-            out += parse(p)
-        return out
+            parse(p, writer, formatter)
+        return
     else:  # parsing simple path
 
         # groups might contain non-path things like stock.
         if not hasattr(pathobj, "Path"):
-            return out
+            return
 
         # if OUTPUT_COMMENTS:
-        #     out += linenumber() + "(" + pathobj.Label + ")\n"
+        #     writer.write(linenumber() + "(" + pathobj.Label + ")\n")
 
+        formatter.reset()
         for c in pathobj.Path.Commands:
-            outstring = []
             command = c.Name
-            outstring.append(command)
-            # if modal: only print the command if it is not the same as the
-            # last one
-            if MODAL is True:
-                if command == lastcommand:
-                    outstring.pop(0)
-
-            # Now add the remaining parameters in order
-            for param in params:
-                if param in c.Parameters:
-                    if param == 'F':
-                        if c.Name not in ["G0", "G00"]: #linuxcnc doesn't use rapid speeds
-                            speed = Units.Quantity(c.Parameters['F'], FreeCAD.Units.Velocity)
-                            outstring.append(
-                                param + format(float(speed.getValueAs(UNIT_FORMAT)), '.2f') )
-                    elif param == 'T':
-                        outstring.append(param + str(c.Parameters['T']))
-                    elif param == 'S':
-                        outstring.append(param + str(c.Parameters['S']))
-                        SPINDLE_SPEED = c.Parameters['S']
-                    else:
-                        outstring.append(
-                            param + format(c.Parameters[param], '.4f'))
+            outstring = formatter.words(c)
+            if 'S' in c.Parameters:
+                SPINDLE_SPEED = c.Parameters['S']
             if command in ['G1', 'G01', 'G2', 'G02', 'G3', 'G03']:
                 outstring.append('S' + str(SPINDLE_SPEED))
 
-            # store the latest command
-            lastcommand = command
-
             # Check for Tool Change:
             if command == 'M6':
                 # if OUTPUT_COMMENTS:
-                #     out += linenumber() + "(begin toolchange)\n"
-                for line in TOOL_CHANGE.splitlines(True):
-                    out += linenumber() + line
+                #     writer.write(linenumber() + "(begin toolchange)\n")
+                writer.writeLines(TOOL_CHANGE, linenumber)
 
             if command == "message":
                 if OUTPUT_COMMENTS is False:
-                    out = []
+                    outstring = []
                 else:
                     outstring.pop(0)  # remove the command
 
@@ -373,11 +331,7 @@ def parse(pathobj):
                     outstring.insert(0, (linenumber()))
 
                 # append the line to the final output
-                for w in outstring:
-                    out += w + COMMAND_SPACE 
-                out = out.strip() + "\n"
-
-        return out
+                writer.command(outstring)
 
 
 print(__name__ + " gcode postprocessor loaded.")
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+'''
+Timings of the Path code against the implementation it replaced. They are not part of
+the unit tests, each prints its timings and checks both implementations agree.
+
+From the command line:
+    FreeCADCmd -c "from PathTests import PathBenchmarks; PathBenchmarks.main()" -- [name ...]
+'''
+
+from __future__ import print_function
+
+import argparse
+import sys
+import time
+
+
+def timed(function, *args):
+    '''timed(function, *args) ... returns (result, seconds) of calling function with args.'''
+    begin = time.time()
+    result = function(*args)
+    return (result, time.time() - begin)
+
+def benchmarkFormatter(count=100000):
+    '''CommandFormatter against formatting every parameter of every command.'''
+    from PathScripts import PostUtils
+    from PathTests.TestPathPostUtils import PARAMS, formatWords, syntheticPath
+
+    commands = syntheticPath(count).Commands
+    (before, tBefore) = timed(formatWords, commands, 4, 'mm/min')
+    formatter = PostUtils.CommandFormatter(PARAMS, 4)
+    (after, tAfter) = timed(lambda: [formatter.words(c) for c in commands])
+    assert before == after
+    print("formatting %d commands: %.0f commands/s before, %.0f commands/s with CommandFormatter" %
+            (count, count / max(tBefore, 1e-9), count / max(tAfter, 1e-9)))
+
+def benchmarkKDTree(count=20000, queries=5000):
+    '''ArrayKDTree against KDTree, for ball and nearest neighbour queries.'''
+    import numpy
+    from PathScripts import kdtree
+
+    random = numpy.random.RandomState(3)
+    data = random.uniform(0, 100, (count, 2))
+    points = random.uniform(0, 100, (queries, 2))
+
+    tree = kdtree.KDTree(data)
+    (before, tBallBefore) = timed(lambda: [tree.query_ball_point(point, 2) for point in points])
+    ((dBefore, iBefore), tQueryBefore) = timed(tree.query, points, 3)
+
+    tree = kdtree.ArrayKDTree(data)
+    (after, tBallAfter) = timed(tree.query_ball_point, points, 2)
+    ((dAfter, iAfter), tQueryAfter) = timed(tree.query, points, 3)
+
+    assert [sorted(b) for b in before] == list(after)
+    assert numpy.allclose(dBefore, dAfter)
+    print("%d points, %d queries: query_ball_point %.2fs with KDTree, %.2fs with ArrayKDTree; query k=3 %.2fs with KDTree, %.2fs with ArrayKDTree" %
+            (count, queries, tBallBefore, tBallAfter, tQueryBefore, tQueryAfter))
+
+def benchmarkDogbone(count=2500):
+    '''The dogbone dressup of each style on a sheet of many pockets, 4 corners each.'''
+    from PathScripts import PathDressupDogbone
+    from PathTests.TestPathDressupDogbone import dressup, pocket
+
+    commands = []
+    for i in range(count):
+        commands.extend(pocket((i % 50) * 20, (i // 50) * 20, 5 + i % 7, 5 + i % 5, True))
+    for style in PathDressupDogbone.Style.All:
+        ((obj, proxy), elapsed) = timed(dressup, commands, PathDressupDogbone.Side.Right, style)
+        assert len(proxy.bones) == 4 * count
+        print("%s on %d commands: %d bones in %.2fs" % (style, len(commands), len(proxy.bones), elapsed))
+
+Benchmarks = [('formatter', benchmarkFormatter), ('kdtree', benchmarkKDTree), ('dogbone', benchmarkDogbone)]
+
+def main(argv=None):
+    '''main([argv]) ... runs the benchmarks named in argv, or all of them, argv defaults to the
+    arguments after '--' on the command line.'''
+    if argv is None:
+        argv = sys.argv[1:]
+        if '--' in argv:
+            argv = argv[argv.index('--') + 1:]
+    names = [name for (name, benchmark) in Benchmarks]
+    parser = argparse.ArgumentParser(prog='PathBenchmarks', description='Time the Path code against the implementation it replaced.')
+    parser.add_argument('names', nargs='*', help='benchmarks to run (default all): %s' % ', '.join(names))
+    args = parser.parse_args(argv)
+    for name in args.names:
+        if name not in names:
+            parser.error("unknown benchmark '%s'" % name)
+    for (name, benchmark) in Benchmarks:
+        if not args.names or name in args.names:
+            benchmark()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
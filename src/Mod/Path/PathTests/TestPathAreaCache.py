@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+import FreeCAD
+import Part
+import Path
+
+from PathScripts import PathAreaCache
+from PathTests.PathTestUtils import PathTestBase
+
+
+class TestPathAreaCache(PathTestBase):
+
+    def area(self, shape, **params):
+        area = Path.Area()
+        area.setPlane(Part.makeCircle(10))
+        area.add(shape)
+        area.setParams(**params)
+        return area
+
+    def test00(self):
+        '''Check sections are reused for equal geometry, parameters and heights.'''
+        cache = PathAreaCache.SectionCache()
+        heights = [8.0, 5.0, 2.0]
+        sections = cache.makeSections(self.area(Part.makeBox(10, 10, 10), ToolRadius=1), heights=heights)
+        self.assertEqual(len(sections), 3)
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+        # a box built again, as when an operation recomputes its envelope
+        again = cache.makeSections(self.area(Part.makeBox(10, 10, 10), ToolRadius=1), heights=heights)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(len(again), 3)
+        for (a, b) in zip(sections, again):
+            self.assertRoughly(a.BoundBox.ZMin, b.BoundBox.ZMin)
+            self.assertRoughly(a.Length, b.Length)
+
+        # anything else is sectioned again
+        cache.makeSections(self.area(Part.makeBox(10, 10, 10), ToolRadius=2), heights=heights)
+        cache.makeSections(self.area(Part.makeBox(10, 10, 10), ToolRadius=1), heights=heights[:2])
+        cache.makeSections(self.area(Part.makeBox(10, 10, 10), ToolRadius=1), project=True, heights=heights)
+        cache.makeSections(self.area(Part.makeBox(10, 10, 11), ToolRadius=1), heights=heights)
+        box = Part.makeBox(10, 10, 10)
+        box.translate(FreeCAD.Vector(1, 0, 0))
+        cache.makeSections(self.area(box, ToolRadius=1), heights=heights)
+        self.assertEqual((cache.hits, cache.misses), (1, 6))
+
+    def test01(self):
+        '''Check the least recently used sections are evicted.'''
+        cache = PathAreaCache.SectionCache(2)
+        boxes = [Part.makeBox(10, 10, 10 + i) for i in range(3)]
+        cache.makeSections(self.area(boxes[0]), heights=[5.0])
+        cache.makeSections(self.area(boxes[1]), heights=[5.0])
+        cache.makeSections(self.area(boxes[0]), heights=[5.0])
+        cache.makeSections(self.area(boxes[2]), heights=[5.0])
+        self.assertEqual(len(cache.entries), 2)
+        cache.makeSections(self.area(boxes[0]), heights=[5.0])
+        self.assertEqual((cache.hits, cache.misses), (2, 3))
+        cache.makeSections(self.area(boxes[1]), heights=[5.0])
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+        cache.clear()
+        self.assertEqual(len(cache.entries), 0)
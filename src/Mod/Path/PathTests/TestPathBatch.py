@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+import Part
+import Path
+import csv
+import os
+import shutil
+import tempfile
+
+from PathScripts import PathBatch
+from PathScripts import PathToolController
+from PathTests.PathTestUtils import PathTestBase
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+
+class _Job(object):
+    Label = 'Job001'
+
+Template = '''<?xml version="1.0"?>
+<PathJobTemplate>
+  <Job post="linuxcnc" post_args="--no-show-editor --no-header" tol="0.01"/>
+  <ToolController label="TC" nr="1" vfeed="100 mm/min" hfeed="200 mm/min" speed="1000" dir="Forward">
+    <Tool name="EndMill" diameter="5.0" height="15.0" type="EndMill" mat="HighSpeedSteel"/>
+  </ToolController>
+</PathJobTemplate>
+'''
+
+Script = '''import PathScripts.PathContour as PathContour
+import PathScripts.PathUtils as PathUtils
+
+obj = doc.addObject("Path::FeaturePython", "Contour")
+PathContour.ObjectContour(obj)
+obj.Active = True
+obj.ClearanceHeight = 15.0
+obj.SafeHeight = 7.0
+obj.StepDown = 1.0
+obj.StartDepth = 5.0
+obj.FinalDepth = 0.0
+obj.OffsetExtra = 0.0
+obj.Direction = "CW"
+obj.UseComp = True
+obj.JoinType = "Round"
+obj.MiterLimit = 0.1
+PathUtils.addToJob(obj, job.Name)
+obj.ToolController = [o for o in job.Group if hasattr(o, 'SpindleDir')][0]
+'''
+
+
+class TestPathBatch(PathTestBase):
+
+    def result(self, model, status='ok', total=1.0):
+        result = dict((column, '') for column in PathBatch.Columns)
+        result.update({'model': model, 'status': status, 'total': total})
+        return result
+
+    def test00(self):
+        '''Check the output file name of a model.'''
+        model = os.path.join('parts', 'bracket.step')
+        directory = os.path.dirname(os.path.abspath(model))
+        self.assertEqual(PathBatch.outputFile(PathBatch.DefaultOutput, model, _Job()), directory + '/bracket.ngc')
+        self.assertEqual(PathBatch.outputFile('/tmp/%j-%m.nc', model, _Job()), '/tmp/Job001-bracket.nc')
+
+    def test01(self):
+        '''Check the summary report.'''
+        results = [self.result('a.step', total=1.5), self.result('b.step', 'failed: no job', 0.25)]
+        out = StringIO()
+        PathBatch.report(results, 2.0, out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith('model'))
+        self.assertTrue('1.50' in lines[1])
+        self.assertTrue('failed: no job' in lines[2])
+        self.assertEqual(lines[3], '2 models, 1 failed, 2.00s (1.75s in total in all processes)')
+
+        (fd, filename) = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        try:
+            PathBatch.writeCsv(results, filename)
+            with open(filename) as f:
+                rows = list(csv.reader(f))
+            self.assertEqual(rows[0], PathBatch.Columns)
+            self.assertEqual(rows[2][1], 'failed: no job')
+        finally:
+            os.remove(filename)
+
+    def test02(self):
+        '''Check a model which can't be processed is reported as failed.'''
+        options = PathBatch.Options('does-not-exist.FCStd', processes=1)
+        results = PathBatch.run(['does-not-exist.step'], options)
+        self.assertEqual(len(results), 1)
+        self.assertTrue(results[0]['status'].startswith('failed'))
+        self.assertEqual(results[0]['output'], '')
+
+    def test03(self):
+        '''Check a box is processed with a job template and posted with linuxcnc.'''
+        directory = tempfile.mkdtemp()
+        try:
+            model = os.path.join(directory, 'box.brep')
+            Part.makeBox(20, 10, 5).exportBrep(model)
+            template = os.path.join(directory, 'job_box.xml')
+            with open(template, 'w') as f:
+                f.write(Template)
+            script = os.path.join(directory, 'setup.py')
+            with open(script, 'w') as f:
+                f.write(Script)
+
+            options = PathBatch.Options(template, output='%D/%m.ngc', script=script, processes=1)
+            results = PathBatch.run([model], options)
+            self.assertEqual(len(results), 1)
+            self.assertEqual(results[0]['status'], 'ok')
+            self.assertEqual(results[0]['operations'], 1)
+            output = results[0]['output']
+            self.assertEqual(output, os.path.join(directory, 'box.ngc'))
+            self.assertTrue(os.path.exists(output))
+
+            with open(output) as f:
+                words = [line.split()[0] for line in f if line.strip()]
+            self.assertTrue('G0' in words)
+            self.assertTrue('G1' in words)
+        finally:
+            shutil.rmtree(directory)
+
+    def test04(self):
+        '''Check the tool controllers and inactive operations of a job aren't counted as operations.'''
+
+        class ToolControllerProxy(PathToolController.ToolController):
+            def __init__(self):
+                pass
+
+        class Obj(object):
+            def __init__(self, commands, proxy=None, active=True):
+                self.Path = Path.Path([Path.Command(c) for c in commands])
+                self.Proxy = proxy
+                self.Active = active
+
+        tc = Obj(['M6', 'M3'], ToolControllerProxy())
+        del tc.Active
+        ops = [Obj(['G0', 'G1', 'G1']), Obj(['G1']), Obj(['G1', 'G1'], active=False)]
+
+        class Job(object):
+            Group = [tc] + ops
+
+        self.assertEqual(PathBatch.jobOperations(Job()), ops[:2])
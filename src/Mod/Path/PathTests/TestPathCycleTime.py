@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+import Path
+import math
+
+from PathScripts import PathCycleTime
+from PathTests.PathTestUtils import PathTestBase
+
+
+class TestPathCycleTime(PathTestBase):
+
+    def setUp(self):
+        self.machine = PathCycleTime.Machine((100, 100, 50), (500, 500, 250), 0.01)
+
+    def estimate(self, commands, feeds=None, position=(0, 0, 0)):
+        return PathCycleTime.estimate(commands, feeds, self.machine, position)
+
+    def test00(self):
+        '''Check the time of straight moves includes acceleration and corners.'''
+        # reaching 50mm/s takes 0.1s and 2.5mm, and as long to stop again
+        e = self.estimate([Path.Command('G1', {'X': 100, 'F': 50})])
+        self.assertRoughly(e.time, 2.1)
+        self.assertRoughly(e.nominalTime, 2.0)
+        self.assertRoughly(e.feedDistance, 100)
+
+        # too short to reach the feed rate
+        e = self.estimate([Path.Command('G1', {'X': 2, 'F': 50})])
+        self.assertRoughly(e.time, 2 * math.sqrt(1 / 250.0))
+
+        # straight on the moves don't slow down, in corners they almost stop
+        e = self.estimate([Path.Command('G1', {'X': 50, 'F': 50}), Path.Command('G1', {'X': 100})])
+        self.assertRoughly(e.time, 2.1)
+        e = self.estimate([Path.Command('G1', {'X': 100, 'F': 50}), Path.Command('G1', {'Y': 100})])
+        self.assertTrue(4.15 < e.time < 4.2)
+
+        # the feed rates of the tool controller, and the axis limits
+        feeds = PathCycleTime.Feeds(horizFeed=20, vertFeed=5)
+        e = self.estimate([Path.Command('G1', {'X': 100}), Path.Command('G1', {'Z': -10})], feeds)
+        self.assertTrue(5.0 < e.times[0] < 5.04)
+        self.assertTrue(2.0 < e.times[1] < 2.02)
+        # X limits the speed of this move to 100mm/s along X
+        e = self.estimate([Path.Command('G0', {'X': 300, 'Z': -100})])
+        self.assertRoughly(e.rapidTime, 3.2)
+        self.assertRoughly(e.rapidDistance, math.hypot(300, 100))
+
+    def test01(self):
+        '''Check arcs.'''
+        e = self.estimate([Path.Command('G2', {'X': 10, 'Y': 0, 'I': -10, 'J': 0, 'F': 50})], position=(10, 0, 0))
+        self.assertRoughly(e.lengths[0], 20 * math.pi)
+        self.assertRoughly(e.feedTime, 20 * math.pi / 50 + 0.1)
+
+        # half a helix, and the tangent continuation of a line into an arc
+        e = self.estimate([Path.Command('G1', {'X': 10, 'F': 10}), Path.Command('G3', {'X': 10, 'Y': 20, 'Z': -5, 'I': 0, 'J': 10})])
+        self.assertRoughly(e.lengths[1], math.hypot(10 * math.pi, 5))
+        self.assertTrue(abs(e.time - (10 + e.lengths[1]) / 10 - 0.02) < 0.001)
+
+        # centripetal acceleration limits the speed on small arcs
+        e = self.estimate([Path.Command('G3', {'X': 1, 'Y': 0, 'I': -1, 'J': 0, 'F': 100})], position=(1, 0, 0))
+        self.assertTrue(e.feedTime > 2 * math.pi / math.sqrt(500))
+
+    def test02(self):
+        '''Check drill cycles, dwells and tool changes.'''
+        machine = PathCycleTime.Machine(toolChangeTime=5)
+        e = PathCycleTime.estimate([
+            Path.Command('M6', {'T': 1}),
+            Path.Command('G0', {'X': 0, 'Y': 0, 'Z': 10}),
+            Path.Command('G98'),
+            Path.Command('G83', {'X': 5, 'Y': 5, 'Z': -10, 'R': 2, 'Q': 3, 'F': 10}),
+            Path.Command('G82', {'X': 10, 'Y': 5, 'Z': -10, 'R': 2, 'P': 1.5, 'F': 10}),
+            Path.Command('G4', {'P': 2})], machine=machine)
+        self.assertRoughly(e.dwellTime, 8.5)
+        self.assertRoughly(e.feedDistance, 24)
+        self.assertRoughly(e.rapidDistance, math.hypot(5, 5) + 8 + 2 * (3 + 6 + 9) + 20 + 5 + 8 + 20)
+        self.assertRoughly(e.end[0], 10)
+        self.assertRoughly(e.end[2], 10)
+        self.assertTrue(e.time > e.dwellTime + e.feedDistance / 10)
+
+    def test03(self):
+        '''Check estimateJob only estimates the active operations of a job.'''
+        from PathScripts import PathToolController
+
+        class Speed(object):
+            def __init__(self, value):
+                self.Value = value
+
+        class ToolControllerProxy(PathToolController.ToolController):
+            def __init__(self):
+                pass
+
+        class Obj(object):
+            def __init__(self, commands, proxy=None, tc=None, active=True):
+                self.Path = Path.Path(commands)
+                self.Proxy = proxy
+                self.ToolController = tc
+                self.Active = active
+
+        tc = Obj([Path.Command('M6', {'T': 1})], ToolControllerProxy())
+        tc.HorizFeed = tc.VertFeed = tc.HorizRapid = tc.VertRapid = Speed(10)
+        del tc.ToolController
+        ops = [Obj([Path.Command('G0', {'X': 0, 'Y': 0, 'Z': 0}), Path.Command('G1', {'X': 10, 'F': 10})], tc=tc),
+                Obj([Path.Command('G1', {'X': 30, 'F': 10})], tc=tc),
+                Obj([Path.Command('G1', {'X': 50, 'F': 10})], tc=tc, active=False)]
+
+        class Job(object):
+            Group = [tc] + ops
+
+        (total, estimates) = PathCycleTime.estimateJob(Job(), PathCycleTime.Machine(toolChangeTime=100))
+        self.assertEqual([op for (op, e) in estimates], ops[:2])
+        self.assertRoughly(estimates[1][1].feedDistance, 20)
+        self.assertRoughly(total.feedDistance, 30)
+        self.assertRoughly(total.dwellTime, 0)
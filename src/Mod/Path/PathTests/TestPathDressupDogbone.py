@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import Path
+import math
+
+from PathScripts import PathDressupDogbone
+from PathScripts.PathGeom import PathGeom
+from PathTests.PathTestUtils import PathTestBase
+
+
+class BasePath(object):
+    def __init__(self, commands):
+        self.Path = Path.Path(commands)
+
+    def isDerivedFrom(self, typeId):
+        return typeId == 'Path::Feature'
+
+
+class Dressup(object):
+    '''Stands in for the dressup document object, execute only reads its properties.'''
+    def __init__(self, commands, side, style=PathDressupDogbone.Style.Dogbone, incision=PathDressupDogbone.Incision.Fixed):
+        self.Base = BasePath(commands)
+        self.Side = side
+        self.Style = style
+        self.Incision = incision
+        self.Custom = 0.0
+        self.BoneBlacklist = []
+        self.ToolController = None
+        self.Path = None
+
+
+def pocket(x, y, w, h, ccw):
+    '''returns the commands for a rectangular pocket outline with its lower left corner at x, y.'''
+    corners = [(x + w, y), (x + w, y + h), (x, y + h), (x, y)]
+    if not ccw:
+        corners = [(x, y + h), (x + w, y + h), (x + w, y), (x, y)]
+    commands = [Path.Command('G0', {'X': x, 'Y': y, 'Z': 5}), Path.Command('G1', {'Z': -1})]
+    commands.extend(Path.Command('G1', {'X': px, 'Y': py}) for (px, py) in corners)
+    commands.append(Path.Command('G0', {'Z': 5}))
+    return commands
+
+
+def hasPoint(commands, x, y):
+    return any(PathGeom.isRoughly(c.Parameters.get('X', x + 1), x) and PathGeom.isRoughly(c.Parameters.get('Y', y + 1), y) for c in commands)
+
+
+def dressup(commands, side, style=PathDressupDogbone.Style.Dogbone):
+    obj = Dressup(commands, side, style)
+    proxy = PathDressupDogbone.ObjectDressup.__new__(PathDressupDogbone.ObjectDressup)
+    proxy.execute(obj)
+    return (obj, proxy)
+
+
+class TestPathDressupDogbone(PathTestBase):
+
+    def test00(self):
+        '''Check the chords of a path keep the position of axes a move doesn't change.'''
+        commands = [Path.Command('G0', {'X': 1, 'Y': 2}), Path.Command('(comment)'), Path.Command('G1', {'Z': -1}),
+                Path.Command('M3'), Path.Command('G2', {'X': 3, 'I': 1, 'J': 0}), Path.Command('G1', {'Y': 4, 'Z': 0})]
+        (moves, starts, ends) = PathDressupDogbone.chordsOf(commands)
+        self.assertEqual(moves, [0, 2, 4, 5])
+        self.assertEqual(starts.tolist(), [[0, 0, 0], [1, 2, 0], [1, 2, -1], [3, 2, -1]])
+        self.assertEqual(ends.tolist(), [[1, 2, 0], [1, 2, -1], [3, 2, -1], [3, 4, 0]])
+
+    def test01(self):
+        '''Check corners are found where the path turns to the given side, or folds back.'''
+        commands = [Path.Command('G1', {'X': 10}), Path.Command('G1', {'Y': 10}), Path.Command('G1', {'X': 20}),
+                Path.Command('G1', {'X': 30}), Path.Command('G1', {'X': 25})]
+        (moves, starts, ends) = PathDressupDogbone.chordsOf(commands)
+        # left turn, right turn, straight on, folding back
+        self.assertEqual(PathDressupDogbone.cornersOf(starts, ends, PathDressupDogbone.Side.Left).tolist(), [True, False, False, True])
+        self.assertEqual(PathDressupDogbone.cornersOf(starts, ends, PathDressupDogbone.Side.Right).tolist(), [False, True, False, True])
+
+    def test02(self):
+        '''Check a bone is inserted in each corner of a pocket, including the one closing the loop.'''
+        # the fixed length dogbone reaches into the corner by toolRadius * 0.41422, diagonally
+        length = 5 * 0.41422 / math.sqrt(2)
+        for (ccw, side) in [(True, PathDressupDogbone.Side.Right), (False, PathDressupDogbone.Side.Left)]:
+            (obj, proxy) = dressup(pocket(0, 0, 10, 10, ccw), side)
+            self.assertEqual(sorted(loc for (boneId, loc, enabled, inaccessible) in proxy.bones), [(0, 0), (0, 10), (10, 0), (10, 10)])
+            for (x, y) in [(10 + length, -length), (10 + length, 10 + length), (-length, 10 + length), (-length, -length)]:
+                self.assertTrue(hasPoint(obj.Path.Commands, x, y))
+
+        # with the bones on the other side there are no corners to dress up
+        (obj, proxy) = dressup(pocket(0, 0, 10, 10, True), PathDressupDogbone.Side.Left)
+        self.assertEqual(proxy.bones, [])
+        self.assertEqual(len(obj.Path.Commands), len(pocket(0, 0, 10, 10, True)))
+
+    def test03(self):
+        '''Check blacklisted bones are skipped.'''
+        obj = Dressup(pocket(0, 0, 10, 10, True), PathDressupDogbone.Side.Right)
+        obj.BoneBlacklist = [2]
+        proxy = PathDressupDogbone.ObjectDressup.__new__(PathDressupDogbone.ObjectDressup)
+        proxy.execute(obj)
+        self.assertEqual([enabled for (boneId, loc, enabled, inaccessible) in proxy.bones], [True, False, True, True])
+
+        length = 5 * 0.41422 / math.sqrt(2)
+        self.assertTrue(hasPoint(obj.Path.Commands, 10 + length, -length))
+        self.assertFalse(hasPoint(obj.Path.Commands, 10 + length, 10 + length))
+        self.assertTrue(hasPoint(obj.Path.Commands, -length, -length))
+
+    def test04(self):
+        '''Check each style dresses up all corners of a sheet of pockets.'''
+        commands = []
+        for i in range(25):
+            commands.extend(pocket((i % 5) * 20, (i // 5) * 20, 5 + i % 7, 5 + i % 5, True))
+        for style in PathDressupDogbone.Style.All:
+            (obj, proxy) = dressup(commands, PathDressupDogbone.Side.Right, style)
+            self.assertEqual(len(proxy.bones), 4 * 25)
@@ -75,3 +75,36 @@ class TestHoldingTags(PathTestBase):
         print(h)
         self.assertConeAt(tag.solid, Vector(0,0,-h * 0.01), 2.5, 0, h)
 
+
+    def test05(self):
+        """Verify tags of the same shape get their own solid at their position."""
+        tag1 = Tag(0, 100, 200, 4, 5, 90, 0, True)
+        tag1.createSolidsAt(17, 0)
+        tag2 = Tag(1, -10, 20, 4, 5, 90, 0, True)
+        tag2.createSolidsAt(3, 0)
+        self.assertCylinderAt(tag1.solid, Vector(100, 200, 17 - 5 * 0.01), 2, 5 * 1.01)
+        self.assertCylinderAt(tag2.solid, Vector(-10, 20, 3 - 5 * 0.01), 2, 5 * 1.01)
+
+        tag1.createSolidsAt(0, 0)
+        self.assertCylinderAt(tag1.solid, Vector(100, 200, -5 * 0.01), 2, 5 * 1.01)
+        self.assertCylinderAt(tag2.solid, Vector(-10, 20, 3 - 5 * 0.01), 2, 5 * 1.01)
+
+    def test06(self):
+        """Verify the tag index only returns tags close to an edge."""
+        tags = []
+        for i in range(10):
+            tag = Tag(i, i * 10, 0, 4, 5, 90, 0, True)
+            tag.createSolidsAt(0, 0)
+            tags.append(tag)
+        index = TagIndex(tags)
+
+        self.assertEqual(index.candidates(Part.Edge(Part.LineSegment(Vector(-5, 0, 0), Vector(95, 0, 0)))), list(range(10)))
+        self.assertEqual(index.candidates(Part.Edge(Part.LineSegment(Vector(19, -5, 0), Vector(19, 5, 0)))), [2])
+        self.assertEqual(index.candidates(Part.Edge(Part.LineSegment(Vector(25, 0, 0), Vector(41, 0, 0)))), [3, 4])
+        self.assertEqual(index.candidates(Part.Edge(Part.LineSegment(Vector(25, 0, 0), Vector(27, 0, 0)))), [])
+        # above the tags, and away from them
+        self.assertEqual(index.candidates(Part.Edge(Part.LineSegment(Vector(-5, 0, 6), Vector(95, 0, 6)))), [])
+        self.assertEqual(index.candidates(Part.Edge(Part.LineSegment(Vector(-5, 10, 0), Vector(95, 10, 0)))), [])
+        # arcs are bounded by their extent, not their end points
+        arc = Part.Edge(Part.Circle(Vector(50, 5, 0), Vector(0, 0, 1), 4.5), math.pi, 2 * math.pi)
+        self.assertEqual(index.candidates(arc), [5])
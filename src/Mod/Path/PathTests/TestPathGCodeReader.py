@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+import Path
+import math
+import os
+import tempfile
+
+from PathScripts import PathGCodeReader
+from PathTests.PathTestUtils import PathTestBase
+
+Program = b'''%
+(program start)
+N10 G90 G21 G17
+S1000 M3
+G0 X1 Y2 Z5
+G1 Z-1 F100
+X2
+Y3 ; a comment
+N20 G91
+G1 X1 Y1
+X1
+G90
+G20
+G0 X1
+g2 x2y1 i.5 j0 F10
+G81 X1 Y1 Z-1 R2
+X2
+G80
+T2 M6
+(unfinished comment'''
+
+def syntheticProgram(count):
+    '''a zig zag surfacing program with count moves'''
+    lines = ['G0 X0 Y0 Z5']
+    for i in range(count):
+        x = (i % 200) * 0.5
+        y = (i // 200) * 0.5
+        z = -1 - math.sin(x / 7.0) * math.cos(y / 11.0)
+        lines.append('G1 X%.4f Y%.4f Z%.4f F20' % (x, y, z))
+        if i % 1000 == 0:
+            lines.append('(row %d)' % (i // 200))
+    return '\n'.join(lines) + '\n'
+
+
+class TestPathGCodeReader(PathTestBase):
+
+    def assertCommands(self, commands, expected):
+        self.assertEqual([c.Name for c in commands], [e[0] for e in expected])
+        for (c, e) in zip(commands, expected):
+            self.assertEqual(sorted(c.Parameters), sorted(e[1]))
+            for p in e[1]:
+                self.assertRoughly(c.Parameters[p], e[1][p])
+
+    def test00(self):
+        '''Check GCodeReader tracks the modal state of a program.'''
+        commands = PathGCodeReader.GCodeReader().batch(Program)
+        self.assertCommands(commands, [
+            ('(program start)', {}),
+            ('G17', {}),
+            ('M3', {'S': 1000}),
+            ('G0', {'X': 1, 'Y': 2, 'Z': 5}),
+            ('G1', {'Z': -1, 'F': 100}),
+            ('G1', {'X': 2}),
+            ('G1', {'Y': 3}),
+            ('(a comment)', {}),
+            ('G1', {'X': 3, 'Y': 4}),
+            ('G1', {'X': 4}),
+            ('G0', {'X': 25.4}),
+            ('G2', {'X': 50.8, 'Y': 25.4, 'I': 12.7, 'J': 0, 'F': 254}),
+            ('G81', {'X': 25.4, 'Y': 25.4, 'Z': -25.4, 'R': 50.8}),
+            ('G81', {'X': 50.8}),
+            ('G80', {}),
+            ('M6', {'T': 2}),
+            ('(unfinished comment)', {})])
+
+        commands = PathGCodeReader.GCodeReader(comments=False).batch(Program)
+        self.assertFalse([c for c in commands if c.Name.startswith('(')])
+
+    def test01(self):
+        '''Check the batches of a file add up to the commands of the whole file.'''
+        reader = PathGCodeReader.GCodeReader()
+        expected = [(c.Name, c.Parameters) for c in reader.batch(Program)]
+        for size in [1, 7, 100]:
+            reader.reset()
+            batches = list(reader.batches(Program, size))
+            self.assertTrue(len(batches) > 1)
+            self.assertEqual([(c.Name, c.Parameters) for batch in batches for c in batch], expected)
+
+        (fd, filename) = tempfile.mkstemp(suffix='.ngc')
+        try:
+            os.write(fd, Program)
+            os.close(fd)
+            commands = [c for batch in PathGCodeReader.readBatches(filename, size=10) for c in batch]
+            self.assertEqual([(c.Name, c.Parameters) for c in commands], expected)
+            # empty files can't be memory mapped
+            with open(filename, 'w'):
+                pass
+            self.assertEqual(PathGCodeReader.readPath(filename).Commands, [])
+        finally:
+            os.remove(filename)
+
+    def test02(self):
+        '''Check GCodeReader reads a program like Path.Path does.'''
+        gcode = syntheticProgram(2000)
+        expected = Path.Path(gcode).Commands
+        commands = PathGCodeReader.GCodeReader().batch(gcode.encode())
+        self.assertEqual([c.Name for c in commands], [c.Name for c in expected])
+        for (c, e) in zip(commands, expected):
+            self.assertEqual(c.Parameters, e.Parameters)
+
+    def test03(self):
+        '''Check modal G codes apply to the whole line, and N and O words are dropped.'''
+        commands = PathGCodeReader.GCodeReader().batch(b'''O1000
+G91
+G0 X1
+G0 G90 X10 Y10
+G91 G1 X1
+G1 X1 O2
+N5 G1 Y1
+G90
+G20 Z1 G0
+''')
+        self.assertCommands(commands, [
+            ('G0', {'X': 1}),
+            ('G0', {'X': 10, 'Y': 10}),
+            ('G1', {'X': 11}),
+            ('G1', {'X': 12}),
+            ('G1', {'Y': 11}),
+            ('G0', {'Z': 25.4})])
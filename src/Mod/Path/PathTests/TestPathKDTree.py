@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+import numpy
+
+from PathScripts import kdtree
+from PathTests.PathTestUtils import PathTestBase
+
+
+class TestPathKDTree(PathTestBase):
+
+    def setUp(self):
+        random = numpy.random.RandomState(17)
+        self.data = random.uniform(0, 100, (3000, 3))
+        # a few points on top of each other
+        self.data[:50] = self.data[50:100]
+        self.points = random.uniform(-5, 105, (400, 3))
+
+    def distances(self, data, points, p=2):
+        return kdtree.minkowski_distance(points[:, numpy.newaxis, :], data[numpy.newaxis, :, :], p)
+
+    def test00(self):
+        '''Check ArrayKDTree.query_ball_point finds the same points as a brute force search.'''
+        for m in [2, 3]:
+            data = self.data[:, :m]
+            points = self.points[:, :m]
+            tree = kdtree.ArrayKDTree(data, leafsize=7)
+            radii = numpy.linspace(0.5, 12, len(points))
+            for p in [1, 2, numpy.inf]:
+                distances = self.distances(data, points, p)
+                result = tree.query_ball_point(points, radii, p=p)
+                self.assertEqual(result.shape, (len(points),))
+                for i in range(len(points)):
+                    self.assertEqual(result[i], list(numpy.flatnonzero(distances[i] <= radii[i])))
+            self.assertEqual(tree.query_ball_point(points[0], 10), list(numpy.flatnonzero(self.distances(data, points[:1])[0] <= 10)))
+            self.assertEqual(tree.query_ball_point(points.reshape(20, 20, m), 5).shape, (20, 20))
+
+    def test01(self):
+        '''Check ArrayKDTree.query finds the same neighbors as a brute force search.'''
+        tree = kdtree.ArrayKDTree(self.data, leafsize=3)
+        for p in [1, 2, 3, numpy.inf]:
+            distances = self.distances(self.data, self.points, p)
+            d, i = tree.query(self.points, p=p)
+            self.assertTrue(numpy.allclose(d, distances.min(axis=1)))
+            self.assertTrue(numpy.allclose(distances[numpy.arange(len(self.points)), i], d))
+            d, i = tree.query(self.points, k=8, p=p)
+            self.assertEqual(d.shape, (len(self.points), 8))
+            self.assertTrue(numpy.allclose(d, numpy.sort(distances, axis=1)[:, :8]))
+
+        # missing neighbors are reported as infinitely far away
+        d, i = tree.query(self.points, k=3, distance_upper_bound=1.5)
+        expected = numpy.sort(self.distances(self.data, self.points), axis=1)[:, :3]
+        expected[expected >= 1.5] = numpy.inf
+        self.assertTrue(numpy.allclose(d, expected))
+        self.assertTrue(((i == len(self.data)) == numpy.isinf(d)).all())
+
+        d, i = kdtree.ArrayKDTree(self.data[:2]).query(self.points[0], k=3)
+        self.assertEqual(list(i), [0, 1, 2] if d[0] <= d[1] else [1, 0, 2])
+        self.assertEqual(d[2], numpy.inf)
+
+    def test02(self):
+        '''Check ArrayKDTree answers single queries like KDTree.'''
+        tree = kdtree.KDTree(self.data)
+        arrayTree = kdtree.ArrayKDTree(self.data)
+        for point in self.points[:50]:
+            self.assertEqual(arrayTree.query_ball_point(point, 8), sorted(tree.query_ball_point(point, 8)))
+            (d, i) = tree.query(point)
+            (ad, ai) = arrayTree.query(point)
+            self.assertRoughly(d, ad)
+            self.assertEqual(i, ai)
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import Path
+import math
+import numpy
+
+from PathScripts import PathPointReduction
+from PathTests.PathTestUtils import PathTestBase
+
+
+def deviation(points, cmds):
+    '''returns the largest distance of any of points to the moves of cmds starting at points[0]'''
+    start = points[0]
+    distance = numpy.full(len(points), numpy.inf)
+    for cmd in cmds:
+        p = cmd.Parameters
+        end = numpy.array([p['X'], p['Y'], p['Z']])
+        if cmd.Name == 'G1':
+            d = PathPointReduction.segmentDistance(points, start, end)
+        else:
+            center = start[:2] + (p['I'], p['J'])
+            radius = numpy.hypot(p['I'], p['J'])
+            a0 = math.atan2(start[1] - center[1], start[0] - center[0])
+            a1 = math.atan2(end[1] - center[1], end[0] - center[0])
+            sweep = (a0 - a1 if cmd.Name == 'G2' else a1 - a0) % (2 * math.pi)
+            rel = points[:, :2] - center
+            a = numpy.arctan2(rel[:, 1], rel[:, 0])
+            offset = ((a0 - a) if cmd.Name == 'G2' else (a - a0)) % (2 * math.pi)
+            d = numpy.where(offset <= sweep,
+                    numpy.hypot(numpy.abs(numpy.hypot(rel[:, 0], rel[:, 1]) - radius), points[:, 2] - (start[2] + (end[2] - start[2]) * offset / sweep)),
+                    numpy.minimum(numpy.sqrt(((points - start) ** 2).sum(axis=1)), numpy.sqrt(((points - end) ** 2).sum(axis=1))))
+        distance = numpy.minimum(distance, d)
+        start = end
+    return distance.max()
+
+
+class TestPathPointReduction(PathTestBase):
+
+    def test00(self):
+        '''Check collinear points are reduced to the end points of the line.'''
+        points = numpy.array([(i * 0.1, 2 * i * 0.1, 1) for i in range(1001)])
+        self.assertEqual(PathPointReduction.simplify(points, 0.001), [0, 1000])
+        cmds = PathPointReduction.commands(points, 0.001, params={'F': 10})
+        self.assertEqual(len(cmds), 1)
+        self.assertEqual(cmds[0].Name, 'G1')
+        self.assertRoughly(cmds[0].Parameters['X'], 100)
+        self.assertRoughly(cmds[0].Parameters['Y'], 200)
+        self.assertRoughly(cmds[0].Parameters['F'], 10)
+
+    def test01(self):
+        '''Check the reduced path stays within tolerance of all points.'''
+        x = numpy.arange(4000) * 0.05
+        points = numpy.c_[x, numpy.cos(x / 7.0) * 3, numpy.sin(x / 3.0)]
+        for tolerance in [0.1, 0.01, 0.001]:
+            cmds = PathPointReduction.commands(points, tolerance)
+            self.assertTrue(len(cmds) < len(points) / 4)
+            self.assertTrue(deviation(points, cmds) <= tolerance)
+
+    def test02(self):
+        '''Check points along an arc are replaced by G2/G3.'''
+        points = [(x * 0.1, 0, 0) for x in range(100)]
+        for a in range(1, 91):
+            t = math.radians(a)
+            points.append((9.9 + 5 * math.sin(t), 5 - 5 * math.cos(t), 0))
+        points.extend([(14.9, 5 + y * 0.1, 0) for y in range(1, 50)])
+        points = numpy.array(points)
+
+        cmds = PathPointReduction.commands(points, 0.01)
+        self.assertEqual([c.Name for c in cmds], ['G1', 'G3', 'G1'])
+        self.assertTrue(deviation(points, cmds) <= 0.01)
+
+        cmds = PathPointReduction.commands(points[::-1], 0.01)
+        self.assertEqual([c.Name for c in cmds], ['G1', 'G2', 'G1'])
+        self.assertTrue(deviation(points[::-1], cmds) <= 0.01)
+
+        cmds = PathPointReduction.commands(points, 0.01, arcs=False)
+        self.assertTrue(all(c.Name == 'G1' for c in cmds))
+        self.assertTrue(deviation(points, cmds) <= 0.01)
+
+    def test03(self):
+        '''Check reduceCommands only reduces runs of straight moves with the same feed rate.'''
+        commands = [Path.Command('G0', {'X': 0, 'Y': 0, 'Z': 5}), Path.Command('G1', {'Z': 0, 'F': 10})]
+        commands.extend([Path.Command('G1', {'X': i * 0.1, 'F': 10}) for i in range(1, 101)])
+        commands.append(Path.Command('(comment)'))
+        commands.extend([Path.Command('G1', {'Y': i * 0.1, 'F': 10}) for i in range(1, 11)])
+        commands.extend([Path.Command('G1', {'Y': 1 + i * 0.1, 'F': 5}) for i in range(1, 11)])
+        commands.append(Path.Command('G2', {'X': 12, 'Y': 4, 'I': 1, 'J': 1}))
+        commands.extend([Path.Command('G1', {'X': 12, 'Y': 4 + i * 0.1, 'Z': (i * 0.1) ** 2 / 100}) for i in range(1, 11)])
+
+        (result, deviation) = PathPointReduction.reduceCommands(commands, 0.01)
+        self.assertEqual([c.Name for c in result], ['G0', 'G1', 'G1', '(comment)', 'G1', 'G1', 'G1', 'G2', 'G1'])
+        self.assertRoughly(result[2].Parameters['X'], 10)
+        self.assertRoughly(result[2].Parameters['F'], 10)
+        self.assertRoughly(result[4].Parameters['Y'], 1)
+        self.assertRoughly(result[5].Parameters['Y'], 1.1)
+        self.assertRoughly(result[6].Parameters['Y'], 2)
+        self.assertRoughly(result[6].Parameters['F'], 5)
+        self.assertFalse('F' in result[8].Parameters)
+        self.assertRoughly(result[8].Parameters['Z'], 0.01)
+        self.assertTrue(deviation <= 0.01)
+
+        # the other runs are exactly straight, only the last one keeps more moves
+        (result, deviation) = PathPointReduction.reduceCommands(commands, 0.0001)
+        self.assertEqual([c.Name for c in result[:8]], ['G0', 'G1', 'G1', '(comment)', 'G1', 'G1', 'G1', 'G2'])
+        self.assertTrue(len(result) > 9)
+        self.assertTrue(deviation <= 0.0001)
+
+    def test04(self):
+        '''Check arcs fitted to noisy points with a slight slope in Z stay within tolerance.'''
+        random = numpy.random.RandomState(7)
+        a = numpy.radians(numpy.arange(0, 300, 2.0))
+        for slope in [0.0, 0.001, 0.002]:
+            points = numpy.c_[20 * numpy.cos(a), 20 * numpy.sin(a), slope * numpy.arange(len(a))]
+            points += random.uniform(-0.003, 0.003, points.shape)
+            for tolerance in [0.01, 0.005]:
+                m = PathPointReduction.moves(points, tolerance)
+                self.assertTrue(any(center is not None for (end, center, clockwise) in m))
+                self.assertTrue(PathPointReduction.deviation(points, m) <= tolerance)
+                self.assertTrue(deviation(points, PathPointReduction.commandsFor(points, m)) <= tolerance + 1e-9)
@@ -31,6 +31,8 @@ import PathScripts.PathPost
 import PathScripts.PathToolController
 import PathScripts.PathUtil
 import difflib
+import os
+import tempfile
 import unittest
 
 
@@ -53,10 +55,22 @@ class PathPostTestCases(unittest.TestCase):
     def tearDown(self):
         FreeCAD.closeDocument("boxtest")
 
+    def export(self, postprocessor, args):
+        '''posts the job into a temporary file and returns the file's content, the G-code is
+        streamed into the file and not returned by export'''
+        (fd, filename) = tempfile.mkstemp(suffix='.tmp')
+        os.close(fd)
+        try:
+            self.assertIsNone(postprocessor.export(self.postlist, filename, args))
+            with open(filename, 'r') as fp:
+                return fp.read()
+        finally:
+            os.remove(filename)
+
     def testLinuxCNC(self):
         from PathScripts.post import linuxcnc_post as postprocessor
         args = '--no-header --no-line-numbers --no-comments --no-show-editor --output-precision=2'
-        gcode = postprocessor.export(self.postlist, 'gcode.tmp', args)
+        gcode = self.export(postprocessor, args)
 
         referenceFile = FreeCAD.getHomePath() + 'Mod/Path/PathTests/test_linuxcnc_00.ngc'
         with open(referenceFile, 'r') as fp:
@@ -74,7 +88,7 @@ class PathPostTestCases(unittest.TestCase):
     def testCentroid(self):
         from PathScripts.post import centroid_post as postprocessor
         args = '--no-header --no-line-numbers --no-comments --no-show-editor --axis-precision=2 --feed-precision=2'
-        gcode = postprocessor.export(self.postlist, 'gcode.tmp', args)
+        gcode = self.export(postprocessor, args)
 
         referenceFile = FreeCAD.getHomePath() + 'Mod/Path/PathTests/test_centroid_00.ngc'
         with open(referenceFile, 'r') as fp:
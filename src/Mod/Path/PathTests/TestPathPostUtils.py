@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import Path
+import math
+import os
+import pickle
+import tempfile
+
+from FreeCAD import Units
+from PathScripts import PostUtils
+from PathTests.PathTestUtils import PathTestBase
+
+PARAMS = ['X', 'Y', 'Z', 'A', 'B', 'I', 'J', 'F', 'S', 'T', 'Q', 'R', 'L', 'H']
+
+def syntheticPath(count):
+    '''a zig zag surfacing path with count moves'''
+    commands = [Path.Command('G0', {'X': 0, 'Y': 0, 'Z': 5})]
+    for i in range(count):
+        x = (i % 200) * 0.5
+        y = (i // 200) * 0.5
+        z = -1 - math.sin(x / 7.0) * math.cos(y / 11.0)
+        commands.append(Path.Command('G1', {'X': x, 'Y': y, 'Z': z, 'F': 20}))
+    return Path.Path(commands)
+
+def formatWords(commands, precision, unitFormat):
+    '''the per parameter formatting the post processors did before CommandFormatter'''
+    precision_string = '.' + str(precision) + 'f'
+    lines = []
+    for c in commands:
+        outstring = [c.Name]
+        for param in PARAMS:
+            if param in c.Parameters:
+                if param == 'F':
+                    if c.Name not in ["G0", "G00"]:
+                        speed = Units.Quantity(c.Parameters['F'], FreeCAD.Units.Velocity)
+                        outstring.append(param + format(float(speed.getValueAs(unitFormat)), precision_string))
+                elif param == 'T':
+                    outstring.append(param + str(int(c.Parameters['T'])))
+                else:
+                    outstring.append(param + format(c.Parameters[param], precision_string))
+        lines.append(outstring)
+    return lines
+
+
+class TestPathPostUtils(PathTestBase):
+
+    def test00(self):
+        '''Check CommandFormatter orders and formats the words of a command.'''
+        formatter = PostUtils.CommandFormatter(PARAMS, 3, feedPrecision=1)
+        c = Path.Command('G1', {'Y': 2, 'X': 1, 'F': 10, 'K': 4})
+        self.assertEqual(formatter.words(c), ['G1', 'X1.000', 'Y2.000', 'F600.0'])
+        c = Path.Command('G0', {'Z': 5, 'F': 10})
+        self.assertEqual(formatter.words(c), ['G0', 'Z5.000'])
+        c = Path.Command('M6', {'T': 2})
+        self.assertEqual(formatter.words(c), ['M6', 'T2'])
+
+        formatter = PostUtils.CommandFormatter(PARAMS, 3, unitFormat='in/min', wordFormats={'S': 'S%s', 'T': lambda t: 'T%02d' % t})
+        c = Path.Command('M3', {'S': 1000, 'T': 2})
+        self.assertEqual(formatter.words(c), ['M3', 'S1000.0', 'T02'])
+        c = Path.Command('G1', {'X': 1, 'F': 25.4})
+        self.assertEqual(formatter.words(c), ['G1', 'X1.000', 'F60.000'])
+
+    def test01(self):
+        '''Check CommandFormatter suppresses unchanged modal words.'''
+        formatter = PostUtils.CommandFormatter(PARAMS, 2, modal=True, modalParams=['X', 'Y', 'Z', 'F'])
+        commands = [
+                Path.Command('G0', {'X': 1, 'Y': 2, 'Z': 5}),
+                Path.Command('G1', {'X': 1, 'Y': 2, 'Z': 1, 'F': 1}),
+                Path.Command('G1', {'X': 2, 'Y': 2, 'Z': 1, 'F': 1}),
+                Path.Command('G1', {'X': 2, 'Y': 2, 'Z': 1, 'F': 1}),
+                Path.Command('G2', {'X': 3, 'Y': 2, 'I': 0.5, 'J': 0}),
+                Path.Command('G81', {'X': 3, 'Y': 2, 'Z': 0, 'R': 2}),
+                Path.Command('G1', {'X': 3, 'Y': 2, 'Z': 1, 'F': 1})]
+        lines = [formatter.words(c) for c in commands]
+        self.assertEqual(lines, [
+            ['G0', 'X1.00', 'Y2.00', 'Z5.00'],
+            ['G1', 'Z1.00', 'F60.00'],
+            ['X2.00'],
+            [],
+            ['G2', 'X3.00', 'I0.50', 'J0.00'],
+            ['G81', 'X3.00', 'Y2.00', 'Z0.00', 'R2.00'],
+            ['G1', 'X3.00', 'Y2.00', 'Z1.00', 'F60.00']])
+
+        formatter.reset()
+        self.assertEqual(formatter.words(commands[3]), ['G1', 'X2.00', 'Y2.00', 'Z1.00', 'F60.00'])
+
+    def test02(self):
+        '''Check a pickled CommandFormatter carries on with its modal state.'''
+        formatter = PostUtils.CommandFormatter(PARAMS, 2, modal=True, modalParams=['X', 'Y', 'Z'])
+        formatter.words(Path.Command('G1', {'X': 1, 'Y': 2, 'Z': 3}))
+        clone = pickle.loads(pickle.dumps(formatter))
+        c = Path.Command('G1', {'X': 1, 'Y': 3, 'Z': 3})
+        self.assertEqual(clone.words(c), ['Y3.00'])
+        self.assertEqual(clone.wordsOf('G1', {'X': 2.0}), ['X2.00'])
+
+    def test03(self):
+        '''Check imapPool returns the results in the order of the tasks.'''
+        commands = PostUtils.serializeCommands(syntheticPath(10).Commands)
+        tasks = [-i for i in range(8)]
+        self.assertEqual(list(PostUtils.imapPool(abs, tasks, 1)), list(range(8)))
+        self.assertEqual(list(PostUtils.imapPool(abs, tasks, 2)), list(range(8)))
+        self.assertEqual(list(PostUtils.imapPool(len, [commands, commands[1:]], 2)), [11, 10])
+
+    def test04(self):
+        '''Check GCodeWriter streams its chunks into the file and drops them.'''
+        fd, filename = tempfile.mkstemp(suffix='.ngc')
+        os.close(fd)
+        try:
+            writer = PostUtils.GCodeWriter(filename, chunkSize=2)
+            writer.writeLines("G17\nG90\n")
+            self.assertEqual(writer.chunks, [])
+            writer.command(['N10 ', 'G0', 'X1.00'])
+            writer.command([])
+            self.assertEqual(len(writer.chunks), 1)
+            self.assertIsNone(writer.close())
+            with open(filename, 'r') as fp:
+                self.assertEqual(fp.read(), "G17\nG90\nN10  G0 X1.00\n")
+        finally:
+            os.remove(filename)
+
+        writer = PostUtils.GCodeWriter(formatter=lambda words: ','.join(words) + '\n')
+        writer.command(['M2', 'X1'])
+        self.assertEqual(writer.close(), "M2,X1\n")
+
+    def test05(self):
+        '''Check PostProcessor.export hands processes to the post processor and restores its setting.'''
+        from PathScripts.PathPostProcessor import PostProcessor
+
+        class Script(object):
+            PROCESSES = 1
+
+            def export(self, objs, filename, args):
+                if args == 'fail':
+                    raise ValueError(args)
+                return self.PROCESSES
+
+        script = Script()
+        processor = PostProcessor(script)
+        self.assertEqual(processor.export([], '-', '', 2), 2)
+        self.assertEqual(script.PROCESSES, 1)
+        self.assertRaises(ValueError, processor.export, [], '-', 'fail', 2)
+        self.assertEqual(script.PROCESSES, 1)
+        self.assertEqual(processor.export([], '-', ''), 1)
+
+    def test06(self):
+        '''Check CommandFormatter formats the same words as formatting every parameter of every command.'''
+        commands = syntheticPath(1000).Commands
+        formatter = PostUtils.CommandFormatter(PARAMS, 4)
+        self.assertEqual([formatter.words(c) for c in commands], formatWords(commands, 4, 'mm/min'))
+
+    def test07(self):
+        '''Check CommandFormatter doesn't suppress repeated axis words in incremental mode.'''
+        formatter = PostUtils.CommandFormatter(PARAMS, 2, modalParams=['X', 'Y', 'Z'])
+        commands = [
+                Path.Command('G1', {'X': 1, 'Y': 1, 'Z': 0}),
+                Path.Command('G91'),
+                Path.Command('G1', {'X': 1, 'Y': 1, 'Z': 0}),
+                Path.Command('G1', {'X': 1, 'Y': 1, 'Z': 0}),
+                Path.Command('G90'),
+                Path.Command('G1', {'X': 1, 'Y': 1, 'Z': 0}),
+                Path.Command('G1', {'X': 1, 'Y': 2, 'Z': 0})]
+        lines = [formatter.words(c) for c in commands]
+        self.assertEqual(lines, [
+            ['G1', 'X1.00', 'Y1.00', 'Z0.00'],
+            ['G91'],
+            ['G1', 'X1.00', 'Y1.00', 'Z0.00'],
+            ['G1', 'X1.00', 'Y1.00', 'Z0.00'],
+            ['G90'],
+            ['G1', 'X1.00', 'Y1.00', 'Z0.00'],
+            ['G1', 'Y2.00']])
+
+        # the distance mode survives a reset and pickling, and can be followed through commands
+        formatter.wordsOf('G91', {})
+        formatter.reset()
+        clone = pickle.loads(pickle.dumps(formatter))
+        self.assertTrue(clone.incremental)
+        clone.wordsOf('G1', {'X': 1.0})
+        self.assertEqual(clone.wordsOf('G1', {'X': 1.0}), ['G1', 'X1.00'])
+        self.assertFalse(clone.incrementalAfter([('G1', {}), ('G90', {}), ('G0', {})]))
+        self.assertTrue(PostUtils.CommandFormatter(PARAMS).incrementalAfter(PostUtils.serializeCommands(commands[:4])))
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+import Path
+import math
+import numpy
+
+from PathScripts import PathSimulator
+from PathTests.PathTestUtils import PathTestBase
+
+
+class TestPathSimulator(PathTestBase):
+
+    def simulation(self, cutter, resolution=0.25):
+        sim = PathSimulator.Simulation(PathSimulator.Heightmap(0, 0, 100, 50, 0, 10, resolution))
+        sim.setCutter(cutter)
+        sim.position[:] = (0, 0, 20)
+        return sim
+
+    def test00(self):
+        '''Check a flat end mill cuts a slot of its diameter.'''
+        sim = self.simulation(PathSimulator.Cutter(6), 0.5)
+        sim.run([Path.Command('G0', {'X': 10, 'Y': 25, 'Z': 20}), Path.Command('G1', {'Z': 5}), Path.Command('G1', {'X': 90})])
+        stock = sim.stock
+        section = stock.height[:, stock.nx // 2]
+        self.assertRoughly(stock.y[section < 10].min(), 22.25)
+        self.assertRoughly(stock.y[section < 10].max(), 27.75)
+        self.assertRoughly(section.min(), 5)
+        self.assertTrue(abs(sim.removedVolume() - (80 * 6 + math.pi * 9) * 5) < 10)
+        self.assertFalse(sim.rapidCuts.any())
+
+    def test01(self):
+        '''Check the cross section of a ball end mill's cut, and a ramp.'''
+        sim = self.simulation(PathSimulator.Cutter(6, 3))
+        sim.run([Path.Command('G0', {'X': 10, 'Y': 25, 'Z': 20}), Path.Command('G1', {'Z': 5}), Path.Command('G1', {'X': 90})])
+        y = sim.stock.y - 25
+        expected = numpy.where(abs(y) <= 3, 8 - numpy.sqrt(numpy.maximum(9 - y * y, 0)), 10)
+        self.assertTrue(numpy.allclose(sim.stock.height[:, sim.stock.nx // 2], numpy.minimum(expected, 10)))
+
+        # the leading edge of a flat end mill is lowest going down a ramp
+        sim = self.simulation(PathSimulator.Cutter(6))
+        sim.position[:] = (10, 25, 10)
+        sim.run([Path.Command('G1', {'X': 90, 'Z': 2})])
+        x = sim.stock.x
+        expected = numpy.where((x >= 7) & (x <= 93), 10 - (numpy.minimum(x + 3, 90) - 10) / 10.0, 10)
+        self.assertTrue(abs(sim.stock.height[sim.stock.ny // 2] - expected).max() < 0.05)
+
+    def test02(self):
+        '''Check arcs, drill cycles and rapid moves through the stock.'''
+        sim = self.simulation(PathSimulator.Cutter(4), 0.5)
+        sim.run([
+            Path.Command('G0', {'X': 20, 'Y': 25, 'Z': 12}),
+            Path.Command('G1', {'Z': 5}),
+            Path.Command('G2', {'X': 20, 'Y': 25, 'I': 10, 'J': 0}),
+            Path.Command('G0', {'Z': 20}),
+            Path.Command('G98'),
+            Path.Command('G81', {'X': 70, 'Y': 25, 'Z': -1, 'R': 12})])
+        self.assertFalse(sim.rapidCuts.any())
+        self.assertRoughly(sim.position[2], 20)
+        stock = sim.stock
+        # the ring of the circle, and its untouched center
+        self.assertRoughly(stock.height[50, 79], 5)
+        self.assertRoughly(stock.height[50, 60], 10)
+        self.assertRoughly(stock.height[31, 60], 5)
+        # the hole
+        self.assertRoughly(stock.height[50, 140], -1)
+        self.assertRoughly(stock.height[50, 145], 10)
+
+        sim.run([Path.Command('G0', {'X': 5, 'Y': 5}), Path.Command('G0', {'Z': 8}), Path.Command('G0', {'X': 20})])
+        self.assertTrue(sim.rapidCuts[10, 10:40].all())
+        self.assertFalse(sim.rapidCuts[20:].any())
+
+    def test03(self):
+        '''Check gouges into the target surface are found.'''
+        stock = PathSimulator.Heightmap(0, 0, 100, 50, 0, 10, 0.5)
+        # a plateau at 4 from 20 to 80 in X and 10 to 40 in Y
+        triangles = numpy.array([
+            [(20, 10, 4), (80, 10, 4), (80, 40, 4)],
+            [(20, 10, 4), (80, 40, 4), (20, 40, 4)]], dtype=float)
+        target = stock.surface(triangles)
+        self.assertRoughly(target[50, 100], 4)
+        self.assertEqual(target[5, 5], -numpy.inf)
+
+        sim = PathSimulator.Simulation(stock, target)
+        sim.setCutter(PathSimulator.Cutter(6))
+        sim.position[:] = (0, 0, 20)
+        sim.run([Path.Command('G0', {'X': 30, 'Y': 25}), Path.Command('G1', {'Z': 4}), Path.Command('G1', {'X': 50}), Path.Command('G1', {'Z': 3}), Path.Command('G1', {'X': 70})])
+        self.assertRoughly(sim.remaining()[50, 80], 0)
+        self.assertRoughly(sim.remaining()[5, 5], 10)
+        gouges = sim.gouges(0.01)
+        # the cutter's edge plunges into the plateau at X47
+        self.assertFalse(gouges[:, :90].any())
+        self.assertTrue(gouges[50, 96:140].all())
+        self.assertFalse(sim.gouges(1.0).any())
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+import PathScripts.PathUtils as PathUtils
+import numpy
+import random
+
+from PathTests.PathTestUtils import PathTestBase
+
+
+def nearestNeighbours(locations, keys, attractors):
+    '''the nearest neighbour order, looking at all remaining locations for every pick'''
+    def cost(a, b):
+        return sum((a[k] - b[k]) ** 2 for k in keys) + sum(abs(b[k]) for k in attractors)
+
+    remaining = list(locations)
+    out = []
+    last = dict((k, 0) for k in keys)
+    while remaining:
+        last = min(remaining, key=lambda l: cost(last, l))
+        remaining.remove(last)
+        out.append(last)
+    return out
+
+
+class TestPathSortJobs(PathTestBase):
+
+    def setUp(self):
+        random.seed(17)
+        self.locations = [{'x': random.uniform(-20, 100), 'y': random.uniform(0, 50), 'z': random.choice([0, -2, -4])} for i in range(400)]
+
+    def test00(self):
+        '''Check sort_jobs picks the same locations as a plain nearest neighbour search.'''
+        self.assertEqual(PathUtils.sort_jobs([], ['x', 'y']), [])
+        self.assertEqual(PathUtils.sort_jobs(self.locations, ['x', 'y']), nearestNeighbours(self.locations, ['x', 'y'], ['x']))
+        self.assertEqual(PathUtils.sort_jobs(self.locations, ['x', 'y'], ['x', 'z']), nearestNeighbours(self.locations, ['x', 'y'], ['x', 'z']))
+
+    def test01(self):
+        '''Check locations on a grid and on top of each other are all sorted.'''
+        locations = [{'x': x * 10, 'y': y * 10} for x in range(20) for y in range(20)] * 2
+        self.assertEqual(PathUtils.sort_jobs(locations, ['x', 'y']), nearestNeighbours(locations, ['x', 'y'], ['x']))
+
+    def test02(self):
+        '''Check 2-opt keeps all locations and the start and shortens the travel distance.'''
+        before = PathUtils.sort_jobs(self.locations, ['x', 'y'])
+        after = PathUtils.sort_jobs(self.locations, ['x', 'y'], optimize=True)
+        self.assertEqual(before[0], after[0])
+        self.assertEqual(sorted(id(l) for l in after), sorted(id(l) for l in self.locations))
+        self.assertTrue(PathUtils.travel_distance(after, ['x', 'y']) < PathUtils.travel_distance(before, ['x', 'y']))
+        self.assertRoughly(PathUtils.travel_distance([{'x': 0, 'y': 0}, {'x': 3, 'y': 4}, {'x': 3, 'y': 0}], ['x', 'y']), 9)
+
+    def test03(self):
+        '''Check an outlier and plates far apart don't crowd the locations into a few grid cells.'''
+        holes = [{'x': (i % 20) * 5.0, 'y': (i // 20) * 5.0} for i in range(400)] + [{'x': 1e5, 'y': 1e5}]
+        plates = [{'x': (i % 20) * 4.0 + (i // 400) * 1e5, 'y': ((i // 20) % 20) * 4.0} for i in range(800)]
+        for locations in [holes, plates]:
+            points = numpy.array([[l['x'], l['y']] for l in locations])
+            cells = PathUtils._location_grid(points)[2]
+            self.assertTrue(max(len(indices) for indices in cells.values()) <= 4)
+            self.assertEqual(PathUtils.sort_jobs(locations, ['x', 'y']), nearestNeighbours(locations, ['x', 'y'], ['x']))
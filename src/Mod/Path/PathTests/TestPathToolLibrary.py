@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import Path
+import os
+import tempfile
+
+from PathScripts import PathToolLibraryManager
+from PathTests.PathTestUtils import PathTestBase
+
+TestPrefs = "User parameter:BaseApp/Preferences/Mod/Path"
+TestGroup = "TestToolLibrary"
+Types = ['EndMill', 'Drill', 'BallEndMill', 'ChamferMill']
+
+
+def createTooltable(count):
+    tooltable = Path.Tooltable()
+    for i in range(1, count + 1):
+        tool = Path.Tool()
+        tool.Name = "T%d" % (i % 100)
+        tool.ToolType = Types[i % len(Types)]
+        tool.Material = 'Carbide'
+        tool.Diameter = 0.5 + (i % 40) * 0.5
+        tool.LengthOffset = i * 0.1
+        tooltable.setTool(i, tool)
+    return tooltable
+
+
+class TestPathToolLibrary(PathTestBase):
+
+    def setUp(self):
+        PathToolLibraryManager.invalidateMainLibrary()
+        self.tlm = PathToolLibraryManager.ToolLibraryManager()
+        self.tlm.prefs = FreeCAD.ParamGet(TestPrefs + "/" + TestGroup)
+
+    def tearDown(self):
+        FreeCAD.ParamGet(TestPrefs).RemGroup(TestGroup)
+        PathToolLibraryManager.invalidateMainLibrary()
+
+    def test00(self):
+        '''Check a parsed tooltable matches the original one.'''
+        tooltable = createTooltable(50)
+        tools = PathToolLibraryManager.parseTools(PathToolLibraryManager.ElementTree.fromstring(tooltable.Content))
+        self.assertEqual(sorted(tools), list(range(1, 51)))
+        for (number, tool) in tooltable.Tools.items():
+            self.assertEqual(tools[number].Name, tool.Name)
+            self.assertEqual(tools[number].ToolType, tool.ToolType)
+            self.assertEqual(tools[number].Material, tool.Material)
+            self.assertRoughly(tools[number].Diameter, tool.Diameter)
+            self.assertRoughly(tools[number].LengthOffset, tool.LengthOffset)
+        self.assertEqual(PathToolLibraryManager.tooltableOf(tools).Content, tooltable.Content)
+
+    def test01(self):
+        '''Check the index finds tools by number, name, type and diameter.'''
+        tooltable = createTooltable(1000)
+        index = PathToolLibraryManager.ToolIndex(tooltable.Tools)
+        self.assertEqual(len(index), 1000)
+        self.assertEqual(index.getTool(17).Name, 'T17')
+        self.assertTrue(index.getTool(1001) is None)
+        self.assertEqual(index.withName('T17'), [17 + 100 * i for i in range(10)])
+        self.assertEqual(index.withType('Drill'), list(range(1, 1001, 4)))
+        self.assertEqual(sorted(index.withDiameter(3, 3.5)), sorted([i for i in range(1, 1001) if i % 40 in (5, 6)]))
+        self.assertEqual(index.withDiameter(30, 40), [])
+        self.assertEqual(index.find(toolType='BallEndMill', minDiameter=19.5), list(range(38, 1001, 40)))
+        self.assertEqual(index.find(name='T17', maxDiameter=10), [17, 217, 417, 617, 817])
+        self.assertEqual(index.find(), list(range(1, 1001)))
+
+    def test02(self):
+        '''Check the main library is parsed once and reparsed after a write.'''
+        self.tlm.saveMainLibrary(createTooltable(200))
+        index = self.tlm.index("<Main>")
+        self.assertEqual(len(index), 200)
+        self.assertTrue(self.tlm.index("<Main>") is index)
+        self.assertEqual(self.tlm.getTool("<Main>", 5).Name, 'T5')
+
+        # modifying the returned tool or table must not change the library
+        self.tlm.getTool("<Main>", 5).Name = 'changed'
+        self.tlm._findList("<Main>").deleteTool(5)
+        self.assertEqual(self.tlm.getTool("<Main>", 5).Name, 'T5')
+
+        self.assertTrue(self.tlm.delete(5, "<Main>"))
+        self.assertFalse(self.tlm.index("<Main>") is index)
+        self.assertEqual(len(self.tlm.index("<Main>")), 199)
+        self.assertTrue(self.tlm.getTool("<Main>", 5) is None)
+
+        self.assertTrue(self.tlm.moveup(6, "<Main>"))
+        self.assertEqual(self.tlm.getTool("<Main>", 5).Name, 'T6')
+        self.assertTrue(self.tlm.getTool("<Main>", 6) is None)
+
+    def test03(self):
+        '''Check a large tooltable is exported and imported in bulk.'''
+        self.tlm.saveMainLibrary(createTooltable(2000))
+        (fd, filename) = tempfile.mkstemp(suffix='.xml')
+        os.close(fd)
+        try:
+            self.tlm.write((filename, 'Tooltable XML (*.xml)'), "<Main>")
+            self.assertTrue(self.tlm.read((filename, 'Tooltable XML (*.xml)'), "<Main>"))
+        finally:
+            os.remove(filename)
+        index = self.tlm.index("<Main>")
+        self.assertEqual(len(index), 4000)
+        self.assertEqual(index.getTool(2017).Name, 'T17')
+        self.assertEqual(len(index.withName('T17')), 40)
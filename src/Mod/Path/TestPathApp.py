@@ -27,8 +27,19 @@ import TestApp
 from PathTests.TestPathLog   import TestPathLog
 from PathTests.TestPathCore  import TestPathCore
 #from PathTests.TestPathPost  import PathPostTestCases
+from PathTests.TestPathPostUtils import TestPathPostUtils
+from PathTests.TestPathPointReduction import TestPathPointReduction
+from PathTests.TestPathSortJobs import TestPathSortJobs
+from PathTests.TestPathGCodeReader import TestPathGCodeReader
+from PathTests.TestPathSimulator import TestPathSimulator
+from PathTests.TestPathCycleTime import TestPathCycleTime
+from PathTests.TestPathAreaCache import TestPathAreaCache
+from PathTests.TestPathBatch import TestPathBatch
+from PathTests.TestPathToolLibrary import TestPathToolLibrary
 from PathTests.TestPathGeom  import TestPathGeom
+from PathTests.TestPathKDTree import TestPathKDTree
 from PathTests.TestPathUtil  import TestPathUtil
 from PathTests.TestPathDepthParams        import depthTestCases
+from PathTests.TestPathDressupDogbone import TestPathDressupDogbone
 from PathTests.TestPathDressupHoldingTags import TestHoldingTags
 